@@ -20,12 +20,16 @@ Note:
 """
 
 import os
-import json
 import logging
-from typing import List, Optional
+from typing import List
 
 import numpy as np
-from sklearn.cluster import KMeans
+
+from main.utils.config_registry import get_registry, load_config
+from main.utils.lazy_import import lazy_module
+
+# scikit-learn は import が重いため、fit_predict で初めて使う時点まで遅延させる
+sklearn_cluster = lazy_module("sklearn.cluster", hint="pip install scikit-learn")
 
 # 将来的にGPU対応 (cuMLなど) をする場合のimport例 (コメントアウト)
 # try:
@@ -58,7 +62,7 @@ class PhonemeClustering:
         """
         self.num_clusters = num_clusters
         self.random_state = random_state
-        self.model: Optional[KMeans] = None
+        self.model = None  # sklearn.cluster.KMeans (初回の fit_predict で生成)
 
         # ロガー設定（必要に応じて好みで設定）
         self.logger = logging.getLogger(__name__)
@@ -87,7 +91,7 @@ class PhonemeClustering:
         self.logger.debug(f"Fitting KMeans with shape={feature_vectors.shape}")
         if self.model is None:
             # KMeansインスタンスを作成
-            self.model = KMeans(
+            self.model = sklearn_cluster.KMeans(
                 n_clusters=self.num_clusters,
                 random_state=self.random_state,
                 init="k-means++",
@@ -127,12 +131,13 @@ def load_cluster_config(config_path: str = "lip_sync_config.json") -> dict:
     Returns:
         dict: クラスタリング設定などの辞書
     """
-    if not os.path.exists(config_path):
+    # 相対パスはプロジェクトルート / main/ も探す。読み込み結果はプロセス内で共有される
+    resolved = get_registry().resolve_path(config_path)
+    if not os.path.exists(resolved):
         logging.warning(f"Config file not found: {config_path}. Using defaults.")
         return {}
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_config(resolved)
 
     clustering_cfg = data.get("clustering", {})
     logging.debug(f"Loaded clustering config: {clustering_cfg}")
@@ -6,10 +6,10 @@ distributed_tasks.py
 
 Usage:
     # 1) Celeryワーカー起動
-    #    $ celery -A analysis.distributed_tasks worker --loglevel=info
+    #    $ celery -A main.analysis.distributed_tasks:celery_app worker --loglevel=info
     #
     # 2) タスク呼び出し例 (他のモジュールから)
-    #    from analysis.distributed_tasks import analyze_audio_chunk_async
+    #    from main.analysis.distributed_tasks import analyze_audio_chunk_async
     #
     #    result_async = analyze_audio_chunk_async.delay(chunk_data, "chunk_id_x", use_gpu=True)
     #    # 後で result_async.get() 等で結果を取得
@@ -18,14 +18,17 @@ Note:
     - Celeryを使用する例。Brokerとして Redis や RabbitMQ などが必要。
     - GPU活用の場合はGPU対応コンテナやワーカー環境が必要。
     - Dask/Rayでも同様の分散実装が可能。
+    - celery の import と Celery アプリの生成 (設定読み込み含む) は、celery_app やタスクに
+      初めてアクセスした時点まで遅延する (PEP 562 のモジュール __getattr__)。
+      このモジュールを import するだけでは celery は読み込まれない。
 """
 
 import os
-import json
 import logging
+import threading
 from typing import List, Optional
 
-from celery import Celery, shared_task
+from main.utils.config_registry import get_registry, load_config
 
 # もし別途GPU利用などで独自の処理が必要ならimport
 # from .some_gpu_analysis import GPUAnalyzer
@@ -41,12 +44,12 @@ def load_distributed_config(config_path: str = "lip_sync_config.json") -> dict:
     Returns:
         dict: JSONで定義されるBroker設定等の辞書
     """
-    if not os.path.exists(config_path):
+    resolved = get_registry().resolve_path(config_path)
+    if not os.path.exists(resolved):
         logging.warning(f"[distributed_tasks] Config file not found: {config_path}. Using defaults.")
         return {}
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_config(resolved)
 
     dist_cfg = data.get("distributed", {})
     logging.debug(f"[distributed_tasks] Loaded distributed config: {dist_cfg}")
@@ -55,36 +58,77 @@ def load_distributed_config(config_path: str = "lip_sync_config.json") -> dict:
 
 # Celeryアプリケーションの初期化: Broker/Backend設定
 # 例: Redisをブローカー、RPCベースのresult backendを使うとする
-dist_config = load_distributed_config("lip_sync_config.json")
-BROKER_URL = dist_config.get("broker_url", "redis://localhost:6379/0")
-RESULT_BACKEND = dist_config.get("result_backend", "rpc://")
-
-celery_app = Celery(
-    "lip_sync_analysis",
-    broker=BROKER_URL,
-    backend=RESULT_BACKEND,
-)
-
-# 必要に応じて追加コンフィグ
-celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-    # タスク再試行やタイムアウト設定例
-    task_annotations={
-        "*": {
-            "max_retries": 3,           # 再試行回数
-            "time_limit": 300,         # タスク実行タイムアウト (秒)
-            "soft_time_limit": 250,    # ソフトタイムアウト
-        }
-    },
-)
+_app_lock = threading.Lock()
+_celery_app = None
+_tasks = {}
 
 
-@shared_task(bind=True)
-def analyze_audio_chunk_async(self, audio_chunk_data: bytes, chunk_id: str, use_gpu: bool = False) -> dict:
+def get_celery_app():
+    """
+    Celeryアプリを返す。初回呼び出し時に celery を import し、設定を読んでアプリとタスクを生成する。
+    """
+    global _celery_app
+    if _celery_app is not None:
+        return _celery_app
+    with _app_lock:
+        if _celery_app is not None:
+            return _celery_app
+
+        from celery import Celery
+
+        dist_config = load_distributed_config("lip_sync_config.json")
+        broker_url = dist_config.get("broker_url", "redis://localhost:6379/0")
+        result_backend = dist_config.get("result_backend", "rpc://")
+
+        app = Celery(
+            "lip_sync_analysis",
+            broker=broker_url,
+            backend=result_backend,
+        )
+
+        # 必要に応じて追加コンフィグ
+        app.conf.update(
+            task_serializer="json",
+            accept_content=["json"],
+            result_serializer="json",
+            timezone="UTC",
+            enable_utc=True,
+            # タスク再試行やタイムアウト設定例
+            task_annotations={
+                "*": {
+                    "max_retries": 3,           # 再試行回数
+                    "time_limit": 300,         # タスク実行タイムアウト (秒)
+                    "soft_time_limit": 250,    # ソフトタイムアウト
+                }
+            },
+        )
+
+        # タスク名は従来 (@shared_task でモジュール直下に定義していた頃) と同じにする
+        _tasks["analyze_audio_chunk_async"] = app.task(
+            bind=True, name=f"{__name__}.analyze_audio_chunk_async"
+        )(_analyze_audio_chunk)
+        _tasks["example_combine_results"] = app.task(
+            name=f"{__name__}.example_combine_results"
+        )(_combine_results)
+
+        _celery_app = app
+        return _celery_app
+
+
+def __getattr__(name: str):
+    # celery_app / タスクへの初回アクセスでアプリを生成する (PEP 562)
+    if name == "celery_app":
+        return get_celery_app()
+    if name in ("analyze_audio_chunk_async", "example_combine_results"):
+        get_celery_app()
+        return _tasks[name]
+    if name in ("BROKER_URL", "RESULT_BACKEND"):
+        conf = get_celery_app().conf
+        return conf.broker_url if name == "BROKER_URL" else conf.result_backend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _analyze_audio_chunk(self, audio_chunk_data: bytes, chunk_id: str, use_gpu: bool = False) -> dict:
     """
     音声チャンクの解析処理を分散タスクとして実行。
     大量のチャンクを並列処理することでスループットを向上させる。
@@ -98,7 +142,7 @@ def analyze_audio_chunk_async(self, audio_chunk_data: bytes, chunk_id: str, use_
         dict: 解析結果をまとめた辞書 
               例: {"chunk_id":..., "rms":..., "phoneme_list":...} 
     """
-    logger = analyze_audio_chunk_async.get_logger()
+    logger = self.get_logger()
     logger.info(f"Start analyzing chunk_id={chunk_id}, use_gpu={use_gpu}")
 
     # ここで実際の音声解析処理を行う (ダミー処理例)
@@ -130,8 +174,7 @@ def analyze_audio_chunk_async(self, audio_chunk_data: bytes, chunk_id: str, use_
         raise self.retry(exc=e, countdown=10)
 
 
-@shared_task
-def example_combine_results(task_results: List[dict]) -> dict:
+def _combine_results(task_results: List[dict]) -> dict:
     """
     解析タスクの結果を集約するタスクの例。
     分散完了後に各ワーカーから返った結果をまとめ、追加処理を行う想定。
@@ -142,7 +185,8 @@ def example_combine_results(task_results: List[dict]) -> dict:
     Returns:
         dict: 全体レポートなど
     """
-    logger = example_combine_results.get_logger()
+    from celery.utils.log import get_task_logger
+    logger = get_task_logger(__name__)
     logger.info(f"Combining {len(task_results)} results...")
 
     try:
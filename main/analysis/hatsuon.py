@@ -112,7 +112,17 @@ class HatsuonEngine:
         Returns:
             List[Dict]: 1音素ごとに {"phoneme":..., "start":..., "end":...} を含む
         """
-        phonemes = self.text_to_phonemes(text)
+        return self.phonemes_to_timing(self.text_to_phonemes(text), total_duration)
+
+    def phonemes_to_timing(self, phonemes: List[str], total_duration: float) -> List[Dict]:
+        """
+        変換済みの音素列に (start, end) を割り当てる (text_to_phoneme_timing の後半)。
+        音素変換は音声長に依存しないため、音声解析と並行して先に済ませておける。
+
+        Args:
+            phonemes (List[str]): text_to_phonemes() の結果
+            total_duration (float): 音声全体の長さ(秒)
+        """
         n_ph = len(phonemes)
         if n_ph == 0 or total_duration <= 0:
             return []
@@ -16,9 +16,23 @@ import os
 import wave
 import numpy as np
 
-# ここで、コンパイル済みのCython拡張モジュール `rms_fast` をインポート
-# パスを変更する場合は、プロジェクト構成に合わせて修正
-from main.optimizations import rms_fast
+# コンパイル済みのCython拡張モジュール `rms_fast` は初回の RMS 計算時に読み込む。
+# 未ビルドの環境では NumPy 実装にフォールバックする (import 時には失敗しない)。
+_rms_fast = None
+_rms_fast_checked = False
+
+
+def _get_rms_fast():
+    """rms_fast 拡張を返す。ビルドされていなければ None。"""
+    global _rms_fast, _rms_fast_checked
+    if not _rms_fast_checked:
+        _rms_fast_checked = True
+        try:
+            from main.optimizations import rms_fast
+            _rms_fast = rms_fast
+        except ImportError:
+            print("[rms_analysis] rms_fast 拡張が見つからないため NumPy 実装を使用します。")
+    return _rms_fast
 
 
 def compute_rms_from_array(audio_data: np.ndarray, use_gpu: bool = False) -> float:
@@ -43,6 +57,12 @@ def compute_rms_from_array(audio_data: np.ndarray, use_gpu: bool = False) -> flo
         # return rms_fast.calculate_rms_fast_gpu(audio_data)
         pass
 
+    rms_fast = _get_rms_fast()
+    if rms_fast is None:
+        if audio_data.size == 0:
+            return 0.0
+        return float(np.sqrt(np.mean(audio_data.astype(np.float64) ** 2)))
+
     rms_value = rms_fast.calculate_rms_fast(audio_data)
     return rms_value
 
@@ -0,0 +1,16 @@
+# main/benchmarks/__init__.py
+# -*- coding: utf-8 -*-
+
+"""
+benchmarks パッケージ
+
+解析・出力まわりの主要カーネルのベンチマーク。
+
+- corpus.py : 決定的な合成コーパス (発話風のノイズバースト + 無音、対応する日本語テキスト)
+- kernels.py: 計測対象カーネルの定義 (RMS / 音素 / マージ / オーバーラップ / 出力 / キャッシュ / gRPC)
+- bench.py  : 実行・結果の JSON 出力・ベースラインとの比較 (回帰でしきい値を超えたら exit 1)
+
+使い方:
+    python -m main.benchmarks.bench --output bench_results.json
+    python -m main.benchmarks.bench --compare baseline.json --threshold 0.15
+"""
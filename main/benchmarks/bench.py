@@ -0,0 +1,294 @@
+# main/benchmarks/bench.py
+# -*- coding: utf-8 -*-
+
+"""
+bench.py
+
+ベンチマークの実行とベースライン比較。
+
+1) 実行: プリセットの合成クリップごとに各カーネルを計測し、結果を JSON で書き出す。
+   各計測は最低 --repeat 回かつ合計 --min-time 秒以上繰り返し、最小値 (best) と中央値を記録する。
+   カーネル内の print は計測中は捨てる。
+2) 比較 (--compare baseline.json): 同じ (カーネル, クリップ) の best を比べ、
+   ベースラインより threshold (既定 10%) 以上 かつ --min-delta 秒以上遅くなったものを回帰として表示し、
+   1件でもあれば終了コード 1 を返す。
+   マシンが違うと比較にならないため、ベースラインは同じ環境で取った結果を使うこと。
+
+結果 JSON:
+    {
+      "schema": 1,
+      "meta": {"timestamp", "python", "numpy", "platform", "machine", "preset", "seed"},
+      "results": [
+        {"kernel", "clip", "duration", "sample_rate", "runs", "best", "median", "mean",
+         "realtime_factor"},    # realtime_factor = 音声の長さ / best (大きいほど速い)
+        ...
+      ],
+      "skipped": [{"kernel", "clip", "reason"}, ...]
+    }
+
+依存:
+- numpy
+
+使い方:
+    python -m main.benchmarks.bench                                    # quick プリセット → bench_results.json
+    python -m main.benchmarks.bench --preset full --output full.json
+    python -m main.benchmarks.bench --kernel rms --kernel merge        # 名前に含む文字列で絞り込み
+    python -m main.benchmarks.bench --compare baseline.json --threshold 0.15
+    python -m main.benchmarks.bench --compare-only baseline.json new.json
+    python -m main.benchmarks.bench --write-corpus ./bench_corpus      # 合成コーパスを WAV+TXT で書き出すだけ
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from main.benchmarks.corpus import PRESETS, get_preset, write_corpus
+from main.benchmarks.kernels import BenchContext, SkipKernel, select_kernels
+
+SCHEMA_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_DELTA = 1e-4
+# 1件の計測にかける時間の上限 (長尺クリップは1回で打ち切る)
+TIME_BUDGET = 30.0
+
+
+def time_callable(fn: Callable, repeat: int = 5, min_time: float = 0.2) -> List[float]:
+    """
+    fn を繰り返し実行し、1回ごとの所要時間 (秒) を返す。
+
+    最初の1回はウォームアップとして捨てる (ただし1秒以上かかる場合はそのまま計測値として使う)。
+    """
+    sink = io.StringIO()
+    samples: List[float] = []
+    with contextlib.redirect_stdout(sink):
+        t0 = time.perf_counter()
+        fn()
+        first = time.perf_counter() - t0
+        if first >= 1.0:
+            samples.append(first)
+        total = sum(samples)
+        while len(samples) < repeat or total < min_time:
+            if samples and total + samples[-1] > TIME_BUDGET:
+                break
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+            total += samples[-1]
+            sink.seek(0)
+            sink.truncate()
+    return samples
+
+
+def run_benchmarks(
+    preset: str = "quick",
+    kernel_patterns: Optional[List[str]] = None,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    seed: int = 0
+) -> dict:
+    """ベンチマークを実行して結果 dict (モジュール docstring の形式) を返す。"""
+    kernels = select_kernels(kernel_patterns)
+    clips = get_preset(preset, seed=seed)
+    results, skipped = [], []
+    workdir = tempfile.mkdtemp(prefix="lipsync_bench_")
+    try:
+        for clip in clips:
+            ctx = BenchContext(clip, workdir)
+            print(f"[bench] クリップ {clip.name} ({clip.num_samples} samples)")
+            for kernel in kernels:
+                if not kernel.applies_to(clip):
+                    skipped.append({"kernel": kernel.name, "clip": clip.name,
+                                    "reason": f"max_duration={kernel.max_duration:g}s"})
+                    continue
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        fn = kernel.setup(ctx)
+                except SkipKernel as e:
+                    skipped.append({"kernel": kernel.name, "clip": clip.name, "reason": str(e)})
+                    print(f"[bench]   skip {kernel.name}: {e}")
+                    continue
+                samples = time_callable(fn, repeat=repeat, min_time=min_time)
+                best = min(samples)
+                entry = {
+                    "kernel": kernel.name,
+                    "clip": clip.name,
+                    "duration": clip.duration,
+                    "sample_rate": clip.sample_rate,
+                    "runs": len(samples),
+                    "best": best,
+                    "median": statistics.median(samples),
+                    "mean": statistics.fmean(samples),
+                    "realtime_factor": clip.duration / best if best > 0 else None
+                }
+                results.append(entry)
+                print(f"[bench]   {kernel.name:<36} best {best * 1e3:10.3f} ms "
+                      f"median {entry['median'] * 1e3:10.3f} ms  x{len(samples)}")
+            ctx.release()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "preset": preset,
+            "seed": seed
+        },
+        "results": results,
+        "skipped": skipped
+    }
+
+
+# ----------------------------------------------------------------
+# 比較
+# ----------------------------------------------------------------
+def compare_results(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+    kernel_thresholds: Optional[Dict[str, float]] = None
+) -> dict:
+    """
+    baseline と current を (カーネル, クリップ) ごとに best で比較する。
+
+    Args:
+        threshold (float): 許容する悪化率 (0.10 = 10%)
+        min_delta (float): これ未満の差 (秒) は誤差として無視する
+        kernel_thresholds (dict): カーネル名 → threshold の個別指定
+
+    Returns:
+        dict: {"rows": [...], "regressions": [...], "missing": [...]}
+              rows の各要素は {"kernel", "clip", "baseline", "current", "ratio", "status"}
+    """
+    kernel_thresholds = kernel_thresholds or {}
+    base_map = {(r["kernel"], r["clip"]): r for r in baseline.get("results", [])}
+    rows, regressions = [], []
+    seen = set()
+    for r in current.get("results", []):
+        key = (r["kernel"], r["clip"])
+        seen.add(key)
+        b = base_map.get(key)
+        if b is None:
+            rows.append({"kernel": key[0], "clip": key[1], "baseline": None,
+                         "current": r["best"], "ratio": None, "status": "new"})
+            continue
+        ratio = r["best"] / b["best"] if b["best"] > 0 else float("inf")
+        limit = kernel_thresholds.get(key[0], threshold)
+        status = "ok"
+        if ratio > 1.0 + limit and r["best"] - b["best"] > min_delta:
+            status = "REGRESSION"
+        elif ratio < 1.0 / (1.0 + limit) and b["best"] - r["best"] > min_delta:
+            status = "improved"
+        row = {"kernel": key[0], "clip": key[1], "baseline": b["best"],
+               "current": r["best"], "ratio": ratio, "status": status}
+        rows.append(row)
+        if status == "REGRESSION":
+            regressions.append(row)
+    missing = [{"kernel": k, "clip": c} for (k, c) in base_map if (k, c) not in seen]
+    return {"rows": rows, "regressions": regressions, "missing": missing}
+
+
+def print_comparison(report: dict):
+    print(f"  {'kernel':<36} {'clip':<12} {'baseline':>12} {'current':>12} {'ratio':>7}  status")
+    for row in report["rows"]:
+        base = f"{row['baseline'] * 1e3:10.3f}ms" if row["baseline"] is not None else "           -"
+        ratio = f"{row['ratio']:7.2f}" if row["ratio"] is not None else "      -"
+        print(f"  {row['kernel']:<36} {row['clip']:<12} {base} {row['current'] * 1e3:10.3f}ms {ratio}  {row['status']}")
+    for m in report["missing"]:
+        print(f"  [注意] ベースラインにあるが今回計測されていない: {m['kernel']} / {m['clip']}")
+    if report["regressions"]:
+        print(f"[bench] 回帰 {len(report['regressions'])} 件")
+    else:
+        print("[bench] 回帰なし")
+
+
+def _load_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"[bench] 結果ファイルの schema が違います: {path} ({data.get('schema')})")
+    return data
+
+
+def _parse_kernel_thresholds(items: List[str]) -> Dict[str, float]:
+    out = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        if not value:
+            raise ValueError(f"[bench] --kernel-threshold は name=0.2 の形式で指定してください: {item}")
+        out[name] = float(value)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析・出力カーネルのベンチマーク")
+    parser.add_argument("--preset", default="quick", choices=sorted(PRESETS),
+                        help="合成コーパスのプリセット (quick: 1〜60秒 / full: 2時間まで)")
+    parser.add_argument("--kernel", action="append", default=[],
+                        help="名前にこの文字列を含むカーネルだけ実行 (複数指定可)")
+    parser.add_argument("--repeat", type=int, default=5, help="最低繰り返し回数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="1計測あたりの最低合計時間(秒)")
+    parser.add_argument("--seed", type=int, default=0, help="コーパスの乱数シード")
+    parser.add_argument("--output", default="bench_results.json", help="結果の出力先 (JSON)")
+    parser.add_argument("--compare", default="", help="比較するベースラインの結果ファイル")
+    parser.add_argument("--compare-only", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="計測せず、2つの結果ファイルを比較する")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="回帰とみなす悪化率 (既定 0.10 = 10%%)")
+    parser.add_argument("--kernel-threshold", action="append", default=[],
+                        help="カーネル個別のしきい値 (例: exporter.vmd=0.25)")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA,
+                        help="これ未満の差(秒)は回帰とみなさない")
+    parser.add_argument("--write-corpus", default="",
+                        help="合成コーパスを WAV + TXT でこのフォルダに書き出して終了する")
+    args = parser.parse_args()
+
+    if args.write_corpus:
+        paths = write_corpus(args.write_corpus, get_preset(args.preset, seed=args.seed))
+        print(f"[bench] コーパスを書き出しました: {len(paths)} 件 → {args.write_corpus}")
+        return 0
+
+    kernel_thresholds = _parse_kernel_thresholds(args.kernel_threshold)
+
+    if args.compare_only:
+        report = compare_results(_load_json(args.compare_only[0]), _load_json(args.compare_only[1]),
+                                 args.threshold, args.min_delta, kernel_thresholds)
+        print_comparison(report)
+        return 1 if report["regressions"] else 0
+
+    # 比較対象は計測前に読んでおく (パスの間違いで計測が無駄にならないように)
+    baseline = _load_json(args.compare) if args.compare else None
+
+    current = run_benchmarks(args.preset, args.kernel, args.repeat, args.min_time, args.seed)
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"[bench] 結果を {args.output} に出力しました ({len(current['results'])} 件)")
+
+    if baseline is not None:
+        report = compare_results(baseline, current, args.threshold, args.min_delta, kernel_thresholds)
+        print_comparison(report)
+        return 1 if report["regressions"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
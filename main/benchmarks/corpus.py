@@ -0,0 +1,211 @@
+# main/benchmarks/corpus.py
+# -*- coding: utf-8 -*-
+
+"""
+corpus.py
+
+ベンチマーク用の決定的な合成コーパス。
+
+- 音声: 発話区間 (0.4〜3秒) と無音 (0.1〜0.8秒) を交互に並べ、発話区間は
+  帯域を絞ったノイズを音節レート (4〜7Hz) で振幅変調したもの。無音区間にも小さなノイズフロアを入れる。
+- テキスト: 発話区間の長さに見合うモーラ数 (約7モーラ/秒) のひらがな列。
+  発話区間の区切りに「、」、数区間ごとに「。」を入れる。
+- 同じ (長さ, サンプリングレート, seed) からは常に同じ波形・テキストが得られる。
+  ノイズは1秒ごとに [seed, 秒番号] から乱数を作るため、全体を一度に作っても
+  任意のブロック単位で作っても同じになる (2時間のクリップもブロック単位で WAV に書き出せる)。
+
+依存:
+- numpy
+
+使い方:
+    from main.benchmarks.corpus import CorpusClip, get_preset
+
+    clip = CorpusClip(duration=60.0, sample_rate=22050, seed=1)
+    audio = clip.audio()          # float32, -1.0〜1.0
+    text = clip.text()
+    clip.write_wav("clip.wav")    # 16bit PCM (ブロック単位で書き出す)
+
+    for clip in get_preset("quick"):
+        ...
+"""
+
+import os
+import wave
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# ノイズフロア (無音区間の振幅)
+NOISE_FLOOR = 1e-3
+# 発話区間あたりのモーラ数 / 秒
+MORAS_PER_SECOND = 7.0
+
+# テキスト生成に使うかな (出現しやすいものを重複させて重み付け)
+_KANA = (
+    "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ"
+    "あいうえおかしたなのはまもらるれんんっ"
+)
+
+# プリセット: (長さ[秒], サンプリングレート)
+PRESETS = {
+    # CI 向け (数十秒で終わる)
+    "quick": [(1.0, 16000), (10.0, 22050), (60.0, 44100), (60.0, 16000)],
+    # 長尺を含む (2時間クリップは float32 で約460MB)
+    "full": [(1.0, 16000), (10.0, 22050), (60.0, 44100), (60.0, 16000),
+             (600.0, 48000), (7200.0, 16000)],
+}
+
+
+class CorpusClip:
+    """
+    合成クリップ1本。
+
+    Args:
+        duration (float): 長さ(秒)
+        sample_rate (int): サンプリングレート
+        seed (int): 乱数シード
+    """
+
+    def __init__(self, duration: float, sample_rate: int = 16000, seed: int = 0):
+        self.duration = float(duration)
+        self.sample_rate = int(sample_rate)
+        self.seed = int(seed)
+        self.num_samples = int(round(self.duration * self.sample_rate))
+        self._plan = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.duration:g}s@{self.sample_rate}"
+
+    # ----------------------------------------------------------------
+    # 発話区間の計画
+    # ----------------------------------------------------------------
+    def plan(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        発話区間の一覧 (サンプル単位)。
+
+        Returns:
+            (starts, ends, rates, gains): 開始/終了サンプル、音節レート[Hz]、振幅
+        """
+        if self._plan is not None:
+            return self._plan
+        rng = np.random.default_rng([self.seed, 0x5EED])
+        starts, ends, rates, gains = [], [], [], []
+        t = float(rng.uniform(0.05, 0.3))
+        while t < self.duration:
+            length = float(rng.uniform(0.4, 3.0))
+            starts.append(t)
+            ends.append(min(t + length, self.duration))
+            rates.append(float(rng.uniform(4.0, 7.0)))
+            gains.append(float(rng.uniform(0.1, 0.6)))
+            t += length + float(rng.uniform(0.1, 0.8))
+        sr = self.sample_rate
+        self._plan = (
+            (np.asarray(starts) * sr).astype(np.int64),
+            (np.asarray(ends) * sr).astype(np.int64),
+            np.asarray(rates, dtype=np.float64),
+            np.asarray(gains, dtype=np.float64),
+        )
+        return self._plan
+
+    # ----------------------------------------------------------------
+    # 波形
+    # ----------------------------------------------------------------
+    def iter_blocks(self, block_seconds: float = 10.0) -> Iterator[np.ndarray]:
+        """波形を block_seconds ごとの float32 配列で返す。"""
+        block = max(1, int(block_seconds * self.sample_rate))
+        for b0 in range(0, self.num_samples, block):
+            yield self._render(b0, min(b0 + block, self.num_samples))
+
+    def audio(self) -> np.ndarray:
+        """波形全体 (float32)。"""
+        out = np.empty(self.num_samples, dtype=np.float32)
+        pos = 0
+        for chunk in self.iter_blocks():
+            out[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
+        return out
+
+    def _noise(self, b0: int, b1: int) -> np.ndarray:
+        """サンプル [b0, b1) の白色ノイズ。1秒単位で [seed, 秒番号] から作る (負の位置は 0)。"""
+        sr = self.sample_rate
+        out = np.zeros(b1 - b0)
+        for sec in range(max(0, b0) // sr, (b1 - 1) // sr + 1):
+            s0 = sec * sr
+            seg = np.random.default_rng([self.seed, sec]).standard_normal(sr)
+            lo, hi = max(b0, s0), min(b1, s0 + sr)
+            out[lo - b0:hi - b0] = seg[lo - s0:hi - s0]
+        return out
+
+    def _render(self, b0: int, b1: int) -> np.ndarray:
+        noise = self._noise(b0 - 2, b1)
+        # 簡易ローパス (3タップ) で高域を落として声っぽくする
+        carrier = 0.25 * (noise[2:] + 0.6 * noise[1:-1] + 0.3 * noise[:-2])
+        env = np.full(b1 - b0, NOISE_FLOOR)
+
+        starts, ends, rates, gains = self.plan()
+        lo = np.searchsorted(ends, b0, side="right")
+        hi = np.searchsorted(starts, b1, side="left")
+        sr = float(self.sample_rate)
+        for k in range(lo, hi):
+            s = max(starts[k], b0)
+            e = min(ends[k], b1)
+            if e <= s:
+                continue
+            t = (np.arange(s, e) - starts[k]) / sr
+            env[s - b0:e - b0] += gains[k] * 0.5 * (1.0 - np.cos(2.0 * np.pi * rates[k] * t))
+        return np.clip(carrier * env, -1.0, 1.0).astype(np.float32)
+
+    def write_wav(self, path: str, block_seconds: float = 10.0):
+        """16bit PCM モノラルの WAV としてブロック単位で書き出す。"""
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            for chunk in self.iter_blocks(block_seconds):
+                wf.writeframes((chunk * 32767.0).astype("<i2").tobytes())
+
+    # ----------------------------------------------------------------
+    # テキスト
+    # ----------------------------------------------------------------
+    def text(self) -> str:
+        """発話区間に対応するひらがなテキスト。"""
+        rng = np.random.default_rng([self.seed, 0x7E47])
+        starts, ends, _, _ = self.plan()
+        kana = np.array(list(_KANA))
+        parts: List[str] = []
+        for k, (s, e) in enumerate(zip(starts, ends)):
+            moras = max(1, int(round((e - s) / self.sample_rate * MORAS_PER_SECOND)))
+            parts.append("".join(kana[rng.integers(0, len(kana), moras)]))
+            parts.append("。" if k % 4 == 3 else "、")
+        if parts:
+            parts[-1] = "。"
+        return "".join(parts)
+
+
+def get_preset(name: str, seed: int = 0) -> List[CorpusClip]:
+    """プリセット名からクリップ一覧を作る。"""
+    if name not in PRESETS:
+        raise ValueError(f"[corpus] 未知のプリセット: {name} (候補: {', '.join(PRESETS)})")
+    return [CorpusClip(d, sr, seed=seed + i) for i, (d, sr) in enumerate(PRESETS[name])]
+
+
+def write_corpus(out_dir: str, clips: List[CorpusClip]) -> List[str]:
+    """
+    クリップを WAV + テキスト (.txt) として out_dir に書き出す (lip_sync_main --batch の入力にもなる)。
+
+    Returns:
+        List[str]: 書き出した WAV のパス
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for clip in clips:
+        base = os.path.join(out_dir, f"clip_{clip.duration:g}s_{clip.sample_rate}")
+        clip.write_wav(base + ".wav")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(clip.text())
+        paths.append(base + ".wav")
+    return paths
@@ -0,0 +1,243 @@
+# main/benchmarks/kernels.py
+# -*- coding: utf-8 -*-
+
+"""
+kernels.py
+
+ベンチマーク対象のカーネル定義。
+
+各カーネルは setup(ctx) で計測対象の関数 (引数なし) を返す。入力の準備 (波形生成・前段の解析など) は
+setup 側で行い、計測には含めない。前段の結果は BenchContext がクリップごとにキャッシュする。
+
+カーネル一覧:
+- rms_analysis.array           : compute_rms_from_array (配列全体の RMS)
+- rms_analysis.chunks          : compute_rms_in_chunks (16bit WAV をチャンク読み)
+- generator._analyze_rms       : LipSyncGenerator._analyze_rms (10ms ごとの RMS)
+- generator._merge_phonemes_and_rms
+- hatsuon.text_to_phoneme_timing
+- overlap.apply_overlap_easing
+- exporter.vmd                 : VMDExporter.from_lip_sync_data + export_vmd_binary
+- exporter.gmod                : GModExporter.from_lip_sync_data + export_gmod_json
+- cache_manager.set_get        : CacheManager に lip_sync フレームを保存して読み戻す
+- cache_manager.sqlite.set_get : 同上 (backend="sqlite")
+- grpc.AnalyzeAudio            : AnalysisServiceServicer.AnalyzeAudio (プロセス内呼び出し)
+
+依存:
+- numpy (grpc.AnalyzeAudio は grpcio と analysis_pb2 が必要。無ければスキップ)
+"""
+
+import os
+from typing import Callable, List, Optional
+
+from main.benchmarks.corpus import CorpusClip
+
+
+class SkipKernel(Exception):
+    """依存が無いなどでカーネルを実行できない。"""
+
+
+class BenchContext:
+    """
+    1クリップぶんの入力と前段の解析結果をキャッシュする。
+
+    Args:
+        clip (CorpusClip): 対象クリップ
+        workdir (str): 一時ファイル (WAV / 出力 / キャッシュ) の置き場所
+    """
+
+    def __init__(self, clip: CorpusClip, workdir: str):
+        self.clip = clip
+        self.workdir = workdir
+        self._cache = {}
+
+    def _get(self, key: str, factory: Callable):
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.workdir, f"{self.clip.name.replace('@', '_')}_{name}")
+
+    @property
+    def audio(self):
+        return self._get("audio", self.clip.audio)
+
+    @property
+    def text(self) -> str:
+        return self._get("text", self.clip.text)
+
+    @property
+    def wav_path(self) -> str:
+        def make():
+            p = self.path("clip.wav")
+            self.clip.write_wav(p)
+            return p
+        return self._get("wav", make)
+
+    @property
+    def generator(self):
+        def make():
+            from main.pipeline.lip_sync_generator import LipSyncGenerator
+            gen = LipSyncGenerator()
+            gen.verbose = False
+            return gen
+        return self._get("generator", make)
+
+    @property
+    def phoneme_segments(self):
+        def make():
+            gen = self.generator
+            text = gen._normalize_text(self.text)
+            segments = gen._analyze_phonemes(text, self.clip.duration)
+            return gen._smooth_phoneme_segments(segments, gen.default_gap_threshold)
+        return self._get("segments", make)
+
+    @property
+    def rms_timeline(self):
+        return self._get("rms", lambda: self.generator._analyze_rms(self.audio, self.clip.sample_rate))
+
+    @property
+    def merged_frames(self):
+        return self._get("merged", lambda: self.generator._merge_phonemes_and_rms(
+            self.phoneme_segments, self.rms_timeline))
+
+    @property
+    def lip_sync_data(self) -> dict:
+        def make():
+            from main.utils.overlap_utils import apply_overlap_easing
+            return {"lip_sync_frames": apply_overlap_easing(self.merged_frames, self.generator.overlap_ratio)}
+        return self._get("lip_sync_data", make)
+
+    def release(self):
+        self._cache.clear()
+
+
+class Kernel:
+    """
+    計測対象1件。
+
+    Args:
+        name (str): カーネル名
+        setup (callable): setup(ctx) -> 計測する関数 (引数なし)
+        max_duration (float or None): これより長いクリップでは実行しない
+    """
+
+    def __init__(self, name: str, setup: Callable, max_duration: Optional[float] = None):
+        self.name = name
+        self.setup = setup
+        self.max_duration = max_duration
+
+    def applies_to(self, clip: CorpusClip) -> bool:
+        return self.max_duration is None or clip.duration <= self.max_duration
+
+
+# ----------------------------------------------------------------
+# 各カーネルの setup
+# ----------------------------------------------------------------
+def _setup_rms_array(ctx: BenchContext):
+    from main.analysis.rms_analysis import compute_rms_from_array
+    audio = ctx.audio
+    return lambda: compute_rms_from_array(audio)
+
+
+def _setup_rms_chunks(ctx: BenchContext):
+    from main.analysis.rms_analysis import compute_rms_in_chunks
+    path = ctx.wav_path
+    return lambda: compute_rms_in_chunks(path)
+
+
+def _setup_analyze_rms(ctx: BenchContext):
+    gen, audio, sr = ctx.generator, ctx.audio, ctx.clip.sample_rate
+    return lambda: gen._analyze_rms(audio, sr)
+
+
+def _setup_merge(ctx: BenchContext):
+    gen, segments, rms = ctx.generator, ctx.phoneme_segments, ctx.rms_timeline
+    return lambda: gen._merge_phonemes_and_rms(segments, rms)
+
+
+def _setup_hatsuon(ctx: BenchContext):
+    from main.analysis.hatsuon import HatsuonEngine
+    engine = HatsuonEngine()
+    text, duration = ctx.text, ctx.clip.duration
+    return lambda: engine.text_to_phoneme_timing(text, duration)
+
+
+def _setup_overlap(ctx: BenchContext):
+    from main.utils.overlap_utils import apply_overlap_easing
+    frames, ratio = ctx.merged_frames, ctx.generator.overlap_ratio
+    return lambda: apply_overlap_easing(frames, ratio)
+
+
+def _setup_vmd(ctx: BenchContext):
+    from main.pipeline.exporter_vmd import VMDExporter
+    exporter = VMDExporter()
+    data, out = ctx.lip_sync_data, ctx.path("out.vmd")
+
+    def run():
+        exporter.from_lip_sync_data(data)
+        exporter.export_vmd_binary(out)
+    return run
+
+
+def _setup_gmod(ctx: BenchContext):
+    from main.pipeline.exporter_gmod import GModExporter
+    exporter = GModExporter()
+    data, out = ctx.lip_sync_data, ctx.path("out_gmod.json")
+
+    def run():
+        exporter.from_lip_sync_data(data)
+        exporter.export_gmod_json(out, compact=True)
+    return run
+
+
+def _setup_cache(ctx: BenchContext, backend: str = "files"):
+    from main.utils.cache_manager import CacheManager
+    # メモリ層に当たるとディスク層を計測できないので切る
+    cache = CacheManager(
+        cache_dir=ctx.path(f"cache_{backend}"), backend=backend, max_memory_entries=0, sweep_interval=0
+    )
+    frames = ctx.lip_sync_data["lip_sync_frames"]
+    key = f"bench_{ctx.clip.name}"
+
+    def run():
+        cache.set(key, frames)
+        if cache.get(key) is None:
+            raise RuntimeError("[bench] キャッシュの読み戻しに失敗しました")
+    return run
+
+
+def _setup_grpc(ctx: BenchContext):
+    try:
+        from main.server import analysis_pb2
+        from main.server.analysis_server import AnalysisServiceServicer
+    except ImportError as e:
+        raise SkipKernel(f"grpcio / analysis_pb2 が利用できません ({e})")
+    servicer = AnalysisServiceServicer()
+    request = analysis_pb2.AnalyzeRequest(
+        audio_data=ctx.audio.tobytes(), text=ctx.text, character="default", use_gpu=False
+    )
+    return lambda: servicer.AnalyzeAudio(request, None)
+
+
+KERNELS: List[Kernel] = [
+    Kernel("rms_analysis.array", _setup_rms_array),
+    Kernel("rms_analysis.chunks", _setup_rms_chunks),
+    Kernel("generator._analyze_rms", _setup_analyze_rms),
+    Kernel("generator._merge_phonemes_and_rms", _setup_merge),
+    Kernel("hatsuon.text_to_phoneme_timing", _setup_hatsuon),
+    Kernel("overlap.apply_overlap_easing", _setup_overlap),
+    Kernel("exporter.vmd", _setup_vmd),
+    Kernel("exporter.gmod", _setup_gmod),
+    Kernel("cache_manager.set_get", _setup_cache),
+    Kernel("cache_manager.sqlite.set_get", lambda ctx: _setup_cache(ctx, backend="sqlite")),
+    # 1メッセージで送るため、既定の受信上限 (4MB) を大きく超える長さは対象外
+    Kernel("grpc.AnalyzeAudio", _setup_grpc, max_duration=600.0),
+]
+
+
+def select_kernels(patterns: Optional[List[str]] = None) -> List[Kernel]:
+    """名前に patterns のいずれかを含むカーネル (未指定なら全部)。"""
+    if not patterns:
+        return list(KERNELS)
+    return [k for k in KERNELS if any(p in k.name for p in patterns)]
@@ -19,7 +19,11 @@ WhisperベースのASRを利用して、音声データをテキストやタイ
 import os
 import tempfile
 import numpy as np
-import whisper  # openai-whisper ライブラリ
+
+from main.utils.lazy_import import lazy_module
+
+# openai-whisper (torch ごと読み込まれて重いため、モデルをロードする時点まで import しない)
+whisper = lazy_module("whisper", hint="pip install openai-whisper")
 
 
 class WhisperASR:
@@ -181,7 +185,7 @@ def demo_main():
       python -m main.pipeline.asr_whisper
     """
     import sys
-    import librosa
+    from main.utils.audio_decode import load_audio
 
     # テスト用音声ファイル
     sample_file = "path/to/sample.wav"
@@ -189,7 +193,7 @@ def demo_main():
         print("[Error] テスト用音声ファイルがありません。終了。")
         return
 
-    audio_data, sr = librosa.load(sample_file, sr=16000, mono=True)
+    audio_data, sr = load_audio(sample_file, sr=16000, mono=True)
     audio_data = audio_data.astype(np.float32, copy=False)
 
     # WhisperASR インスタンス
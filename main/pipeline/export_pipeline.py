@@ -0,0 +1,316 @@
+# main/pipeline/export_pipeline.py
+# -*- coding: utf-8 -*-
+
+"""
+export_pipeline.py
+
+1つの lip_sync_data から複数形式 (VMD / VMDデバッグテキスト / GMod JSON / GModウェイトテーブル /
+生の lip_sync JSON) をまとめて書き出すエクスポートパイプライン。
+
+- ソート・音素→モーフ変換・キー生成は (fps, マッピング) ごとに1回だけ計算し (MorphCurve)、
+  すべての出力先で共有する。
+- 各出力先の書き込みは ThreadPoolExecutor で並行に実行する。
+  (エンコードは GIL の影響を受けるが、ファイル書き込みの待ち時間は重ねられる)
+- 出力先ごとの所要時間を結果として返す。
+
+依存:
+- main.pipeline.morph_curve
+- main.pipeline.exporter_vmd / exporter_gmod
+- main.utils.json_stream
+
+使い方:
+    from main.pipeline.export_pipeline import ExportPipeline
+
+    pipeline = ExportPipeline(lip_sync_data, model_name="MyMMDModel")
+    targets = ExportPipeline.make_targets("./output", "lipsync_result", ["vmd", "vmd_text", "gmod_json"])
+    report = pipeline.run(targets, fps=30)
+    for r in report["targets"]:
+        print(r["format"], r["seconds"], r["ok"])
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from main.pipeline.morph_curve import MorphCurve
+from main.pipeline.exporter_vmd import VMDExporter
+from main.pipeline.exporter_gmod import GModExporter
+from main.utils.json_stream import dump_json_stream
+from main.utils.config_registry import thaw
+
+# 出力形式 → 既定のファイル名サフィックス
+EXPORT_FORMATS = {
+    "vmd": ".vmd",
+    "vmd_text": "_debug.json",
+    "gmod_json": "_gmod.json",
+    "gmod_table": ".lswt",
+    "lip_sync_json": ".json",
+}
+
+
+class ExportPipeline:
+    """
+    共有の中間表現から複数のエクスポート先へ並行に書き出すクラス。
+
+    Args:
+        lip_sync_data (dict): LipSyncGenerator の出力 ({"lip_sync_frames": [...], ...})
+        model_name (str): VMD に書き込むモデル名 (export_options.model_name があればそちら優先)
+        vmd_mapping (dict): VMD 用の音素→モーフ名マッピング (VMDExporter と同じマージ規則)
+        gmod_mapping (dict): GMod ウェイトテーブル用マッピング (None なら既定JSON)
+        max_workers (int): 書き込みスレッド数 (None なら出力先の数)
+        character (str) / character_settings (dict): VMDExporter と同じ (派生音素の展開用)
+    """
+
+    def __init__(
+        self,
+        lip_sync_data: dict,
+        model_name: str = None,
+        vmd_mapping: dict = None,
+        gmod_mapping: dict = None,
+        max_workers: Optional[int] = None,
+        character: str = None,
+        character_settings: dict = None
+    ):
+        self.lip_sync_data = lip_sync_data
+        self.max_workers = max_workers
+
+        # マッピング解決用のテンプレート (外部JSONの読み込みはここで1回だけ)
+        self._vmd_template = VMDExporter(
+            model_name=model_name,
+            phoneme_mapping=vmd_mapping,
+            character=character,
+            character_settings=character_settings
+        )
+        export_opts = lip_sync_data.get("export_options", {})
+        maybe_model = export_opts.get("model_name") or lip_sync_data.get("model_name")
+        if maybe_model:
+            self._vmd_template.model_name = maybe_model
+        self._gmod_mapping = GModExporter(phoneme_mapping=gmod_mapping).phoneme_mapping
+
+        self._lock = threading.Lock()
+        self._curves: Dict[tuple, MorphCurve] = {}
+        self._vmd_tracks: Dict[tuple, List[dict]] = {}
+
+    # ----------------------------------------------------------------
+    # 出力先の組み立て
+    # ----------------------------------------------------------------
+    @staticmethod
+    def make_targets(out_dir: str, base_name: str, formats: List[str]) -> List[dict]:
+        """
+        出力ディレクトリ + ベース名から、形式ごとの出力先 dict を作る。
+        例: [{"format": "vmd", "path": "./output/result.vmd"}, ...]
+        """
+        targets = []
+        for fmt in formats:
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"[ExportPipeline] 未知の出力形式: {fmt}")
+            targets.append({
+                "format": fmt,
+                "path": os.path.join(out_dir, base_name + EXPORT_FORMATS[fmt])
+            })
+        return targets
+
+    # ----------------------------------------------------------------
+    # 共有中間表現 (キャッシュ)
+    # ----------------------------------------------------------------
+    def _mapping_key(self) -> str:
+        template = self._vmd_template
+        return json.dumps(
+            [template.phoneme_mapping, template.character],
+            sort_keys=True, ensure_ascii=False, default=thaw
+        )
+
+    def get_curve(self, fps: int) -> MorphCurve:
+        """(fps, マッピング) ごとの MorphCurve を返す。無ければ計算してキャッシュする。"""
+        key = (fps, self._mapping_key())
+        with self._lock:
+            curve = self._curves.get(key)
+            if curve is None:
+                curve = MorphCurve.from_lip_sync_data(
+                    self.lip_sync_data, fps=fps, mixer=self._vmd_template.build_mixer()
+                )
+                self._curves[key] = curve
+            return curve
+
+    def get_vmd_tracks(
+        self,
+        fps: int,
+        fade_in: bool = True,
+        fade_out: bool = True,
+        crossfade_threshold: float = 0.1,
+        min_weight: float = 0.0
+    ) -> List[dict]:
+        """
+        VMD のモーフキー (frame 昇順) を返す。VMDバイナリとデバッグテキストで共有する。
+        返り値のリスト・dict は読み取り専用として扱うこと。
+        """
+        curve = self.get_curve(fps)
+        key = (fps, self._mapping_key(), fade_in, fade_out, crossfade_threshold, min_weight)
+        with self._lock:
+            tracks = self._vmd_tracks.get(key)
+            if tracks is None:
+                builder = copy.copy(self._vmd_template)
+                builder.morph_tracks = []
+                builder.from_morph_curve(
+                    curve,
+                    fade_in=fade_in,
+                    fade_out=fade_out,
+                    crossfade_threshold=crossfade_threshold,
+                    min_weight=min_weight
+                )
+                tracks = builder.morph_tracks
+                tracks.sort(key=lambda x: x["frame"])
+                self._vmd_tracks[key] = tracks
+            return tracks
+
+    def clear_cache(self):
+        """lip_sync_data を差し替えた場合などに中間表現を破棄する。"""
+        with self._lock:
+            self._curves.clear()
+            self._vmd_tracks.clear()
+
+    # ----------------------------------------------------------------
+    # 実行
+    # ----------------------------------------------------------------
+    def run(
+        self,
+        targets: List[dict],
+        fps: int = 30,
+        fade_in: bool = True,
+        fade_out: bool = True,
+        crossfade_threshold: float = 0.1,
+        min_weight: float = 0.0,
+        compact: bool = False,
+        on_target_done: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """
+        targets をすべて書き出す。
+
+        Args:
+            targets (list): [{"format": "vmd", "path": "..."}, ...]
+                任意キー: "compact"(JSON系), "encoding"(gmod_table: "binary"/"base64"),
+                          "rate"(gmod_table, 既定は fps), "fade_out"(gmod_json, 既定 False)
+            fps, fade_in, fade_out, crossfade_threshold, min_weight: VMDキー生成の設定
+            compact (bool): JSON系出力の既定の compact 指定
+            on_target_done (callable): 出力先が1つ書き終わるたびに結果 dict で呼ばれる (進捗表示用。
+                書き込みスレッドではなく run を呼んだスレッドから、完了順に呼ばれる)
+
+        Returns:
+            dict: {
+              "prepare_seconds": 共有中間表現の計算時間,
+              "total_seconds": 全体の所要時間,
+              "targets": [{"format", "path", "ok", "seconds", "error"}, ...]  (targets と同順)
+            }
+        """
+        t_start = time.perf_counter()
+
+        # 1) 共有中間表現を1回だけ計算 (書き込みスレッドからは読むだけ)
+        curve = self.get_curve(fps)
+        tracks = None
+        if any(t.get("format") in ("vmd", "vmd_text") for t in targets):
+            tracks = self.get_vmd_tracks(fps, fade_in, fade_out, crossfade_threshold, min_weight)
+        prepare_sec = time.perf_counter() - t_start
+
+        # 2) 出力先ごとに並行して書き込み
+        results = []
+        if targets:
+            workers = self.max_workers or len(targets)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self._run_target, target, curve, tracks, compact)
+                    for target in targets
+                ]
+                if on_target_done is not None:
+                    for f in as_completed(futures):
+                        on_target_done(f.result())
+                results = [f.result() for f in futures]
+
+        total_sec = time.perf_counter() - t_start
+        print(f"[ExportPipeline] 共有データ準備: {prepare_sec:.3f}s")
+        for r in results:
+            status = "OK" if r["ok"] else f"失敗: {r['error']}"
+            print(f"[ExportPipeline]   {r['format']:<13} {r['seconds']:.3f}s -> {r['path']} ({status})")
+        print(f"[ExportPipeline] 合計: {total_sec:.3f}s ({len(results)}件)")
+
+        return {
+            "prepare_seconds": prepare_sec,
+            "total_seconds": total_sec,
+            "targets": results
+        }
+
+    def _run_target(self, target: dict, curve: MorphCurve, tracks: List[dict], compact: bool) -> dict:
+        fmt = target.get("format")
+        path = target.get("path")
+        result = {"format": fmt, "path": path, "ok": False, "seconds": 0.0, "error": None}
+
+        t0 = time.perf_counter()
+        try:
+            out_dir = os.path.dirname(path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+            use_compact = target.get("compact", compact)
+
+            if fmt in ("vmd", "vmd_text"):
+                exporter = copy.copy(self._vmd_template)
+                # 共有リストを各スレッドでソートしないよう、外側のリストだけ複製する
+                exporter.morph_tracks = list(tracks)
+                if fmt == "vmd":
+                    exporter.export_vmd_binary(path)
+                else:
+                    exporter.export_vmd_text(path, compact=use_compact)
+
+            elif fmt == "gmod_json":
+                exporter = GModExporter(phoneme_mapping=self._gmod_mapping)
+                exporter.from_morph_curve(curve, fade_out=target.get("fade_out", False))
+                exporter.export_gmod_json(path, compact=use_compact)
+
+            elif fmt == "gmod_table":
+                exporter = GModExporter(phoneme_mapping=self._gmod_mapping)
+                exporter.build_weight_table(
+                    self.lip_sync_data, rate=target.get("rate", curve.fps), columns=curve.columns
+                )
+                exporter.export_gmod_table(path, encoding=target.get("encoding", "binary"))
+
+            elif fmt == "lip_sync_json":
+                with open(path, "w", encoding="utf-8") as f:
+                    dump_json_stream(self.lip_sync_data, f, compact=use_compact)
+
+            else:
+                raise ValueError(f"未知の出力形式: {fmt}")
+
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = str(e)
+            print(f"[ExportPipeline] {fmt} の出力に失敗: {traceback.format_exc()}")
+        result["seconds"] = time.perf_counter() - t0
+        return result
+
+
+def demo_main():
+    """
+    デモ: 1つの lip_sync_data から VMD / デバッグテキスト / GMod JSON / ウェイトテーブルを一括出力
+    """
+    lip_sync_data_example = {
+        "export_options": {"model_name": "MyMMDModel", "overlap_rate": 0.1},
+        "lip_sync_frames": [
+            {"start": 0.00, "end": 0.18, "phoneme": "a", "avg_rms": 0.45},
+            {"start": 0.18, "end": 0.35, "phoneme": "i", "avg_rms": 0.30},
+            {"start": 0.35, "end": 0.50, "phoneme": "u", "avg_rms": 0.25},
+            {"start": 0.55, "end": 1.00, "phoneme": "o", "avg_rms": 0.10},
+        ]
+    }
+
+    pipeline = ExportPipeline(lip_sync_data_example)
+    targets = ExportPipeline.make_targets(
+        "./output", "pipeline_demo", ["vmd", "vmd_text", "gmod_json", "gmod_table"]
+    )
+    pipeline.run(targets, fps=30)
+
+
+if __name__ == "__main__":
+    demo_main()
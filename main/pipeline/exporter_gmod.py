@@ -9,11 +9,38 @@ exporter_gmod.py (改良版)
 - fade_out=True なら音素終了タイミングで weight=0 (口を閉じる) を追加。
 - ファイル名の禁止文字を置換するなど `_sanitize_filename` を導入。
 - JSON先頭にmetadataとして version, overlap_rate などを追加。
+- 固定ステップのウェイトテーブル (1行=1tick, 1列=口モーフ, uint8量子化) を
+  バイナリ or base64 で書き出す `export_gmod_table` を追加。
+  ゲーム側は floor(t * rate) で行を O(1) で引ける。
+
+ウェイトテーブルのバイナリ形式 (リトルエンディアン):
+    magic      4byte  b"LSWT"
+    version    uint16
+    rate       uint16  (1秒あたりのtick数)
+    n_ticks    uint32
+    n_morphs   uint16
+    reserved   uint16
+    morphs     n_morphs 個の (uint8 長さ + UTF-8 名)
+    weights    n_ticks * n_morphs バイト (行優先, 0~255 → 0.0~1.0)
 """
 
 import os
 import json
 import re
+import struct
+import base64
+
+import numpy as np
+
+from main.pipeline.lip_sync_columns import LipSyncColumns
+from main.pipeline.morph_mixer import MorphMixer
+from main.utils.json_stream import dump_json_stream
+from main.utils.config_registry import load_mapping
+
+# GMod向けの音素→モーフ名マッピング (PROJECT_ROOT/configs/gmod_phoneme_to_morph_map.json)
+GMOD_MAP_JSON = os.path.join(
+    os.path.dirname(__file__), "..", "..", "configs", "gmod_phoneme_to_morph_map.json"
+)
 
 class GModExporter:
     """
@@ -23,10 +50,16 @@ class GModExporter:
 
     FORBIDDEN_CHARS_PATTERN = r'[\\/:*?"<>|]'  # Windowsで禁止されている文字
 
-    def __init__(self, version="1.0"):
+    TABLE_MAGIC = b"LSWT"
+    TABLE_VERSION = 1
+    TABLE_HEADER_FORMAT = "<4sHHIHH"
+
+    def __init__(self, version="1.0", phoneme_mapping: dict = None):
         """
         Args:
             version (str): 出力JSON内のバージョン番号(文字列)
+            phoneme_mapping (dict): ウェイトテーブル用の音素→モーフ名マッピング。
+                未指定なら configs/gmod_phoneme_to_morph_map.json を読み込む。
         """
         self.version = version
         # GMod向けに書き出すデータ
@@ -38,6 +71,16 @@ class GModExporter:
             "generator": "LipSyncTool"
         }
 
+        if phoneme_mapping is None:
+            # レジストリ経由 (読み取り専用ビュー、ファイルが変わらない限り再パースしない)
+            phoneme_mapping = load_mapping(GMOD_MAP_JSON)
+        self.phoneme_mapping = phoneme_mapping
+
+        # ウェイトテーブル (build_weight_table で構築)
+        self.table_rate = 0
+        self.table_morphs = []
+        self.table_weights = np.zeros((0, 0), dtype=np.uint8)
+
     def from_lip_sync_data(
         self,
         lip_sync_data: dict,
@@ -142,9 +185,40 @@ class GModExporter:
             print(f"[GModExporter] 未知のgranularity: {granularity} → 'segment'を使用します。")
             self.from_lip_sync_data(lip_sync_data, fps, granularity="segment", fade_out=fade_out)
 
-    def export_gmod_json(self, output_path: str):
+    def from_morph_curve(self, curve, fade_out: bool = False):
+        """
+        計算済みの MorphCurve (main.pipeline.morph_curve) から
+        segment 単位の frames_data を構築する。weight は curve.peak をそのまま使う。
+        セグメントは curve と同じく start 昇順になる。
+        """
+        self.frames_data.clear()
+        self.metadata["overlap_rate"] = curve.export_options.get("overlap_rate", 0.0)
+
+        cols = curve.columns
+        phonemes = cols.phonemes
+        for start_t, end_t, code, weight in zip(
+            cols.start.tolist(), cols.end.tolist(),
+            cols.phoneme_codes.tolist(), curve.peak.tolist()
+        ):
+            phoneme = phonemes[code]
+            self.frames_data.append({
+                "start": start_t,
+                "end": end_t,
+                "phoneme": phoneme,
+                "weight": weight
+            })
+            if fade_out:
+                self.frames_data.append({
+                    "start": end_t,
+                    "end": end_t,
+                    "phoneme": phoneme,
+                    "weight": 0.0
+                })
+
+    def export_gmod_json(self, output_path: str, compact: bool = False):
         """
         実際にJSONをファイル出力。
+        lip_sync 配列はストリーミングで書き出す (compact=True で最小表現)。
         書き出す構造:
         {
           "metadata": {
@@ -165,25 +239,160 @@ class GModExporter:
         }
 
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(out_data, f, indent=2, ensure_ascii=False)
+            dump_json_stream(out_data, f, compact=compact)
 
         print(f"[GModExporter] GMod用JSONを {output_path} に出力しました。")
 
+    # -----------------------------------------
+    # 固定ステップ ウェイトテーブル
+    # -----------------------------------------
+    def build_weight_table(self, lip_sync_data: dict, rate: int = 30, columns: LipSyncColumns = None):
+        """
+        lip_sync_data から固定ステップのウェイトテーブルを構築する。
+        1行 = 1tick (t = row / rate), 1列 = 口モーフ。
+        各tickでは、その時刻を含むセグメントのモーフ列に min(1, avg_rms*2) を置き、
+        他の列は 0 とする。ウェイトは 0~255 の uint8 に量子化する。
+        マッピングがブレンド指定 (リスト / {モーフ: 重み}) なら、混合率に応じて複数列に配分する。
+
+        Args:
+            lip_sync_data (dict): {"lip_sync_frames": [...], "export_options": {...}}
+            rate (int): 1秒あたりのtick数
+            columns (LipSyncColumns): 変換済みの列データがあれば渡す (lip_sync_frames の再変換を省略)
+        """
+        if rate <= 0:
+            raise ValueError(f"[GModExporter] rate は正の整数である必要があります: {rate}")
+
+        export_opts = lip_sync_data.get("export_options", {})
+        self.metadata["overlap_rate"] = export_opts.get("overlap_rate", 0.0)
+
+        cols = columns
+        if cols is None:
+            cols = LipSyncColumns.from_frames(lip_sync_data.get("lip_sync_frames", []))
+        self.table_rate = int(rate)
+
+        # 音素語彙 × モーフ の混合行列。使われるモーフ列だけを、語彙での出現順に残す
+        all_morphs, mix = MorphMixer(self.phoneme_mapping).vocab_matrix(cols.phonemes)
+        used_cols = []
+        for row in mix:
+            for c in np.nonzero(row > 0.0)[0].tolist():
+                if c not in used_cols:
+                    used_cols.append(c)
+        mix = mix[:, used_cols]
+        morphs = [all_morphs[c] for c in used_cols]
+        self.table_morphs = morphs
+
+        n_ticks = int(np.floor(cols.duration * rate)) + 1 if len(cols) else 0
+        table = np.zeros((n_ticks, len(morphs)), dtype=np.uint8)
+        if n_ticks and morphs:
+            times = np.arange(n_ticks, dtype=np.float64) / rate
+            seg = cols.segment_index_at(times)
+            hit = np.nonzero(seg >= 0)[0]
+            seg_hit = seg[hit]
+            w = mix[cols.phoneme_codes[seg_hit]] * cols.peak_weights()[seg_hit, None]
+            table[hit] = np.rint(np.clip(w, 0.0, 1.0) * 255.0).astype(np.uint8)
+        self.table_weights = table
+
+    def export_gmod_table(self, output_path: str, encoding: str = "binary"):
+        """
+        build_weight_table() で構築したテーブルを書き出す。
+
+        Args:
+            output_path (str): 出力先
+            encoding (str):
+              - "binary": ヘッダ付きの生バイナリ (既定拡張子 .lswt)
+              - "base64": metadata + base64 文字列の小さなJSON (既定拡張子 .json)
+                          Lua 側は util.Base64Decode 後に
+                          string.byte(data, row * n_morphs + col + 1) で参照できる。
+        """
+        encoding = encoding.lower()
+        if encoding not in ("binary", "base64"):
+            raise ValueError(f"[GModExporter] 未知のencoding: {encoding}")
+
+        default_ext = ".lswt" if encoding == "binary" else ".json"
+        output_path = self._sanitize_filename(output_path, default_ext=default_ext)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+        n_ticks, n_morphs = self.table_weights.shape[0], len(self.table_morphs)
+        payload = np.ascontiguousarray(self.table_weights).tobytes()
+
+        if encoding == "binary":
+            with open(output_path, "wb") as f:
+                f.write(struct.pack(
+                    self.TABLE_HEADER_FORMAT, self.TABLE_MAGIC, self.TABLE_VERSION,
+                    self.table_rate, n_ticks, n_morphs, 0
+                ))
+                for name in self.table_morphs:
+                    name_bytes = name.encode("utf-8")[:255]
+                    f.write(struct.pack("<B", len(name_bytes)))
+                    f.write(name_bytes)
+                f.write(payload)
+        else:
+            out_data = {
+                "metadata": self.metadata,
+                "rate": self.table_rate,
+                "ticks": n_ticks,
+                "morphs": self.table_morphs,
+                "weights_b64": base64.b64encode(payload).decode("ascii")
+            }
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(out_data, f, ensure_ascii=False, separators=(",", ":"))
+
+        print(f"[GModExporter] ウェイトテーブル({encoding}, {n_ticks}tick x {n_morphs}morph) "
+              f"を {output_path} に出力しました。")
+
+    @classmethod
+    def read_gmod_table(cls, input_path: str):
+        """
+        export_gmod_table(encoding="binary") で書き出したファイルを読み戻す (検証・デバッグ用)。
+
+        Returns:
+            tuple: (rate, morphs(list), weights(np.ndarray uint8, shape=(n_ticks, n_morphs)))
+        """
+        with open(input_path, "rb") as f:
+            raw = f.read()
+
+        header_size = struct.calcsize(cls.TABLE_HEADER_FORMAT)
+        magic, version, rate, n_ticks, n_morphs, _ = struct.unpack_from(
+            cls.TABLE_HEADER_FORMAT, raw, 0
+        )
+        if magic != cls.TABLE_MAGIC:
+            raise ValueError(f"[GModExporter] ウェイトテーブルではありません: {input_path}")
+        if version != cls.TABLE_VERSION:
+            raise ValueError(f"[GModExporter] 未対応のテーブルバージョン: {version}")
+
+        offset = header_size
+        morphs = []
+        for _ in range(n_morphs):
+            name_len = raw[offset]
+            offset += 1
+            morphs.append(raw[offset:offset + name_len].decode("utf-8"))
+            offset += name_len
+
+        weights = np.frombuffer(raw, dtype=np.uint8, count=n_ticks * n_morphs, offset=offset)
+        return rate, morphs, weights.reshape(n_ticks, n_morphs)
+
     # -----------------------------------------
     # 内部ユーティリティ
     # -----------------------------------------
-    def _sanitize_filename(self, filename: str) -> str:
+    def _map_phoneme(self, ph: str) -> str:
+        """音素 → モーフ名 (ブレンド指定なら最も重いモーフ)。未定義なら _fallback、それも無ければ音素名そのまま。"""
+        if ph in self.phoneme_mapping:
+            return MorphMixer.primary_morph_of(self.phoneme_mapping[ph])
+        return MorphMixer.primary_morph_of(self.phoneme_mapping.get("_fallback", ph))
+
+    def _sanitize_filename(self, filename: str, default_ext: str = ".json") -> str:
         """ Windows禁止文字の置換 + ASCII以外が含まれていたら注意を促す例 """
-        base, ext = os.path.splitext(filename)
+        # ディレクトリ区切りまで置換しないよう、ファイル名部分だけを対象にする
+        base, ext = os.path.splitext(os.path.basename(filename))
         sanitized_base = re.sub(self.FORBIDDEN_CHARS_PATTERN, "_", base)
 
         # ASCII以外(日本語など)を検出
         if re.search(r'[^\x00-\x7F]', sanitized_base):
             print(f"[GModExporter] 注意: ファイル名にUnicode文字が含まれています: {sanitized_base}")
 
-        # デフォルト拡張子を .json にしたいなら
+        # 拡張子が無ければデフォルト拡張子を付与
         if not ext:
-            ext = ".json"
+            ext = default_ext
 
         new_name = sanitized_base + ext
         dir_name = os.path.dirname(filename)
@@ -216,6 +425,11 @@ def demo_main():
     exporter.from_lip_sync_data(lip_sync_data_example, fps=30, granularity="frame", fade_out=True)
     exporter.export_gmod_json("./output/gmod_frame.json")
 
+    # 3) 固定ステップのウェイトテーブル (バイナリ / base64)
+    exporter.build_weight_table(lip_sync_data_example, rate=30)
+    exporter.export_gmod_table("./output/gmod_table.lswt", encoding="binary")
+    exporter.export_gmod_table("./output/gmod_table_b64.json", encoding="base64")
+
 
 if __name__ == "__main__":
     demo_main()
@@ -14,13 +14,22 @@ exporter_vmd.py (高度なリップシンク処理付き)
 - 同じフレーム・同じモーフで weight=0→0 のキーが乱立するのを防ぐため、
   add_morph_key() 内で「重複キー」の排除ロジックを入れる。
 - 外部JSON (configs/phoneme_to_morph_map.json) があれば読み込み、マッピングをマージ
+- マッピング値は "あ" (1モーフ) のほか ["え", "い"] / {"い": 0.7, "う": 0.3} のブレンド指定も可。
+  MorphMixer で混合行列にコンパイルし、全セグメントのウェイトを一括計算する。
 """
 
 import os
 import struct
-import json
 import re
 
+from main.pipeline.morph_curve import MorphCurve
+from main.pipeline.morph_mixer import MorphMixer
+from main.utils.json_stream import dump_json_stream
+from main.utils.config_registry import load_config, load_mapping
+
+# 外部マッピングJSON (CWD → プロジェクトルートの順で探す)
+EXTERNAL_MAP_JSON = os.path.join("configs", "phoneme_to_morph_map.json")
+
 class VMDExporter:
     DEFAULT_HEADER_STR = "Vocaloid Motion Data 0002"
     DEFAULT_MODEL_NAME = "SomeModel"
@@ -30,7 +39,9 @@ class VMDExporter:
         self,
         header_str: str = None,
         model_name: str = None,
-        phoneme_mapping: dict = None
+        phoneme_mapping: dict = None,
+        character: str = None,
+        character_settings: dict = None
     ):
         """
         Args:
@@ -40,6 +51,11 @@ class VMDExporter:
                 例: {"a":"あ", "i":"い", "u":"う", "e":"え", "o":"お"}
                 未指定の場合は {"a":"a", "i":"i", "u":"u", "e":"e", "o":"o"}。
                 "_fallback": "a" なども追加可能。
+                値にはリスト / {モーフ名: 重み} でブレンドも指定できる。
+            character (str): lip_sync_config.json の character_settings のキャラ名。
+                指定すると派生音素 (a2, a3 など) が基底音素のモーフ行を引き継ぐ。
+            character_settings (dict): character_settings 相当の dict
+                (未指定で character があれば lip_sync_config.json のものを使う)
         """
         if header_str is None:
             header_str = self.DEFAULT_HEADER_STR
@@ -60,16 +76,8 @@ class VMDExporter:
             "o": "o",
         }
 
-        # 1) 外部JSON (configs/phoneme_to_morph_map.json) があれば読み込み
-        external_map = {}
-        external_map_path = os.path.join("configs", "phoneme_to_morph_map.json")
-        if os.path.exists(external_map_path):
-            try:
-                with open(external_map_path, "r", encoding="utf-8") as fm:
-                    external_map = json.load(fm)
-            except Exception as e:
-                print(f"[VMDExporter] 外部マッピングJSONの読み込み失敗: {e}")
-                external_map = {}
+        # 1) 外部JSON (configs/phoneme_to_morph_map.json) があれば読み込み (レジストリでキャッシュ済み)
+        external_map = load_mapping(EXTERNAL_MAP_JSON)
 
         # 2) マッピングをまとめてマージ
         merged_map = default_mapping.copy()
@@ -84,6 +92,10 @@ class VMDExporter:
 
         # 最終的に self.phoneme_mapping に設定
         self.phoneme_mapping = merged_map
+        self.character = character
+        if character_settings is None and character:
+            character_settings = load_config().get("character_settings", {})
+        self.character_settings = character_settings or {}
 
     def clear_morph_tracks(self):
         """モーフキーフレーム一覧をクリア。"""
@@ -154,41 +166,31 @@ class VMDExporter:
         if maybe_model:
             self.model_name = maybe_model
 
-        frames_info = lip_sync_data.get("lip_sync_frames", [])
-        # 時間順ソート
-        frames_info = sorted(frames_info, key=lambda x: x.get("start", 0.0))
-
-        # 次音素の開始時刻リスト (gap計算用)
-        start_times = [fi.get("start", 999999) for fi in frames_info]
-        next_start_times = []
-        for i in range(len(start_times) - 1):
-            next_start_times.append(start_times[i+1])
-        # 最後はもう次が無いので大きめの値を代入
-        next_start_times.append(999999.0)
-
-        # メインループ
-        for i, seg in enumerate(frames_info):
-            ph = seg.get("phoneme", "a")
-            st = seg.get("start", 0.0)
-            ed = seg.get("end", st + 0.2)
-            avg_rms = seg.get("avg_rms", 0.0)
-
-            # morph名取得
-            morph_name = self._map_phoneme(ph)
-
-            # 3点キーの基本時刻: start_f, mid_f, end_f
-            mid_sec = (st + ed) * 0.5
-            start_f = int(st  * fps)
-            mid_f   = int(mid_sec * fps)
-            end_f   = int(ed  * fps)
-
-            # RMS→peakWeight (簡易ロジック)
-            peak_weight = min(1.0, avg_rms * 2.0)
-
-            # 次音素開始との間隔
-            next_start = next_start_times[i]
-            gap = next_start - ed  # 連続する音素までの無音
+        curve = MorphCurve.from_lip_sync_data(lip_sync_data, fps=fps, mixer=self.build_mixer())
+        self.from_morph_curve(
+            curve,
+            fade_in=fade_in,
+            fade_out=fade_out,
+            crossfade_threshold=crossfade_threshold,
+            min_weight=min_weight
+        )
 
+    def from_morph_curve(
+        self,
+        curve: MorphCurve,
+        fade_in: bool = True,
+        fade_out: bool = True,
+        crossfade_threshold: float = 0.1,
+        min_weight: float = 0.0
+    ):
+        """
+        計算済みの MorphCurve からモーフキーフレームを生成する。
+        フレーム番号・peak weight・gap は curve 側で計算済みなので、ここではキーを打つだけ。
+        (引数の意味は from_lip_sync_data と同じ)
+        """
+        self.clear_morph_tracks()
+
+        for morph_name, start_f, mid_f, end_f, peak_weight, gap in curve.iter_keys():
             # [1] Startフレーム (フェードイン)
             if fade_in:
                 self.add_morph_key(start_f, morph_name, 0.0)
@@ -205,14 +207,23 @@ class VMDExporter:
                     # gapが大きい → 完全に閉じる
                     self.add_morph_key(end_f, morph_name, 0.0)
 
+    def build_mixer(self) -> MorphMixer:
+        """現在の phoneme_mapping / character から混合行列をコンパイルする。"""
+        return MorphMixer(
+            self.phoneme_mapping,
+            default_morph="a",
+            character=self.character,
+            character_settings=self.character_settings
+        )
+
     def _map_phoneme(self, ph: str) -> str:
         """
-        音素 → モーフ名 の変換。
+        音素 → モーフ名 の変換 (ブレンド指定なら最も重いモーフ)。
         未定義の音素は _fallback か "a" とする。
         """
         if ph in self.phoneme_mapping:
-            return self.phoneme_mapping[ph]
-        return self.phoneme_mapping.get("_fallback", "a")
+            return MorphMixer.primary_morph_of(self.phoneme_mapping[ph])
+        return MorphMixer.primary_morph_of(self.phoneme_mapping.get("_fallback", "a"))
 
     # -----------------------------------------
     # 以下、バイナリ/テキストのVMD出力処理
@@ -265,7 +276,11 @@ class VMDExporter:
 
         print(f"[VMDExporter] バイナリVMDを {output_path} に書き出しました。")
 
-    def export_vmd_text(self, output_path: str):
+    def export_vmd_text(self, output_path: str, compact: bool = False):
+        """
+        デバッグ用のテキスト(JSON)出力。
+        Face.Data はジェネレータで渡し、ストリーミングで書き出す (compact=True で最小表現)。
+        """
         if not output_path:
             print("[VMDExporter] 警告: テキスト出力ファイルが指定されていません。中断します。")
             return
@@ -291,7 +306,14 @@ class VMDExporter:
             },
             "Face": {
                 "Count": len(self.morph_tracks),
-                "Data": []
+                "Data": (
+                    {
+                        "FrameNo": track["frame"],
+                        "Name": track["morph_name"],
+                        "Weight": track["weight"]
+                    }
+                    for track in self.morph_tracks
+                )
             },
             "Camera": {
                 "Count": 0,
@@ -311,15 +333,8 @@ class VMDExporter:
             }
         }
 
-        for track in self.morph_tracks:
-            data_dict["Face"]["Data"].append({
-                "FrameNo": track["frame"],
-                "Name": track["morph_name"],
-                "Weight": track["weight"]
-            })
-
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(data_dict, f, ensure_ascii=False, indent=2)
+            dump_json_stream(data_dict, f, compact=compact)
 
         print(f"[VMDExporter] テキスト(デバッグ用)として {output_path} に書き出しました。")
 
@@ -335,7 +350,8 @@ class VMDExporter:
         return encoded
 
     def _sanitize_filename(self, filename: str) -> str:
-        base, ext = os.path.splitext(filename)
+        # ディレクトリ区切りを置換しないよう、ファイル名部分だけをサニタイズする
+        base, ext = os.path.splitext(os.path.basename(filename))
         sanitized_base = re.sub(self.FORBIDDEN_CHARS_PATTERN, "_", base)
         if re.search(r'[^\x00-\x7F]', sanitized_base):
             print(f"[VMDExporter] 注意: ファイル名に全角やUnicode文字が含まれています -> {sanitized_base}")
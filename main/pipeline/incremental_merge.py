@@ -0,0 +1,188 @@
+# main/pipeline/incremental_merge.py
+# -*- coding: utf-8 -*-
+
+"""
+incremental_merge.py
+
+タイムライン編集の反映 (LipSyncGenerator.apply_timeline_edits) を差分で行うためのモジュール。
+
+編集前後の phoneme_segments を比べて変更のあった範囲だけを再計算し、
+_merge_phonemes_and_rms + apply_overlap_easing を全体に掛け直した場合と
+同じ結果 (浮動小数点の計算順も同じ) を返す。
+
+- マージ: _merge_phonemes_and_rms は RMS のインデックスを先頭から一方向に進めるため、
+  音素 i が使う RMS の範囲は「i より前の音素の end の最大値」で決まる。
+  変更範囲の後ろは、この最大値が編集前と一致した時点で以降の結果も一致するので、そこで打ち切る。
+- オーバーラップ: iter_overlap_easing は直前のフレームの start に依存するため、
+  変更範囲の後ろは、出力フレームの start が編集前と一致した時点で打ち切る。
+- RMS の平均は元の実装と同じく区間ごとに sum() で求める (結果が全体再計算と完全に一致する)。
+
+依存:
+- 標準ライブラリのみ (bisect)
+
+使い方:
+    merger = IncrementalMerger(phoneme_segments, rms_timeline, raw_frames)
+    raw_frames, (lo, hi) = merger.update(new_segments)
+    frames = patch_overlap(old_frames, raw_frames, lo, hi, len(new_segments) - len(old_segments), ratio)
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+Segment = Tuple[str, float, float]
+
+
+def diff_range(old: List[Segment], new: List[Segment]) -> Tuple[int, int, int]:
+    """
+    old → new で変わった範囲。
+
+    Returns:
+        (a, old_end, new_end): old[a:old_end] が new[a:new_end] に置き換わった
+        (前後の一致部分を除いた最小の範囲)。変更が無ければ a == old_end == new_end。
+    """
+    n_old, n_new = len(old), len(new)
+    a = 0
+    limit = min(n_old, n_new)
+    while a < limit and old[a] == new[a]:
+        a += 1
+    b = 0
+    while b < limit - a and old[n_old - 1 - b] == new[n_new - 1 - b]:
+        b += 1
+    return a, n_old - b, n_new - b
+
+
+class IncrementalMerger:
+    """
+    _merge_phonemes_and_rms の結果 (オーバーラップ前の生フレーム) を保持し、差分で更新する。
+
+    Args:
+        segments (list): 現在の phoneme_segments [(phoneme, start, end), ...]
+        rms_timeline (list): [(time, rms), ...] (time は昇順)
+        raw_frames (list or None): segments と rms_timeline をマージした結果。None なら作り直す。
+    """
+
+    def __init__(self, segments: List[Segment], rms_timeline: list, raw_frames: Optional[List[Dict]] = None):
+        self.rms_timeline = rms_timeline
+        self.times = [t for (t, _) in rms_timeline]
+        self.values = [v for (_, v) in rms_timeline]
+        self.segments = list(segments)
+        self.end_max: List[float] = []
+        running = float("-inf")
+        for (_, _, ed) in self.segments:
+            running = max(running, ed)
+            self.end_max.append(running)
+        if raw_frames is None or len(raw_frames) != len(self.segments):
+            raw_frames = [self._merge_one(seg, self._pointer(i)) for i, seg in enumerate(self.segments)]
+        self.raw_frames = list(raw_frames)
+
+    def _pointer(self, index: int, end_max: List[float] = None) -> int:
+        """音素 index を処理する直前の RMS インデックス。"""
+        end_max = self.end_max if end_max is None else end_max
+        if index == 0:
+            return 0
+        return bisect_left(self.times, end_max[index - 1])
+
+    def _merge_one(self, seg: Segment, pointer: int) -> Dict:
+        ph, st, ed = seg
+        lo = max(pointer, bisect_left(self.times, st))
+        hi = bisect_left(self.times, ed)
+        seg_rms = self.values[lo:hi] if hi > lo else []
+        avg_val = sum(seg_rms) / len(seg_rms) if seg_rms else 0.0
+        return {"start": st, "end": ed, "phoneme": ph, "avg_rms": avg_val}
+
+    def update(self, new_segments: List[Segment]) -> Tuple[List[Dict], Tuple[int, int]]:
+        """
+        new_segments に置き換え、生フレームを差分で更新する。
+
+        Returns:
+            (raw_frames, (lo, hi)): 更新後の生フレームと、再計算した範囲 new[lo:hi]
+        """
+        old = self.segments
+        new = list(new_segments)
+        a, old_end, new_end = diff_range(old, new)
+        shift = len(new) - len(old)
+
+        running = self.end_max[a - 1] if a > 0 else float("-inf")
+        pointer = bisect_left(self.times, running) if a > 0 else 0
+        patched_frames, patched_max = [], []
+        j = a
+        while j < len(new):
+            if j >= new_end:
+                oj = j + (-shift)
+                prev_old = self.end_max[oj - 1] if oj > 0 else float("-inf")
+                if running == prev_old:
+                    break
+            frame = self._merge_one(new[j], pointer)
+            patched_frames.append(frame)
+            running = max(running, new[j][2])
+            patched_max.append(running)
+            pointer = max(pointer, bisect_left(self.times, new[j][2]))
+            j += 1
+
+        tail = j - shift
+        self.raw_frames = self.raw_frames[:a] + patched_frames + self.raw_frames[tail:]
+        self.end_max = self.end_max[:a] + patched_max + self.end_max[tail:]
+        self.segments = new
+        return self.raw_frames, (a, j)
+
+
+def patch_overlap(
+    old_frames: List[Dict],
+    raw_frames: List[Dict],
+    lo: int,
+    hi: int,
+    shift: int,
+    overlap_ratio: float
+) -> List[Dict]:
+    """
+    raw_frames[lo:hi] が変わったときに、apply_overlap_easing(raw_frames) の結果を
+    old_frames (変更前の出力) から差分で作る。
+
+    Args:
+        old_frames (list): 変更前の apply_overlap_easing の出力
+        raw_frames (list): 変更後の生フレーム (全体)
+        lo, hi (int): raw_frames のうち再計算された範囲
+        shift (int): 件数の増減 (変更後 - 変更前)。hi 以降の old 側のインデックスは j - shift
+        overlap_ratio (float): apply_overlap_easing と同じ値
+    """
+    if overlap_ratio <= 0.0 or not raw_frames:
+        return raw_frames
+
+    n = len(raw_frames)
+    prev = None
+    if lo > 0:
+        # 直前のフレームの「次のフレームに縮められる前」の状態を復元する
+        base = raw_frames[lo - 1]
+        prev = dict(old_frames[lo - 1])
+        if lo - 1 == 0:
+            prev["end"] = base["end"]
+        else:
+            prev["end"] = prev["start"] + (base["end"] - base["start"])
+
+    out = old_frames[:max(lo - 1, 0)]
+    j = lo
+    while j < n:
+        current = dict(raw_frames[j])
+        if prev is not None:
+            base_duration = current["end"] - current["start"]
+            overlap_time = base_duration * overlap_ratio
+            prev_end = prev["end"]
+            new_start = current["start"] - overlap_time
+            if new_start < prev_end:
+                delta = prev_end - new_start
+                shift_amt = min(delta, overlap_time) * 0.5
+                prev["end"] -= shift_amt
+                new_start += shift_amt
+            current["start"] = new_start
+            current["end"] = new_start + base_duration
+            out.append(prev)
+        prev = current
+        j += 1
+        if j > hi and j - 1 - shift < len(old_frames) and current["start"] == old_frames[j - 1 - shift]["start"]:
+            # ここから先は変更前と同じ (フレーム j-1 の end も次のフレームが同じなので一致する)
+            out.append(old_frames[j - 1 - shift])
+            out.extend(old_frames[j - shift:])
+            return out
+    if prev is not None:
+        out.append(prev)
+    return out
@@ -0,0 +1,170 @@
+# main/pipeline/lip_sync_columns.py
+# -*- coding: utf-8 -*-
+
+"""
+lip_sync_columns.py
+
+lip_sync_frames (dict のリスト) を列指向 (columnar) の NumPy 配列に変換して扱うためのモジュール。
+
+- start / end / avg_rms を float64 配列、phoneme を整数コード配列 + 語彙リストで保持する。
+- 時刻 → セグメント番号の検索を np.searchsorted でまとめて行えるため、
+  フレーム単位のテーブル生成などで Python ループを避けられる。
+- to_frames() / iter_records() で従来の dict 形式にも戻せる。
+
+使い方:
+    from main.pipeline.lip_sync_columns import LipSyncColumns
+
+    cols = LipSyncColumns.from_frames(lip_sync_data["lip_sync_frames"])
+    seg_idx = cols.segment_index_at(np.arange(0, 10, 1 / 30))
+"""
+
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+class LipSyncColumns:
+    """
+    lip_sync_frames の列指向表現。
+
+    Attributes:
+        start (np.ndarray): float64, 各セグメントの開始時刻(秒)
+        end (np.ndarray): float64, 各セグメントの終了時刻(秒)
+        avg_rms (np.ndarray): float64, 各セグメントの平均RMS
+        phoneme_codes (np.ndarray): int32, phonemes へのインデックス
+        phonemes (List[str]): 音素の語彙 (コード → 音素名)
+    """
+
+    __slots__ = ("start", "end", "avg_rms", "phoneme_codes", "phonemes")
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        avg_rms: np.ndarray,
+        phoneme_codes: np.ndarray,
+        phonemes: Sequence[str]
+    ):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.avg_rms = np.asarray(avg_rms, dtype=np.float64)
+        self.phoneme_codes = np.asarray(phoneme_codes, dtype=np.int32)
+        self.phonemes = list(phonemes)
+
+    # ----------------------------------------------------------------
+    # 変換
+    # ----------------------------------------------------------------
+    @classmethod
+    def from_frames(cls, frames: List[Dict]) -> "LipSyncColumns":
+        """
+        lip_sync_frames ([{"start","end","phoneme","avg_rms"}, ...]) から生成。
+        欠損キーは各エクスポータと同じデフォルト値で補う。
+        """
+        n = len(frames)
+        start = np.empty(n, dtype=np.float64)
+        end = np.empty(n, dtype=np.float64)
+        avg_rms = np.empty(n, dtype=np.float64)
+        codes = np.empty(n, dtype=np.int32)
+
+        vocab: Dict[str, int] = {}
+        for i, fr in enumerate(frames):
+            st = fr.get("start", 0.0)
+            start[i] = st
+            end[i] = fr.get("end", st + 0.2)
+            avg_rms[i] = fr.get("avg_rms", 0.0)
+            ph = fr.get("phoneme", "a")
+            code = vocab.get(ph)
+            if code is None:
+                code = len(vocab)
+                vocab[ph] = code
+            codes[i] = code
+
+        return cls(start, end, avg_rms, codes, list(vocab.keys()))
+
+    def to_frames(self) -> List[Dict]:
+        """従来の lip_sync_frames 形式 (dict のリスト) に戻す。"""
+        return list(self.iter_records())
+
+    def iter_records(self) -> Iterator[Dict]:
+        """1セグメントずつ dict を生成する (全件をメモリに並べない)。"""
+        phonemes = self.phonemes
+        for st, ed, ph_code, rms in zip(
+            self.start.tolist(), self.end.tolist(),
+            self.phoneme_codes.tolist(), self.avg_rms.tolist()
+        ):
+            yield {
+                "start": st,
+                "end": ed,
+                "phoneme": phonemes[ph_code],
+                "avg_rms": rms
+            }
+
+    # ----------------------------------------------------------------
+    # 参照系
+    # ----------------------------------------------------------------
+    def __len__(self) -> int:
+        return int(self.start.shape[0])
+
+    @property
+    def duration(self) -> float:
+        """最後のセグメントの終了時刻 (空なら 0.0)。"""
+        if len(self) == 0:
+            return 0.0
+        return float(self.end.max())
+
+    def sorted_by_start(self) -> "LipSyncColumns":
+        """start 昇順に並べ替えたコピーを返す (安定ソート)。"""
+        order = np.argsort(self.start, kind="stable")
+        return LipSyncColumns(
+            self.start[order], self.end[order], self.avg_rms[order],
+            self.phoneme_codes[order], self.phonemes
+        )
+
+    def segment_index_at(self, times: np.ndarray, assume_sorted: bool = False) -> np.ndarray:
+        """
+        各時刻 t について start <= t < end となるセグメント番号を返す。
+        該当なしは -1。t を含むセグメントが複数ある場合は、開始が最も遅いものを採用する
+        (短いセグメントが長いセグメントの途中で終わる入れ子の場合も、外側の長いセグメントを返す)。
+
+        Args:
+            times (np.ndarray): 検索したい時刻の配列(秒)
+            assume_sorted (bool): True なら start が昇順である前提で並べ替えを省略
+
+        Returns:
+            np.ndarray: int64, times と同じ長さのセグメント番号配列
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if len(self) == 0:
+            return np.full(times.shape, -1, dtype=np.int64)
+
+        if assume_sorted:
+            order = None
+            starts = self.start
+        else:
+            order = np.argsort(self.start, kind="stable")
+            starts = self.start[order]
+
+        ends = self.end if order is None else self.end[order]
+        pos = np.searchsorted(starts, times, side="right") - 1
+        valid = pos >= 0
+        pos_clipped = np.where(valid, pos, 0)
+        valid &= times < ends[pos_clipped]
+        result = np.where(valid, pos_clipped, -1).astype(np.int64)
+
+        # 開始が最も遅いセグメントが t より前に終わっていても、それより前の長いセグメントが
+        # t を含んでいることがある (入れ子)。終了時刻の累積最大で該当しうるものだけ探し直す。
+        max_ends = np.maximum.accumulate(ends)
+        nested = np.nonzero((pos >= 0) & ~valid & (times < max_ends[pos_clipped]))[0]
+        for i in nested.tolist():
+            t, hi = times.flat[i], int(pos.flat[i])
+            lo = int(np.searchsorted(max_ends[:hi + 1], t, side="right"))
+            hit = np.nonzero(ends[lo:hi + 1] > t)[0]
+            result.flat[i] = lo + int(hit[-1])
+
+        if order is not None:
+            result = np.where(result >= 0, order[np.maximum(result, 0)], -1)
+        return result
+
+    def peak_weights(self, gain: float = 2.0) -> np.ndarray:
+        """avg_rms から各エクスポータ共通の peak weight (min(1, rms*gain)) を計算。"""
+        return np.minimum(1.0, self.avg_rms * gain)
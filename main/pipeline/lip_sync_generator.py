@@ -7,12 +7,22 @@ lip_sync_generator.py (高度な時間調整付き)
 - 短い無音をつぶして母音を被せる、長い無音はそのままにする…など、時間軸の再調整を行う例。
 - generate_lip_sync() 内で _smooth_phoneme_segments() を呼び出し、
   phoneme_segments の start/end_time を微調整してから _merge_phonemes_and_rms() へ渡す。
+- generate_lip_sync_stream() は音声をブロック単位で受け取り、確定したフレームから順に返す
+  ストリーミング版 (数時間の録音でもメモリ使用量が一定)。
+- apply_timeline_edits() / apply_segment_edits() はタイムライン編集を差分で反映する
+  (変更のあった音素とその前後だけ RMS 平均・オーバーラップを再計算する。incremental_merge.py)。
+- processing_options.enable_cache が有効なら、音声の内容・テキスト・結果に影響する設定をキーに
+  解析結果全体をキャッシュする (main.utils.result_cache)。同じ入力の再解析は数ミリ秒で返る。
+- 各ステージの所要時間・件数は self.metrics (main.utils.metrics.Metrics) に記録される。
+  self.stage_listener を設定すると各ステージの開始時に呼ばれる (UI の進捗表示・中断用)。
+  進捗表示は self.verbose (lip_sync_config.json の logging.verbose) が True のときだけ行う。
 """
 
 import os
 import json
 import numpy as np
 import traceback
+from typing import Iterable, Iterator, Optional, Tuple
 
 # hatsuon.py があればインポート、なければ None でダミー実装へ
 try:
@@ -26,20 +36,19 @@ try:
 except ImportError:
     overlap_utils = None
 
-CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "lip_sync_config.json")
+from main.utils.json_stream import dump_json_stream
+from main.utils.config_registry import LIP_SYNC_CONFIG, load_config
+from main.utils.metrics import Metrics
+from main.utils.result_cache import ResultCache
+from main.pipeline.incremental_merge import IncrementalMerger, patch_overlap
+
+CONFIG_FILE = LIP_SYNC_CONFIG
 
 
 class LipSyncGenerator:
     def __init__(self, config_path: str = CONFIG_FILE):
-        self.config = {}
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
-            except Exception as e:
-                print(f"[LipSyncGenerator] 設定ファイル読み込みエラー: {e}")
-        else:
-            print(f"[LipSyncGenerator] 設定ファイルが見つかりません: {config_path}")
+        # 設定はプロセス共通のレジストリから読み取り専用ビューで受け取る (2回目以降は再パースしない)
+        self.config = load_config(config_path)
 
         # processing_options
         processing_opts = self.config.get("processing_options", {})
@@ -52,8 +61,16 @@ class LipSyncGenerator:
         # オプションで gap_threshold を config から取り出し (なければデフォルト0.05)
         self.default_gap_threshold = processing_opts.get("gap_threshold", 0.05)
 
+        # 解析結果のキャッシュ (None なら使わない)
+        self.result_cache = None
+        if processing_opts.get("enable_cache", False):
+            self.result_cache = ResultCache(processing_opts.get("cache_directory", "./cache"))
+
+        # ストリーミング解析で音声全体の長さが不明な場合の、1音素あたりの長さ(秒)
+        self.stream_phoneme_duration = processing_opts.get("stream_phoneme_duration", 0.12)
+
         # ASR設定
-        asr_conf = self.config.setdefault("asr", {})
+        asr_conf = self.config.get("asr", {})
         self.asr_model_size = asr_conf.get("model_size", "large")
         if self.asr_model_size not in ["small", "medium", "large"]:
             self.asr_model_size = "large"
@@ -61,12 +78,22 @@ class LipSyncGenerator:
         # export_options
         self.export_options = self.config.get("export_options", {})
 
+        # 進捗表示 (バッチ処理では False にして print のコストを省く)
+        self.verbose = self.config.get("logging", {}).get("verbose", True)
+
+        # 直近の解析の計測結果 (generate_lip_sync / export_lip_sync のたびに更新)
+        self.metrics = Metrics()
+        # ステージ開始の通知先 (UI のワーカーが進捗表示・中断に使う。None なら通知しない)
+        self.stage_listener = None
+
         # 解析結果を保持する辞書
         self.lip_sync_data = {
             "phoneme_segments": [],
             "rms_timeline": [],
             "lip_sync_frames": []
         }
+        # 差分再マージ用: 直近のマージ結果 (_remember_merge)
+        self._merge_cache = None
 
     def generate_lip_sync(
         self,
@@ -83,69 +110,199 @@ class LipSyncGenerator:
         if gap_threshold is None:
             gap_threshold = self.default_gap_threshold
 
+        metrics = self.metrics = Metrics(listener=self.stage_listener)
+
         if self.use_gpu:
-            print("[LipSyncGenerator] GPUフラグON (※本サンプルではCPUで処理)")
+            self._log("GPUフラグON (※本サンプルではCPUで処理)")
 
         # テキスト正規化
-        debug_text = text.replace("\n", "\\n").replace("\r", "\\r")
-        print(f"[LipSyncGenerator] Raw user text = '{debug_text}'")
+        with metrics.stage("normalize"):
+            text_normalized = self._normalize_text(text)
+        metrics.incr("text_chars", len(text_normalized))
+        self._log(f"normalized text = '{self._preview(text_normalized)}' ({len(text_normalized)}文字)")
+
+        # キャッシュ (テキストが空で ASR を使う場合は結果が毎回変わりうるので使わない)
+        cache_key = None
+        if self.result_cache is not None and (text_normalized or not self.allow_asr):
+            with metrics.stage("cache"):
+                cache_key = self.result_cache.make_key(
+                    audio_data, sample_rate, text_normalized, self._cache_params(gap_threshold)
+                )
+                cached = self.result_cache.load(cache_key)
+            if cached is not None:
+                metrics.incr("cache_hits")
+                metrics.incr("frames", len(cached["lip_sync_frames"]))
+                self._log("キャッシュ済みの解析結果を使います。")
+                self.lip_sync_data.update(cached)
+                self._merge_cache = None
+                return self.lip_sync_data
+            metrics.incr("cache_misses")
+
+        result = self._generate_lip_sync(audio_data, text_normalized, sample_rate, gap_threshold)
+        if cache_key is not None:
+            with metrics.stage("cache"):
+                self.result_cache.store(cache_key, result)
+        return result
+
+    def _cache_params(self, gap_threshold: float) -> dict:
+        """キャッシュキーに含める、解析結果に影響する設定。"""
+        return {
+            "rms_threshold": self.rms_threshold,
+            "gap_threshold": gap_threshold,
+            "overlap_ratio": self.overlap_ratio,
+            "phoneme_timing_mode": self.phoneme_timing_mode,
+            "asr_model_size": self.asr_model_size,
+            "allow_asr": self.allow_asr,
+            "hatsuon": hatsuon is not None,
+            "overlap_utils": overlap_utils is not None
+        }
 
-        text_normalized = (
-            text.replace("\u3000", " ")
-                .replace("\n", " ")
-                .replace("\r", " ")
-                .strip()
-        )
-        print(f"[LipSyncGenerator] normalized text = '{text_normalized}'")
+    def _generate_lip_sync(self, audio_data: np.ndarray, text_normalized: str, sample_rate: int,
+                           gap_threshold: float) -> dict:
+        """generate_lip_sync の本体 (キャッシュ確認後)。"""
+        metrics = self.metrics
 
         # テキストが空 → ASR or ダミー
         if not text_normalized:
             if self.allow_asr:
-                print(f"[LipSyncGenerator] テキストが実質空。Whisperダミーを試みます。(model_size={self.asr_model_size})")
+                self._log(f"テキストが実質空。Whisperダミーを試みます。(model_size={self.asr_model_size})")
                 try:
                     text_asr_result = self._fake_asr_whisper(audio_data, sample_rate)
                     if not text_asr_result:
-                        print("[LipSyncGenerator] Whisper(ダミー)が空 → ダミー音素使用")
+                        self._log("Whisper(ダミー)が空 → ダミー音素使用")
                         return self._dummy_lip_sync(audio_data, sample_rate)
                     else:
-                        print(f"[LipSyncGenerator] Whisper(ダミー)結果: {text_asr_result}")
+                        self._log(f"Whisper(ダミー)結果: {text_asr_result}")
                         text_normalized = text_asr_result
                 except Exception as e:
-                    print("[LipSyncGenerator] Whisper(ダミー)呼び出しでエラー:", e)
+                    self._log(f"Whisper(ダミー)呼び出しでエラー: {e}")
                     return self._dummy_lip_sync(audio_data, sample_rate)
             else:
-                print("[LipSyncGenerator] テキスト空 & ASR不可 → ダミー音素を使用")
+                self._log("テキスト空 & ASR不可 → ダミー音素を使用")
                 return self._dummy_lip_sync(audio_data, sample_rate)
 
         # --- テキストがある → 通常フロー
         total_duration = len(audio_data) / float(sample_rate)
-        phoneme_segments = self._analyze_phonemes(text_normalized, total_duration)
+        with metrics.stage("phonemes"):
+            phoneme_segments = self._analyze_phonemes(text_normalized, total_duration)
 
         # 短いgapを自動で被せる処理
-        phoneme_segments_smoothed = self._smooth_phoneme_segments(phoneme_segments, gap_threshold)
+        with metrics.stage("smooth"):
+            phoneme_segments_smoothed = self._smooth_phoneme_segments(phoneme_segments, gap_threshold)
+        metrics.incr("segments", len(phoneme_segments_smoothed))
 
         # RMS解析
-        rms_timeline = self._analyze_rms(audio_data, sample_rate)
+        with metrics.stage("rms"):
+            rms_timeline = self._analyze_rms(audio_data, sample_rate)
+        metrics.incr("rms_frames", len(rms_timeline))
 
         # マージ
-        lip_sync_frames = self._merge_phonemes_and_rms(phoneme_segments_smoothed, rms_timeline)
+        with metrics.stage("merge"):
+            lip_sync_frames = self._merge_phonemes_and_rms(phoneme_segments_smoothed, rms_timeline)
+        raw_frames = lip_sync_frames
 
         # overlap_utils があればオーバーラップ処理
         if overlap_utils is not None:
-            print("[LipSyncGenerator] overlap_utils でオーバーラップ処理を適用します。")
-            lip_sync_frames = overlap_utils.apply_overlap_easing(
-                lip_sync_frames, self.overlap_ratio
-            )
+            self._log("overlap_utils でオーバーラップ処理を適用します。")
+            with metrics.stage("overlap"):
+                lip_sync_frames = overlap_utils.apply_overlap_easing(
+                    lip_sync_frames, self.overlap_ratio
+                )
         else:
-            print("[LipSyncGenerator] overlap_utils が無いためオーバーラップ処理はスキップ。")
+            self._log("overlap_utils が無いためオーバーラップ処理はスキップ。")
+        metrics.incr("frames", len(lip_sync_frames))
 
         # 結果を保持
         self.lip_sync_data["phoneme_segments"] = phoneme_segments_smoothed
         self.lip_sync_data["rms_timeline"] = rms_timeline
         self.lip_sync_data["lip_sync_frames"] = lip_sync_frames
+        self._remember_merge(raw_frames)
 
         return self.lip_sync_data
 
+    def generate_lip_sync_stream(
+        self,
+        audio_blocks: Iterable[np.ndarray],
+        text: str,
+        sample_rate: int = 16000,
+        total_duration: Optional[float] = None,
+        gap_threshold: float = None
+    ) -> Iterator[dict]:
+        """
+        generate_lip_sync のストリーミング版。
+        音声をブロック (1次元 float 配列) のイテレータで受け取り、確定した lip_sync フレームから順に yield する。
+
+        - RMS は 10ms ごとに逐次計算し、音素区間の終端を過ぎた時点でその区間の平均を確定する。
+        - オーバーラップ処理は次の音素を受け取った時点で前の音素を確定する (1件だけ保持)。
+        - 保持するのはテキスト由来の音素区間と、処理中のブロック・直前の1フレームのみで、
+          rms_timeline や全フレームのリストは作らない (self.lip_sync_data も更新しない)。
+
+        Args:
+            audio_blocks: float32 のブロックを返すイテレータ (ファイル / パイプ / ソケット)
+            text (str): 読み上げテキスト
+            sample_rate (int): ブロックのサンプリングレート
+            total_duration (float or None): 音声全体の長さ(秒)。分かっていれば generate_lip_sync と
+                同じ音素タイミングになる。None (パイプ等で不明) の場合は 1音素あたり
+                stream_phoneme_duration 秒で割り当てる。
+            gap_threshold (float): generate_lip_sync と同じ。None なら設定値。
+
+        Yields:
+            dict: {"start", "end", "phoneme", "avg_rms"} (generate_lip_sync の lip_sync_frames と同じ形式)
+        """
+        if gap_threshold is None:
+            gap_threshold = self.default_gap_threshold
+
+        text_normalized = self._normalize_text(text)
+        self._log(f"(stream) normalized text = '{self._preview(text_normalized)}' ({len(text_normalized)}文字)")
+
+        if text_normalized:
+            phonemes = self._text_to_phonemes(text_normalized)
+            if total_duration is None:
+                total_duration = len(phonemes) * self.stream_phoneme_duration
+                self._log(f"(stream) 音声長が不明のため 1音素 {self.stream_phoneme_duration}s で割り当てます。")
+            phoneme_segments = self._align_phonemes(phonemes, total_duration)
+            phoneme_segments = self._smooth_phoneme_segments(phoneme_segments, gap_threshold)
+        else:
+            # ASR は音声全体が必要なためストリーミングでは使わない
+            if self.allow_asr:
+                self._log("(stream) ストリーミングでは ASR を使えません。ダミー音素を使用します。")
+            else:
+                self._log("(stream) テキスト空 → ダミー音素を使用")
+            phoneme_segments = [
+                ("a", 0.0, 1.0),
+                ("i", 1.0, 2.0),
+                ("u", 2.0, 3.0),
+            ]
+
+        rms_stream = self._iter_rms(audio_blocks, sample_rate)
+        frames = self._iter_merge_phonemes_and_rms(phoneme_segments, rms_stream)
+
+        if overlap_utils is not None:
+            frames = overlap_utils.iter_overlap_easing(frames, self.overlap_ratio)
+
+        for frame in frames:
+            yield frame
+
+    def _log(self, message: str):
+        """進捗表示。verbose=False のときは何もしない。"""
+        if self.verbose:
+            print(f"[LipSyncGenerator] {message}")
+
+    @staticmethod
+    def _preview(text: str, limit: int = 40) -> str:
+        """ログ用にテキストを先頭 limit 文字に切り詰める (全文はログに出さない)。"""
+        return text if len(text) <= limit else text[:limit] + "..."
+
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        """全角スペース・改行を半角スペースにし、前後の空白を除去する。"""
+        return (
+            text.replace("\u3000", " ")
+                .replace("\n", " ")
+                .replace("\r", " ")
+                .strip()
+        )
+
     def _smooth_phoneme_segments(self, segments, gap_threshold=0.05):
         """
         短いgapを被せる簡易処理:
@@ -209,6 +366,7 @@ class LipSyncGenerator:
 
         # phoneme_segments の上書き
         seg_list = timeline_data.get("phoneme_segments", [])
+        new_segments = None
         if seg_list:
             new_segments = []
             for seg in seg_list:
@@ -216,43 +374,117 @@ class LipSyncGenerator:
                 st = seg.get("start_time", 0.0)
                 ed = seg.get("end_time", st + 0.2)
                 new_segments.append((ph, st, ed))
-            self.lip_sync_data["phoneme_segments"] = new_segments
 
         # overlap_rate があれば更新
         new_ol = timeline_data.get("overlap_rate", None)
         if new_ol is not None:
-            self.overlap_ratio = new_ol
-            print(f"[LipSyncGenerator] overlap_ratio updated to {new_ol}")
+            self._log(f"overlap_ratio updated to {new_ol}")
 
-        # 再マージ
-        phoneme_segments = self.lip_sync_data["phoneme_segments"]
-        rms_timeline = self.lip_sync_data["rms_timeline"]
-        frames = self._merge_phonemes_and_rms(phoneme_segments, rms_timeline)
-        if overlap_utils is not None:
-            frames = overlap_utils.apply_overlap_easing(frames, self.overlap_ratio)
+        self.apply_segment_edits(new_segments, overlap_ratio=new_ol)
+        self._log("apply_timeline_edits: done.")
 
-        self.lip_sync_data["lip_sync_frames"] = frames
-        print("[LipSyncGenerator] apply_timeline_edits: done.")
+    def apply_segment_edits(self, segments: Optional[list] = None, overlap_ratio: Optional[float] = None):
+        """
+        編集後の phoneme_segments [(phoneme, start, end), ...] を反映し、lip_sync_frames を更新する。
+
+        直前の結果と比べて変わった音素の範囲 (と、結果が変わる前後の音素) だけを再計算するため、
+        長いトラックで1音節だけ直した場合もほぼ一瞬で終わる。結果は全体を再マージした場合と一致する。
+
+        Args:
+            segments (list or None): 新しい音素区間。None なら現在のまま (overlap_ratio だけ変える場合)
+            overlap_ratio (float or None): 指定すると self.overlap_ratio を更新する
+        """
+        data = self.lip_sync_data
+        old_segments = data["phoneme_segments"]
+        rms_timeline = data["rms_timeline"]
+        if segments is None:
+            segments = old_segments
+        if overlap_ratio is not None:
+            self.overlap_ratio = overlap_ratio
+        ratio = self.overlap_ratio if overlap_utils is not None else 0.0
+
+        cache = self._merge_cache
+        valid = (
+            cache is not None
+            and cache["segments"] is old_segments
+            and cache["rms_timeline"] is rms_timeline
+            and cache["frames"] is data["lip_sync_frames"]
+        )
+
+        metrics = self.metrics = Metrics(listener=self.stage_listener)
+        with metrics.stage("remerge"):
+            if valid:
+                merger = cache["merger"]
+                if merger is None:
+                    merger = IncrementalMerger(old_segments, rms_timeline, cache["raw_frames"])
+                raw_frames, (lo, hi) = merger.update(segments)
+            else:
+                # 直前のマージ結果が無い (lip_sync_data を外から差し替えた等) → 全体を計算
+                merger = IncrementalMerger(segments, rms_timeline)
+                raw_frames, (lo, hi) = merger.raw_frames, (0, len(segments))
+
+            if valid and cache["overlap_ratio"] == ratio:
+                frames = patch_overlap(
+                    data["lip_sync_frames"], raw_frames, lo, hi,
+                    len(segments) - len(old_segments), ratio
+                )
+            elif overlap_utils is not None:
+                frames = overlap_utils.apply_overlap_easing(raw_frames, ratio)
+            else:
+                frames = raw_frames
+        metrics.incr("segments", len(segments))
+        metrics.incr("remerged_segments", hi - lo)
+        metrics.incr("frames", len(frames))
+        self._log(f"apply_segment_edits: {hi - lo}/{len(segments)} 音素を再計算")
+
+        data["phoneme_segments"] = segments
+        data["lip_sync_frames"] = frames
+        self._remember_merge(raw_frames, merger)
+
+    def _remember_merge(self, raw_frames: list, merger: Optional[IncrementalMerger] = None):
+        """差分再マージ用に、lip_sync_data の現在の中身とオーバーラップ前のフレームを覚えておく。"""
+        self._merge_cache = {
+            "segments": self.lip_sync_data["phoneme_segments"],
+            "rms_timeline": self.lip_sync_data["rms_timeline"],
+            "frames": self.lip_sync_data["lip_sync_frames"],
+            "raw_frames": raw_frames,
+            "overlap_ratio": self.overlap_ratio if overlap_utils is not None else 0.0,
+            "merger": merger
+        }
+
+    def export_lip_sync(self, export_format="json", output_path="./output/lipsync_result.json",
+                        compact: bool = False):
+        """
+        lip_sync_data をファイルへ書き出す。
+        JSON はストリーミングで書き出すため、長時間の結果でも全体を文字列化しない。
 
-    def export_lip_sync(self, export_format="json", output_path="./output/lipsync_result.json"):
+        Args:
+            export_format (str): "json" / "vmd"(ダミー)
+            output_path (str): 出力先
+            compact (bool): True なら改行・インデント無しの最小表現で書き出す
+        """
         if not self.lip_sync_data["lip_sync_frames"]:
             print("[LipSyncGenerator] lip_sync_frames が空です。解析実行しましたか？")
             return
 
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
+        with self.metrics.stage("export"):
+            self._export_lip_sync(export_format, output_path, compact)
+
+    def _export_lip_sync(self, export_format: str, output_path: str, compact: bool):
         if "json" in export_format.lower():
             with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(self.lip_sync_data, f, indent=2, ensure_ascii=False)
-            print(f"[LipSyncGenerator] JSON出力 -> {output_path}")
+                dump_json_stream(self.lip_sync_data, f, compact=compact)
+            self._log(f"JSON出力 -> {output_path}")
 
         elif "vmd" in export_format.lower():
             # ダミーVMD出力（本来は exporter_vmd.py を使う想定）
-            print("[LipSyncGenerator] VMDダミー出力します。本来は exporter_vmd に委譲するのがおすすめ。")
+            self._log("VMDダミー出力します。本来は exporter_vmd に委譲するのがおすすめ。")
             with open(output_path, "w", encoding="utf-8") as f:
                 f.write("// VMD dummy file\n")
-                json.dump(self.lip_sync_data, f, indent=2, ensure_ascii=False)
-            print(f"[LipSyncGenerator] ダミーVMD出力 -> {output_path}")
+                dump_json_stream(self.lip_sync_data, f, compact=compact)
+            self._log(f"ダミーVMD出力 -> {output_path}")
         else:
             print(f"[LipSyncGenerator] 未対応の形式です: {export_format}")
 
@@ -260,36 +492,64 @@ class LipSyncGenerator:
     # 内部メソッド: ASRダミー, ダミー音素, hatsuon 等
     # ----------------------------------------------------------------
     def _fake_asr_whisper(self, audio_data: np.ndarray, sr: int) -> str:
-        print(f"[LipSyncGenerator] [fake_asr_whisper] model_size={self.asr_model_size}, gpu={self.use_gpu}")
+        self._log(f"[fake_asr_whisper] model_size={self.asr_model_size}, gpu={self.use_gpu}")
         import random
         if random.random() < 0.5:
             return ""
         return f"Whisper({self.asr_model_size})ダミー結果"
 
     def _dummy_lip_sync(self, audio_data: np.ndarray, sr: int) -> dict:
-        print("[LipSyncGenerator] ダミー音素解析を行います。(a->i->u)")
+        self._log("ダミー音素解析を行います。(a->i->u)")
         dummy_segments = [
             ("a", 0.0, 1.0),
             ("i", 1.0, 2.0),
             ("u", 2.0, 3.0),
         ]
 
-        rms_timeline = self._analyze_rms(audio_data, sr)
-        frames = self._merge_phonemes_and_rms(dummy_segments, rms_timeline)
+        metrics = self.metrics
+        with metrics.stage("rms"):
+            rms_timeline = self._analyze_rms(audio_data, sr)
+        with metrics.stage("merge"):
+            frames = self._merge_phonemes_and_rms(dummy_segments, rms_timeline)
+        raw_frames = frames
 
         if overlap_utils is not None:
-            frames = overlap_utils.apply_overlap_easing(frames, self.overlap_ratio)
+            with metrics.stage("overlap"):
+                frames = overlap_utils.apply_overlap_easing(frames, self.overlap_ratio)
+        metrics.incr("segments", len(dummy_segments))
+        metrics.incr("rms_frames", len(rms_timeline))
+        metrics.incr("frames", len(frames))
 
         self.lip_sync_data["phoneme_segments"] = dummy_segments
         self.lip_sync_data["rms_timeline"] = rms_timeline
         self.lip_sync_data["lip_sync_frames"] = frames
+        self._remember_merge(raw_frames)
         return self.lip_sync_data
 
     def _analyze_phonemes(self, text: str, total_duration: float) -> list:
+        return self._align_phonemes(self._text_to_phonemes(text), total_duration)
+
+    def _text_to_phonemes(self, text: str) -> list:
+        """
+        テキスト → 音素列 (タイミング無し)。音声を必要としないので、RMS解析などと並行して実行できる。
+        """
         if hatsuon is not None:
-            print("[LipSyncGenerator] hatsuon を使って音素解析中...")
+            self._log("hatsuon を使って音素解析中...")
             engine = hatsuon.HatsuonEngine(language="ja", overlap_ratio=self.overlap_ratio)
-            segs = engine.text_to_phoneme_timing(text, total_duration=total_duration)
+            return engine.text_to_phonemes(text)
+
+        # ダミー: a,i,u を繰り返し
+        self._log("hatsuon.py が無いのでダミー音素を生成します。(a,i,uループ)")
+        tokens = list(text.replace(" ", ""))  # 空白除去
+        return [["a", "i", "u"][i % 3] for i in range(len(tokens))]
+
+    def _align_phonemes(self, phonemes: list, total_duration: float) -> list:
+        """
+        音素列に音声全体の長さからタイミングを割り当て、(phoneme, start, end) のリストにする。
+        """
+        if hatsuon is not None:
+            engine = hatsuon.HatsuonEngine(language="ja", overlap_ratio=self.overlap_ratio)
+            segs = engine.phonemes_to_timing(phonemes, total_duration=total_duration)
             phoneme_segments = []
             for s in segs:
                 ph = s["phoneme"]
@@ -297,27 +557,24 @@ class LipSyncGenerator:
                 ed = s["end"]
                 phoneme_segments.append((ph, st, ed))
             return phoneme_segments
-        else:
-            # ダミー: 0.2秒ずつ a,i,u を繰り返し
-            print("[LipSyncGenerator] hatsuon.py が無いのでダミー音素を生成します。(a,i,uループ)")
-            tokens = list(text.replace(" ", ""))  # 空白除去
-            n_tok = len(tokens)
-            if n_tok == 0:
-                return []
-
-            seg_len = total_duration / n_tok
-            segs = []
-            t0 = 0.0
-            for i, ch in enumerate(tokens):
-                ph = ["a", "i", "u"][i % 3]
-                segs.append((ph, t0, t0 + seg_len))
-                t0 += seg_len
-            return segs
+
+        # ダミー: 均等割り
+        n_tok = len(phonemes)
+        if n_tok == 0:
+            return []
+
+        seg_len = total_duration / n_tok
+        segs = []
+        t0 = 0.0
+        for ph in phonemes:
+            segs.append((ph, t0, t0 + seg_len))
+            t0 += seg_len
+        return segs
 
     def _analyze_rms(self, audio_data: np.ndarray, sr: int) -> list:
-        hop_length = int(sr * 0.01)  # 10ms
+        # 約10ms。22.05kHz などでは端数が切り捨てられるので、時刻は 0.01 の加算ではなくサンプル位置から求める
+        hop_length = max(1, int(sr * 0.01))
         frames = []
-        t = 0.0
 
         idx = 0
         while idx < len(audio_data):
@@ -327,12 +584,83 @@ class LipSyncGenerator:
             val = float(np.sqrt(np.mean(chunk ** 2)))
             if val < self.rms_threshold:
                 val = 0.0
-            frames.append((t, val))
+            frames.append((idx / float(sr), val))
             idx += hop_length
-            t += 0.01
 
         return frames
 
+    def _iter_rms(self, audio_blocks: Iterable[np.ndarray], sr: int) -> Iterator[Tuple[float, float]]:
+        """
+        _analyze_rms の逐次版。ブロック境界をまたぐ端数サンプルは次のブロックに持ち越すため、
+        ブロックの区切り方によらず _analyze_rms と同じ (t, rms) 列になる。
+        音声はネイティブのサンプリングレートのまま届くので、時刻は消費したサンプル数 / sr で求める
+        (hop_length の切り捨てで 0.01 秒刻みからずれていかないように)。
+        """
+        hop_length = max(1, int(sr * 0.01))  # 約10ms
+        threshold = self.rms_threshold
+        carry = np.zeros(0, dtype=np.float32)
+        consumed = 0
+        inv_sr = 1.0 / float(sr)
+
+        for block in audio_blocks:
+            block = np.asarray(block, dtype=np.float32).ravel()
+            if len(carry):
+                block = np.concatenate([carry, block])
+            n_hops = len(block) // hop_length
+            if n_hops:
+                hops = block[:n_hops * hop_length].reshape(n_hops, hop_length)
+                values = np.sqrt(np.mean(hops ** 2, axis=1)).tolist()
+                for val in values:
+                    if val < threshold:
+                        val = 0.0
+                    yield (consumed * inv_sr, val)
+                    consumed += hop_length
+            carry = block[n_hops * hop_length:]
+
+        # 最後の端数 (hop_length 未満)
+        if len(carry):
+            val = float(np.sqrt(np.mean(carry ** 2)))
+            if val < threshold:
+                val = 0.0
+            yield (consumed * inv_sr, val)
+
+    def _iter_merge_phonemes_and_rms(
+        self,
+        phoneme_segments: list,
+        rms_stream: Iterator[Tuple[float, float]]
+    ) -> Iterator[dict]:
+        """
+        _merge_phonemes_and_rms の逐次版。
+        区間の end 以降の RMS が届いた (またはストリームが終わった) 時点でその区間を確定して返す。
+        先読みするのは RMS 1件だけ。
+        """
+        pending = None
+        exhausted = False
+
+        for (ph, st, ed) in phoneme_segments:
+            total = 0.0
+            count = 0
+            while not exhausted:
+                if pending is None:
+                    pending = next(rms_stream, None)
+                    if pending is None:
+                        exhausted = True
+                        break
+                time_t, val = pending
+                if time_t >= ed:
+                    break
+                if time_t >= st:
+                    total += val
+                    count += 1
+                pending = None
+
+            yield {
+                "start": st,
+                "end": ed,
+                "phoneme": ph,
+                "avg_rms": total / count if count else 0.0
+            }
+
     def _merge_phonemes_and_rms(self, phoneme_segments: list, rms_timeline: list) -> list:
         frames = []
         rms_index = 0
@@ -360,7 +688,7 @@ class LipSyncGenerator:
 
 
 def main():
-    import librosa
+    from main.utils.audio_decode import load_audio
 
     audio_file = "path/to/test.wav"
     text_data = "こんにちは"
@@ -369,7 +697,7 @@ def main():
         print("[Error] サンプル用ファイルが存在しません。終了。")
         return
 
-    audio, sr = librosa.load(audio_file, sr=16000, mono=True)
+    audio, sr = load_audio(audio_file, sr=16000, mono=True)
     audio = audio.astype(np.float32, copy=False)
 
     gen = LipSyncGenerator()
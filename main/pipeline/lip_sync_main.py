@@ -8,7 +8,7 @@ lip_sync_main.py
 
 依存:
 - Python 3.7 以上推奨
-- 必要に応じて librosa, numpy, etc.
+- numpy, scipy (音声デコード / リサンプリング。WAV以外は librosa)
 - 同一プロジェクト内の pipeline / analysis モジュールをimport
 
 想定ユース:
@@ -18,13 +18,47 @@ lip_sync_main.py
 
 例: オプション追加
   python lip_sync_main.py --audio input.wav --text "こんにちは" --gpu --rms-threshold 0.01 --output output.json
+  python lip_sync_main.py --audio input.wav --text "こんにちは" --compact   # 改行無しの最小JSONで出力
+  python lip_sync_main.py --audio input.wav --text "こんにちは" --profile   # ステージ別の時間・メモリを表示
+  python lip_sync_main.py --audio input.wav --text "こんにちは" --no-cache  # 解析結果のキャッシュを使わずに再解析
+  python lip_sync_main.py --audio input.wav --text "..." --metrics-out logs/metrics.lp --metrics-format line
+
+バッチモード (1プロセスで大量のクリップを処理):
+  python lip_sync_main.py --batch manifest.csv --workers 8
+  python lip_sync_main.py --batch manifest.jsonl
+  python lip_sync_main.py --batch path/to/audio_dir      # ディレクトリ内の音声 + 同名 .txt
+  - マニフェストの列 (CSVはヘッダ行必須 / JSONLは各行のキー):
+      audio (必須), text, text_path, character, output
+    相対パスはマニフェストのあるディレクトリ基準。text が空で text_path があればそのファイルを読む。
+    output 省略時は音声と同じ場所に <音声名>.lipsync.json を書き出す。
+  - 出力の隣に <出力>.digest (テキスト・キャラ・解析オプション・設定ファイルの内容のハッシュ) を書き、
+    ハッシュが一致して出力が音声より新しいエントリはスキップする (--force で再処理)。
+    マニフェストのテキストやキャラを変えた行は再処理される。
+  - 各ワーカープロセスは起動時に1回だけ import / 設定読み込み / LipSyncGenerator 初期化を行う。
+
+ストリーミングモード (数時間の録音でもメモリ使用量一定。確定したフレームから順に書き出す):
+  python lip_sync_main.py --stream --audio long.wav --text-file script.txt --output long.json
+  some_recorder | python lip_sync_main.py --stream --audio - --stream-sr 16000 --text "..." --output live.json
+  - --audio - の場合は標準入力からヘッダ無しの s16le PCM を読む (--stream-sr / --stream-channels)。
+    全体の長さが分からないため、音素は1つあたり stream_phoneme_duration 秒で割り当てる。
 """
 
 import os
 import sys
 import argparse
 import json
+import csv
+import hashlib
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# ディレクトリ指定のバッチで対象にする音声拡張子
+BATCH_AUDIO_EXTS = (".wav", ".mp3", ".flac", ".ogg", ".m4a")
+# output 省略時の出力ファイル名サフィックス
+BATCH_OUTPUT_SUFFIX = ".lipsync.json"
+# 出力の隣に書く、入力・設定のハッシュのファイルのサフィックス
+BATCH_DIGEST_SUFFIX = ".digest"
 
 def parse_arguments():
     """
@@ -36,6 +70,8 @@ def parse_arguments():
                         help="入力音声ファイルのパス (WAVなど)")
     parser.add_argument("--text", type=str, default="",
                         help="リップシンク対象のテキスト")
+    parser.add_argument("--text-file", type=str, default="",
+                        help="テキストをファイルから読み込む (長い台本用。--text より優先)")
     parser.add_argument("--config", type=str, default="",
                         help="lip_sync_config.json などの設定ファイルパス")
     parser.add_argument("--output", type=str, default="output.json",
@@ -46,23 +82,471 @@ def parse_arguments():
                         help="GPUを使用するフラグ (configのenable_gpuを上書きする)")
     parser.add_argument("--rms-threshold", type=float, default=None,
                         help="RMS閾値 (configを上書き)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="解析結果のキャッシュ (processing_options.enable_cache) を使わない")
+    parser.add_argument("--compact", action="store_true",
+                        help="結果JSONを改行・インデント無しの最小表現で出力する")
+
+    # 計測
+    parser.add_argument("--profile", action="store_true",
+                        help="ステージ別の所要時間・カウンタ・メモリ (tracemalloc) を表示する")
+    parser.add_argument("--metrics-out", type=str, default="",
+                        help="計測結果を追記するファイル ('-' で標準エラー)。省略時は設定の metrics セクション")
+    parser.add_argument("--metrics-format", type=str, default="jsonl", choices=["jsonl", "line"],
+                        help="--metrics-out の形式 (JSON Lines / InfluxDB line protocol)")
+
+    # バッチモード
+    parser.add_argument("--batch", type=str, default="",
+                        help="マニフェスト (CSV / JSONL) または音声ディレクトリを指定してまとめて処理する")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="バッチモードのワーカープロセス数 (0 なら CPU 数)")
+    parser.add_argument("--force", action="store_true",
+                        help="バッチモードで、出力が最新でも再処理する")
+
+    # ストリーミングモード
+    parser.add_argument("--stream", action="store_true",
+                        help="音声をブロック単位で解析し、確定したフレームから逐次JSONへ書き出す")
+    parser.add_argument("--stream-block", type=float, default=1.0,
+                        help="ストリーミングモードの読み込みブロック長(秒)")
+    parser.add_argument("--stream-sr", type=int, default=16000,
+                        help="--audio - (標準入力の s16le PCM) のサンプリングレート")
+    parser.add_argument("--stream-channels", type=int, default=1,
+                        help="--audio - (標準入力の s16le PCM) のチャンネル数")
 
     args = parser.parse_args()
     return args
 
 
+# ----------------------------------------------------------------
+# 計測結果の出力
+# ----------------------------------------------------------------
+def _open_metrics_sink(args, config):
+    """--metrics-out があればそれを、無ければ設定の metrics セクションからシンクを作る (無効なら None)。"""
+    from main.utils.metrics import make_sink, sink_from_config
+
+    if args.metrics_out:
+        return make_sink(args.metrics_format, args.metrics_out)
+    return sink_from_config(config)
+
+
+def _emit_metrics(args, sink, metrics, title: str = "計測結果"):
+    if sink is not None:
+        try:
+            sink.write(metrics)
+        except Exception as e:
+            print(f"[Warning] 計測結果の書き込みに失敗: {e}")
+    if args.profile:
+        print(f"[Info] ===== {title} =====")
+        print(metrics.report())
+
+
+# ----------------------------------------------------------------
+# バッチモード
+# ----------------------------------------------------------------
+def _resolve_entry_path(path: str, base_dir: str) -> str:
+    if not path:
+        return ""
+    path = os.path.expanduser(path)
+    if os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(base_dir, path))
+
+
+def _make_entry(raw: dict, base_dir: str) -> dict:
+    """マニフェストの1行を正規化する。audio が無ければ ValueError。"""
+    audio = _resolve_entry_path(str(raw.get("audio") or "").strip(), base_dir)
+    if not audio:
+        raise ValueError("audio が指定されていません")
+    output = _resolve_entry_path(str(raw.get("output") or "").strip(), base_dir)
+    if not output:
+        output = os.path.splitext(audio)[0] + BATCH_OUTPUT_SUFFIX
+    text = raw.get("text") or ""
+    text_path = _resolve_entry_path(str(raw.get("text_path") or "").strip(), base_dir)
+    if text_path and not text:
+        try:
+            with open(text_path, "r", encoding="utf-8") as f:
+                text = f.read().strip()
+        except OSError as e:
+            raise ValueError(f"text_path を読み込めません: {text_path} ({e})")
+    return {
+        "audio": audio,
+        "text": text,
+        "character": raw.get("character") or "",
+        "output": output,
+        "text_path": text_path
+    }
+
+
+def load_batch_entries(source: str) -> list:
+    """
+    --batch に渡されたマニフェスト / ディレクトリからエントリ一覧を作る。
+
+    Returns:
+        list: [{"audio", "text", "character", "output", "text_path"}, ...]
+    """
+    entries = []
+
+    if os.path.isdir(source):
+        # ディレクトリ: 音声ファイル + 同名 .txt (あればテキストとして使う)
+        for name in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in BATCH_AUDIO_EXTS:
+                continue
+            text, text_path = "", os.path.join(source, stem + ".txt")
+            if os.path.exists(text_path):
+                with open(text_path, "r", encoding="utf-8") as f:
+                    text = f.read().strip()
+            else:
+                text_path = ""
+            entries.append(_make_entry(
+                {"audio": name, "text": text, "text_path": text_path}, source
+            ))
+        return entries
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    ext = os.path.splitext(source)[1].lower()
+    with open(source, "r", encoding="utf-8-sig", newline="") as f:
+        if ext == ".csv":
+            rows = list(csv.DictReader(f))
+        elif ext in (".jsonl", ".ndjson"):
+            rows = []
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    print(f"[Warning] マニフェスト {line_no}行目を読み込めません: {e}")
+        else:
+            raise ValueError(f"未対応のマニフェスト形式です (CSV / JSONL): {source}")
+
+    for line_no, row in enumerate(rows, 1):
+        try:
+            entries.append(_make_entry(row, base_dir))
+        except ValueError as e:
+            print(f"[Warning] マニフェスト {line_no}件目をスキップ: {e}")
+    return entries
+
+
+def batch_entry_digest(entry: dict, config_path: str = "", params: dict = None) -> str:
+    """
+    エントリの出力を決める入力のハッシュ (テキスト・キャラ・解析オプション・設定ファイルの内容)。
+    音声は大きいので内容ではなく更新時刻で比べる (is_output_up_to_date)。
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        "text": entry.get("text") or "",
+        "character": entry.get("character") or "",
+        "params": params or {}
+    }, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    if not config_path:
+        from main.utils.config_registry import LIP_SYNC_CONFIG
+        config_path = LIP_SYNC_CONFIG
+    try:
+        with open(config_path, "rb") as f:
+            h.update(f.read())
+    except OSError:
+        pass
+    return h.hexdigest()
+
+
+def write_output_digest(output_path: str, digest: str):
+    """出力の隣に <出力>.digest を書く (出力を書き終えてから呼ぶ)。"""
+    tmp_path = output_path + BATCH_DIGEST_SUFFIX + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(digest)
+    os.replace(tmp_path, output_path + BATCH_DIGEST_SUFFIX)
+
+
+def is_output_up_to_date(entry: dict, config_path: str = "", params: dict = None) -> bool:
+    """
+    出力が音声より新しく、<出力>.digest が今の入力 (batch_entry_digest) と一致すれば True。
+    digest が無い出力 (古い版で書いたもの) は最新とみなさない。
+    """
+    out = entry["output"]
+    if not os.path.exists(out):
+        return False
+    if os.path.exists(entry["audio"]) and os.path.getmtime(entry["audio"]) > os.path.getmtime(out):
+        return False
+    try:
+        with open(out + BATCH_DIGEST_SUFFIX, "r", encoding="utf-8") as f:
+            stored = f.read().strip()
+    except OSError:
+        return False
+    return stored == batch_entry_digest(entry, config_path, params)
+
+
+def batch_params(args) -> dict:
+    """出力に影響するコマンドラインオプション (digest に含める)。"""
+    return {"gpu": bool(args.gpu), "rms_threshold": args.rms_threshold, "compact": bool(args.compact)}
+
+
+# ワーカープロセスごとの常駐状態 (initializer で1回だけ作る)
+_WORKER_STATE = {}
+
+
+def _init_batch_worker(config_path: str, use_gpu: bool, rms_threshold, compact: bool, profile: bool = False,
+                       no_cache: bool = False):
+    """ワーカー起動時に重い import と LipSyncGenerator の初期化を済ませる。"""
+    import numpy as np
+    import tracemalloc
+    from main.utils.audio_decode import load_audio
+    from main.pipeline.lip_sync_generator import LipSyncGenerator
+    from main.utils.json_stream import dump_json_stream
+    from main.utils.metrics import Metrics
+
+    if config_path:
+        generator = LipSyncGenerator(config_path=config_path)
+    else:
+        generator = LipSyncGenerator()
+    if use_gpu:
+        generator.use_gpu = True
+    if rms_threshold is not None:
+        generator.rms_threshold = rms_threshold
+    if no_cache:
+        generator.result_cache = None
+    # 大量のクリップで進捗 print がボトルネックにならないよう黙らせる
+    generator.verbose = False
+    if profile and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    _WORKER_STATE.update({
+        "np": np,
+        "load_audio": load_audio,
+        "generator": generator,
+        "dump_json_stream": dump_json_stream,
+        "Metrics": Metrics,
+        "compact": compact
+    })
+
+
+def _process_batch_entry(entry: dict) -> dict:
+    """1エントリを処理する (ワーカープロセス内で実行)。"""
+    t0 = time.perf_counter()
+    result = {"audio": entry["audio"], "output": entry["output"], "ok": False,
+              "seconds": 0.0, "audio_seconds": 0.0, "error": None, "metrics": None}
+    metrics = _WORKER_STATE["Metrics"](tags={"audio": os.path.basename(entry["audio"])})
+    try:
+        np = _WORKER_STATE["np"]
+        generator = _WORKER_STATE["generator"]
+
+        with metrics.stage("decode"):
+            audio_data, sr = _WORKER_STATE["load_audio"](entry["audio"], sr=16000, mono=True)
+            audio_data = audio_data.astype(np.float32, copy=False)
+        result["audio_seconds"] = len(audio_data) / float(sr)
+
+        lip_sync = generator.generate_lip_sync(audio_data, entry["text"], sample_rate=sr)
+        metrics.merge(generator.metrics)
+        out_data = dict(lip_sync)
+        if entry.get("character"):
+            out_data["character"] = entry["character"]
+
+        out_dir = os.path.dirname(entry["output"])
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        # 途中で落ちても「最新の出力」と誤認されないよう、一時ファイルに書いてから置き換える
+        tmp_path = entry["output"] + ".tmp"
+        with metrics.stage("export"):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                _WORKER_STATE["dump_json_stream"](out_data, f, compact=_WORKER_STATE["compact"])
+            os.replace(tmp_path, entry["output"])
+            if entry.get("digest"):
+                write_output_digest(entry["output"], entry["digest"])
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - t0
+    # プロセス間で受け渡すため dict で返す
+    result["metrics"] = metrics.to_dict()
+    return result
+
+
+def run_batch(args) -> int:
+    """
+    バッチモード本体。終了コード (失敗が1件でもあれば 1) を返す。
+    """
+    source = args.batch
+    if not os.path.exists(source):
+        print(f"[Error] バッチの入力が見つかりません: {source}")
+        return 1
+
+    try:
+        entries = load_batch_entries(source)
+    except Exception as e:
+        print(f"[Error] マニフェストの読み込みに失敗: {e}")
+        return 1
+
+    config_path = args.config
+    if config_path and not os.path.exists(config_path):
+        print(f"[Error] 指定された設定ファイルが見つかりません: {config_path}")
+        return 1
+
+    params = batch_params(args)
+    todo, skipped = [], 0
+    for entry in entries:
+        entry["digest"] = batch_entry_digest(entry, config_path, params)
+        if not os.path.exists(entry["audio"]):
+            todo.append(entry)  # ワーカー側でエラーとして集計する
+        elif not args.force and is_output_up_to_date(entry, config_path, params):
+            skipped += 1
+        else:
+            todo.append(entry)
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    workers = max(1, min(workers, len(todo) or 1))
+    print(f"[Info] バッチ: 全{len(entries)}件 / 処理{len(todo)}件 / スキップ(最新){skipped}件 / workers={workers}")
+
+    init_args = (config_path, args.gpu, args.rms_threshold, args.compact, args.profile, args.no_cache)
+    results = []
+    t_start = time.perf_counter()
+
+    from main.utils.config_registry import load_config
+    from main.utils.metrics import Metrics
+    sink = _open_metrics_sink(args, load_config(config_path) if config_path else load_config())
+    totals = Metrics(tags={"batch": os.path.basename(os.path.normpath(source))}, sample_memory=False)
+
+    def collect(r):
+        results.append(r)
+        if r.get("metrics"):
+            m = Metrics.from_dict(r["metrics"])
+            totals.merge(m)
+            if sink is not None:
+                sink.write(m)
+
+    if todo:
+        if workers == 1:
+            # 1ワーカーならプロセスを立てずにこのプロセスで処理
+            _init_batch_worker(*init_args)
+            for i, entry in enumerate(todo, 1):
+                r = _process_batch_entry(entry)
+                collect(r)
+                _print_batch_progress(i, len(todo), r)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_batch_worker, initargs=init_args
+            ) as pool:
+                futures = [pool.submit(_process_batch_entry, entry) for entry in todo]
+                for i, fut in enumerate(as_completed(futures), 1):
+                    r = fut.result()
+                    collect(r)
+                    _print_batch_progress(i, len(todo), r)
+
+    elapsed = time.perf_counter() - t_start
+    ok = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    audio_total = sum(r["audio_seconds"] for r in ok)
+
+    print("[Info] ===== バッチ結果 =====")
+    print(f"[Info] 成功: {len(ok)}件 / 失敗: {len(failed)}件 / スキップ: {skipped}件")
+    print(f"[Info] 経過時間: {elapsed:.2f}s")
+    if elapsed > 0 and ok:
+        print(f"[Info] スループット: {len(ok) / elapsed:.2f} 件/s, "
+              f"音声 {audio_total / elapsed:.1f} 秒/s (合計 {audio_total:.1f} 秒)")
+    for r in failed:
+        print(f"[Error]   {r['audio']}: {r['error']}")
+    if args.profile and results:
+        print("[Info] ===== ステージ別合計 (全ワーカー) =====")
+        print(totals.report())
+
+    return 1 if failed else 0
+
+
+def _print_batch_progress(done: int, total: int, r: dict):
+    status = "OK" if r["ok"] else f"失敗 ({r['error']})"
+    print(f"[Info] [{done}/{total}] {os.path.basename(r['audio'])} {r['seconds']:.2f}s {status}")
+
+
+# ----------------------------------------------------------------
+# ストリーミングモード
+# ----------------------------------------------------------------
+def run_stream(args, input_text: str) -> int:
+    """
+    音声をブロック単位で読みながら解析し、確定した lip_sync_frames を逐次 JSON に書き出す。
+    出力は {"lip_sync_frames": [...]} (phoneme_segments / rms_timeline は含めない)。
+    """
+    from main.pipeline.lip_sync_generator import LipSyncGenerator
+    from main.utils.audio_decode import open_audio_blocks, iter_pcm_blocks
+    from main.utils.json_stream import dump_json_stream
+
+    if args.config:
+        generator = LipSyncGenerator(config_path=args.config)
+    else:
+        generator = LipSyncGenerator()
+    if args.gpu:
+        generator.use_gpu = True
+    if args.rms_threshold is not None:
+        generator.rms_threshold = args.rms_threshold
+
+    if args.audio == "-":
+        sr = args.stream_sr
+        duration = None
+        blocks = iter_pcm_blocks(
+            sys.stdin.buffer,
+            channels=args.stream_channels,
+            block_frames=max(1, int(sr * args.stream_block))
+        )
+        print(f"[Info] 標準入力から s16le PCM を読み込みます (sr={sr}, ch={args.stream_channels})")
+    else:
+        blocks, sr, duration = open_audio_blocks(args.audio, block_seconds=args.stream_block)
+        print(f"[Info] ストリーミング解析: {args.audio} (sr={sr}, 長さ={duration}s)")
+
+    counter = {"frames": 0}
+
+    def counted(frames):
+        for frame in frames:
+            counter["frames"] += 1
+            yield frame
+
+    t_start = time.perf_counter()
+    frames = generator.generate_lip_sync_stream(
+        blocks, input_text, sample_rate=sr, total_duration=duration
+    )
+    tmp_path = args.output + ".tmp"
+    try:
+        out_dir = os.path.dirname(args.output)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            dump_json_stream({"lip_sync_frames": counted(frames)}, f, compact=args.compact)
+        os.replace(tmp_path, args.output)
+    except Exception:
+        print(f"[Error] ストリーミング解析に失敗: {traceback.format_exc()}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return 1
+
+    elapsed = time.perf_counter() - t_start
+    print(f"[Info] {counter['frames']} フレームを {args.output} に出力しました ({elapsed:.2f}s)")
+    return 0
+
+
 def main():
     """
     リップシンク処理全体を管理するエントリーポイント。
     """
     args = parse_arguments()
 
-    audio_file = args.audio
+    if args.batch:
+        sys.exit(run_batch(args))
+
     input_text = args.text
+    if args.text_file:
+        with open(args.text_file, "r", encoding="utf-8") as f:
+            input_text = f.read()
+
+    if args.stream:
+        if args.audio != "-" and (not args.audio or not os.path.exists(args.audio)):
+            print(f"[Error] 音声ファイルが指定されていないか、存在しません: {args.audio}")
+            sys.exit(1)
+        sys.exit(run_stream(args, input_text))
+
+    audio_file = args.audio
     config_path = args.config
     output_json_path = args.output
     use_gpu_flag = args.gpu
     override_rms = args.rms_threshold
+    compact_output = args.compact
 
     # 1) 引数チェック
     if not audio_file or not os.path.exists(audio_file):
@@ -80,8 +564,10 @@ def main():
             print(f"[Error] 指定された設定ファイルが見つかりません: {config_path}")
             sys.exit(1)
         try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                config_data = json.load(f)
+            from main.utils.config_registry import load_config, thaw
+
+            # 以降でオプション上書きするため、可変コピーを受け取る
+            config_data = thaw(load_config(config_path))
         except Exception as e:
             print(f"[Warning] 設定ファイルの読み込みに失敗: {e}\n  -> デフォルト設定で進行します。")
             config_data = {}
@@ -101,13 +587,21 @@ def main():
         config_data["processing_options"]["rms_threshold"] = override_rms
         print(f"[Info] コマンドラインオプションにより RMS閾値を {override_rms} に上書きしました。")
 
-    # 4) 音声ファイルをロード (librosa で読み込み)
+    from main.utils.metrics import Metrics
+
+    if args.profile:
+        import tracemalloc
+        tracemalloc.start()
+    metrics = Metrics(tags={"audio": os.path.basename(audio_file)})
+
+    # 4) 音声ファイルをロード (WAVは直接デコード、その他は librosa)
     try:
         import numpy as np
-        import librosa
+        from main.utils.audio_decode import load_audio
 
         print(f"[Info] 音声ファイルを読み込み中: {audio_file}")
-        audio_data, sr = librosa.load(audio_file, sr=16000, mono=True)
+        with metrics.stage("decode"):
+            audio_data, sr = load_audio(audio_file, sr=16000, mono=True)
         audio_data = audio_data.astype(np.float32)
         print(f"[Info] 音声ロード完了: shape={audio_data.shape}, sr={sr}")
     except Exception as e:
@@ -130,6 +624,8 @@ def main():
             # あるいは generator 側が受け取れるように setterを用意して
             # generator.set_config_data(config_data)
             # のようにしてもOK
+        if args.no_cache:
+            generator.result_cache = None
 
         print("[Info] リップシンク解析を実行します...")
         result = generator.generate_lip_sync(
@@ -137,6 +633,9 @@ def main():
             input_text,
             sample_rate=sr
         )
+        metrics.merge(generator.metrics)
+        if generator.metrics.counters.get("cache_hits"):
+            print("[Info] キャッシュ済みの解析結果を使用しました (--no-cache で再解析)。")
 
     except ImportError as ie:
         print(f"[Error] LipSyncGeneratorのインポートに失敗しました: {ie}\nモジュール構成を確認してください。")
@@ -147,13 +646,19 @@ def main():
 
     # 6) 結果をJSONファイルに出力
     try:
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        from main.utils.json_stream import dump_json_stream
+
+        with metrics.stage("export"):
+            with open(output_json_path, 'w', encoding='utf-8') as f:
+                dump_json_stream(result, f, compact=compact_output)
         print(f"[Info] 解析結果を {output_json_path} に出力しました。")
     except Exception as e:
         print(f"[Error] 結果出力に失敗: {traceback.format_exc()}")
         sys.exit(1)
 
+    # 7) 計測結果 (--profile / --metrics-out / 設定の metrics セクション)
+    _emit_metrics(args, _open_metrics_sink(args, generator.config), metrics)
+
     print("[Info] リップシンク解析が完了しました。")
 
 
@@ -0,0 +1,110 @@
+# main/pipeline/morph_curve.py
+# -*- coding: utf-8 -*-
+
+"""
+morph_curve.py
+
+lip_sync_data から「モーフウェイト曲線」の中間表現を作るモジュール。
+VMD / GMod など複数のエクスポータが共通で使う計算 (時間順ソート・音素→モーフ変換・
+3点キーのフレーム番号・peak weight・次音素までの gap) を1回だけ行い、NumPy 配列で保持する。
+
+- 音素→モーフ変換は MorphMixer の混合行列で行い、全セグメント分のモーフウェイトを一括で求める。
+  1音素が複数モーフにブレンドされる場合は、モーフごとにキーが打たれる。
+- (fps, マッピング) が同じなら、同じ MorphCurve を複数の出力先で使い回せる。
+
+使い方:
+    from main.pipeline.morph_curve import MorphCurve
+
+    curve = MorphCurve.from_lip_sync_data(lip_sync_data, fps=30, mixer=exporter.build_mixer())
+    for name, st_f, mid_f, ed_f, w, gap in curve.iter_keys():
+        ...
+"""
+
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from main.pipeline.lip_sync_columns import LipSyncColumns
+from main.pipeline.morph_mixer import MorphMixer
+
+# 最後のセグメントの「次音素までの間隔」計算に使う番兵 (exporter_vmd の従来値)
+NO_NEXT_START = 999999.0
+
+
+class MorphCurve:
+    """
+    モーフウェイト曲線の中間表現 (start 昇順)。
+
+    Attributes:
+        columns (LipSyncColumns): start 昇順に並べ替えたセグメント列
+        fps (int): フレーム番号計算に使った FPS
+        morphs (List[str]): モーフ名 (weights の列)
+        mix (np.ndarray): float64, (セグメント数, モーフ数) の混合率 (peak を掛ける前)
+        weights (np.ndarray): float64, mix * peak
+        export_options (dict): 元データの export_options
+        start_f / mid_f / end_f (np.ndarray): int64, 3点キーのフレーム番号
+        peak (np.ndarray): float64, min(1, avg_rms*2)
+        gap (np.ndarray): float64, 次セグメント開始までの間隔(秒)
+    """
+
+    def __init__(
+        self,
+        columns: LipSyncColumns,
+        fps: int,
+        mixer: MorphMixer,
+        export_options: Dict = None
+    ):
+        self.columns = columns
+        self.fps = fps
+        self.export_options = dict(export_options or {})
+
+        start, end = columns.start, columns.end
+        mid = (start + end) * 0.5
+        # int() と同じく 0 方向への切り捨て
+        self.start_f = (start * fps).astype(np.int64)
+        self.mid_f = (mid * fps).astype(np.int64)
+        self.end_f = (end * fps).astype(np.int64)
+        self.peak = columns.peak_weights()
+
+        next_start = np.empty_like(start)
+        next_start[:-1] = start[1:]
+        next_start[-1:] = NO_NEXT_START
+        self.gap = next_start - end
+
+        self.morphs, self.mix = mixer.evaluate(columns.phoneme_codes, columns.phonemes)
+        self.weights = self.mix * self.peak[:, None]
+
+    @classmethod
+    def from_lip_sync_data(
+        cls,
+        lip_sync_data: dict,
+        fps: int = 30,
+        mixer: MorphMixer = None
+    ) -> "MorphCurve":
+        """
+        Args:
+            lip_sync_data (dict): {"lip_sync_frames": [...], "export_options": {...}}
+            fps (int): フレームレート
+            mixer (MorphMixer): 音素→モーフの混合行列。None なら音素名をそのままモーフ名として扱う。
+        """
+        columns = LipSyncColumns.from_frames(lip_sync_data.get("lip_sync_frames", []))
+        columns = columns.sorted_by_start()
+        if mixer is None:
+            mixer = MorphMixer({})
+        return cls(columns, fps, mixer, lip_sync_data.get("export_options", {}))
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def iter_keys(self) -> Iterator[Tuple[str, int, int, int, float, float]]:
+        """
+        (morph_name, start_f, mid_f, end_f, weight, gap) をセグメント順に返す。
+        1セグメントが複数モーフに混ざる場合は、モーフ (列) 順に複数件返す。
+        """
+        seg_idx, col_idx = np.nonzero(self.mix > 0.0)
+        morphs = self.morphs
+        return zip(
+            [morphs[c] for c in col_idx.tolist()],
+            self.start_f[seg_idx].tolist(), self.mid_f[seg_idx].tolist(), self.end_f[seg_idx].tolist(),
+            self.weights[seg_idx, col_idx].tolist(), self.gap[seg_idx].tolist()
+        )
@@ -0,0 +1,197 @@
+# main/pipeline/morph_mixer.py
+# -*- coding: utf-8 -*-
+
+"""
+morph_mixer.py
+
+音素→モーフのマッピングJSONを「音素 × モーフ」の密な混合行列 (mixing matrix) にコンパイルするモジュール。
+
+マッピングの値は次のどれでも良い:
+    "a": "あ"                        # 従来どおり1モーフ (weight 1.0)
+    "e": ["え", "い"]                # 複数モーフを均等に混ぜる (各 0.5)
+    "sh": {"い": 0.7, "う": 0.3}      # 重み付きブレンド
+    "_fallback": "あ"                # 未定義の音素
+
+character_settings (lip_sync_config.json) の各キャラ設定
+    {"a": ["a", "a2", "a3"], ...}
+にある派生音素 (a2, a3 など) は、マッピングに明示が無ければ基底音素 (a) の行を引き継ぐ。
+
+全セグメントのモーフウェイトは、音素コード配列に対する1回の行列演算
+(one-hot(codes) @ M を行の取り出しとして計算) に peak weight を掛けて求める。
+
+使い方:
+    from main.pipeline.morph_mixer import MorphMixer
+
+    mixer = MorphMixer(mapping, character="reimu", character_settings=config["character_settings"])
+    morphs, weights = mixer.evaluate(cols.phoneme_codes, cols.phonemes, cols.peak_weights())
+    # weights.shape == (セグメント数, len(morphs))
+"""
+
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FALLBACK_KEY = "_fallback"
+
+
+class MorphMixer:
+    """
+    音素×モーフの混合行列。
+
+    Args:
+        mapping (dict): 音素 → モーフ指定 (str / list / {morph: weight})
+        default_morph (str or None): "_fallback" も無い未定義音素のモーフ。
+            None なら音素名をそのままモーフ名として扱う。
+        character (str): character_settings のキャラ名 (None なら派生音素の展開なし)
+        character_settings (dict): {"キャラ名": {"a": ["a", "a2"], ...}, ...}
+    """
+
+    def __init__(
+        self,
+        mapping: Dict,
+        default_morph: Optional[str] = None,
+        character: str = None,
+        character_settings: Dict = None
+    ):
+        self.default_morph = default_morph
+        self.character = character
+
+        entries: Dict[str, Dict[str, float]] = {}
+        for ph, value in (mapping or {}).items():
+            entries[ph] = self.normalize_entry(value)
+
+        # 派生音素 (a2, a3 ...) は明示マッピングが無ければ基底音素の行を引き継ぐ
+        variants = {}
+        if character and character_settings:
+            variants = character_settings.get(character, {}) or {}
+            if not variants:
+                print(f"[MorphMixer] character_settings にキャラ '{character}' がありません。")
+        for base_ph, variant_list in variants.items():
+            base_entry = entries.get(base_ph)
+            if base_entry is None:
+                continue
+            for variant in variant_list:
+                if variant not in entries:
+                    entries[variant] = base_entry
+
+        self.fallback_entry = entries.pop(FALLBACK_KEY, None)
+
+        # 列 (モーフ) を出現順に割り当て、行列を組み立てる
+        self.phonemes: List[str] = list(entries.keys())
+        self.morphs: List[str] = []
+        self._morph_col: Dict[str, int] = {}
+        for entry in list(entries.values()) + [self.fallback_entry or {}]:
+            for morph in entry:
+                self._add_morph(morph)
+
+        self._row: Dict[str, int] = {ph: i for i, ph in enumerate(self.phonemes)}
+        self.matrix = np.zeros((len(self.phonemes), len(self.morphs)), dtype=np.float64)
+        for i, entry in enumerate(entries.values()):
+            for morph, w in entry.items():
+                self.matrix[i, self._morph_col[morph]] = w
+
+    # ----------------------------------------------------------------
+    # マッピング値の正規化
+    # ----------------------------------------------------------------
+    @staticmethod
+    def normalize_entry(value) -> Dict[str, float]:
+        """str / list / dict のマッピング値を {morph: weight} に揃える。"""
+        if isinstance(value, str):
+            return {value: 1.0}
+        if isinstance(value, Mapping):
+            return {str(m): float(w) for m, w in value.items()}
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return {}
+            w = 1.0 / len(value)
+            entry: Dict[str, float] = {}
+            for m in value:
+                entry[str(m)] = entry.get(str(m), 0.0) + w
+            return entry
+        raise TypeError(f"[MorphMixer] 未対応のマッピング値: {value!r}")
+
+    @classmethod
+    def primary_morph_of(cls, value) -> str:
+        """マッピング値のうち最も重いモーフ名 (同値なら先頭)。単一モーフ出力用。"""
+        entry = cls.normalize_entry(value)
+        if not entry:
+            return ""
+        return max(entry.items(), key=lambda kv: kv[1])[0]
+
+    # ----------------------------------------------------------------
+    # 行列の参照
+    # ----------------------------------------------------------------
+    def _add_morph(self, morph: str) -> int:
+        col = self._morph_col.get(morph)
+        if col is None:
+            col = len(self.morphs)
+            self._morph_col[morph] = col
+            self.morphs.append(morph)
+        return col
+
+    def vocab_matrix(self, vocab: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        音素語彙 (LipSyncColumns.phonemes など) に対応する行を並べた行列を返す。
+        default_morph=None で未定義音素が音素名そのままのモーフになる場合は、列が追加される。
+
+        Returns:
+            (morphs, np.ndarray shape=(len(vocab), len(morphs)))
+        """
+        morphs = list(self.morphs)
+        extra_col: Dict[str, int] = {}
+        rows = np.empty(len(vocab), dtype=np.int64)
+        pending = []  # (vocab_index, {morph: weight}) 行列外の行
+
+        for i, ph in enumerate(vocab):
+            idx = self._row.get(ph)
+            if idx is not None:
+                rows[i] = idx
+                continue
+            rows[i] = -1
+            if self.fallback_entry is not None:
+                entry = self.fallback_entry
+            elif self.default_morph is not None:
+                entry = {self.default_morph: 1.0}
+            else:
+                entry = {ph: 1.0}
+            for morph in entry:
+                if morph not in self._morph_col and morph not in extra_col:
+                    extra_col[morph] = len(morphs)
+                    morphs.append(morph)
+            pending.append((i, entry))
+
+        out = np.zeros((len(vocab), len(morphs)), dtype=np.float64)
+        known = rows >= 0
+        out[known, :len(self.morphs)] = self.matrix[rows[known]]
+        for i, entry in pending:
+            for morph, w in entry.items():
+                col = self._morph_col.get(morph)
+                if col is None:
+                    col = extra_col[morph]
+                out[i, col] = w
+        return morphs, out
+
+    def evaluate(
+        self,
+        phoneme_codes: np.ndarray,
+        vocab: Sequence[str],
+        peak: np.ndarray = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        全セグメントのモーフウェイトを一括計算する。
+
+        Args:
+            phoneme_codes (np.ndarray): セグメントごとの音素コード (vocab へのインデックス)
+            vocab (Sequence[str]): 音素語彙
+            peak (np.ndarray): セグメントごとの peak weight (None なら 1.0)
+
+        Returns:
+            (morphs, weights): weights.shape == (len(phoneme_codes), len(morphs))
+        """
+        morphs, mix = self.vocab_matrix(vocab)
+        # one-hot(codes) @ mix と同値。行の取り出しで計算する。
+        weights = np.take(mix, np.asarray(phoneme_codes, dtype=np.int64), axis=0)
+        if peak is not None:
+            weights = weights * np.asarray(peak, dtype=np.float64)[:, None]
+        return morphs, weights
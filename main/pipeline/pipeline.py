@@ -7,109 +7,414 @@ pipeline.py
 
 依存:
 - Python 3.7 以上推奨
-- 必要に応じて numpy, librosa, etc.
+- numpy, main.utils.audio_decode (音声読み込み)
 - 同一プロジェクト内の analysis.*, pipeline.lip_sync_generator 等を import
 
 概要:
-    1) 音声読み込み → 2) RMS解析・音素解析(hatsuon) → 3) clustering 等の追加解析 → 4) lip_sync_generator
-    の順に各モジュールの関数を呼び出し、最終的にリップシンク結果を取得する例を示す。
+    各処理を「入力名 → 出力名」を宣言したステージとして StageGraph (DAG) に登録し、
+    依存関係が満たされたステージから順にスレッドプールで実行する。
+
+        decode ──┬─> envelope ───────────────┐
+                 └─> (asr) ─┐                 ├─> merge ─> overlap ─> (export)
+        text ───────────────┴─> phonemes ─> align ┘
+
+    - envelope (RMS) と ASR は互いに依存しないので並行に動く。
+    - テキストがある場合、音素変換 (phonemes) は音声を待たずに開始できる。
+    - 各ステージの所要時間 (wall time) を結果に含める。
+    1クリップあたりの処理時間は「全ステージの合計」ではなく「最も重い経路」に近づく。
 
 使い方の例（単体テストや別スクリプトから呼び出し）:
     from main.pipeline.pipeline import LipSyncPipeline
 
     pipeline = LipSyncPipeline(config_path="path/to/lip_sync_config.json")
     result = pipeline.run_pipeline(audio_data, sr=16000, text="こんにちは")
-    # ここでresultにはリップシンク用の結果が格納されている想定
+    print(result["stage_times"])  # {"decode": 0.001, "envelope": 0.12, ...}
 """
 
 import os
-import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
 import numpy as np
 
-# 例: analysis配下のモジュールをインポート
-# from main.analysis.rms_analysis import RMSAnalyzer
-# from main.analysis.hatsuon import HatsuonAnalyzer
-# from main.analysis.clustering import ClusteringAnalyzer
-#
-# 例: pipeline配下の lip_sync_generator をインポート
-# from main.pipeline.lip_sync_generator import LipSyncGenerator
+from main.utils.config_registry import LIP_SYNC_CONFIG, load_config
+from main.utils.metrics import Metrics
+from main.pipeline.lip_sync_generator import LipSyncGenerator
 
 try:
-    import librosa
+    from main.utils import overlap_utils
 except ImportError:
-    # librosaが無い環境向けにフォールバックまたはエラー処理
-    librosa = None
+    overlap_utils = None
+
+
+class PipelineStage:
+    """
+    DAGの1ステージ。func(*inputs) の戻り値を outputs に格納する。
+    outputs が2つ以上なら func は同じ長さのタプルを返すこと。
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (), outputs: Sequence[str] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) if outputs is not None else (name,)
+
+    def __repr__(self):
+        return f"PipelineStage({self.name}: {list(self.inputs)} -> {list(self.outputs)})"
+
+
+class StageGraph:
+    """
+    ステージの依存グラフ (DAG) と、その実行器。
+
+    使い方:
+        graph = StageGraph()
+        graph.add_stage("envelope", analyze_rms, inputs=("audio", "sr"), outputs=("rms",))
+        values, timings = graph.run({"audio": audio, "sr": 16000})
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, PipelineStage] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable,
+        inputs: Sequence[str] = (),
+        outputs: Sequence[str] = None
+    ) -> PipelineStage:
+        if name in self.stages:
+            raise ValueError(f"[StageGraph] ステージ名が重複しています: {name}")
+        stage = PipelineStage(name, func, inputs, outputs)
+        self.stages[name] = stage
+        return stage
+
+    def validate(self, provided: Sequence[str]):
+        """
+        全ステージの入力が「初期値」か「他ステージの出力」で満たされ、循環が無いことを確認する。
+        問題があれば ValueError。
+        """
+        producers: Dict[str, str] = {}
+        for stage in self.stages.values():
+            for out in stage.outputs:
+                if out in producers or out in provided:
+                    raise ValueError(f"[StageGraph] 値 '{out}' を複数箇所が生成しています。")
+                producers[out] = stage.name
+
+        available = set(provided)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [s for s in remaining.values() if all(i in available for i in s.inputs)]
+            if not ready:
+                missing = {
+                    name: [i for i in s.inputs if i not in available and i not in producers]
+                    for name, s in remaining.items()
+                }
+                missing = {k: v for k, v in missing.items() if v}
+                if missing:
+                    raise ValueError(f"[StageGraph] 入力が不足しています: {missing}")
+                raise ValueError(f"[StageGraph] 依存関係が循環しています: {list(remaining)}")
+            for s in ready:
+                available.update(s.outputs)
+                del remaining[s.name]
+
+    def run(
+        self,
+        initial: Dict[str, Any],
+        max_workers: Optional[int] = None,
+        executor=None
+    ) -> Tuple[Dict[str, Any], Dict[str, dict]]:
+        """
+        依存関係が満たされたステージから並行に実行する。
+
+        Args:
+            initial (dict): 初期値 (例: {"audio_input": ..., "sr": 16000, "text": "..."})
+            max_workers (int): スレッド数 (executor 未指定時)
+            executor: concurrent.futures の Executor を外から渡す場合
+                (ProcessPoolExecutor を使う場合は func / 値が pickle 可能であること)
+
+        Returns:
+            (values, timings):
+              values = 初期値 + 全ステージの出力
+              timings = {stage名: {"start": 開始オフセット秒, "seconds": 所要秒}}
+        """
+        self.validate(list(initial.keys()))
+
+        values = dict(initial)
+        timings: Dict[str, dict] = {}
+        pending = dict(self.stages)
+        t_origin = time.perf_counter()
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.stages)))
+
+        running = {}
+        try:
+            while pending or running:
+                # 入力が揃ったステージを投入
+                for name in list(pending):
+                    stage = pending[name]
+                    if all(i in values for i in stage.inputs):
+                        args = [values[i] for i in stage.inputs]
+                        fut = executor.submit(_timed_call, stage.func, args)
+                        running[fut] = stage
+                        del pending[name]
+
+                if not running:
+                    # validate 済みなのでここには来ない想定
+                    raise RuntimeError(f"[StageGraph] 実行できるステージがありません: {list(pending)}")
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    stage = running.pop(fut)
+                    try:
+                        result, t_start, t_end = fut.result()
+                    except Exception as e:
+                        for other in running:
+                            other.cancel()
+                        raise RuntimeError(f"[StageGraph] ステージ '{stage.name}' でエラー: {e}") from e
+
+                    timings[stage.name] = {
+                        "start": t_start - t_origin,
+                        "seconds": t_end - t_start
+                    }
+                    if len(stage.outputs) == 1:
+                        values[stage.outputs[0]] = result
+                    else:
+                        if not isinstance(result, tuple) or len(result) != len(stage.outputs):
+                            raise RuntimeError(
+                                f"[StageGraph] ステージ '{stage.name}' の戻り値が outputs "
+                                f"{list(stage.outputs)} と一致しません。"
+                            )
+                        values.update(zip(stage.outputs, result))
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True)
+
+        return values, timings
+
+
+def _timed_call(func: Callable, args: List[Any]):
+    """ワーカー側で実行時間を測る (キュー待ち時間を含めないため)。"""
+    t_start = time.perf_counter()
+    result = func(*args)
+    return result, t_start, time.perf_counter()
 
 
 class LipSyncPipeline:
     """
-    音声データを元に複数の解析 → リップシンク生成を行うパイプラインをまとめたクラス例。
+    音声データを元に複数の解析 → リップシンク生成を行うパイプライン。
+    実際の各処理は LipSyncGenerator のメソッドを使い、StageGraph で並行実行する。
     """
-    def __init__(self, config_path: str = ""):
+    def __init__(self, config_path: str = "", max_workers: Optional[int] = None):
         """
         Args:
             config_path (str): リップシンク全体の設定ファイル (JSONなど) のパス
+            max_workers (int): ステージ実行スレッド数 (None ならステージ数)
         """
         self.config = {}
-        if config_path and os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+        if config_path:
+            self.config = load_config(config_path)
+
+        self.max_workers = max_workers
+        self.lip_sync_gen = LipSyncGenerator(config_path=config_path or LIP_SYNC_CONFIG)
+        self._asr = None
+        self._asr_lock = threading.Lock()
+
+    # ----------------------------------------------------------------
+    # グラフ構築
+    # ----------------------------------------------------------------
+    def build_graph(self, use_asr: bool = False, output_path: str = None) -> StageGraph:
+        """
+        ステージグラフを組み立てる。
+
+        Args:
+            use_asr (bool): True ならテキストの代わりに ASR で transcript を得る
+            output_path (str): 指定すると最後に export ステージを追加
+        """
+        gen = self.lip_sync_gen
+        graph = StageGraph()
+
+        graph.add_stage("decode", self._stage_decode, inputs=("audio_input",), outputs=("audio",))
+        graph.add_stage("duration", self._stage_duration, inputs=("audio", "sr"), outputs=("duration",))
+        graph.add_stage("envelope", gen._analyze_rms, inputs=("audio", "sr"), outputs=("rms_timeline",))
+
+        if use_asr:
+            graph.add_stage("asr", self._stage_asr, inputs=("audio", "sr"), outputs=("transcript",))
+        else:
+            graph.add_stage("text", gen._normalize_text, inputs=("text",), outputs=("transcript",))
+
+        graph.add_stage("phonemes", gen._text_to_phonemes, inputs=("transcript",), outputs=("phoneme_list",))
+        graph.add_stage(
+            "align",
+            lambda phonemes, duration, gap: self._stage_align(phonemes, duration, gap, use_asr),
+            inputs=("phoneme_list", "duration", "gap_threshold"),
+            outputs=("phoneme_segments",)
+        )
+        graph.add_stage(
+            "merge", gen._merge_phonemes_and_rms,
+            inputs=("phoneme_segments", "rms_timeline"), outputs=("merged_frames",)
+        )
+        graph.add_stage("overlap", self._stage_overlap, inputs=("merged_frames",), outputs=("lip_sync_frames",))
 
-        # 必要に応じて解析クラスのインスタンスを初期化
-        # self.rms_analyzer = RMSAnalyzer()
-        # self.hatsuon_analyzer = HatsuonAnalyzer()
-        # self.clustering_analyzer = ClusteringAnalyzer()
-        # self.lip_sync_gen = LipSyncGenerator(config=self.config)
+        if output_path:
+            graph.add_stage(
+                "export",
+                lambda segs, rms, frames: self._stage_export(segs, rms, frames, output_path),
+                inputs=("phoneme_segments", "rms_timeline", "lip_sync_frames"),
+                outputs=("export_path",)
+            )
+        return graph
 
-    def run_pipeline(self, audio_data: np.ndarray, sr: int, text: str):
+    # ----------------------------------------------------------------
+    # 実行
+    # ----------------------------------------------------------------
+    def run_pipeline(
+        self,
+        audio_data: np.ndarray,
+        sr: int,
+        text: str,
+        output_path: str = None,
+        gap_threshold: float = None
+    ):
         """
         パイプラインを実行し、リップシンク結果を生成して返す。
-        
+
         Args:
-            audio_data (np.ndarray): 音声サンプル (float32想定)
+            audio_data (np.ndarray): 音声サンプル (float32想定, 2次元ならチャンネル平均でモノラル化)
             sr (int): サンプリングレート
-            text (str): 解析したいテキスト。hatsuon等で使用。
+            text (str): 解析したいテキスト。空で allow_asr が有効なら ASR を使う。
+            output_path (str): 指定すると lip_sync_data を JSON で書き出す
+            gap_threshold (float): 短い無音を被せる閾値 (None なら設定値)
 
         Returns:
-            dict: リップシンク用の解析結果データ (例: モーフターゲットや口パクパラメータのリスト等)
+            dict: {
+              "rms": RMSタイムライン,
+              "phonemes": 音素セグメント,
+              "clusters": None (未使用),
+              "lip_sync": {"phoneme_segments", "rms_timeline", "lip_sync_frames"},
+              "transcript": 解析に使ったテキスト,
+              "stage_times": {ステージ名: 秒},
+              "stage_timeline": {ステージ名: {"start", "seconds"}},
+              "total_seconds": 全体の所要時間,
+              "metrics": Metrics (ステージ時間 + segments / frames / rms_frames カウンタ)
+            }
         """
         if audio_data is None or len(audio_data) == 0:
             raise ValueError("音声データが空です。")
 
-        if not text:
+        gen = self.lip_sync_gen
+        use_asr = not gen._normalize_text(text or "")
+        if use_asr and not gen.allow_asr:
             raise ValueError("解析テキストが指定されていません。")
 
-        # 1) RMS解析例
-        #   rms_val = self.rms_analyzer.analyze(audio_data)
-        #   print("RMS:", rms_val)
-
-        # 2) 音素解析(hatsuon)例
-        #   phoneme_list = self.hatsuon_analyzer.analyze(text, audio_data, sr)
-        #   print("Phoneme解析結果:", phoneme_list)
+        if gap_threshold is None:
+            gap_threshold = gen.default_gap_threshold
 
-        # 3) クラスタリングなど追加解析例
-        #   cluster_result = self.clustering_analyzer.cluster(phoneme_list)
-        #   print("クラスタリング結果:", cluster_result)
+        graph = self.build_graph(use_asr=use_asr, output_path=output_path)
+        t0 = time.perf_counter()
+        values, timings = graph.run(
+            {"audio_input": audio_data, "sr": sr, "text": text or "", "gap_threshold": gap_threshold},
+            max_workers=self.max_workers
+        )
+        total_sec = time.perf_counter() - t0
 
-        # 4) リップシンク生成 (LipSyncGenerator) を呼び出し
-        #   lip_sync_result = self.lip_sync_gen.generate_lip_sync(audio_data, text, sample_rate=sr)
-
-        # テスト用のダミー処理 (実際の処理は上記コメントアウト部で置き換え)
         lip_sync_result = {
-            "fake_result": True,
-            "detail": "この部分をLipSyncGeneratorなどで生成する"
+            "phoneme_segments": values["phoneme_segments"],
+            "rms_timeline": values["rms_timeline"],
+            "lip_sync_frames": values["lip_sync_frames"]
         }
+        # LipSyncGenerator 経由で export_lip_sync 等も使えるよう、結果を反映しておく
+        gen.lip_sync_data.update(lip_sync_result)
+
+        metrics = Metrics()
+        for name, t in timings.items():
+            metrics.add_time(name, t["seconds"])
+        metrics.incr("segments", len(values["phoneme_segments"]))
+        metrics.incr("rms_frames", len(values["rms_timeline"]))
+        metrics.incr("frames", len(values["lip_sync_frames"]))
+        gen.metrics = metrics
 
-        # 必要に応じて合成して結果を返す
         final_result = {
-            "rms": None,  # rms_val,
-            "phonemes": None,  # phoneme_list,
-            "clusters": None,  # cluster_result,
-            "lip_sync": lip_sync_result
+            "rms": values["rms_timeline"],
+            "phonemes": values["phoneme_segments"],
+            "clusters": None,
+            "lip_sync": lip_sync_result,
+            "transcript": values["transcript"],
+            "stage_times": {name: t["seconds"] for name, t in timings.items()},
+            "stage_timeline": timings,
+            "total_seconds": total_sec,
+            "metrics": metrics
         }
-
         return final_result
 
+    # ----------------------------------------------------------------
+    # ステージ実装
+    # ----------------------------------------------------------------
+    @staticmethod
+    def _stage_decode(audio_input) -> np.ndarray:
+        """float32 / モノラルの1次元配列に揃える。"""
+        audio = np.asarray(audio_input)
+        if audio.ndim > 1:
+            # (channels, samples) / (samples, channels) のどちらでも短い軸をチャンネルとみなす
+            ch_axis = 0 if audio.shape[0] < audio.shape[-1] else audio.ndim - 1
+            audio = audio.mean(axis=ch_axis)
+        return audio.astype(np.float32, copy=False)
+
+    @staticmethod
+    def _stage_duration(audio: np.ndarray, sr: int) -> float:
+        return len(audio) / float(sr)
+
+    def _stage_asr(self, audio: np.ndarray, sr: int) -> str:
+        """Whisper が使えればそれで、無ければ LipSyncGenerator のダミーASRで文字起こし。"""
+        gen = self.lip_sync_gen
+        with self._asr_lock:
+            if self._asr is None:
+                try:
+                    from main.pipeline.asr_whisper import WhisperASR
+                    self._asr = WhisperASR(use_gpu=gen.use_gpu, model_size=gen.asr_model_size)
+                except ImportError:
+                    self._asr = False
+        if self._asr:
+            try:
+                return gen._normalize_text(self._asr.transcribe(audio, sr))
+            except RuntimeError as e:
+                print(f"[LipSyncPipeline] ASR結果が空です: {e}")
+                return ""
+        return gen._normalize_text(gen._fake_asr_whisper(audio, sr))
+
+    def _stage_align(self, phonemes: list, duration: float, gap_threshold: float, from_asr: bool) -> list:
+        gen = self.lip_sync_gen
+        if not phonemes and from_asr:
+            # generate_lip_sync と同じく、ASR結果が空ならダミー音素 (a->i->u)
+            print("[LipSyncPipeline] ASR結果が空 → ダミー音素使用")
+            return [("a", 0.0, 1.0), ("i", 1.0, 2.0), ("u", 2.0, 3.0)]
+        segments = gen._align_phonemes(phonemes, duration)
+        return gen._smooth_phoneme_segments(segments, gap_threshold)
+
+    def _stage_overlap(self, frames: list) -> list:
+        if overlap_utils is None:
+            return frames
+        return overlap_utils.apply_overlap_easing(frames, self.lip_sync_gen.overlap_ratio)
+
+    @staticmethod
+    def _stage_export(phoneme_segments, rms_timeline, lip_sync_frames, output_path: str) -> str:
+        from main.utils.json_stream import dump_json_stream
+
+        out_dir = os.path.dirname(output_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            dump_json_stream({
+                "phoneme_segments": phoneme_segments,
+                "rms_timeline": rms_timeline,
+                "lip_sync_frames": lip_sync_frames
+            }, f)
+        return output_path
+
 
 # デバッグ実行用のmainブロック（直接このスクリプトを起動した場合の例）
 if __name__ == "__main__":
@@ -119,16 +424,14 @@ if __name__ == "__main__":
         print(f"テスト音声ファイルが存在しません: {test_audio_path}")
         exit(1)
 
-    # 音声読み込み (librosa)
-    if librosa is None:
-        print("librosaがインポートできなかったため、音声読み込みをスキップします。")
-        exit(1)
-
-    audio_data, sr = librosa.load(test_audio_path, sr=16000, mono=True)
+    # 音声読み込み (WAVは直接デコード、その他は librosa)
+    from main.utils.audio_decode import load_audio
+    audio_data, sr = load_audio(test_audio_path, sr=16000, mono=True)
     audio_data = audio_data.astype(np.float32)
 
-    pipeline = LipSyncPipeline(config_path="path/to/lip_sync_config.json")
+    pipeline = LipSyncPipeline()
     result = pipeline.run_pipeline(audio_data, sr=sr, text="こんにちは世界")
 
     # ここで結果を確認
-    print("パイプライン最終結果:", result)
+    print("ステージ別所要時間:", result["stage_times"])
+    print("合計:", result["total_seconds"])
@@ -0,0 +1,434 @@
+# main/pipeline/realtime_engine.py
+# -*- coding: utf-8 -*-
+
+"""
+realtime_engine.py
+
+マイク入力などの PCM ブロックを逐次受け取り、低遅延でモーフウェイトを出力するリアルタイムエンジン。
+LipSyncGenerator (クリップ全体 + テキストが必要) とは別に、ライブ配信のアバター向けに使う。
+
+- 10ms ごとの「tick」単位で RMS エンベロープを更新する (ブロック境界の端数は次のブロックへ持ち越し)。
+- 任意で音声のみの母音分類器 (LPC によるフォルマント推定 → 日本語5母音のプロトタイプに最近傍) を使う。
+  無効にした場合は default_vowel の口形を RMS だけで開閉する。
+- lookahead_ms ぶん先の tick が届くまで出力を保留し、その範囲の最大エンベロープを使って
+  口を音より少し先に開き始める。出力遅延 = lookahead + ブロック長 + 処理時間。
+- 出力前にアタック/リリースの平滑化をかけ、音素→モーフ変換は MorphMixer の混合行列で行う。
+- ブロックごとの処理時間を計測し、latency_budget_ms を超えた回数と合わせて stats() で返す。
+- replay_file() でファイルをブロックに切ってエンジンへ流せる (テスト・チューニング用のハーネス)。
+
+依存:
+- numpy
+- main.pipeline.morph_mixer
+- main.utils.audio_decode (replay_file のみ)
+
+使い方:
+    from main.pipeline.realtime_engine import RealtimeLipSyncEngine
+
+    engine = RealtimeLipSyncEngine(sample_rate=16000, block_size=320, lookahead_ms=20)
+    while streaming:
+        for tick in engine.process_block(pcm_block):   # int16 / float どちらでも可
+            avatar.set_morphs(tick["weights"])          # {"あ": 0.7, ...}
+    print(engine.stats())                               # 処理遅延 (平均 / p95 / 最大) など
+"""
+
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from main.pipeline.morph_mixer import MorphMixer
+from main.utils.config_registry import load_config
+
+# 分類対象の母音
+VOWELS = ("a", "i", "u", "e", "o")
+
+# 日本語5母音のフォルマント (F1, F2) の目安 [Hz] (成人話者の平均的な値)
+VOWEL_FORMANTS = {
+    "a": (800.0, 1300.0),
+    "i": (300.0, 2300.0),
+    "u": (350.0, 1400.0),
+    "e": (500.0, 1900.0),
+    "o": (500.0, 900.0),
+}
+
+TICK_SECONDS = 0.01  # 10ms
+
+
+class VowelClassifier:
+    """
+    音声のみの簡易母音分類器。
+    直近 window_ms の音声から LPC でフォルマント (F1, F2) を推定し、
+    log 周波数空間での各母音プロトタイプとの距離から確率 (softmax) を求める。
+
+    Args:
+        sample_rate (int): サンプリングレート
+        window_ms (float): 分析窓の長さ
+        lpc_order (int or None): LPC 次数 (None なら 2 + sr/1000)
+        sharpness (float): softmax の鋭さ (大きいほど最近傍に寄る)
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        window_ms: float = 30.0,
+        lpc_order: Optional[int] = None,
+        sharpness: float = 12.0
+    ):
+        self.sample_rate = sample_rate
+        self.window_size = max(32, int(sample_rate * window_ms / 1000.0))
+        self.lpc_order = lpc_order or int(2 + sample_rate / 1000)
+        self.sharpness = sharpness
+        self._window = np.hamming(self.window_size).astype(np.float64)
+        self._protos = np.log(np.array([VOWEL_FORMANTS[v] for v in VOWELS], dtype=np.float64))
+
+    def estimate_formants(self, frame: np.ndarray) -> Optional[tuple]:
+        """
+        frame (window_size サンプル) から (F1, F2) を推定する。推定できなければ None。
+        """
+        x = np.asarray(frame, dtype=np.float64)
+        if len(x) < self.window_size:
+            return None
+        x = x[-self.window_size:]
+        # プリエンファシス + 窓掛け
+        x = np.append(x[0], x[1:] - 0.97 * x[:-1]) * self._window
+
+        order = self.lpc_order
+        r = np.correlate(x, x, mode="full")[len(x) - 1:len(x) + order]
+        if r[0] <= 1e-12:
+            return None
+        a = _levinson(r, order)
+        if a is None:
+            return None
+
+        roots = np.roots(a)
+        roots = roots[np.imag(roots) > 0]
+        if len(roots) == 0:
+            return None
+        freqs = np.angle(roots) * (self.sample_rate / (2.0 * np.pi))
+        bandwidths = -np.log(np.abs(roots)) * (self.sample_rate / np.pi)
+        keep = (freqs > 200.0) & (bandwidths < 500.0)
+        freqs = np.sort(freqs[keep])
+        if len(freqs) < 2:
+            return None
+        return float(freqs[0]), float(freqs[1])
+
+    def classify(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        frame の母音確率 (VOWELS 順, 合計1) を返す。フォルマントが取れなければ None。
+        """
+        formants = self.estimate_formants(frame)
+        if formants is None:
+            return None
+        point = np.log(np.array(formants, dtype=np.float64))
+        d2 = np.sum((self._protos - point) ** 2, axis=1)
+        logits = -self.sharpness * d2
+        p = np.exp(logits - logits.max())
+        return p / p.sum()
+
+
+def _levinson(r: np.ndarray, order: int) -> Optional[np.ndarray]:
+    """自己相関 r[0..order] から LPC 係数 [1, a1, ..., ap] を求める (Levinson-Durbin)。"""
+    a = np.zeros(order + 1, dtype=np.float64)
+    a[0] = 1.0
+    err = r[0]
+    for i in range(1, order + 1):
+        acc = r[i] + np.dot(a[1:i], r[i - 1:0:-1])
+        k = -acc / err
+        a[1:i] = a[1:i] + k * a[i - 1:0:-1]
+        a[i] = k
+        err *= (1.0 - k * k)
+        if err <= 0:
+            return None
+    return a
+
+
+class RealtimeLipSyncEngine:
+    """
+    PCM ブロックを受け取り、10ms ごとの tick でモーフウェイトを返すリアルタイムエンジン。
+
+    Args:
+        sample_rate (int): 入力のサンプリングレート
+        block_size (int): 想定する1ブロックのサンプル数 (遅延計算用。process_block は任意長も受け付ける)
+        lookahead_ms (float): 出力を保留する先読み時間 (0 なら最小遅延)
+        latency_budget_ms (float): 許容する遅延 (ブロック長 + 先読み + 処理時間)。超過回数を数える
+        use_vowel_classifier (bool): 母音分類器を使うか
+        mapping (dict): 母音→モーフ名のマッピング (MorphMixer 形式)。None なら母音名そのまま
+        default_vowel (str): 分類器を使わない / 推定できない場合の母音
+        rms_threshold (float): これ未満の RMS は無音扱い
+        attack_ms / release_ms (float): ウェイトの立ち上がり / 減衰の時定数
+        config_path (str): 既定値を読む設定ファイル (lip_sync_config.json の "realtime" セクション)
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        block_size: int = None,
+        lookahead_ms: float = None,
+        latency_budget_ms: float = None,
+        use_vowel_classifier: bool = None,
+        mapping: Dict = None,
+        default_vowel: str = None,
+        rms_threshold: float = None,
+        attack_ms: float = None,
+        release_ms: float = None,
+        config_path: str = None
+    ):
+        config = load_config(config_path) if config_path else load_config()
+        rt_conf = config.get("realtime", {})
+        proc_conf = config.get("processing_options", {})
+
+        def pick(value, key, default):
+            return value if value is not None else rt_conf.get(key, default)
+
+        self.sample_rate = int(sample_rate)
+        self.hop = max(1, int(self.sample_rate * TICK_SECONDS))
+        # 22.05kHz などでは hop が切り捨てられるので、1ティックの実際の長さはサンプル数から求める
+        self.tick_seconds = self.hop / float(self.sample_rate)
+        self.block_size = int(pick(block_size, "block_size", self.hop * 2))
+        self.lookahead_ms = float(pick(lookahead_ms, "lookahead_ms", 20.0))
+        self.latency_budget_ms = float(pick(latency_budget_ms, "latency_budget_ms", 50.0))
+        self.use_vowel_classifier = bool(pick(use_vowel_classifier, "use_vowel_classifier", True))
+        self.default_vowel = pick(default_vowel, "default_vowel", "a")
+        self.rms_threshold = float(
+            rms_threshold if rms_threshold is not None
+            else rt_conf.get("rms_threshold", proc_conf.get("rms_threshold", 0.02))
+        )
+        attack_ms = float(pick(attack_ms, "attack_ms", 15.0))
+        release_ms = float(pick(release_ms, "release_ms", 60.0))
+        # 1 tick あたりの追従率 (時定数 → 指数平滑の係数)
+        self._attack = 1.0 - np.exp(-self.tick_seconds * 1000.0 / max(attack_ms, 1e-3))
+        self._release = 1.0 - np.exp(-self.tick_seconds * 1000.0 / max(release_ms, 1e-3))
+
+        self.lookahead_ticks = int(round(self.lookahead_ms / (self.tick_seconds * 1000.0)))
+
+        if mapping is None:
+            mapping = {v: v for v in VOWELS}
+        # マッピングに無い母音は default_vowel のモーフ (それも無ければ母音名) で代用する
+        default_morph = self.default_vowel
+        if self.default_vowel in mapping:
+            default_morph = MorphMixer.primary_morph_of(mapping[self.default_vowel])
+        mixer = MorphMixer(mapping, default_morph=default_morph)
+        self.morphs, self._mix = mixer.vocab_matrix(VOWELS)
+        self._default_probs = np.array(
+            [1.0 if v == self.default_vowel else 0.0 for v in VOWELS], dtype=np.float64
+        )
+
+        self.classifier = VowelClassifier(self.sample_rate) if self.use_vowel_classifier else None
+        history = self.classifier.window_size if self.classifier else 0
+
+        # 状態
+        self._carry = np.zeros(0, dtype=np.float32)            # hop 未満の端数
+        self._history = np.zeros(history, dtype=np.float32)     # 分類器の分析窓
+        self._pending = deque()                                 # 先読み待ちの tick
+        self._smoothed = np.zeros(len(self.morphs), dtype=np.float64)
+        self._tick_index = 0
+        self._latencies = deque(maxlen=1000)                    # 直近の処理時間 [ms]
+        self.blocks_processed = 0
+        self.budget_overruns = 0
+
+    # ----------------------------------------------------------------
+    # 入力
+    # ----------------------------------------------------------------
+    @property
+    def algorithmic_latency_ms(self) -> float:
+        """処理時間を除いた遅延 (ブロック長 + 先読み)。"""
+        return self.block_size * 1000.0 / self.sample_rate + self.lookahead_ticks * self.tick_seconds * 1000.0
+
+    def process_block(self, pcm: np.ndarray) -> List[dict]:
+        """
+        PCM ブロックを1つ処理し、確定した tick のリストを返す。
+
+        Args:
+            pcm (np.ndarray): int16 (±32768) または float (±1.0) のモノラル PCM
+
+        Returns:
+            List[dict]: [{"time", "rms", "vowel", "weights": {morph: weight}}, ...]
+        """
+        t0 = time.perf_counter()
+
+        block = np.asarray(pcm)
+        if block.dtype == np.int16:
+            block = block.astype(np.float32) * (1.0 / 32768.0)
+        else:
+            block = block.astype(np.float32, copy=False)
+        block = block.ravel()
+        if len(self._carry):
+            block = np.concatenate([self._carry, block])
+
+        n_hops = len(block) // self.hop
+        if n_hops:
+            hops = block[:n_hops * self.hop].reshape(n_hops, self.hop)
+            rms_values = np.sqrt(np.mean(hops ** 2, axis=1))
+            for i in range(n_hops):
+                self._pending.append(self._analyze_tick(hops[i], float(rms_values[i])))
+        self._carry = block[n_hops * self.hop:].copy()
+
+        out = []
+        while len(self._pending) > self.lookahead_ticks:
+            out.append(self._emit())
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        self._latencies.append(elapsed_ms)
+        self.blocks_processed += 1
+        if elapsed_ms + self.algorithmic_latency_ms > self.latency_budget_ms:
+            self.budget_overruns += 1
+        return out
+
+    def flush(self) -> List[dict]:
+        """入力終了時に、先読み待ちで保留している tick をすべて出力する。"""
+        out = []
+        while self._pending:
+            out.append(self._emit())
+        return out
+
+    def reset(self):
+        """状態を初期化する (設定はそのまま)。"""
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._history[:] = 0.0
+        self._pending.clear()
+        self._smoothed[:] = 0.0
+        self._tick_index = 0
+        self._latencies.clear()
+        self.blocks_processed = 0
+        self.budget_overruns = 0
+
+    # ----------------------------------------------------------------
+    # 内部処理
+    # ----------------------------------------------------------------
+    def _analyze_tick(self, samples: np.ndarray, rms: float) -> dict:
+        t = self._tick_index * self.hop / float(self.sample_rate)
+        self._tick_index += 1
+
+        probs = None
+        if self.classifier is not None:
+            hist = self._history
+            n = len(samples)
+            if n >= len(hist):
+                hist[:] = samples[-len(hist):]
+            else:
+                hist[:-n] = hist[n:]
+                hist[-n:] = samples
+            if rms >= self.rms_threshold:
+                probs = self.classifier.classify(hist)
+
+        if rms < self.rms_threshold:
+            rms = 0.0
+        return {"time": t, "rms": rms, "probs": probs}
+
+    def _emit(self) -> dict:
+        tick = self._pending.popleft()
+
+        # 先読み範囲 (今の tick + 保留中の tick) の最大エンベロープで口を先に開く
+        envelope = tick["rms"]
+        for ahead in self._pending:
+            if ahead["rms"] > envelope:
+                envelope = ahead["rms"]
+        peak = min(1.0, envelope * 2.0)
+
+        probs = tick["probs"]
+        if probs is None:
+            # 無音 / 推定失敗 → 次に推定できた tick の母音を先取り (無ければ既定の母音)
+            probs = next((a["probs"] for a in self._pending if a["probs"] is not None), self._default_probs)
+
+        target = (probs @ self._mix) * peak
+        rate = np.where(target > self._smoothed, self._attack, self._release)
+        self._smoothed += (target - self._smoothed) * rate
+
+        vowel = VOWELS[int(np.argmax(probs))] if peak > 0.0 else None
+        return {
+            "time": tick["time"],
+            "rms": tick["rms"],
+            "vowel": vowel,
+            "weights": {m: float(w) for m, w in zip(self.morphs, self._smoothed)}
+        }
+
+    # ----------------------------------------------------------------
+    # 計測
+    # ----------------------------------------------------------------
+    def stats(self) -> dict:
+        """
+        直近 (最大1000ブロック) の処理遅延の統計。
+
+        Returns:
+            dict: {"blocks", "mean_ms", "p95_ms", "max_ms", "algorithmic_ms",
+                   "budget_ms", "budget_overruns"}
+        """
+        lat = np.array(self._latencies, dtype=np.float64)
+        return {
+            "blocks": self.blocks_processed,
+            "mean_ms": float(lat.mean()) if len(lat) else 0.0,
+            "p95_ms": float(np.percentile(lat, 95)) if len(lat) else 0.0,
+            "max_ms": float(lat.max()) if len(lat) else 0.0,
+            "algorithmic_ms": self.algorithmic_latency_ms,
+            "budget_ms": self.latency_budget_ms,
+            "budget_overruns": self.budget_overruns
+        }
+
+
+def replay_file(
+    engine: RealtimeLipSyncEngine,
+    audio_path: str,
+    realtime: bool = False
+) -> Iterator[dict]:
+    """
+    音声ファイルを engine.block_size ごとに切ってエンジンへ流すハーネス。
+    ファイルは engine.sample_rate にリサンプリングして読み込む。
+
+    Args:
+        engine (RealtimeLipSyncEngine): 対象エンジン
+        audio_path (str): 音声ファイル
+        realtime (bool): True ならブロック長ぶん待ちながら流す (実機の入力タイミングを再現)
+
+    Yields:
+        dict: engine.process_block / flush が返す tick
+    """
+    from main.utils.audio_decode import load_audio
+
+    audio, _ = load_audio(audio_path, sr=engine.sample_rate, mono=True)
+    block_sec = engine.block_size / float(engine.sample_rate)
+    next_time = time.perf_counter()
+
+    for start in range(0, len(audio), engine.block_size):
+        if realtime:
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_time += block_sec
+        for tick in engine.process_block(audio[start:start + engine.block_size]):
+            yield tick
+
+    for tick in engine.flush():
+        yield tick
+
+
+def demo_main():
+    """
+    デモ: 合成した母音 (a → i → u → e → o) をブロック単位で流し、推定結果と遅延を表示
+    """
+    sr = 16000
+    t = np.arange(int(sr * 0.3)) / sr
+    pieces = []
+    for v in VOWELS:
+        f1, f2 = VOWEL_FORMANTS[v]
+        # 120Hz のパルス列 (声帯音源の代わり) を2つの共振で強調した簡易合成
+        src = np.sign(np.sin(2 * np.pi * 120 * t))
+        tone = 0.6 * np.sin(2 * np.pi * f1 * t) + 0.4 * np.sin(2 * np.pi * f2 * t)
+        pieces.append((0.3 * src * 0.1 + 0.3 * tone).astype(np.float32))
+        pieces.append(np.zeros(int(sr * 0.1), dtype=np.float32))
+    audio = np.concatenate(pieces)
+
+    engine = RealtimeLipSyncEngine(sample_rate=sr, block_size=320, lookahead_ms=20)
+    ticks = []
+    for start in range(0, len(audio), engine.block_size):
+        ticks.extend(engine.process_block(audio[start:start + engine.block_size]))
+    ticks.extend(engine.flush())
+
+    for tick in ticks[::10]:
+        top = max(tick["weights"].items(), key=lambda kv: kv[1])
+        print(f"[RealtimeLipSyncEngine] t={tick['time']:.2f}s vowel={tick['vowel']} top={top[0]}:{top[1]:.2f}")
+    print(f"[RealtimeLipSyncEngine] stats: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    demo_main()
@@ -0,0 +1,218 @@
+# main/scripts/startup_profile.py
+# -*- coding: utf-8 -*-
+
+"""
+startup_profile.py
+
+エントリーポイントの起動時間を計測するスクリプト。
+
+1) import 時間のプロファイル (既定):
+   対象モジュールを別プロセスで `python -X importtime` 付きで import し、
+   モジュールごとの self / cumulative 時間を大きい順に表示する。
+
+2) 起動時間の回帰チェック (--check):
+   - `python -m main.pipeline.lip_sync_main --help` の実行時間
+   - GUI (MainWindow) を生成して show() し、最初のイベント処理が終わるまでの時間
+   を計測し、予算 (秒) を超えた場合や、起動時に読み込むべきでない重い依存
+   (whisper / torch / sklearn / moviepy / celery / librosa) が import されていた場合は
+   終了コード 1 を返す。CI などで起動時間の悪化を検出するために使う。
+
+依存:
+- 標準ライブラリのみ (GUI チェックには PyQt5 が必要。QT_QPA_PLATFORM=offscreen で実行する)
+
+使い方:
+    python -m main.scripts.startup_profile                          # main.ui.main_app の import 内訳
+    python -m main.scripts.startup_profile main.pipeline.lip_sync_main --top 15
+    python -m main.scripts.startup_profile --check                  # 予算チェック (超過で exit 1)
+    python -m main.scripts.startup_profile --check --cli-budget 0.3 --gui-budget 1.5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# 既定の予算 (秒)。計測は複数回の最小値で比較する。
+DEFAULT_CLI_BUDGET = 0.5
+DEFAULT_GUI_BUDGET = 2.0
+
+# 起動時 (ヘルプ表示 / ウィンドウ表示まで) に import されてはいけない重い依存
+HEAVY_MODULES = ("whisper", "torch", "sklearn", "moviepy", "celery", "librosa", "matplotlib")
+
+# GUI 起動を計測する子プロセス用コード
+_GUI_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from main.ui.main_app import MainWindow
+app = QApplication(sys.argv)
+window = MainWindow()
+window.show()
+app.processEvents()
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+# CLI (--help) を計測する子プロセス用コード
+_CLI_PROBE = r"""
+import json, runpy, sys, time
+t0 = time.perf_counter()
+sys.argv = ["lip_sync_main", "--help"]
+try:
+    runpy.run_module("main.pipeline.lip_sync_main", run_name="__main__")
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - t0
+sys.stderr.write("@@PROBE@@" + json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}) + "\n")
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+# ----------------------------------------------------------------
+# import 時間のプロファイル
+# ----------------------------------------------------------------
+def profile_imports(module: str) -> List[dict]:
+    """
+    module を -X importtime 付きの別プロセスで import し、モジュールごとの時間を返す。
+
+    Returns:
+        List[dict]: [{"module", "self_ms", "cumulative_ms", "depth"}, ...] (import 完了順)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_child_env(), cwd=PROJECT_ROOT
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # ヘッダ行
+        name = parts[2].rstrip()
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(parts[0]) / 1000.0,
+            "cumulative_ms": int(parts[1]) / 1000.0,
+            "depth": (len(name) - len(name.lstrip())) // 2
+        })
+    if proc.returncode != 0:
+        print(f"[startup_profile] {module} の import に失敗しました:\n{proc.stderr[-2000:]}")
+    return rows
+
+
+def print_import_profile(module: str, top: int = 25):
+    rows = profile_imports(module)
+    if not rows:
+        return
+    total = max(r["cumulative_ms"] for r in rows)
+    print(f"[startup_profile] import {module}: 合計 {total:.1f} ms ({len(rows)} モジュール)")
+
+    print(f"\n  cumulative 上位 {top} (直下の import のみ = depth 1):")
+    direct = [r for r in rows if r["depth"] <= 1]
+    for r in sorted(direct, key=lambda r: -r["cumulative_ms"])[:top]:
+        print(f"    {r['cumulative_ms']:9.1f} ms  {r['module']}")
+
+    print(f"\n  self 上位 {top}:")
+    for r in sorted(rows, key=lambda r: -r["self_ms"])[:top]:
+        print(f"    {r['self_ms']:9.1f} ms  {r['module']}")
+
+    heavy = sorted({r["module"].split(".")[0] for r in rows} & set(HEAVY_MODULES))
+    if heavy:
+        print(f"\n  [注意] 重い依存が import されています: {', '.join(heavy)}")
+
+
+# ----------------------------------------------------------------
+# 予算チェック
+# ----------------------------------------------------------------
+def _run_probe(code: str, from_stderr: bool = False) -> Optional[dict]:
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, env=_child_env(), cwd=PROJECT_ROOT
+    )
+    stream = proc.stderr if from_stderr else proc.stdout
+    for line in reversed(stream.splitlines()):
+        if from_stderr:
+            if line.startswith("@@PROBE@@"):
+                return json.loads(line[len("@@PROBE@@"):])
+        elif line.startswith("{"):
+            return json.loads(line)
+    print(f"[startup_profile] 計測プロセスが失敗しました (exit={proc.returncode}):\n{proc.stderr[-2000:]}")
+    return None
+
+
+def measure(name: str, code: str, runs: int, from_stderr: bool = False) -> Optional[dict]:
+    """code を runs 回実行し、最小時間と (最後の実行で) 読み込まれた重い依存を返す。"""
+    best = None
+    modules = []
+    for _ in range(max(1, runs)):
+        result = _run_probe(code, from_stderr)
+        if result is None:
+            return None
+        modules = result["modules"]
+        best = result["seconds"] if best is None else min(best, result["seconds"])
+    heavy = sorted({m.split(".")[0] for m in modules} & set(HEAVY_MODULES))
+    return {"name": name, "seconds": best, "heavy": heavy}
+
+
+def run_check(cli_budget: float, gui_budget: float, runs: int, skip_gui: bool = False) -> int:
+    """予算チェック。すべて満たせば 0、超過・失敗があれば 1。"""
+    checks = [("lip_sync_main --help", _CLI_PROBE, cli_budget, True)]
+    if not skip_gui:
+        checks.append(("GUI window show", _GUI_PROBE, gui_budget, False))
+
+    failed = False
+    for name, code, budget, from_stderr in checks:
+        result = measure(name, code, runs, from_stderr)
+        if result is None:
+            failed = True
+            print(f"[startup_profile] NG  {name}: 計測できませんでした")
+            continue
+        ok = result["seconds"] <= budget and not result["heavy"]
+        failed |= not ok
+        status = "OK" if ok else "NG"
+        print(f"[startup_profile] {status}  {name}: {result['seconds']:.3f}s (予算 {budget:.3f}s)")
+        if result["heavy"]:
+            print(f"[startup_profile]     起動時に重い依存が import されています: {', '.join(result['heavy'])}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エントリーポイントの import 時間 / 起動時間を計測する")
+    parser.add_argument("modules", nargs="*", default=["main.ui.main_app"],
+                        help="import 時間を計測するモジュール (既定: main.ui.main_app)")
+    parser.add_argument("--top", type=int, default=25, help="表示する件数")
+    parser.add_argument("--check", action="store_true",
+                        help="起動時間の予算チェックを行い、超過したら終了コード 1 を返す")
+    parser.add_argument("--cli-budget", type=float, default=DEFAULT_CLI_BUDGET,
+                        help="lip_sync_main --help の予算(秒)")
+    parser.add_argument("--gui-budget", type=float, default=DEFAULT_GUI_BUDGET,
+                        help="GUI ウィンドウ表示までの予算(秒)")
+    parser.add_argument("--runs", type=int, default=3, help="計測回数 (最小値で比較)")
+    parser.add_argument("--no-gui", action="store_true", help="--check で GUI の計測を省略する")
+    args = parser.parse_args()
+
+    if args.check:
+        t0 = time.perf_counter()
+        code = run_check(args.cli_budget, args.gui_budget, args.runs, skip_gui=args.no_gui)
+        print(f"[startup_profile] チェック完了 ({time.perf_counter() - t0:.1f}s)")
+        sys.exit(code)
+
+    for module in args.modules:
+        print_import_profile(module, args.top)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# main/ui/analysis_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+analysis_worker.py
+
+MainWindow の解析・エクスポートを GUI スレッドの外 (QThreadPool) で実行するためのジョブキュー。
+
+- AnalysisQueue.submit_analysis() で音声の読み込み + LipSyncGenerator.generate_lip_sync を、
+  submit_export() で ExportPipeline.run を、submit_peaks() で波形表示用のピークピラミッドの
+  読み込み・作成をワーカースレッドに投入する。戻り値はジョブID。
+- 進捗は LipSyncGenerator.stage_listener (Metrics のステージ開始通知) から取り、
+  ステージ名と 0-100 の値を jobProgress シグナルで通知する (固定のチェックポイントではない)。
+- cancel(job_id) で中断を要求する。解析はステージの境目で、エクスポートは書き込み開始前に止まる
+  (numpy の1ステージの途中では止まらない)。キュー待ちのジョブは開始時にそのまま破棄される。
+- 複数のジョブを同時に実行できる (スレッド数は processing_options.analysis_workers。0 なら CPU 数)。
+  ジョブごとに LipSyncGenerator を作るので、スレッド間で解析状態は共有しない。
+  RMS などの重い処理は numpy 内で GIL を手放すため、スレッドでも並列に進む。
+  (純 Python 部分まで並列にしたい大量バッチは lip_sync_main.py --batch のプロセスプールを使う)
+- シグナルはワーカースレッドから発行され、GUI スレッドのスロットへはキュー経由で届く。
+
+依存:
+- PyQt5
+- main.pipeline.lip_sync_generator / main.utils.audio_decode
+- main.pipeline.export_pipeline (エクスポート時のみ)
+- main.utils.peak_pyramid (波形ピークの作成時のみ)
+
+使い方:
+    from main.ui.analysis_worker import AnalysisQueue
+
+    queue = AnalysisQueue(parent=self, max_workers=2)
+    queue.jobProgress.connect(lambda job_id, percent, stage: ...)
+    queue.jobFinished.connect(lambda job_id, payload: print(payload["result"]))
+    job_id = queue.submit_analysis("voice.wav", "こんにちは")
+    queue.cancel(job_id)
+"""
+
+import os
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# ステージ開始時点の進捗 (%)。解析で実際に通るステージだけが通知される。
+STAGE_PROGRESS = {
+    "queued": 0,
+    "decode": 2,
+    "normalize": 25,
+    "cache": 30,
+    "phonemes": 35,
+    "smooth": 45,
+    "rms": 50,
+    "merge": 75,
+    "overlap": 90,
+    "write": 95,
+    "prepare": 5,
+    "export": 30,
+    "peaks": 10
+}
+
+# 表示用のステージ名
+STAGE_LABELS = {
+    "queued": "待機中",
+    "decode": "音声の読み込み",
+    "normalize": "テキスト正規化",
+    "cache": "キャッシュ確認",
+    "phonemes": "音素解析",
+    "smooth": "音素の時間調整",
+    "rms": "RMS解析",
+    "merge": "音素とRMSのマージ",
+    "overlap": "オーバーラップ処理",
+    "write": "結果の書き出し",
+    "prepare": "共有データ準備",
+    "export": "書き出し",
+    "peaks": "波形の読み込み"
+}
+
+
+class AnalysisCancelled(Exception):
+    """cancel() されたジョブがステージの境目で送出する例外。"""
+
+
+class _Job(QRunnable):
+    """
+    1件のジョブ。run() はワーカースレッドで実行される。
+    進捗・結果は queue のシグナルで通知する。
+    """
+
+    def __init__(self, queue: "AnalysisQueue", job_id: int, work: Callable):
+        super().__init__()
+        self.queue = queue
+        self.job_id = job_id
+        self.work = work
+        self.cancel_event = threading.Event()
+        self._percent = 0
+
+    def report(self, stage: str, percent: Optional[int] = None, check_cancel: bool = True):
+        """ステージ開始を通知する。中断要求があればここで AnalysisCancelled を送出。"""
+        if check_cancel and self.cancel_event.is_set():
+            raise AnalysisCancelled(stage)
+        if percent is None:
+            percent = STAGE_PROGRESS.get(stage, self._percent)
+        # キャッシュの保存など、後から前のステージ名が来ても進捗は戻さない
+        self._percent = max(self._percent, int(percent))
+        self.queue.jobProgress.emit(self.job_id, self._percent, stage)
+
+    def run(self):
+        try:
+            if self.cancel_event.is_set():
+                raise AnalysisCancelled("queued")
+            payload = self.work(self)
+        except AnalysisCancelled:
+            self.queue._job_done(self.job_id)
+            self.queue.jobCancelled.emit(self.job_id)
+            return
+        except Exception:
+            self.queue._job_done(self.job_id)
+            self.queue.jobFailed.emit(self.job_id, traceback.format_exc())
+            return
+        self.queue._job_done(self.job_id)
+        self.queue.jobProgress.emit(self.job_id, 100, "done")
+        self.queue.jobFinished.emit(self.job_id, payload)
+
+
+class AnalysisQueue(QObject):
+    """
+    解析・エクスポートのジョブを QThreadPool で実行するキュー。
+
+    Signals:
+        jobProgress(int job_id, int percent, str stage)
+        jobFinished(int job_id, object payload)
+            解析: {"result": lip_sync_data, "metrics": Metrics, "audio_path", "output_path", "seconds"}
+            エクスポート: ExportPipeline.run のレポート
+            波形ピーク: {"peaks": PeakPyramid, "audio_path"}
+        jobFailed(int job_id, str traceback_text)
+        jobCancelled(int job_id)
+
+    Args:
+        parent (QObject): 親
+        max_workers (int): 同時に実行するジョブ数 (None / 0 なら CPU 数)
+    """
+
+    jobProgress = pyqtSignal(int, int, str)
+    jobFinished = pyqtSignal(int, object)
+    jobFailed = pyqtSignal(int, str)
+    jobCancelled = pyqtSignal(int)
+
+    def __init__(self, parent=None, max_workers: Optional[int] = None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or os.cpu_count() or 1)
+        self._jobs: Dict[int, _Job] = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    # ----------------------------------------------------------------
+    # 投入
+    # ----------------------------------------------------------------
+    def submit_analysis(
+        self,
+        audio_path: str,
+        text: str,
+        asr_mode: bool = False,
+        config_path: str = "",
+        output_path: Optional[str] = None,
+        compact: bool = False,
+        digest: Optional[str] = None
+    ) -> int:
+        """
+        音声の読み込み + リップシンク解析を投入する。
+
+        Args:
+            audio_path (str): 音声ファイル
+            text (str): セリフ (空なら ASR / ダミー)
+            asr_mode (bool): テキストが空のとき ASR を使うか
+            config_path (str): lip_sync_config.json (空なら既定)
+            output_path (str): 指定すると結果 JSON をここに書き出す (バッチ解析用)
+            compact (bool): 書き出す JSON を改行無しにするか
+            digest (str): 指定すると出力の隣に <出力>.digest を書く (lip_sync_main.batch_entry_digest。
+                次回の一括解析で最新かどうかの判定に使う)
+        """
+        def work(job: _Job) -> dict:
+            return _run_analysis(job, audio_path, text, asr_mode, config_path, output_path, compact, digest)
+        return self._submit(work)
+
+    def submit_export(self, lip_sync_data: dict, targets: list, pipeline_options: dict = None,
+                      run_options: dict = None) -> int:
+        """
+        ExportPipeline での書き出しを投入する。
+
+        Args:
+            lip_sync_data (dict): 解析結果
+            targets (list): ExportPipeline.make_targets の戻り値
+            pipeline_options (dict): ExportPipeline(...) のキーワード引数 (model_name, vmd_mapping など)
+            run_options (dict): ExportPipeline.run のキーワード引数 (fps, fade_out など)
+        """
+        def work(job: _Job) -> dict:
+            return _run_export(job, lip_sync_data, targets, pipeline_options or {}, run_options or {})
+        return self._submit(work)
+
+    def submit_peaks(self, audio_path: str, cache_dir: Optional[str] = None) -> int:
+        """
+        波形表示用のピークピラミッドの読み込み (無ければ作成・保存) を投入する。
+        長い音声では作成に時間がかかるので、GUI スレッドでは行わない。
+
+        Args:
+            audio_path (str): 音声ファイル
+            cache_dir (str): 音声の隣に .peaks を書けないときの保存先
+        """
+        def work(job: _Job) -> dict:
+            return _run_peaks(job, audio_path, cache_dir)
+        return self._submit(work)
+
+    def _submit(self, work: Callable) -> int:
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            job = _Job(self, job_id, work)
+            self._jobs[job_id] = job
+        self.pool.start(job)
+        return job_id
+
+    def _job_done(self, job_id: int):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    # ----------------------------------------------------------------
+    # 中断・状態
+    # ----------------------------------------------------------------
+    def cancel(self, job_id: int) -> bool:
+        """ジョブの中断を要求する。既に終わったジョブなら False。"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def cancel_all(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_event.set()
+
+    def active_count(self) -> int:
+        """実行中 + 待機中のジョブ数。"""
+        with self._lock:
+            return len(self._jobs)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """全ジョブの終了を待つ (ウィンドウを閉じるとき用)。"""
+        return self.pool.waitForDone(msecs)
+
+
+# ----------------------------------------------------------------
+# ワーカースレッドで実行される処理
+# ----------------------------------------------------------------
+def _run_analysis(job: _Job, audio_path: str, text: str, asr_mode: bool, config_path: str,
+                  output_path: Optional[str], compact: bool, digest: Optional[str]) -> dict:
+    import numpy as np
+    from main.utils.audio_decode import load_audio
+    from main.utils.metrics import Metrics
+    from main.pipeline.lip_sync_generator import LipSyncGenerator
+
+    t0 = time.perf_counter()
+    metrics = Metrics(tags={"audio": os.path.basename(audio_path)}, listener=job.report)
+
+    with metrics.stage("decode"):
+        audio_data, sr = load_audio(audio_path, sr=16000, mono=True)
+        audio_data = audio_data.astype(np.float32, copy=False)
+
+    generator = LipSyncGenerator(config_path=config_path) if config_path else LipSyncGenerator()
+    generator.allow_asr = asr_mode
+    generator.stage_listener = job.report
+    # 複数ジョブが同時に print すると読めなくなるので黙らせる
+    generator.verbose = False
+    result = dict(generator.generate_lip_sync(audio_data, text, sample_rate=sr))
+    metrics.merge(generator.metrics)
+
+    if output_path:
+        from main.utils.json_stream import dump_json_stream
+        with metrics.stage("write"):
+            out_dir = os.path.dirname(output_path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+            tmp_path = output_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                dump_json_stream(result, f, compact=compact)
+            os.replace(tmp_path, output_path)
+            if digest:
+                from main.pipeline.lip_sync_main import write_output_digest
+                write_output_digest(output_path, digest)
+
+    metrics.listener = None
+    return {
+        "result": result,
+        "metrics": metrics,
+        "audio_path": audio_path,
+        "output_path": output_path,
+        "seconds": time.perf_counter() - t0
+    }
+
+
+def _run_export(job: _Job, lip_sync_data: dict, targets: list, pipeline_options: dict,
+                run_options: dict) -> dict:
+    from main.pipeline.export_pipeline import ExportPipeline
+
+    job.report("prepare")
+    pipeline = ExportPipeline(lip_sync_data, **pipeline_options)
+    job.report("export")
+
+    done = []
+
+    def on_target_done(r: dict):
+        done.append(r)
+        # 書き込みは始まっているので、ここでは中断しない
+        job.report("export", 30 + 70 * len(done) // max(1, len(targets)), check_cancel=False)
+
+    return pipeline.run(targets, on_target_done=on_target_done, **run_options)
+
+
+def _run_peaks(job: _Job, audio_path: str, cache_dir: Optional[str]) -> dict:
+    from main.utils.peak_pyramid import load_or_build_peaks
+
+    job.report("peaks")
+    return {"peaks": load_or_build_peaks(audio_path, cache_dir=cache_dir), "audio_path": audio_path}
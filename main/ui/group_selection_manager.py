@@ -18,6 +18,9 @@ group_selection_manager.py
   2) それを GroupSelectionManager に渡して内部リストを更新
   3) GroupSelectionManager は "selectionChanged" シグナル等を発行して、UIが一括操作可能にする
   4) 一括削除/移動時は GroupSelectionManager 内のメソッドを呼び出し、まとめて Undo/Redo コマンドを発行
+     - 移動: ドロップ時に move_selected_items() を1回呼ぶ。全ブロックぶんが1つの MoveBlocksCommand になり
+       Undo 1回で戻る (マウス移動ごとに呼ぶと、その回数ぶん Undo ステップが積まれる)
+     - 削除: 選択ブロックを1つの RemoveBlocksCommand で消す (Undo 1回で全部戻る)
 
 依存:
   - PyQt5
@@ -29,6 +32,15 @@ from typing import List, Optional
 from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtWidgets import QGraphicsItem, QUndoStack
 
+try:
+    from main.ui.undo_commands import MoveBlocksCommand, RemoveBlocksCommand
+except ImportError:
+    MoveBlocksCommand = None
+    RemoveBlocksCommand = None
+
+# ブロックの x 座標 (px) と時間 (秒) の比 (PhonemeBlockItem と同じ 1sec = 200px)
+PX_PER_SEC = 200.0
+
 class GroupSelectionManager(QObject):
     """
     複数の QGraphicsItem (主に PhonemeBlockItem) をまとめて選択・編集するための管理クラス。
@@ -40,10 +52,14 @@ class GroupSelectionManager(QObject):
 
     selectionChanged = pyqtSignal()
 
-    def __init__(self, parent=None, undo_stack: Optional[QUndoStack] = None):
+    def __init__(self, parent=None, undo_stack: Optional[QUndoStack] = None, model=None):
         super().__init__(parent)
         self._selected_items: List[QGraphicsItem] = []
-        self._undo_stack = undo_stack  # Undo/Redoを使うなら外部のスタックを受け取る
+        # Undo/Redoを使うなら外部のスタックを受け取る (省略時は model.undo_stack)
+        self._model = model  # TimelineDataModel (block_id = event_id で対応)
+        if undo_stack is None and model is not None:
+            undo_stack = getattr(model, "undo_stack", None)
+        self._undo_stack = undo_stack
 
     def update_selection(self, new_selection: List[QGraphicsItem]):
         """
@@ -78,11 +94,11 @@ class GroupSelectionManager(QObject):
         if not self._selected_items:
             return
 
-        # 例: undo_commands の RemoveBlockCommand 等を個別に発行
-        # あるいはまとめて 'DeleteMultipleCommand' を作る
-        if self._undo_stack is not None:
-            # UndoStack がある場合 -> コマンドを生成して push
-            pass
+        if self._undo_stack is not None and self._model is not None and RemoveBlocksCommand:
+            # UndoStack がある場合 -> 選択ブロックをまとめて1コマンドとして push
+            self._undo_stack.push(RemoveBlocksCommand(
+                self._model, [item.block_id for item in self._selected_items]
+            ))
         else:
             # Undo不要なら直接 scene から removeItem など
             for item in self._selected_items:
@@ -95,8 +111,9 @@ class GroupSelectionManager(QObject):
 
     def move_selected_items(self, dx: float, dy: float):
         """
-        選択中のアイテムをまとめて移動する簡易例。
-        Undo/Redo対応するなら MoveMultipleCommand 等を作り、ここで push する。
+        選択中のアイテムをまとめて移動する。
+        モデルと UndoStack があれば、全アイテムぶんを1つの MoveBlocksCommand として push する
+        (Undo 1回・dataChanged 1回)。
         """
         if not self._selected_items:
             return
@@ -106,10 +123,18 @@ class GroupSelectionManager(QObject):
             new_x = old_pos.x() + dx
             new_y = old_pos.y() + dy
             item.setPos(new_x, new_y)
-            # ここで start_time や duration を更新するかはアイテムクラス次第
 
-        # もし UndoStack があればコマンド化すべき
-        # self._undo_stack.push(MoveMultipleCommand(...))
+        if self._undo_stack is None or self._model is None or not MoveBlocksCommand:
+            return
+        items = [it for it in self._selected_items if hasattr(it, "block_id")]
+        event_ids = [it.block_id for it in items]
+        old_starts = [it.start_time for it in items]
+        new_starts = [it.x() / PX_PER_SEC for it in items]
+        for it, st in zip(items, new_starts):
+            it.start_time = st
+        self._undo_stack.push(MoveBlocksCommand(
+            self._model, event_ids, old_starts, new_starts
+        ))
 
     def group_selected_items(self):
         """
@@ -5,7 +5,7 @@ import os
 import json
 import traceback
 
-from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, pyqtSlot
+from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, pyqtSlot, pyqtSignal
 from PyQt5.QtGui import QFont, QClipboard
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
@@ -15,10 +15,9 @@ from PyQt5.QtWidgets import (
 )
 
 # パイプライン・解析・ユーティリティ等
-from main.pipeline.lip_sync_generator import LipSyncGenerator
 from main.analysis.hatsuon import HatsuonEngine
 from main.utils import generate
-from main.video.video_processing import VideoProcessor
+from main.utils.config_registry import LIP_SYNC_CONFIG, load_config, load_mapping, thaw
 
 # AudioPlayer (存在しない場合はNone)
 try:
@@ -48,6 +47,8 @@ try:
 except ImportError:
     class ProgressDialog(QWidget):
         """ダミーの進捗ダイアログ。実際には progress_dialog.py などで本実装。"""
+        canceled = pyqtSignal()
+
         def __init__(self, parent=None):
             super().__init__(parent)
             self.setWindowTitle("Progress")
@@ -61,6 +62,12 @@ except ImportError:
             super().show()
         def close(self):
             super().close()
+        def finish(self):
+            super().close()
+
+# 解析・エクスポートのワーカー (GUIスレッドの外で実行)
+from main.ui.analysis_worker import AnalysisQueue, STAGE_LABELS
+from main.pipeline.lip_sync_main import load_batch_entries, batch_entry_digest, is_output_up_to_date
 
 # VMD出力の本格実装
 try:
@@ -68,11 +75,17 @@ try:
 except ImportError:
     VMDExporter = None
 
+# 複数形式の一括エクスポート (VMD / GMod / デバッグテキスト)
+try:
+    from main.pipeline.export_pipeline import ExportPipeline
+except ImportError:
+    ExportPipeline = None
+
 # phoneme_to_morph_map.json (音素→モーフ名マッピング) へのパス
 PHONEME_MAP_JSON = os.path.join(os.path.dirname(__file__), "..", "phoneme_to_morph_map.json")
 
 # 設定ファイルパス (例: PROJECT_ROOT/main/lip_sync_config.json)
-CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "lip_sync_config.json")
+CONFIG_FILE = LIP_SYNC_CONFIG
 
 
 class MainWindow(QMainWindow):
@@ -111,6 +124,18 @@ class MainWindow(QMainWindow):
         # **解析結果を保持するための変数 (エクスポート時に使用)**
         self._last_lip_sync_data = None
 
+        # 解析・エクスポートはワーカースレッドで実行 (複数ジョブを同時に実行できる)
+        workers = self.config_data.get("processing_options", {}).get("analysis_workers", 0)
+        self.analysis_queue = AnalysisQueue(self, max_workers=workers)
+        self.analysis_queue.jobProgress.connect(self._on_job_progress)
+        self.analysis_queue.jobFinished.connect(self._on_job_finished)
+        self.analysis_queue.jobFailed.connect(self._on_job_failed)
+        self.analysis_queue.jobCancelled.connect(self._on_job_cancelled)
+        # job_id -> {"kind": "analyze" / "batch" / "export" / "peaks", "label", "dialog", "batch"}
+        self._jobs = {}
+        # 最後に選んだ音声 (古いファイルのピークが後から届いても表示しない)
+        self._peaks_audio_path = None
+
         # タブ初期化
         self._init_tab_main()       # Analysis + Export 統合タブ
         self._init_tab_timeline()   # Timeline
@@ -145,15 +170,8 @@ class MainWindow(QMainWindow):
     # 設定ファイル読み込み & UI反映
     # ----------------------------------------------------------------
     def _load_config(self) -> dict:
-        if not os.path.exists(CONFIG_FILE):
-            print(f"[MainApp] lip_sync_config.json not found: {CONFIG_FILE}")
-            return {}
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[MainApp] Failed to load config: {e}")
-            return {}
+        # Settingsタブで編集するため、レジストリのスナップショットを可変コピーで受け取る
+        return thaw(load_config(CONFIG_FILE))
 
     def _apply_ui_settings(self):
         """Settingsタブで保存された theme / font_size をUIに反映"""
@@ -205,10 +223,15 @@ class MainWindow(QMainWindow):
         self.text_input.setPlaceholderText("ここにセリフを入力してください。")
         form_box.addRow("Text Input:", self.text_input)
 
-        # 4) 解析ボタン
+        # 4) 解析ボタン / フォルダ一括解析 (音声 + 同名 .txt。結果は <音声名>.lipsync.json)
+        h_analyze = QHBoxLayout()
         self.btn_analyze = QPushButton("解析実行")
         self.btn_analyze.clicked.connect(self._on_click_analyze)
-        form_box.addRow(self.btn_analyze)
+        self.btn_batch_analyze = QPushButton("フォルダ一括解析...")
+        self.btn_batch_analyze.clicked.connect(self._on_click_batch_analyze)
+        h_analyze.addWidget(self.btn_analyze)
+        h_analyze.addWidget(self.btn_batch_analyze)
+        form_box.addRow(h_analyze)
 
         layout.addLayout(form_box)
 
@@ -228,7 +251,10 @@ class MainWindow(QMainWindow):
 
         # 出力形式
         self.combo_export_fmt = QComboBox()
-        self.combo_export_fmt.addItems(["MMD (VMD)", "GMOD (JSON)"])
+        # GMOD (JSON) は従来どおり解析結果そのまま (<名前>.json)。GModExporter 形式は <名前>_gmod.json
+        self.combo_export_fmt.addItems(
+            ["MMD (VMD)", "GMOD (JSON)", "GMOD (GModExporter JSON)", "ALL (VMD + GMOD + Debug)"]
+        )
         export_box.addRow("Export Format:", self.combo_export_fmt)
 
         # 出力先 + ファイル名
@@ -285,6 +311,23 @@ class MainWindow(QMainWindow):
                 loaded = self.audio_player.load_audio_file(file_path)
                 if not loaded:
                     QMessageBox.warning(self, "エラー", "Audioファイルのロードに失敗しました。")
+            self._load_waveform_peaks(file_path)
+
+    def _load_waveform_peaks(self, file_path: str):
+        """
+        波形ウィジェットにピークピラミッドを表示する (.peaks があれば開くだけ)。
+        作成はワーカースレッドで行い、終わったら _on_job_finished で set_peaks する。
+        """
+        if not getattr(self, "waveform_w", None):
+            return
+        # 前のファイルのピークがまだ待機中なら捨てる (作成中なら終わっても表示しない)
+        for job_id, job in list(self._jobs.items()):
+            if job["kind"] == "peaks":
+                self.analysis_queue.cancel(job_id)
+        self._peaks_audio_path = file_path
+        cache_dir = self.config_data.get("processing_options", {}).get("cache_directory", "./cache")
+        job_id = self.analysis_queue.submit_peaks(file_path, cache_dir=cache_dir)
+        self._jobs[job_id] = {"kind": "peaks", "label": os.path.basename(file_path), "dialog": None, "batch": None}
 
     def _on_browse_outdir(self):
         d = QFileDialog.getExistingDirectory(self, "出力ディレクトリを選択")
@@ -302,7 +345,7 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "エラー", f"サンプルデータ生成失敗:\n{traceback.format_exc()}")
 
     def _on_click_analyze(self):
-        """リップシンク解析 実行"""
+        """リップシンク解析 実行 (ワーカースレッドで実行し、完了は _on_job_finished で受け取る)"""
         audio_path = self.edit_audio_file.text().strip()
         mode = self.combo_mode.currentText()
         text_data = self.text_input.toPlainText().strip()
@@ -328,70 +371,186 @@ class MainWindow(QMainWindow):
             else:
                 return
 
-        # プログレスダイアログ表示
+        # 3) ワーカースレッドで解析 (進捗・完了はシグナルで受け取る)
+        config_path = CONFIG_FILE if os.path.exists(CONFIG_FILE) else ""
+        job_id = self.analysis_queue.submit_analysis(
+            audio_path, text_data, asr_mode=asr_mode, config_path=config_path
+        )
+        label = os.path.basename(audio_path)
         progress_dialog = ProgressDialog(self)
-        progress_dialog.setLabelText("解析を実行中...")
+        progress_dialog.setLabelText(f"{label}: 解析待ち...")
         progress_dialog.setValue(0)
+        progress_dialog.canceled.connect(lambda: self.analysis_queue.cancel(job_id))
         progress_dialog.show()
+        self._jobs[job_id] = {"kind": "analyze", "label": label, "dialog": progress_dialog, "batch": None}
 
+    def _on_click_batch_analyze(self):
+        """フォルダ内の音声 (+ 同名 .txt) をまとめて解析し、音声の隣に JSON を書き出す"""
+        src_dir = QFileDialog.getExistingDirectory(self, "一括解析するフォルダを選択")
+        if not src_dir:
+            return
         try:
-            # 3) 実際の解析開始
-            import librosa
-            import numpy as np
-
-            progress_dialog.setValue(10)
-            audio_data, sr = librosa.load(audio_path, sr=16000, mono=True)
-            audio_data = audio_data.astype(np.float32, copy=False)
-
-            progress_dialog.setValue(50)
-            config_path = CONFIG_FILE if os.path.exists(CONFIG_FILE) else ""
-            generator = LipSyncGenerator(config_path=config_path)
-            generator.allow_asr = asr_mode
-
-            progress_dialog.setValue(70)
-            result = generator.generate_lip_sync(audio_data, text_data, sample_rate=sr)
-
-            # 解析結果を表示
-            progress_dialog.setValue(90)
-            self.text_log.clear()
-            self.text_log.append("[LipSync Analysis Result]\n")
-            self.text_log.append(json.dumps(result, indent=2, ensure_ascii=False))
-
-            # 解析結果を保持して、エクスポート時に使う
-            self._last_lip_sync_data = result
-
-            # 完了
-            progress_dialog.setLabelText("解析完了！")
-            progress_dialog.setValue(100)
-            QMessageBox.information(self, "完了", "リップシンク解析が完了しました！")
-
+            entries = load_batch_entries(src_dir)
         except Exception as e:
-            # 進捗ダイアログを閉じる前にエラー表示
-            progress_dialog.close()
+            QMessageBox.warning(self, "エラー", f"フォルダの読み込みに失敗しました:\n{e}")
+            return
+
+        config_path = CONFIG_FILE if os.path.exists(CONFIG_FILE) else ""
+        asr_mode = ("ASR Mode" in self.combo_mode.currentText())
+        # 出力に影響する設定 (テキスト・キャラ・設定ファイルとあわせて <出力>.digest で比べる)
+        params = {"gpu": False, "rms_threshold": None, "compact": False, "allow_asr": asr_mode}
+        todo = [e for e in entries if not is_output_up_to_date(e, config_path, params)]
+        skipped = len(entries) - len(todo)
+        if not todo:
+            QMessageBox.information(
+                self, "一括解析", f"解析する音声がありません (音声 {len(entries)}件 / 最新 {skipped}件)。"
+            )
+            return
+
+        batch = {"name": os.path.basename(os.path.normpath(src_dir)), "total": len(todo),
+                 "percent": {}, "ok": 0, "failed": 0, "cancelled": 0, "job_ids": []}
+        progress_dialog = ProgressDialog(self)
+        progress_dialog.setValue(0)
+        progress_dialog.canceled.connect(lambda: [self.analysis_queue.cancel(j) for j in batch["job_ids"]])
+        batch["dialog"] = progress_dialog
+        for entry in todo:
+            job_id = self.analysis_queue.submit_analysis(
+                entry["audio"], entry["text"], asr_mode=asr_mode,
+                config_path=config_path, output_path=entry["output"],
+                digest=batch_entry_digest(entry, config_path, params)
+            )
+            batch["job_ids"].append(job_id)
+            batch["percent"][job_id] = 0
+            self._jobs[job_id] = {"kind": "batch", "label": os.path.basename(entry["audio"]),
+                                  "dialog": progress_dialog, "batch": batch}
+        self._update_batch_progress(batch)
+        progress_dialog.show()
+        self.text_log.append(
+            f"[Batch] {src_dir}: {len(todo)}件を解析します (最新のためスキップ {skipped}件, "
+            f"同時実行 {self.analysis_queue.pool.maxThreadCount()})"
+        )
+
+    # ----------------------------------------------------------------
+    # ワーカーからの通知 (GUIスレッドで呼ばれる)
+    # ----------------------------------------------------------------
+    def _on_job_progress(self, job_id: int, percent: int, stage: str):
+        job = self._jobs.get(job_id)
+        if job is None or job["dialog"] is None and job["batch"] is None:
+            return
+        if job["batch"] is not None:
+            job["batch"]["percent"][job_id] = percent
+            job["batch"]["stage"] = f"{job['label']}: {STAGE_LABELS.get(stage, stage)}"
+            self._update_batch_progress(job["batch"])
+            return
+        job["dialog"].setLabelText(f"{job['label']}: {STAGE_LABELS.get(stage, stage)}...")
+        job["dialog"].setValue(percent)
+
+    def _update_batch_progress(self, batch: dict):
+        done = batch["ok"] + batch["failed"] + batch["cancelled"]
+        text = f"一括解析 {batch['name']}: {done}/{batch['total']}件"
+        if batch.get("stage") and done < batch["total"]:
+            text += f"\n{batch['stage']}"
+        batch["dialog"].setLabelText(text)
+        batch["dialog"].setValue(sum(batch["percent"].values()) // max(1, batch["total"]))
+
+    def _finish_batch_job(self, job: dict, job_id: int, key: str):
+        batch = job["batch"]
+        batch[key] += 1
+        batch["percent"][job_id] = 100
+        self._update_batch_progress(batch)
+        if batch["ok"] + batch["failed"] + batch["cancelled"] < batch["total"]:
+            return
+        batch["dialog"].finish()
+        summary = (f"一括解析 {batch['name']}: 成功 {batch['ok']}件 / 失敗 {batch['failed']}件 / "
+                   f"キャンセル {batch['cancelled']}件")
+        self.text_log.append(f"[Batch] {summary}")
+        QMessageBox.information(self, "一括解析", summary)
+
+    def _on_job_finished(self, job_id: int, payload):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if job["kind"] == "peaks":
+            # 別のファイルが選び直されていたら古いピークは表示しない
+            if payload["audio_path"] == self._peaks_audio_path:
+                self.waveform_w.set_peaks(payload["peaks"])
+            return
+        if job["kind"] == "export":
+            job["dialog"].finish()
+            self._show_export_report(payload, **job["export"])
+            return
+        if job["kind"] == "batch":
+            self.text_log.append(
+                f"[Batch] {job['label']} ({payload['seconds']:.2f}s) -> {payload['output_path']}"
+            )
+            self._finish_batch_job(job, job_id, "ok")
+            return
 
-            err_text = traceback.format_exc()
-            msg_box = QMessageBox(self)
-            msg_box.setIcon(QMessageBox.Warning)
-            msg_box.setWindowTitle("エラー")
-            msg_box.setText("解析中にエラーが発生しました。詳細をコピーできます。")
-            msg_box.setDetailedText(err_text)
+        # 解析結果を表示
+        result = payload["result"]
+        job["dialog"].finish()
+        self.text_log.clear()
+        self.text_log.append("[LipSync Analysis Result]\n")
+        self.text_log.append(json.dumps(result, indent=2, ensure_ascii=False))
 
-            copy_button = msg_box.addButton("エラー内容をコピー", QMessageBox.ActionRole)
-            close_button = msg_box.addButton("閉じる", QMessageBox.AcceptRole)
-            msg_box.exec_()
+        # 解析結果を保持して、エクスポート時に使う
+        self._last_lip_sync_data = result
 
-            if msg_box.clickedButton() == copy_button:
-                clipboard = QApplication.clipboard()
-                clipboard.setText(err_text)
+        if payload["metrics"].counters.get("cache_hits"):
+            QMessageBox.information(self, "完了", "キャッシュ済みの解析結果を読み込みました。")
+        else:
+            QMessageBox.information(self, "完了", "リップシンク解析が完了しました！")
 
+    def _on_job_failed(self, job_id: int, err_text: str):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if job["kind"] == "peaks":
+            last_line = err_text.strip().splitlines()[-1] if err_text.strip() else ""
+            print(f"[MainApp] 波形の読み込みに失敗: {last_line}")
             return
-        finally:
-            progress_dialog.close()
+        if job["kind"] == "batch":
+            last_line = err_text.strip().splitlines()[-1] if err_text.strip() else ""
+            self.text_log.append(f"[Batch] {job['label']} 失敗: {last_line}")
+            self._finish_batch_job(job, job_id, "failed")
+            return
+        job["dialog"].finish()
+        if job["kind"] == "export":
+            self._show_error_details("エクスポート中にエラーが発生しました。詳細をコピーできます。",
+                                     f"エクスポート中にエラー:\n{err_text}")
+        else:
+            self._show_error_details("解析中にエラーが発生しました。詳細をコピーできます。", err_text)
+
+    def _on_job_cancelled(self, job_id: int):
+        job = self._jobs.pop(job_id, None)
+        if job is None or job["kind"] == "peaks":
+            return
+        if job["kind"] == "batch":
+            self._finish_batch_job(job, job_id, "cancelled")
+            return
+        job["dialog"].finish()
+        self.text_log.append(f"[{'Export' if job['kind'] == 'export' else 'Analyze'}] {job['label']}: キャンセルしました")
+
+    def _show_error_details(self, message: str, err_text: str):
+        """詳細 (トレースバック) をコピーできるエラーダイアログ"""
+        msg_box = QMessageBox(self)
+        msg_box.setIcon(QMessageBox.Warning)
+        msg_box.setWindowTitle("エラー")
+        msg_box.setText(message)
+        msg_box.setDetailedText(err_text)
+
+        copy_button = msg_box.addButton("エラー内容をコピー", QMessageBox.ActionRole)
+        msg_box.addButton("閉じる", QMessageBox.AcceptRole)
+        msg_box.exec_()
+
+        if msg_box.clickedButton() == copy_button:
+            clipboard = QApplication.clipboard()
+            clipboard.setText(err_text)
 
     def _on_click_export(self):
         """
-        「エクスポート」ボタン。ここで実際に VMDExporter を呼び出して
-        本物の .vmd (バイナリ) を出力できるようにする。
+        「エクスポート」ボタン。ExportPipeline で共有の中間表現 (モーフ曲線・キー) を1回だけ計算し、
+        選択された形式 (複数可) を並行して書き出す。書き出しはワーカースレッドで実行する。
         """
         overlap_val = self.spin_overlap.value()
         fps_val = self.spin_fps.value()
@@ -410,80 +569,81 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "エラー", "解析結果がありません。先に解析してください。")
             return
 
-        # 出力ファイル名
-        if "MMD" in export_fmt:
-            ext = ".vmd"
-            real_fmt = "vmd"
-        else:
-            ext = ".json"
-            real_fmt = "json"
+        if not ExportPipeline:
+            QMessageBox.warning(self, "エラー", "ExportPipeline が読み込まれていません。")
+            return
 
-        out_path = os.path.join(out_dir, out_name + ext)
+        # 出力形式 → パイプラインの出力先
+        if export_fmt.startswith("ALL"):
+            formats = ["vmd", "vmd_text", "lip_sync_json", "gmod_json"]
+        elif "MMD" in export_fmt:
+            formats = ["vmd"]
+        elif "GModExporter" in export_fmt:
+            formats = ["gmod_json"]
+        else:
+            formats = ["lip_sync_json"]
 
-        # 実際のエクスポート処理
+        # 実際のエクスポート処理 (書き出しはワーカースレッド。結果は _show_export_report)
         try:
             if not os.path.exists(out_dir):
                 os.makedirs(out_dir, exist_ok=True)
 
-            if "MMD" in export_fmt:
-                # → VMDExporter を用いて、lip_sync_data からモーフキーを生成し、バイナリ出力
-                if not VMDExporter:
-                    QMessageBox.warning(self, "エラー", "VMDExporter が読み込まれていません。")
-                    return
-
-                # phoneme_to_morph_map.json 読み込み
-                mapping = {}
-                if os.path.exists(PHONEME_MAP_JSON):
-                    try:
-                        with open(PHONEME_MAP_JSON, "r", encoding="utf-8") as fm:
-                            mapping = json.load(fm)
-                    except:
-                        print("[Export] phoneme_to_morph_map.json の読み込み失敗。")
-
-                exporter = VMDExporter(
-                    model_name="MyMMDModel",  # 必要に応じて他の方法でモデル名を指定
-                    phoneme_mapping=mapping
-                )
-                # lip_sync_data → モーフフレーム生成
-                exporter.from_lip_sync_data(self._last_lip_sync_data, fps=fps_val, fade_out=True)
-                # バイナリ出力
-                exporter.export_vmd_binary(out_path)
-
-                QMessageBox.information(
-                    self, "Export完了", f"MMD(VMD) 形式で出力しました:\n{out_path}"
-                )
-                self.text_log.append(f"[Export] VMD出力 -> {out_path}")
+            # phoneme_to_morph_map.json 読み込み (レジストリでキャッシュ済み)
+            mapping = load_mapping(PHONEME_MAP_JSON) if os.path.exists(PHONEME_MAP_JSON) else {}
+            targets = ExportPipeline.make_targets(out_dir, out_name, formats)
+        except Exception:
+            self._show_error_details("エクスポート中にエラーが発生しました。詳細をコピーできます。",
+                                     f"エクスポート中にエラー:\n{traceback.format_exc()}")
+            return
 
+        job_id = self.analysis_queue.submit_export(
+            self._last_lip_sync_data,
+            targets,
+            pipeline_options={
+                "model_name": "MyMMDModel",  # 必要に応じて他の方法でモデル名を指定
+                "vmd_mapping": mapping
+            },
+            run_options={"fps": fps_val, "fade_out": True}
+        )
+        progress_dialog = ProgressDialog(self)
+        progress_dialog.setLabelText(f"{out_name}: 書き出し待ち...")
+        progress_dialog.setValue(0)
+        progress_dialog.canceled.connect(lambda: self.analysis_queue.cancel(job_id))
+        progress_dialog.show()
+        self._jobs[job_id] = {
+            "kind": "export", "label": out_name, "dialog": progress_dialog, "batch": None,
+            "export": {"targets": targets, "export_fmt": export_fmt, "overlap_val": overlap_val, "fps_val": fps_val}
+        }
+
+    def _show_export_report(self, report: dict, targets: list, export_fmt: str, overlap_val: float, fps_val: int):
+        """エクスポートジョブの結果をログ・ダイアログに表示"""
+        self.text_log.append(f"[Export] 共有データ準備: {report['prepare_seconds']:.3f}s")
+        failed = []
+        for r in report["targets"]:
+            if r["ok"]:
+                self.text_log.append(f"[Export] {r['format']} ({r['seconds']:.3f}s) -> {r['path']}")
             else:
-                # → GMOD(JSON)形式 (ダミー)
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(self._last_lip_sync_data, f, indent=2, ensure_ascii=False)
-                QMessageBox.information(
-                    self, "Export完了", f"GMOD(JSON) 形式で出力しました:\n{out_path}"
-                )
-                self.text_log.append(f"[Export] JSON出力 -> {out_path}")
-
-            # ログに追加
-            self.text_log.append(f"[Export] Format: {export_fmt}")
-            self.text_log.append(f"  Overlap: {overlap_val}")
-            self.text_log.append(f"  FPS: {fps_val}")
-            self.text_log.append(f"  OutFile: {out_path}")
-
-        except Exception as e:
-            err_msg = f"エクスポート中にエラー:\n{traceback.format_exc()}"
-            msg_box = QMessageBox(self)
-            msg_box.setIcon(QMessageBox.Warning)
-            msg_box.setWindowTitle("エラー")
-            msg_box.setText("エクスポート中にエラーが発生しました。詳細をコピーできます。")
-            msg_box.setDetailedText(err_msg)
-
-            copy_button = msg_box.addButton("エラー内容をコピー", QMessageBox.ActionRole)
-            close_button = msg_box.addButton("閉じる", QMessageBox.AcceptRole)
-            msg_box.exec_()
+                self.text_log.append(f"[Export] {r['format']} 失敗: {r['error']}")
+                failed.append(r)
+        self.text_log.append(f"[Export] 合計: {report['total_seconds']:.3f}s")
+
+        out_path = ", ".join(t["path"] for t in targets)
+        if failed:
+            QMessageBox.warning(
+                self, "エラー",
+                "一部の出力に失敗しました:\n" + "\n".join(f"{r['format']}: {r['error']}" for r in failed)
+            )
+        else:
+            QMessageBox.information(
+                self, "Export完了",
+                f"{export_fmt} 形式で出力しました:\n" + "\n".join(t["path"] for t in targets)
+            )
 
-            if msg_box.clickedButton() == copy_button:
-                clipboard = QApplication.clipboard()
-                clipboard.setText(err_msg)
+        # ログに追加
+        self.text_log.append(f"[Export] Format: {export_fmt}")
+        self.text_log.append(f"  Overlap: {overlap_val}")
+        self.text_log.append(f"  FPS: {fps_val}")
+        self.text_log.append(f"  OutFile: {out_path}")
 
     # ----------------------------------------------------------------
     # Tab2: Timeline
@@ -654,13 +814,13 @@ class MainWindow(QMainWindow):
         )
         lay_proc.addRow("RMSしきい値:", self.spin_rms)
 
-        self.combo_mode = QComboBox()
-        self.combo_mode.addItems(["naive", "advanced", "standard"])
+        self.combo_proc_mode = QComboBox()
+        self.combo_proc_mode.addItems(["naive", "advanced", "standard"])
         c_mode = self.config_data.get("processing_options", {}).get("mode", "standard")
-        if self.combo_mode.findText(c_mode) < 0:
-            self.combo_mode.addItem(c_mode)
-        self.combo_mode.setCurrentText(c_mode)
-        lay_proc.addRow("処理モード:", self.combo_mode)
+        if self.combo_proc_mode.findText(c_mode) < 0:
+            self.combo_proc_mode.addItem(c_mode)
+        self.combo_proc_mode.setCurrentText(c_mode)
+        lay_proc.addRow("処理モード:", self.combo_proc_mode)
 
         self.check_cache = QCheckBox("キャッシュを使用する")
         self.check_cache.setChecked(
@@ -786,7 +946,7 @@ class MainWindow(QMainWindow):
         proc_opts = self.config_data.setdefault("processing_options", {})
         proc_opts["enable_gpu"] = self.check_gpu.isChecked()
         proc_opts["rms_threshold"] = self.spin_rms.value()
-        proc_opts["mode"] = self.combo_mode.currentText()
+        proc_opts["mode"] = self.combo_proc_mode.currentText()
         proc_opts["enable_cache"] = self.check_cache.isChecked()
         proc_opts["cache_directory"] = self.edit_cache_dir.text()
 
@@ -856,6 +1016,14 @@ class MainWindow(QMainWindow):
     def _on_player_finished(self):
         print("[MainApp] Audio playback finished.")
 
+    def closeEvent(self, event):
+        """実行中の解析・エクスポートを中断し、ワーカーの終了を待ってから閉じる"""
+        if self.analysis_queue.active_count():
+            print("[MainApp] 実行中のジョブを中断しています...")
+            self.analysis_queue.cancel_all()
+            self.analysis_queue.wait_for_done()
+        super().closeEvent(event)
+
 
 def main():
     app = QApplication(sys.argv)
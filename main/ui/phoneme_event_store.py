@@ -0,0 +1,534 @@
+# main/ui/phoneme_event_store.py
+# -*- coding: utf-8 -*-
+
+"""
+phoneme_event_store.py
+
+TimelineDataModel の音素イベントを、イベントごとのオブジェクトではなく
+型付きの並列配列で保持するストア。
+
+1イベント1オブジェクト (PhonemeEvent + float 2個 + UUID 文字列) だと1件あたり 200 バイト強になり、
+数十万件のプロジェクトでは読み込み・保存も Python のループになる。このストアでは:
+
+- start_time / duration: float64 配列
+- phoneme: int32 のコード配列 + 語彙リスト (同じ音素名は1つだけ持つ)
+- event_id: 標準形の UUID 文字列 (xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx) は 2 x uint64 に詰めて持ち、
+  それ以外の ID だけ object 配列に文字列で持つ
+- avg_rms: LipSyncColumns との往復用 (タイムラインでは使わない)
+
+で 1件あたり約 50 バイトになる。
+
+- list と同じ操作 (len / [] / for / append / insert / pop / del / clear / extend) ができるので、
+  model._events を直接触るコード (Undo コマンド、ProjectManager) はそのまま動く。
+  まとめて挿入・削除するなら insert_range / delete_range の方が配列をずらす回数が少ない。
+- [] や for で返るのは行を指す軽量な PhonemeEventRef。属性の読み書きは配列に直接反映される。
+  行がずれても event_id で引き直す。pop() で取り出したイベントは独立した PhonemeEvent になる。
+- event_id -> 行 の索引は row_of() の初回に作り、行の挿入・削除で作り直す。
+- version は内容が変わるたびに増える (時間索引などの作り直しの判定用)。
+- LipSyncColumns との変換: from_columns() / load_columns() は start / phoneme_codes / avg_rms 配列をそのまま使い (コピーなし)、
+  duration だけ end - start で計算する。新しい音素が増えたときは phoneme_codes だけコピーして切り離す。to_columns() も start などは配列のビューを渡し、end だけ計算する。
+
+依存:
+- numpy
+
+使い方:
+    from main.ui.phoneme_event_store import PhonemeEventStore, PhonemeEvent
+
+    store = PhonemeEventStore()
+    store.append(PhonemeEvent("a", 0.0, 0.3))
+    store[0].start_time = 0.1
+    cols = store.to_columns()              # LipSyncColumns
+    store2 = PhonemeEventStore.from_columns(cols)  # load_columns() で既存のストアを置き換えることもできる
+"""
+
+import os
+import re
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from main.pipeline.lip_sync_columns import LipSyncColumns
+
+_UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z")
+
+
+class PhonemeEvent:
+    """
+    タイムライン上で扱う単一の音素イベントを表すクラス。
+    event_id: Sceneの PhonemeBlockItem(block_id) と紐付けるためのID
+    """
+    __slots__ = ("event_id", "phoneme", "start_time", "duration")
+
+    def __init__(self, phoneme: str, start_time: float, duration: float, event_id: Optional[str] = None):
+        self.phoneme = phoneme
+        self.start_time = start_time
+        self.duration = duration
+        # 省略可だが、未指定なら新しくuuidを付与
+        self.event_id = event_id if event_id else str(uuid.uuid4())
+
+    @property
+    def end_time(self) -> float:
+        """start_time + duration を計算して返す。"""
+        return self.start_time + self.duration
+
+    def to_dict(self) -> dict:
+        """
+        JSON化などに使用するための辞書形式へ変換。
+        end_time は動的計算なので保存しない。
+        """
+        return {
+            "event_id": self.event_id,
+            "phoneme": self.phoneme,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            # "end_time" は保存しない（ロード時にも自動計算できる）
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        辞書形式（JSONロード後など）から PhonemeEvent を復元。
+        """
+        return cls(
+            phoneme=data.get("phoneme", "a"),
+            start_time=float(data.get("start_time", 0.0)),
+            duration=float(data.get("duration", 0.1)),
+            event_id=data.get("event_id")  # Noneの場合は自動生成
+        )
+
+
+class PhonemeEventRef:
+    """
+    PhonemeEventStore の1行を指す参照。PhonemeEvent と同じ属性を持ち、読み書きは配列に対して行う。
+    """
+    __slots__ = ("_store", "_row", "_key")
+
+    def __init__(self, store: "PhonemeEventStore", row: int, key):
+        self._store = store
+        self._row = row
+        self._key = key
+
+    def _resolve(self) -> int:
+        store = self._store
+        row = self._row
+        if row < store._n and store._key_at(row) == self._key:
+            return row
+        row = store._row_of_key(self._key)
+        if row is None:
+            raise LookupError(f"[PhonemeEventStore] イベントは削除されています: {_key_to_id(self._key)}")
+        self._row = row
+        return row
+
+    @property
+    def event_id(self) -> str:
+        return _key_to_id(self._key)
+
+    @property
+    def phoneme(self) -> str:
+        store = self._store
+        return store._vocab[store._codes[self._resolve()]]
+
+    @phoneme.setter
+    def phoneme(self, value: str):
+        store = self._store
+        store._codes[self._resolve()] = store._code_for(str(value))
+        store.version += 1
+
+    @property
+    def start_time(self) -> float:
+        return float(self._store._start[self._resolve()])
+
+    @start_time.setter
+    def start_time(self, value: float):
+        self._store._start[self._resolve()] = value
+        self._store.version += 1
+
+    @property
+    def duration(self) -> float:
+        return float(self._store._duration[self._resolve()])
+
+    @duration.setter
+    def duration(self, value: float):
+        self._store._duration[self._resolve()] = value
+        self._store.version += 1
+
+    @property
+    def end_time(self) -> float:
+        row = self._resolve()
+        return float(self._store._start[row] + self._store._duration[row])
+
+    def to_dict(self) -> dict:
+        return {
+            "event_id": self.event_id,
+            "phoneme": self.phoneme,
+            "start_time": self.start_time,
+            "duration": self.duration,
+        }
+
+    def detach(self) -> PhonemeEvent:
+        """配列から切り離した PhonemeEvent を返す。"""
+        return PhonemeEvent(self.phoneme, self.start_time, self.duration, event_id=self.event_id)
+
+    def __eq__(self, other):
+        return isinstance(other, PhonemeEventRef) and other._store is self._store and other._key == self._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        return f"PhonemeEventRef({self.phoneme!r}, {self.start_time}, {self.duration}, event_id={self.event_id!r})"
+
+
+class PhonemeEventStore:
+    """
+    音素イベントの列指向ストア。list の代わりに TimelineDataModel._events として使う。
+
+    Args:
+        capacity (int): 最初に確保する行数 (足りなくなったら倍々に広げる)
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._n = 0
+        self._alloc(capacity)
+        self._vocab: List[str] = []
+        self._vocab_index: Dict[str, int] = {}
+        # キー (UUID の int / 独自IDの str) -> 行番号。None なら row_of() で作る
+        self._index: Optional[Dict[object, int]] = None
+        self.version = 0
+
+    # ----------------------------------------------------------------
+    # list 互換の操作
+    # ----------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._ref(i) for i in range(*row.indices(self._n))]
+        return self._ref(self._check_row(row))
+
+    def __iter__(self) -> Iterator[PhonemeEventRef]:
+        for row in range(self._n):
+            yield self._ref(row)
+
+    def __setitem__(self, row: int, event):
+        row = self._check_row(row)
+        self._write(row, event)
+        self._index = None
+        self.version += 1
+
+    def __delitem__(self, row):
+        if isinstance(row, slice):
+            for i in sorted(range(*row.indices(self._n)), reverse=True):
+                self._remove(i)
+        else:
+            self._remove(self._check_row(row))
+
+    def append(self, event):
+        self._grow(self._n + 1)
+        row = self._n
+        self._n += 1
+        self._write(row, event)
+        if self._index is not None:
+            self._index[self._key_at(row)] = row
+        self.version += 1
+
+    def extend(self, events: Iterable):
+        if isinstance(events, PhonemeEventStore):
+            events = [e.detach() for e in events]
+        for event in events:
+            self.append(event)
+
+    def insert(self, row: int, event):
+        self.insert_range(row if row >= 0 else self._n + row, [event])
+
+    def pop(self, row: int = -1) -> PhonemeEvent:
+        row = self._check_row(row)
+        event = self._ref(row).detach()
+        self._remove(row)
+        return event
+
+    def insert_range(self, row: int, events: List):
+        """row の位置に events を順に挿入する (後ろの行をずらすのは1回だけ)。"""
+        k = len(events)
+        if not k:
+            return
+        row = max(0, min(row, self._n))
+        self._grow(self._n + k)
+        n = self._n
+        for arr in self._arrays():
+            arr[row + k:n + k] = arr[row:n]
+        self._n += k
+        for i, event in enumerate(events):
+            self._write(row + i, event)
+        self._index = None
+        self.version += 1
+
+    def delete_range(self, first: int, last: int) -> List[PhonemeEvent]:
+        """first ～ last 行 (両端を含む) を削除し、切り離した PhonemeEvent のリストを返す。"""
+        first, last = self._check_row(first), self._check_row(last)
+        removed = [self._ref(row).detach() for row in range(first, last + 1)]
+        n = self._n
+        k = last - first + 1
+        for arr in self._arrays():
+            arr[first:n - k] = arr[last + 1:n]
+        self._custom[n - k:n] = None
+        self._n -= k
+        self._index = None
+        self.version += 1
+        return removed
+
+    def clear(self):
+        self._n = 0
+        self._alloc(0)
+        self._vocab = []
+        self._vocab_index = {}
+        self._index = None
+        self.version += 1
+
+    # ----------------------------------------------------------------
+    # 索引・配列
+    # ----------------------------------------------------------------
+    def row_of(self, event_id: str) -> Optional[int]:
+        """event_id の行番号 (無ければ None)。"""
+        return self._row_of_key(_id_to_key(event_id))
+
+    def start_array(self) -> np.ndarray:
+        """start_time の配列 (ビュー。書き換えたら touch() を呼ぶこと)。"""
+        return self._start[:self._n]
+
+    def duration_array(self) -> np.ndarray:
+        """duration の配列 (ビュー)。"""
+        return self._duration[:self._n]
+
+    def end_array(self) -> np.ndarray:
+        return self._start[:self._n] + self._duration[:self._n]
+
+    def touch(self):
+        """配列を直接書き換えたことを知らせる。"""
+        self.version += 1
+
+    @property
+    def nbytes(self) -> int:
+        """配列が確保しているバイト数 (独自IDの文字列と語彙は除く)。"""
+        return sum(arr.nbytes for arr in self._arrays())
+
+    # ----------------------------------------------------------------
+    # 一括の読み込み・書き出し
+    # ----------------------------------------------------------------
+    def load_dicts(self, dicts: List[dict]):
+        """
+        [{"event_id", "phoneme", "start_time", "duration"}, ...] で中身を置き換える。
+        欠損値は PhonemeEvent.from_dict と同じデフォルトで補う。
+        """
+        n = len(dicts)
+        self.clear()
+        self._alloc(n)
+        self._start[:n] = np.fromiter((float(d.get("start_time", 0.0)) for d in dicts), dtype=np.float64, count=n)
+        self._duration[:n] = np.fromiter((float(d.get("duration", 0.1)) for d in dicts), dtype=np.float64, count=n)
+        self._codes[:n] = np.fromiter((self._code_for(d.get("phoneme", "a")) for d in dicts), dtype=np.int32, count=n)
+        self._uid[:n], self._custom[:n] = _pack_ids([d.get("event_id") for d in dicts])
+        self._n = n
+        self.version += 1
+
+    def to_dicts(self) -> List[dict]:
+        """PhonemeEvent.to_dict() と同じ形の dict のリスト。"""
+        vocab = self._vocab
+        return [
+            {"event_id": eid, "phoneme": vocab[code], "start_time": st, "duration": dur}
+            for eid, code, st, dur in zip(
+                self._ids(), self._codes[:self._n].tolist(),
+                self._start[:self._n].tolist(), self._duration[:self._n].tolist()
+            )
+        ]
+
+    @classmethod
+    def from_columns(cls, cols: LipSyncColumns, copy: bool = False) -> "PhonemeEventStore":
+        store = cls()
+        store.load_columns(cols, copy=copy)
+        return store
+
+    def load_columns(self, cols: LipSyncColumns, copy: bool = False):
+        """
+        LipSyncColumns で中身を置き換える。copy=False なら start / phoneme_codes / avg_rms の配列をそのまま使う
+        (ストアを編集すると cols 側も変わる。行を追加して容量が足りなくなった時点で別の配列になる)。
+        語彙 (cols.phonemes) はコピーするので、cols に無い音素が追加されたときは
+        phoneme_codes だけ先にコピーして cols と切り離す (cols 側に存在しないコードを書き込まない)。
+        event_id は新しく振る。
+        """
+        n = len(cols)
+        adopt = np.array if copy else np.asarray
+        self._start = adopt(cols.start, dtype=np.float64)
+        self._duration = np.asarray(cols.end, dtype=np.float64) - self._start
+        self._rms = adopt(cols.avg_rms, dtype=np.float64)
+        self._codes = adopt(cols.phoneme_codes, dtype=np.int32)
+        self._codes_shared = not copy and np.may_share_memory(self._codes, cols.phoneme_codes)
+        self._uid = _new_uuids(n)
+        self._custom = np.empty(n, dtype=object)
+        self._vocab = list(cols.phonemes)
+        self._vocab_index = {ph: i for i, ph in enumerate(self._vocab)}
+        self._index = None
+        self._n = n
+        self.version += 1
+
+    def to_columns(self) -> LipSyncColumns:
+        """
+        LipSyncColumns に変換する。start / phoneme_codes / avg_rms はこのストアの配列のビュー、
+        end は start + duration で計算した新しい配列。
+        """
+        n = self._n
+        return LipSyncColumns(
+            self._start[:n], self.end_array(), self._rms[:n], self._codes[:n], self._vocab
+        )
+
+    # ----------------------------------------------------------------
+    # 内部
+    # ----------------------------------------------------------------
+    def _alloc(self, capacity: int):
+        self._start = np.zeros(capacity, dtype=np.float64)
+        self._duration = np.zeros(capacity, dtype=np.float64)
+        self._rms = np.zeros(capacity, dtype=np.float64)
+        self._codes = np.zeros(capacity, dtype=np.int32)
+        self._codes_shared = False
+        self._uid = np.zeros((capacity, 2), dtype=np.uint64)
+        self._custom = np.empty(capacity, dtype=object)
+
+    def _arrays(self):
+        return (self._start, self._duration, self._rms, self._codes, self._uid, self._custom)
+
+    def _grow(self, needed: int):
+        capacity = len(self._start)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 16)
+        n = self._n
+        old = self._arrays()
+        self._alloc(capacity)
+        for dst, src in zip(self._arrays(), old):
+            dst[:n] = src[:n]
+
+    def _check_row(self, row: int) -> int:
+        if row < 0:
+            row += self._n
+        if not 0 <= row < self._n:
+            raise IndexError("[PhonemeEventStore] 行番号が範囲外です")
+        return row
+
+    def _remove(self, row: int):
+        n = self._n
+        key = self._key_at(row)
+        for arr in self._arrays():
+            arr[row:n - 1] = arr[row + 1:n]
+        self._custom[n - 1] = None
+        self._n -= 1
+        if self._index is not None:
+            if row == n - 1:
+                self._index.pop(key, None)
+            else:
+                self._index = None
+        self.version += 1
+
+    def _write(self, row: int, event):
+        self._start[row] = event.start_time
+        self._duration[row] = event.duration
+        self._rms[row] = 0.0
+        self._codes[row] = self._code_for(event.phoneme)
+        key = _id_to_key(event.event_id)
+        if isinstance(key, int):
+            self._uid[row] = (key >> 64, key & 0xFFFFFFFFFFFFFFFF)
+            self._custom[row] = None
+        else:
+            self._uid[row] = 0
+            self._custom[row] = key
+
+    def _code_for(self, phoneme: str) -> int:
+        code = self._vocab_index.get(phoneme)
+        if code is None:
+            if self._codes_shared:
+                # 呼び出し元の LipSyncColumns の語彙には無いコードになるので、配列を切り離してから書く
+                self._codes = self._codes.copy()
+                self._codes_shared = False
+            code = len(self._vocab)
+            self._vocab.append(phoneme)
+            self._vocab_index[phoneme] = code
+        return code
+
+    def _key_at(self, row: int):
+        custom = self._custom[row]
+        if custom is not None:
+            return custom
+        hi, lo = self._uid[row].tolist()
+        return (hi << 64) | lo
+
+    def _keys(self) -> List[object]:
+        n = self._n
+        his, los = self._uid[:n, 0].tolist(), self._uid[:n, 1].tolist()
+        return [
+            c if c is not None else (hi << 64) | lo
+            for c, hi, lo in zip(self._custom[:n].tolist(), his, los)
+        ]
+
+    def _ids(self) -> List[str]:
+        """全行の event_id 文字列 (UUID は16進にまとめて変換してから区切る)。"""
+        n = self._n
+        hexed = self._uid[:n].astype(">u8").tobytes().hex()
+        out = []
+        for row, custom in enumerate(self._custom[:n].tolist()):
+            if custom is not None:
+                out.append(custom)
+            else:
+                h = hexed[row * 32:row * 32 + 32]
+                out.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+        return out
+
+    def _row_of_key(self, key) -> Optional[int]:
+        if self._index is None:
+            self._index = {k: row for row, k in enumerate(self._keys())}
+        return self._index.get(key)
+
+    def _ref(self, row: int) -> PhonemeEventRef:
+        return PhonemeEventRef(self, row, self._key_at(row))
+
+
+def _id_to_key(event_id: str):
+    """標準形の UUID は 128bit の int に、それ以外は文字列のまま。"""
+    if isinstance(event_id, str) and _UUID_RE.match(event_id):
+        return int(event_id.replace("-", ""), 16)
+    return event_id
+
+
+def _key_to_id(key) -> str:
+    if isinstance(key, int):
+        h = f"{key:032x}"
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return key
+
+
+def _pack_ids(ids: List[Optional[str]]):
+    """event_id のリストを (uid (n,2) uint64, custom object 配列) に。None には新しい UUID を振る。"""
+    n = len(ids)
+    uid = _new_uuids(n)
+    custom = np.empty(n, dtype=object)
+    rows, hexes, custom_rows = [], [], []
+    for row, event_id in enumerate(ids):
+        if not event_id:
+            continue
+        if _UUID_RE.match(event_id):
+            rows.append(row)
+            hexes.append(event_id.replace("-", ""))
+        else:
+            custom[row] = event_id
+            custom_rows.append(row)
+    if rows:
+        uid[rows] = np.frombuffer(bytes.fromhex("".join(hexes)), dtype=">u8").reshape(-1, 2)
+    uid[custom_rows] = 0
+    return uid, custom
+
+
+def _new_uuids(n: int) -> np.ndarray:
+    """UUID version 4 を n 個まとめて作る ((n,2) uint64)。"""
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return raw.view(">u8").reshape(n, 2).astype(np.uint64)
@@ -1,6 +1,10 @@
-from PyQt5.QtWidgets import QDialog, QProgressBar, QVBoxLayout, QLabel
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QDialog, QProgressBar, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
 
 class ProgressDialog(QDialog):
+    # キャンセルボタン / Esc / ×ボタンで発行
+    canceled = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Progress")
@@ -13,6 +17,13 @@ class ProgressDialog(QDialog):
         layout.addWidget(self.label)
         layout.addWidget(self.progress_bar)
 
+        h_buttons = QHBoxLayout()
+        h_buttons.addStretch()
+        self.btn_cancel = QPushButton("キャンセル")
+        self.btn_cancel.clicked.connect(self.reject)
+        h_buttons.addWidget(self.btn_cancel)
+        layout.addLayout(h_buttons)
+
     def setLabelText(self, text):
         """ラベルに表示するテキストを更新します。"""
         self.label.setText(text)
@@ -20,3 +31,14 @@ class ProgressDialog(QDialog):
     def setValue(self, value):
         """プログレスバーの値（0-100）を更新します。"""
         self.progress_bar.setValue(value)
+
+    def reject(self):
+        """キャンセル要求を通知します (閉じるのは処理側が中断を確認してから)。"""
+        self.label.setText("キャンセルしています...")
+        self.btn_cancel.setEnabled(False)
+        self.canceled.emit()
+
+    def finish(self):
+        """処理の終了時に呼びます。canceled を発行せずに閉じます。"""
+        self.hide()
+        self.deleteLater()
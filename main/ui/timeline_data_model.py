@@ -14,6 +14,12 @@ timeline_data_model.py
 3. JSON保存・読み込み時には end_time は保存しない (動的に計算されるため)
 4. 既存の columns: [Phoneme, Start, Duration] に "End" を加え、4列モデル化
 5. Undo/Redoのため、PhonemeEvent にイベントID (event_id) を追加（BlockItemと対になる）
+6. event_id -> 行 の辞書と、開始時刻でソートした時間索引を持つようにした
+   (find_row_by_event_id は O(1)、rows_in_range / rows_at_time は O(log n + k))
+7. イベントは PhonemeEventStore (phoneme_event_store.py) に型付き配列で持つようにした
+   (PhonemeEvent もそちらに移動。このモジュールからも import できる)
+8. 変更通知を notify_rows_changed() にまとめ、行・列の範囲を1回の dataChanged で発行するようにした
+   (複数ブロックの一括移動は set_start_times() で1回の更新・1回の通知)
 
 [特徴]
     - QAbstractTableModel を継承し、GUI要素（QTableView など）にバインド可能
@@ -21,67 +27,30 @@ timeline_data_model.py
     - JSONファイルへの保存・読み込みを行える
     - End列は読み取り専用：StartとDurationから自動計算
     - イベントID (event_id) によって Scene上のブロックと DataModel 上の行を関連付けできる
+    - 索引はストアの version が変わったら次の検索時に作り直す
+      (Undoコマンドなどが _events を直接書き換えても整合する)
+    - LipSyncColumns との一括変換 (import_columns / export_columns)
 
 [想定用途]
     - timeline_editor.py と組み合わせて、音素ブロックのリストを表示・編集
     - QGraphicsScene (TimelineGraphicsView) との相互更新時に役立つ
 
 [依存ライブラリ]
-    pip install PyQt5
+    pip install PyQt5 numpy
 """
 
 import json
 import os
-import uuid
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
 from PyQt5.QtCore import (
     Qt, QAbstractTableModel, QModelIndex, QVariant
 )
+from PyQt5.QtWidgets import QUndoStack
 
-
-class PhonemeEvent:
-    """
-    タイムライン上で扱う単一の音素イベントを表すクラス。
-    event_id: Sceneの PhonemeBlockItem(block_id) と紐付けるためのID
-    """
-    __slots__ = ("event_id", "phoneme", "start_time", "duration")
-
-    def __init__(self, phoneme: str, start_time: float, duration: float, event_id: Optional[str] = None):
-        self.phoneme = phoneme
-        self.start_time = start_time
-        self.duration = duration
-        # 省略可だが、未指定なら新しくuuidを付与
-        self.event_id = event_id if event_id else str(uuid.uuid4())
-
-    @property
-    def end_time(self) -> float:
-        """start_time + duration を計算して返す。"""
-        return self.start_time + self.duration
-
-    def to_dict(self) -> dict:
-        """
-        JSON化などに使用するための辞書形式へ変換。
-        end_time は動的計算なので保存しない。
-        """
-        return {
-            "event_id": self.event_id,
-            "phoneme": self.phoneme,
-            "start_time": self.start_time,
-            "duration": self.duration,
-            # "end_time" は保存しない（ロード時にも自動計算できる）
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict):
-        """
-        辞書形式（JSONロード後など）から PhonemeEvent を復元。
-        """
-        return cls(
-            phoneme=data.get("phoneme", "a"),
-            start_time=float(data.get("start_time", 0.0)),
-            duration=float(data.get("duration", 0.1)),
-            event_id=data.get("event_id")  # Noneの場合は自動生成
-        )
+from main.pipeline.lip_sync_columns import LipSyncColumns
+from main.ui.phoneme_event_store import PhonemeEvent, PhonemeEventRef, PhonemeEventStore
 
 
 class TimelineDataModel(QAbstractTableModel):
@@ -101,10 +70,15 @@ class TimelineDataModel(QAbstractTableModel):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._events: List[PhonemeEvent] = []
+        self._events = PhonemeEventStore()
 
-        # UndoStackなどを仕込む場合は、外部から set_undo_stack() などで注入してもOK
-        # 例: self.undo_stack = QUndoStack()
+        # 時間索引: 開始時刻順の行番号・開始・終了、終了時刻の累積最大
+        # (_events.version が変わったら作り直す)
+        self._time_index = None
+        self._time_index_version = -1
+
+        # Undo/Redo 用 (undo_commands.py のコマンドを push する)
+        self.undo_stack = QUndoStack(self)
 
     # ----------------------------------------------------------------------
     # 必須実装: 行数・列数・データ取得
@@ -189,16 +163,47 @@ class TimelineDataModel(QAbstractTableModel):
         except ValueError:
             return False
 
-        # データ更新通知
-        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
-
-        # End列も連動して変化するので、そこも再描画必要
-        # start_time or durationが変わったら End列も変わるため
-        end_index = self.index(row, self.COL_END)
-        self.dataChanged.emit(end_index, end_index, [Qt.DisplayRole, Qt.EditRole])
+        # データ更新通知 (start_time or durationが変わったら End列も変わるため、End列までを1回で)
+        last_col = col if col == self.COL_PHONEME else self.COL_END
+        self.notify_rows_changed(row, row, col, last_col)
 
         return True
 
+    # ----------------------------------------------------------------------
+    # 変更通知のまとめ
+    # ----------------------------------------------------------------------
+    def notify_rows_changed(self, first_row: int, last_row: int,
+                            first_col: int = 0, last_col: int = COL_END):
+        """
+        行・列の範囲の dataChanged を1回で発行する。
+        """
+        self.dataChanged.emit(self.index(first_row, first_col), self.index(last_row, last_col), [])
+
+    def set_start_times(self, event_ids: Sequence[str], starts: Sequence[float]):
+        """
+        複数イベントの start_time をまとめて書き換え、dataChanged を1回だけ発行する。
+        """
+        self._set_column(event_ids, self._events.start_array(), starts, self.COL_START)
+
+    def set_durations(self, event_ids: Sequence[str], durations: Sequence[float]):
+        """
+        複数イベントの duration をまとめて書き換え、dataChanged を1回だけ発行する。
+        """
+        self._set_column(event_ids, self._events.duration_array(), durations, self.COL_DURATION)
+
+    def _set_column(self, event_ids, column: np.ndarray, values, col: int):
+        rows, vals = [], []
+        for event_id, value in zip(event_ids, values):
+            row = self._events.row_of(event_id)
+            if row is not None:
+                rows.append(row)
+                vals.append(value)
+        if not rows:
+            return
+        column[rows] = vals
+        self._events.touch()
+        self.notify_rows_changed(min(rows), max(rows), col, self.COL_END)
+
     # ----------------------------------------------------------------------
     # カスタムAPI: イベント操作メソッド
     # ----------------------------------------------------------------------
@@ -235,7 +240,40 @@ class TimelineDataModel(QAbstractTableModel):
             self._events.pop(row_index)
             self.endRemoveRows()
 
-    def get_event(self, row_index: int) -> Optional[PhonemeEvent]:
+    def remove_events_by_ids(self, event_ids: Sequence[str]) -> List[Tuple[int, List[PhonemeEvent]]]:
+        """
+        複数イベントをまとめて削除する。連続した行は1回の beginRemoveRows / 配列のずらしで消す。
+
+        Returns:
+            [(先頭の行番号, 削除したイベントのリスト), ...] (行番号の昇順。insert_event_runs で元に戻せる)
+        """
+        rows = sorted({row for row in map(self._events.row_of, event_ids) if row is not None})
+        runs = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        removed = []
+        # 後ろの塊から消せば、前の塊の行番号はずれない
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            removed.append((first, self._events.delete_range(first, last)))
+            self.endRemoveRows()
+        removed.reverse()
+        return removed
+
+    def insert_event_runs(self, runs: List[Tuple[int, List[PhonemeEvent]]]):
+        """
+        remove_events_by_ids の戻り値を元の行に戻す (行番号の昇順に挿入する)。
+        """
+        for first, events in runs:
+            first = min(first, len(self._events))
+            self.beginInsertRows(QModelIndex(), first, first + len(events) - 1)
+            self._events.insert_range(first, events)
+            self.endInsertRows()
+
+    def get_event(self, row_index: int) -> Optional[PhonemeEventRef]:
         """
         指定行のイベントを取得。
         """
@@ -259,10 +297,72 @@ class TimelineDataModel(QAbstractTableModel):
         event_id を持つPhonemeEventが何行目にあるかを返す。
         見つからなければ None。
         """
-        for row, evt in enumerate(self._events):
-            if evt.event_id == event_id:
-                return row
-        return None
+        return self._events.row_of(event_id)
+
+    def get_event_by_id(self, event_id: str) -> Optional[PhonemeEventRef]:
+        row = self.find_row_by_event_id(event_id)
+        return None if row is None else self._events[row]
+
+    # ----------------------------------------------------------------------
+    # 時間索引 (再生ヘッド位置のイベント検索など)
+    # ----------------------------------------------------------------------
+    def rows_in_range(self, t0: float, t1: float) -> List[int]:
+        """
+        [t0, t1] と重なる (start_time <= t1 かつ end_time > t0) イベントの行番号を、
+        開始時刻の順で返す。
+        """
+        order, starts, ends, max_ends = self._ensure_time_index()
+        # 開始が t1 以下のもの = ソート順で先頭から hi 個
+        hi = int(np.searchsorted(starts, t1, side="right"))
+        # それより前の終了時刻の最大が t0 以下なら重ならないので、二分探索で飛ばす
+        lo = int(np.searchsorted(max_ends[:hi], t0, side="right"))
+        hit = np.nonzero(ends[lo:hi] > t0)[0] + lo
+        return order[hit].tolist()
+
+    def rows_at_time(self, t: float) -> List[int]:
+        """
+        時刻 t に鳴っている (start_time <= t < end_time) イベントの行番号。
+        """
+        return self.rows_in_range(t, t)
+
+    def events_at_time(self, t: float) -> List[PhonemeEventRef]:
+        return [self._events[row] for row in self.rows_at_time(t)]
+
+    def _ensure_time_index(self):
+        if self._time_index is None or self._time_index_version != self._events.version:
+            starts = self._events.start_array()
+            ends = self._events.end_array()
+            order = np.argsort(starts, kind="stable")
+            ends = ends[order]
+            self._time_index = (order, starts[order], ends, np.maximum.accumulate(ends) if len(ends) else ends)
+            self._time_index_version = self._events.version
+        return self._time_index
+
+    # ----------------------------------------------------------------------
+    # 一括の読み込み・書き出し
+    # ----------------------------------------------------------------------
+    def load_event_dicts(self, data_list: List[dict]):
+        """
+        PhonemeEvent.to_dict() 形式の dict のリストでイベントを置き換える。
+        """
+        self.beginResetModel()
+        self._events.load_dicts(data_list)
+        self.endResetModel()
+
+    def import_columns(self, cols: LipSyncColumns, copy: bool = False):
+        """
+        LipSyncColumns (lip_sync_frames の列指向表現) でイベントを置き換える。
+        copy=False なら start などの配列をコピーせずに使う。
+        """
+        self.beginResetModel()
+        self._events.load_columns(cols, copy=copy)
+        self.endResetModel()
+
+    def export_columns(self) -> LipSyncColumns:
+        """
+        イベントを LipSyncColumns にする (start などはストアの配列のビュー)。
+        """
+        return self._events.to_columns()
 
     # ----------------------------------------------------------------------
     # JSON への保存 / JSON から読み込み
@@ -291,19 +391,14 @@ class TimelineDataModel(QAbstractTableModel):
                 print("[TimelineDataModel] JSON structure error: not a list.")
                 return False
 
-        self.beginResetModel()
-        self._events.clear()
-        for d in data_list:
-            evt = PhonemeEvent.from_dict(d)
-            self._events.append(evt)
-        self.endResetModel()
+        self.load_event_dicts(data_list)
         return True
 
     def save_to_json(self, json_path: str) -> bool:
         """
         現在保持しているイベントリストを JSONファイルとして保存する。
         """
-        data_list = [evt.to_dict() for evt in self._events]
+        data_list = self._events.to_dicts()
         try:
             os.makedirs(os.path.dirname(json_path), exist_ok=True)
             with open(json_path, 'w', encoding='utf-8') as f:
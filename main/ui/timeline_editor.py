@@ -6,11 +6,12 @@ import os
 import json
 import uuid
 
+import numpy as np
 from PyQt5.QtCore import (
-    Qt, QPointF, QPropertyAnimation, QEasingCurve, pyqtSignal, QRectF
+    Qt, QPointF, QPropertyAnimation, QEasingCurve, pyqtSignal, QRectF, QLineF, QTimer
 )
 from PyQt5.QtGui import (
-    QPainter, QPen, QBrush, QColor
+    QPainter, QPen, QBrush, QColor, QTransform
 )
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -31,16 +32,24 @@ except ImportError:
     WaveformWidget = None
 
 try:
-    from main.ui.timeline_data_model import TimelineDataModel
+    from main.ui.timeline_data_model import TimelineDataModel, PhonemeEvent
+except ImportError:
+    TimelineDataModel = None
+    PhonemeEvent = None
+
+try:
     from main.ui.undo_commands import (
-        AddBlockCommand, MoveBlockCommand, ResizeBlockCommand, DeleteBlockCommand
+        AddBlockCommand, MoveBlockCommand, ResizeBlockCommand, RemoveBlockCommand,
+        EditBlockCommand, MoveBlocksCommand, RemoveBlocksCommand
     )
 except ImportError:
-    TimelineDataModel = None
     AddBlockCommand = None
     MoveBlockCommand = None
     ResizeBlockCommand = None
-    DeleteBlockCommand = None
+    RemoveBlockCommand = None
+    EditBlockCommand = None
+    MoveBlocksCommand = None
+    RemoveBlocksCommand = None
 
 try:
     from main.utils.audio_player import AudioPlayer
@@ -59,6 +68,7 @@ class PhonemeBlockItem(QGraphicsObject):
     - 右クリックで音素バリエーション切り替えメニュー
     - ドラッグ前後の start_time / duration を記録 (Undo/Redo用にシグナル通知)
     - block_id で DataModel と対応させる（省略可）
+    - TimelineGraphicsView では使い回されるので、表示するイベントは bind() で差し替える
     """
     blockMoved = pyqtSignal(object, float, float)   # (self, old_start, new_start)
     blockResized = pyqtSignal(object, float, float) # (self, old_duration, new_duration)
@@ -97,6 +107,9 @@ class PhonemeBlockItem(QGraphicsObject):
         # 高さは固定で 30px としておく
         self.block_height = 30
 
+        # 表示中のイベント (bind() でセット。移動・リサイズの結果はビューが書き戻す)
+        self.event = None
+
         # 再描画用に setAcceptedMouseButtons 等を設定 (QGraphicsObject ではデフォルトON)
         self.setAcceptedMouseButtons(Qt.LeftButton | Qt.RightButton)
         # 選択を有効にする
@@ -104,6 +117,21 @@ class PhonemeBlockItem(QGraphicsObject):
         self.setFlag(QGraphicsObject.ItemIsMovable, True)
         self.setFlag(QGraphicsObject.ItemSendsGeometryChanges, True)
 
+    def bind(self, event, y: float):
+        """
+        イベントの内容で表示を差し替える (再利用時)。
+        """
+        self.prepareGeometryChange()
+        self.event = event
+        self.block_id = event.event_id
+        self.phoneme = event.phoneme
+        self.start_time = event.start_time
+        self.duration = event.duration
+        self._isResizingLeft = False
+        self._isResizingRight = False
+        self.setPos(event.start_time * 200.0, y)
+        self.update()
+
     # ==============================================================
     # QGraphicsObject に必須: boundingRect() と paint() の実装
     # ==============================================================
@@ -211,6 +239,8 @@ class PhonemeBlockItem(QGraphicsObject):
 
             old_duration = self._resizeOldDuration
             new_duration = self.duration
+            # 左端のリサイズでは開始時刻も変わる
+            self.start_time = self.x() / 200.0
             self.blockResized.emit(self, old_duration, new_duration)
 
         else:
@@ -251,13 +281,39 @@ class PhonemeBlockItem(QGraphicsObject):
 class TimelineGraphicsView(QGraphicsView):
     """
     タイムライン表示用のグラフィックスビュー。
+
+    音素イベントは set_events(events) で渡す (TimelineDataModel._events など、
+    event_id / phoneme / start_time / duration を持つオブジェクトのリスト)。
+    - PhonemeBlockItem は表示範囲 + 前後の余白にあるイベントのぶんだけ作り、
+      スクロールで範囲外になったものは非表示にしてプールに戻し、別のイベントに再利用する。
+    - 縮小して表示範囲のイベントが MAX_VISIBLE_ITEMS を超えたら、ブロックを作らずに
+      ピクセル列ごとにまとめた帯 (LOD 表示) を drawBackground で描く。
+    - 範囲の検索は開始時刻でソートした配列の二分探索 (イベントが変わったら invalidate_events)。
+      invalidate_events は何回呼ばれても、イベントループに戻ったときに1回だけ作り直す。
+    - ブロックのシグナルはビューがまとめて中継する (blocksMoved / blockResized / blockRightClicked)。
+      複数選択して動かした場合も、全ブロックぶんを1回の blocksMoved で通知する。
     """
+    blocksMoved = pyqtSignal(list)                         # [(block_item, old_start, new_start), ...]
+    blockResized = pyqtSignal(object, float, float, float) # (block_item, old_start, old_duration, new_duration)
+    blockRightClicked = pyqtSignal(object, QPointF) # (block_item, scenePos)
+
+    PX_PER_SEC = 200.0
+    BLOCK_Y = 40.0
+    SCENE_HEIGHT = 300
+    # 表示幅に対する前後の余白 (この範囲のブロックも先に作っておく)
+    MARGIN_RATIO = 0.5
+    # 表示範囲のイベント数がこれを超えたら LOD 表示
+    MAX_VISIBLE_ITEMS = 1500
+    MIN_ZOOM = 0.0005
+    MAX_ZOOM = 20.0
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setScene(QGraphicsScene(self))
-        self.setSceneRect(0, 0, 2000, 300)
+        self.setSceneRect(0, 0, 2000, self.SCENE_HEIGHT)
         self.setRenderHint(QPainter.Antialiasing)
         self.setBackgroundBrush(QBrush(QColor("#EEEEEE")))
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
 
         # 複数選択を有効化
         self.setDragMode(QGraphicsView.RubberBandDrag)
@@ -265,19 +321,306 @@ class TimelineGraphicsView(QGraphicsView):
         # 再生ヘッドライン
         pen_head = QPen(QColor("#FF0000"))
         pen_head.setWidth(2)
-        self.playhead_line = self.scene().addLine(0, 0, 0, 300, pen_head)
+        self.playhead_line = self.scene().addLine(0, 0, 0, self.SCENE_HEIGHT, pen_head)
+        self.playhead_line.setZValue(10)
+
+        # イベントと、開始時刻でソートした検索用の配列
+        self._events = []
+        self._index_dirty = True
+        self._starts = np.empty(0)
+        self._ends = np.empty(0)
+        self._order = np.empty(0, dtype=np.int64)
+        self._max_duration = 0.0
+
+        # event_id -> 表示中の PhonemeBlockItem / 再利用待ちのアイテム
+        self._items = {}
+        self._pool = []
+        self._zoom = 1.0
+        self._lod = False
+        self._refresh_pending = False
+
+        self.horizontalScrollBar().valueChanged.connect(self._refresh_visible)
 
-    def update_playhead_position(self, current_time: float):
-        x_pos = current_time * 200.0
-        self.playhead_line.setLine(x_pos, 0, x_pos, 300)
+    # -----------------------------------
+    # イベント
+    # -----------------------------------
+    def set_events(self, events):
+        """
+        表示するイベントのリストをセットする (リストはコピーせずに参照する)。
+        """
+        self._release_all()
+        self._events = events
+        self.invalidate_events()
+
+    def invalidate_events(self, *args):
+        """
+        イベントの追加・削除・時刻の変更を反映する (モデルのシグナルに接続できるよう引数は無視)。
+        """
+        self._index_dirty = True
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            QTimer.singleShot(0, self._deferred_refresh)
+
+    def _deferred_refresh(self):
+        self._refresh_pending = False
+        self._refresh_visible()
 
     def add_phoneme_block(self, block_item: PhonemeBlockItem):
-        self.scene().addItem(block_item)
+        """
+        ブロック1つぶんのイベントを追加する (block_item はプールに入れて再利用する)。
+        """
+        if PhonemeEvent is None:
+            self.scene().addItem(block_item)
+            return
+        self._events.append(PhonemeEvent(
+            block_item.phoneme, block_item.start_time, block_item.duration, event_id=block_item.block_id
+        ))
+        self._adopt(block_item)
+        block_item.setVisible(False)
+        self._pool.append(block_item)
+        self.invalidate_events()
+
+    def remove_blocks(self, block_items):
+        """
+        ブロックに対応するイベントをリストから削除する (モデルを使わない場合用)。
+        """
+        ids = {b.block_id for b in block_items}
+        rows = [i for i, e in enumerate(self._events) if e.event_id in ids]
+        for row in reversed(rows):
+            del self._events[row]
+        self.invalidate_events()
 
     def get_selected_blocks(self):
         items = self.scene().selectedItems()
         return [it for it in items if isinstance(it, PhonemeBlockItem)]
 
+    def update_playhead_position(self, current_time: float):
+        x_pos = current_time * self.PX_PER_SEC
+        self.playhead_line.setLine(x_pos, 0, x_pos, self.SCENE_HEIGHT)
+
+    # -----------------------------------
+    # ズーム
+    # -----------------------------------
+    def set_zoom(self, zoom: float):
+        """
+        水平方向の拡大率 (1.0 で 1秒 = 200px)。
+        """
+        self._zoom = max(self.MIN_ZOOM, min(self.MAX_ZOOM, zoom))
+        self.setTransform(QTransform.fromScale(self._zoom, 1.0))
+        self._refresh_visible()
+
+    def wheelEvent(self, event):
+        # Ctrl + ホイールで水平ズーム
+        if event.modifiers() & Qt.ControlModifier:
+            self.set_zoom(self._zoom * (1.25 ** (event.angleDelta().y() / 120.0)))
+            event.accept()
+            return
+        super().wheelEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._refresh_visible()
+
+    # -----------------------------------
+    # 表示範囲のブロックの作成・再利用
+    # -----------------------------------
+    def _visible_time_range(self):
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        return rect.left() / self.PX_PER_SEC, rect.right() / self.PX_PER_SEC
+
+    def _ensure_index(self):
+        if not self._index_dirty:
+            return
+        n = len(self._events)
+        if hasattr(self._events, "start_array"):
+            # PhonemeEventStore なら配列をそのまま使う
+            starts = self._events.start_array()
+            durations = self._events.duration_array()
+        else:
+            starts = np.fromiter((e.start_time for e in self._events), dtype=np.float64, count=n)
+            durations = np.fromiter((e.duration for e in self._events), dtype=np.float64, count=n)
+        self._order = np.argsort(starts, kind="stable")
+        self._starts = starts[self._order]
+        self._ends = self._starts + durations[self._order]
+        self._max_duration = float(durations.max()) if n else 0.0
+        self._index_dirty = False
+
+        end_px = float(self._ends.max()) * self.PX_PER_SEC if n else 0.0
+        self.setSceneRect(0, 0, max(2000.0, end_px + 200.0), self.SCENE_HEIGHT)
+
+    def _sorted_range(self, t0: float, t1: float):
+        """
+        ソート済み配列上で [t0, t1] と重なりうる範囲 (lo, hi)。
+        """
+        lo = int(np.searchsorted(self._starts, t0 - self._max_duration, side="left"))
+        hi = int(np.searchsorted(self._starts, t1, side="right"))
+        return lo, hi
+
+    def _query(self, t0: float, t1: float) -> np.ndarray:
+        """
+        [t0, t1] と重なるイベントの (self._events 上の) インデックス。
+        """
+        lo, hi = self._sorted_range(t0, t1)
+        hit = np.nonzero(self._ends[lo:hi] >= t0)[0] + lo
+        return self._order[hit]
+
+    def _refresh_visible(self, *args):
+        if self.scene() is None:
+            return
+        self._ensure_index()
+        t0, t1 = self._visible_time_range()
+        n_visible = len(self._query(t0, t1))
+
+        lod = n_visible > self.MAX_VISIBLE_ITEMS
+        if lod or lod != self._lod:
+            # 帯は表示範囲のピクセル列に合わせて描くので、スクロールのたびに全体を描き直す
+            self._lod = lod
+            self.viewport().update()
+        if lod:
+            self._release_except({})
+            return
+
+        margin = (t1 - t0) * self.MARGIN_RATIO
+        wanted = {}
+        for i in self._query(t0 - margin, t1 + margin).tolist():
+            evt = self._events[i]
+            wanted[evt.event_id] = evt
+        self._release_except(wanted)
+        for event_id, evt in wanted.items():
+            item = self._items.get(event_id)
+            if item is None:
+                item = self._acquire()
+                self._items[event_id] = item
+            if item.block_id != event_id or item.start_time != evt.start_time or item.duration != evt.duration \
+                    or item.phoneme != evt.phoneme:
+                item.bind(evt, self.BLOCK_Y)
+
+    def _release_except(self, wanted: dict):
+        """
+        wanted に無いイベントのアイテムをプールに戻す (選択中・ドラッグ中のものは残す)。
+        """
+        grabber = self.scene().mouseGrabberItem()
+        for event_id in list(self._items):
+            if event_id in wanted:
+                continue
+            item = self._items[event_id]
+            if (item.isSelected() or item is grabber) and self._event_exists(event_id):
+                continue
+            del self._items[event_id]
+            item.setSelected(False)
+            item.setVisible(False)
+            item.event = None
+            self._pool.append(item)
+
+    def _event_exists(self, event_id: str) -> bool:
+        if hasattr(self._events, "row_of"):
+            return self._events.row_of(event_id) is not None
+        return any(e.event_id == event_id for e in self._events)
+
+    def _release_all(self):
+        for item in self._items.values():
+            item.setSelected(False)
+            item.setVisible(False)
+            item.event = None
+            self._pool.append(item)
+        self._items.clear()
+
+    def _acquire(self) -> PhonemeBlockItem:
+        if self._pool:
+            item = self._pool.pop()
+        else:
+            item = PhonemeBlockItem()
+            self._adopt(item)
+        item.setVisible(True)
+        return item
+
+    def _adopt(self, item: PhonemeBlockItem):
+        """
+        アイテムをシーンに追加し、シグナルをビューに中継する (1アイテムにつき1回)。
+        """
+        item.blockMoved.connect(self._on_item_moved)
+        item.blockResized.connect(self._on_item_resized)
+        item.blockRightClicked.connect(self.blockRightClicked)
+        self.scene().addItem(item)
+
+    def _on_item_moved(self, item, old_start, new_start):
+        # 一緒に動いた (選択中の) ほかのブロックも同じようにスナップして、まとめて通知する
+        moves = [(item, old_start, new_start)]
+        fps = PhonemeBlockItem.SNAP_FPS
+        for other in self.get_selected_blocks():
+            if other is item:
+                continue
+            snapped = round(other.x() / self.PX_PER_SEC * fps) / float(fps)
+            other.setPos(snapped * self.PX_PER_SEC, other.y())
+            if snapped != other.start_time:
+                moves.append((other, other.start_time, snapped))
+                other.start_time = snapped
+        for moved, _, _ in moves:
+            if moved.event is not None:
+                moved.event.start_time = moved.start_time
+        self.blocksMoved.emit(moves)
+        self.invalidate_events()
+
+    def _on_item_resized(self, item, old_duration, new_duration):
+        old_start = item._dragOldStart
+        if item.event is not None:
+            item.event.start_time = item.start_time
+            item.event.duration = item.duration
+        self.blockResized.emit(item, old_start, old_duration, new_duration)
+        self.invalidate_events()
+
+    # -----------------------------------
+    # LOD 表示
+    # -----------------------------------
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self._lod:
+            self._draw_lod(painter)
+
+    def _draw_lod(self, painter):
+        """
+        ピクセル列ごとに、イベントのある区間を帯で、イベントの密度を縦線の高さで描く。
+        """
+        cols = max(1, self.viewport().width())
+        t0, t1 = self._visible_time_range()
+        if t1 <= t0:
+            return
+        lo, hi = self._sorted_range(t0, t1)
+        sec_per_col = (t1 - t0) / cols
+        c0 = np.clip(((self._starts[lo:hi] - t0) / sec_per_col).astype(np.int64), 0, cols)
+        c1 = np.clip(np.ceil((self._ends[lo:hi] - t0) / sec_per_col).astype(np.int64), 0, cols)
+
+        # 区間の被覆 (開始で +1、終了で -1 の累積和)
+        cover = np.cumsum(
+            np.bincount(c0, minlength=cols + 1) - np.bincount(c1, minlength=cols + 1)
+        )[:cols] > 0
+        edges = np.diff(np.concatenate([[0], cover.astype(np.int8), [0]]))
+        run_starts = np.nonzero(edges == 1)[0]
+        run_ends = np.nonzero(edges == -1)[0]
+
+        x0 = t0 * self.PX_PER_SEC
+        px_per_col = sec_per_col * self.PX_PER_SEC
+        height = 30.0
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(QColor("#FFE0A0")))
+        painter.drawRects([
+            QRectF(x0 + s * px_per_col, self.BLOCK_Y, (e - s) * px_per_col, height)
+            for s, e in zip(run_starts.tolist(), run_ends.tolist())
+        ])
+
+        # 列ごとのイベント数 (開始数) を下から伸びる線で
+        counts = np.bincount(c0[c0 < cols], minlength=cols)
+        peak = counts.max() if len(counts) else 0
+        if peak > 0:
+            cols_hit = np.nonzero(counts)[0]
+            heights = counts[cols_hit] / float(peak) * height
+            bottom = self.BLOCK_Y + height
+            painter.setPen(QPen(QColor("#CC8800"), 0))
+            painter.drawLines([
+                QLineF(x0 + (c + 0.5) * px_per_col, bottom, x0 + (c + 0.5) * px_per_col, bottom - h)
+                for c, h in zip(cols_hit.tolist(), heights.tolist())
+            ])
+
 
 class TimelineEditorWindow(QMainWindow):
     """
@@ -325,6 +668,16 @@ class TimelineEditorWindow(QMainWindow):
         # Timeline
         self.timeline_view = TimelineGraphicsView()
         self.timeline_view.setMinimumHeight(250)
+        self.timeline_view.blocksMoved.connect(self._on_phoneme_blocks_moved)
+        self.timeline_view.blockResized.connect(self._on_phoneme_block_resized)
+        self.timeline_view.blockRightClicked.connect(self._on_block_right_clicked)
+        if self.data_model:
+            # モデルのイベントをそのまま表示し、変更があれば表示範囲を作り直す
+            self.timeline_view.set_events(self.data_model._events)
+            self.data_model.rowsInserted.connect(self.timeline_view.invalidate_events)
+            self.data_model.rowsRemoved.connect(self.timeline_view.invalidate_events)
+            self.data_model.modelReset.connect(self.timeline_view.invalidate_events)
+            self.data_model.dataChanged.connect(self.timeline_view.invalidate_events)
         right_side_layout.addWidget(self.timeline_view, stretch=3)
 
         # 3D Preview
@@ -513,9 +866,13 @@ class TimelineEditorWindow(QMainWindow):
                                        f"{len(selected_blocks)} blocks を削除しますか？",
                                        QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
-            for block in selected_blocks:
-                self.timeline_view.scene().removeItem(block)
-                # DataModelからの削除処理 (省略)
+            if self.data_model and RemoveBlocksCommand:
+                # まとめて1コマンドにする (Undo 1回で全部戻る)
+                self.data_model.undo_stack.push(RemoveBlocksCommand(
+                    self.data_model, [block.block_id for block in selected_blocks]
+                ))
+            else:
+                self.timeline_view.remove_blocks(selected_blocks)
             print(f"Deleted {len(selected_blocks)} blocks.")
 
     # -----------------------------------
@@ -530,11 +887,10 @@ class TimelineEditorWindow(QMainWindow):
             ("i_alt",1.5,  0.2),
         ]
         for (ph, st, dur) in demo_data:
-            block = PhonemeBlockItem(phoneme=ph, start_time=st, duration=dur)
-            block.blockMoved.connect(self._on_phoneme_block_moved)
-            block.blockResized.connect(self._on_phoneme_block_resized)
-            block.blockRightClicked.connect(self._on_block_right_clicked)
-            self.timeline_view.add_phoneme_block(block)
+            if self.data_model:
+                self.data_model.add_event(ph, st, dur)
+            else:
+                self.timeline_view.add_phoneme_block(PhonemeBlockItem(phoneme=ph, start_time=st, duration=dur))
 
     # -----------------------------------
     # 再生コントロール
@@ -564,21 +920,37 @@ class TimelineEditorWindow(QMainWindow):
     # -----------------------------------
     # ブロック操作シグナルハンドラ
     # -----------------------------------
-    def _on_phoneme_block_moved(self, block_item, old_start, new_start):
-        print(f"Block moved: {block_item.phoneme}, old={old_start}, new={new_start}")
-        if self.data_model and MoveBlockCommand:
-            row_idx = self._find_row_index_by_blockid(block_item.block_id)
-            if row_idx is not None:
-                cmd = MoveBlockCommand(self.data_model, row_idx, old_start, new_start)
-                # self.data_model.undo_stack.push(cmd)
-
-    def _on_phoneme_block_resized(self, block_item, old_duration, new_duration):
+    def _on_phoneme_blocks_moved(self, moves):
+        print(f"Blocks moved: {len(moves)}")
+        if not (self.data_model and MoveBlocksCommand):
+            return
+        if len(moves) == 1:
+            block_item, old_start, new_start = moves[0]
+            cmd = MoveBlockCommand(self.data_model, block_item.block_id, old_start, new_start)
+        else:
+            # 複数ブロックの移動は1コマンド (Undo 1回・dataChanged 1回)
+            cmd = MoveBlocksCommand(
+                self.data_model,
+                [m[0].block_id for m in moves], [m[1] for m in moves], [m[2] for m in moves]
+            )
+        self.data_model.undo_stack.push(cmd)
+
+    def _on_phoneme_block_resized(self, block_item, old_start, old_duration, new_duration):
         print(f"Block resized: {block_item.phoneme}, oldDur={old_duration}, newDur={new_duration}")
-        if self.data_model and ResizeBlockCommand:
-            row_idx = self._find_row_index_by_blockid(block_item.block_id)
-            if row_idx is not None:
-                cmd = ResizeBlockCommand(self.data_model, row_idx, old_duration, new_duration)
-                # self.data_model.undo_stack.push(cmd)
+        if not (self.data_model and ResizeBlockCommand):
+            return
+        if block_item.start_time != old_start:
+            # 左端のリサイズは開始時刻も変わる
+            cmd = EditBlockCommand(
+                self.data_model, block_item.block_id,
+                block_item.phoneme, block_item.phoneme,
+                old_start, block_item.start_time,
+                old_duration, new_duration,
+                desc="Resize Block"
+            )
+        else:
+            cmd = ResizeBlockCommand(self.data_model, block_item.block_id, old_duration, new_duration)
+        self.data_model.undo_stack.push(cmd)
 
     def _on_block_right_clicked(self, block_item, scene_pos):
         menu = QMenu(self)
@@ -609,6 +981,8 @@ class TimelineEditorWindow(QMainWindow):
     def _apply_phoneme_variation(self, block_item, new_phoneme):
         print(f"Change phoneme: {block_item.phoneme} -> {new_phoneme}")
         block_item.phoneme = new_phoneme
+        if block_item.event is not None:
+            block_item.event.phoneme = new_phoneme
         block_item.update()
 
     # -----------------------------------
@@ -654,11 +1028,7 @@ class TimelineEditorWindow(QMainWindow):
         """block_idとDataModel上のevent_idが一致する行を探して返す (無ければNone)。"""
         if not self.data_model:
             return None
-        for i, evt in enumerate(self.data_model._events):
-            # evtに .event_id がある想定
-            if hasattr(evt, 'event_id') and evt.event_id == block_id:
-                return i
-        return None
+        return self.data_model.find_row_by_event_id(block_id)
 
     # -----------------------------------
     # ウィンドウフェードイン
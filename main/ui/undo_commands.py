@@ -17,11 +17,16 @@ undo_commands.py
  - ユーザが新規ブロックを追加: AddBlockCommand
  - ユーザがブロックを削除: RemoveBlockCommand
  - リサイズや音素変更は EditBlockCommand や ResizeBlockCommand など
- - 複数ブロック同時操作に対応するなら MultiRemoveCommand, MultiMoveCommand 等が考えられる
+ - 複数ブロックの移動は MoveBlocksCommand (1コマンドで全ブロックを更新し、dataChanged も1回)
+ - 複数ブロックの削除は RemoveBlocksCommand (連続した行をまとめて削除)
+ - どちらも1コマンドなので、選択ブロックへの操作は Undo 1回で全部戻る
+ - ドラッグ中はコマンドを積まず、ドロップ (mouseRelease) 時に1回だけ push する
+   (TimelineGraphicsView は選択ブロック全部の移動を1回の blocksMoved で通知する)
 """
 
 from PyQt5.QtWidgets import QUndoCommand
 
+
 class AddBlockCommand(QUndoCommand):
     """
     新しい音素ブロック（PhonemeEvent）を追加するコマンド。
@@ -49,26 +54,22 @@ class AddBlockCommand(QUndoCommand):
         コマンド実行 (やり直し)。
         """
         row_count = self.model.rowCount()
-        self.model.beginInsertRows(self.model.index(row_count - 1, 0), row_count, row_count)
 
         # event_idを渡すことで DataModel 側で PhonemeEvent(event_id=...) が作られる
+        # (行の挿入通知は add_event 側で行う)
         self.model.add_event(self.phoneme, self.start, self.duration, event_id=self.event_id)
         self.inserted_index = row_count
-
-        self.model.endInsertRows()
+        if self.event_id is None:
+            # Redo で同じIDのイベントを作り直せるように
+            self.event_id = self.model.get_event(row_count).event_id
 
     def undo(self):
         """
         コマンドを取り消し。
         """
-        if 0 <= self.inserted_index < self.model.rowCount():
-            self.model.beginRemoveRows(
-                self.model.index(self.inserted_index, 0),
-                self.inserted_index,
-                self.inserted_index
-            )
-            self.model._events.pop(self.inserted_index)
-            self.model.endRemoveRows()
+        row_index = self.model.find_row_by_event_id(self.event_id)
+        if row_index is not None:
+            self.model.remove_event(row_index)
 
 
 class RemoveBlockCommand(QUndoCommand):
@@ -147,11 +148,8 @@ class MoveBlockCommand(QUndoCommand):
         if row_index is not None and 0 <= row_index < self.model.rowCount():
             evt = self.model._events[row_index]
             evt.start_time = start_time
-            # Start列(col=1), End列(col=3)
-            idx_start = self.model.index(row_index, 1)
-            self.model.dataChanged.emit(idx_start, idx_start, [])
-            idx_end = self.model.index(row_index, 3)
-            self.model.dataChanged.emit(idx_end, idx_end, [])
+            # Start列(col=1) ～ End列(col=3) を1回で通知
+            self.model.notify_rows_changed(row_index, row_index, 1, 3)
 
 
 class ResizeBlockCommand(QUndoCommand):
@@ -186,10 +184,7 @@ class ResizeBlockCommand(QUndoCommand):
             evt = self.model._events[row_index]
             evt.duration = duration
             # duration列(col=2) と end列(col=3) が影響
-            idx_dur = self.model.index(row_index, 2)
-            self.model.dataChanged.emit(idx_dur, idx_dur, [])
-            idx_end = self.model.index(row_index, 3)
-            self.model.dataChanged.emit(idx_end, idx_end, [])
+            self.model.notify_rows_changed(row_index, row_index, 2, 3)
 
 
 class EditBlockCommand(QUndoCommand):
@@ -233,6 +228,54 @@ class EditBlockCommand(QUndoCommand):
             evt.duration = duration
 
             # phoneme=col0, start=col1, duration=col2, end=col3
-            top_idx = self.model.index(row_index, 0)
-            bottom_idx = self.model.index(row_index, 3)
-            self.model.dataChanged.emit(top_idx, bottom_idx, [])
+            self.model.notify_rows_changed(row_index, row_index, 0, 3)
+
+
+class MoveBlocksCommand(QUndoCommand):
+    """
+    複数ブロックの移動を1つの操作として記録する。
+    全ブロックの start_time を model.set_start_times() で一度に書き換える (dataChanged も1回)。
+    """
+    def __init__(self, model, event_ids, old_starts, new_starts, desc=None, parent=None):
+        """
+        Args:
+            model: TimelineDataModel
+            event_ids (list[str]): 移動したイベントのID
+            old_starts (list[float]): 移動前の開始時間 (event_ids と同じ順)
+            new_starts (list[float]): 移動後の開始時間
+        """
+        super().__init__(desc or f"Move {len(event_ids)} Blocks", parent)
+        self.model = model
+        self.event_ids = list(event_ids)
+        self.old_starts = list(old_starts)
+        self.new_starts = list(new_starts)
+
+    def redo(self):
+        self.model.set_start_times(self.event_ids, self.new_starts)
+
+    def undo(self):
+        self.model.set_start_times(self.event_ids, self.old_starts)
+
+
+class RemoveBlocksCommand(QUndoCommand):
+    """
+    複数ブロックの削除を1つの操作として記録する。
+    連続した行はまとめて削除・復元する (1件ずつ RemoveBlockCommand を積むより速い)。
+    """
+    def __init__(self, model, event_ids, desc=None, parent=None):
+        """
+        Args:
+            model: TimelineDataModel
+            event_ids (list[str]): 削除対象のイベントID
+        """
+        super().__init__(desc or f"Delete {len(event_ids)} Blocks", parent)
+        self.model = model
+        self.event_ids = list(event_ids)
+        self.removed_runs = []
+
+    def redo(self):
+        self.removed_runs = self.model.remove_events_by_ids(self.event_ids)
+
+    def undo(self):
+        self.model.insert_event_runs(self.removed_runs)
+        self.removed_runs = []
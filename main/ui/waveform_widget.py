@@ -12,19 +12,27 @@ waveform_widget.py
 3) 波形データが非常に長い場合に対応しやすいよう、whileループの描画計算を微調整。
 4) シグナル発行まわり (waveClicked, waveScrubbed) を複数回ドラッグしても問題ないよう、ドラッグ終了後にフラグをリセット。
 5) 内部変数名やコメントの追加で可読性を向上。
+6) 描画はピークピラミッド (main.utils.peak_pyramid) からズームに合ったレベルを選んで行う。
+   1ピクセルごとに元の波形の min / max を計算しないので、長い音声を縮小表示しても描画が重くならない。
+   set_peaks(...) で .peaks ファイルのピラミッドだけを渡すこともできる (元の波形を読み込まずに表示)。
+7) 波形 (背景・中央線・波形・RMS) は QPixmap にキャッシュし、スクロール/ズーム/リサイズ時だけ作り直す。
+   波形は NumPy で頂点配列を作り、1回の drawPolyline で描く (列ごとに上下を往復する折れ線)。
+   再生カーソルの移動では、カーソルの前後の細い帯だけを再描画する (update(QRect))。
 
 """
 
 import sys
 import numpy as np
 
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
+from PyQt5.QtCore import Qt, QRect, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QColor, QPixmap, QPolygonF
 from PyQt5.QtWidgets import (
     QWidget, QScrollBar, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QApplication
 )
 
+from main.utils.peak_pyramid import PeakPyramid
+
 
 class WaveformWidget(QWidget):
     """
@@ -32,7 +40,10 @@ class WaveformWidget(QWidget):
 
     主な機能:
       - set_audio_data(audio_array, sample_rate):
-          音声データ(np.float32) と サンプルレート を受け取り、描画準備。
+          音声データ(np.float32) と サンプルレート を受け取り、描画準備 (ピークピラミッドも作る)。
+      - set_peaks(pyramid):
+          ピークピラミッドだけで表示する (.peaks ファイルから開いたものなど)。
+          この場合、拡大は base_block サンプル/ピクセルまで。
       - set_zoom(samples_per_pixel):
           水平方向ズーム (1ピクセルあたりサンプル数) を設定。小さいほど拡大。
       - set_vertical_zoom(zoom: float):
@@ -58,6 +69,8 @@ class WaveformWidget(QWidget):
 
         self.audio_data: np.ndarray = None
         self.sample_rate: int = 16000
+        # ズームに応じたレベルから描画するためのピークピラミッド
+        self.peaks: PeakPyramid = None
 
         # 1ピクセルあたり何サンプルか (水平ズーム)
         self.samples_per_pixel: int = 128
@@ -73,6 +86,9 @@ class WaveformWidget(QWidget):
         self.enable_scrub_drag: bool = False
         self._is_dragging: bool = False
 
+        # 波形レイヤーのキャッシュ (描画条件のキー, QPixmap)
+        self._wave_cache = None
+
     # ----------------------------------------------------------------
     #  1) Public API
     # ----------------------------------------------------------------
@@ -86,11 +102,27 @@ class WaveformWidget(QWidget):
 
         self.audio_data = audio_array
         self.sample_rate = sample_rate
+        self.peaks = PeakPyramid.from_array(audio_array, sample_rate)
+        self._wave_cache = None
 
         self.scroll_pos = 0
         self.cursor_time = 0.0
         self.update()
 
+    def set_peaks(self, pyramid: PeakPyramid):
+        """
+        ピークピラミッドだけをセットして描画を更新 (元の波形は持たない)。
+        """
+        self.audio_data = None
+        self.peaks = pyramid
+        self.sample_rate = pyramid.sample_rate
+        self._wave_cache = None
+
+        self.scroll_pos = 0
+        self.cursor_time = 0.0
+        self._clamp_zoom()
+        self.update()
+
     def set_zoom(self, samples_per_pixel: int):
         """
         水平ズーム (1ピクセルあたりサンプル数) を設定。
@@ -99,6 +131,7 @@ class WaveformWidget(QWidget):
         if samples_per_pixel < 1:
             samples_per_pixel = 1
         self.samples_per_pixel = samples_per_pixel
+        self._clamp_zoom()
         # スクロール位置が表示範囲を超えないよう再調整
         self._clamp_scroll_pos()
         self.update()
@@ -124,17 +157,24 @@ class WaveformWidget(QWidget):
     def set_cursor_time(self, time_sec: float):
         """
         再生カーソル(秒)を設定。音声長を超える場合はクランプ。
+        再描画は移動前後のカーソル位置の細い帯だけ。
         """
         if time_sec < 0:
             time_sec = 0.0
 
-        if self.audio_data is not None and len(self.audio_data) > 0:
-            audio_duration_sec = len(self.audio_data) / float(self.sample_rate)
+        if self.num_samples() > 0:
+            audio_duration_sec = self.num_samples() / float(self.sample_rate)
             if time_sec > audio_duration_sec:
                 time_sec = audio_duration_sec
 
+        old_x = self._cursor_xpos()
         self.cursor_time = time_sec
-        self.update()
+        new_x = self._cursor_xpos()
+        if old_x == new_x:
+            return
+        for x in (old_x, new_x):
+            if x is not None:
+                self.update(self._cursor_rect(x))
 
     def set_enable_scrub_drag(self, enable: bool):
         """
@@ -145,15 +185,32 @@ class WaveformWidget(QWidget):
     # ----------------------------------------------------------------
     #  2) Internal & Helper Methods
     # ----------------------------------------------------------------
+    def num_samples(self) -> int:
+        """
+        表示中の音声のサンプル数 (元の波形が無い場合はピラミッドから)。
+        """
+        if self.audio_data is not None:
+            return len(self.audio_data)
+        if self.peaks is not None:
+            return self.peaks.n_samples
+        return 0
+
+    def _clamp_zoom(self):
+        """
+        元の波形が無い場合は、ピラミッドのレベル 0 より細かく拡大しない。
+        """
+        if self.audio_data is None and self.peaks is not None:
+            self.samples_per_pixel = max(self.samples_per_pixel, self.peaks.base_block)
+
     def _clamp_scroll_pos(self):
         """
         scroll_pos が音声長を超えないようにクランプ。
         """
-        if self.audio_data is None:
+        if self.num_samples() == 0:
             self.scroll_pos = 0
             return
 
-        max_scroll = max(0, len(self.audio_data) - self.visible_samples_count())
+        max_scroll = max(0, self.num_samples() - self.visible_samples_count())
         self.scroll_pos = max(0, min(self.scroll_pos, max_scroll))
 
     def visible_samples_count(self) -> int:
@@ -166,7 +223,7 @@ class WaveformWidget(QWidget):
         """
         time_sec(秒) → 波形のX座標(px) への変換。
         """
-        if self.audio_data is None or len(self.audio_data) == 0:
+        if self.num_samples() == 0:
             return 0.0
 
         sample_index = time_sec * self.sample_rate
@@ -177,65 +234,109 @@ class WaveformWidget(QWidget):
         """
         x座標(px) → time(秒) に逆変換。
         """
-        if self.audio_data is None:
+        if self.num_samples() == 0:
             return 0.0
         sample_index = (x_px * self.samples_per_pixel) + self.scroll_pos
         return sample_index / float(self.sample_rate)
 
+    def _cursor_xpos(self):
+        """
+        カーソルの X 座標 (px, 整数)。非表示・表示範囲外なら None。
+        """
+        if self.cursor_time is None:
+            return None
+        x = int(self._time_to_xpos(self.cursor_time))
+        if 0 <= x <= self.width():
+            return x
+        return None
+
+    def _cursor_rect(self, x: int) -> QRect:
+        """
+        カーソル (幅2px) を含む再描画範囲。
+        """
+        return QRect(x - 2, 0, 5, self.height())
+
+    def _column_peaks(self, start_sample: int, n_columns: int):
+        """
+        start_sample から1ピクセルずつ n_columns 列ぶんの (min, max, rms)。
+        ズームに合ったピラミッドのレベルを使い、拡大しすぎている場合だけ元の波形から計算する。
+        """
+        spp = self.samples_per_pixel
+        if self.peaks is not None:
+            cols = self.peaks.columns(start_sample, n_columns, spp)
+            if cols is not None:
+                return cols
+
+        end_sample = min(start_sample + n_columns * spp, len(self.audio_data))
+        visible = self.audio_data[start_sample:end_sample]
+        n = (len(visible) + spp - 1) // spp
+        if n == 0:
+            empty = np.empty(0, dtype=np.float32)
+            return empty, empty, empty
+        # 端数の列は最後のサンプルで埋めてから列ごとにまとめる
+        padded = np.empty(n * spp, dtype=np.float32)
+        padded[:len(visible)] = visible
+        padded[len(visible):] = visible[-1]
+        frames = padded.reshape(n, spp)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        return frames.min(axis=1), frames.max(axis=1), rms
+
     # ----------------------------------------------------------------
     #  3) paintEvent: 波形やカーソルを描画
     # ----------------------------------------------------------------
     def paintEvent(self, event):
         super().paintEvent(event)
-        if self.audio_data is None or len(self.audio_data) == 0:
+        if self.num_samples() == 0:
             return
 
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing, False)
+        # 波形レイヤー (描画条件が変わっていなければキャッシュを貼るだけ)
+        painter.drawPixmap(0, 0, self._wave_layer())
 
+        # 再生カーソル
+        cursor_x = self._cursor_xpos()
+        if cursor_x is not None:
+            painter.setPen(QPen(QColor("#FF0000"), 2))
+            painter.drawLine(cursor_x, 0, cursor_x, self.height())
+
+    def _wave_layer(self) -> QPixmap:
+        """
+        背景・中央線・波形・RMS を描いた QPixmap (スクロール位置・ズーム・サイズごとにキャッシュ)。
+        """
         w = self.width()
         h = self.height()
-        mid_y = h // 2
+        dpr = self.devicePixelRatioF()
+        key = (w, h, dpr, self.scroll_pos, self.samples_per_pixel, self.vertical_zoom)
+        if self._wave_cache is not None and self._wave_cache[0] == key:
+            return self._wave_cache[1]
 
-        # 背景
-        painter.fillRect(self.rect(), QBrush(QColor("#FFFFFF")))
+        pixmap = QPixmap(max(1, int(w * dpr)), max(1, int(h * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(QColor("#FFFFFF"))
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        mid_y = h // 2
 
         # 中央線
         painter.setPen(QPen(QColor("#AAAAAA"), 1, Qt.DashLine))
         painter.drawLine(0, mid_y, w, mid_y)
 
-        # 可視範囲サンプルを取得
-        start_sample = self.scroll_pos
-        end_sample = start_sample + self.visible_samples_count()
-        if end_sample > len(self.audio_data):
-            end_sample = len(self.audio_data)
-        visible_data = self.audio_data[start_sample:end_sample]
-
-        # 波形を描画
-        painter.setPen(QPen(QColor("#22AAEE"), 1))
-        stride = self.samples_per_pixel
-
-        x_px = 0
-        idx = 0
-        len_visible = len(visible_data)
-        while idx < len_visible:
-            chunk = visible_data[idx: idx + stride]
-            cmax = float(np.max(chunk))
-            cmin = float(np.min(chunk))
-
-            y_max = mid_y - int(cmax * mid_y * self.vertical_zoom)
-            y_min = mid_y - int(cmin * mid_y * self.vertical_zoom)
-            painter.drawLine(x_px, y_min, x_px, y_max)
+        # 可視範囲の列ごとのピーク
+        mins, maxs, rms = self._column_peaks(self.scroll_pos, w)
+        scale = mid_y * self.vertical_zoom
 
-            x_px += 1
-            idx += stride
+        # 波形 (min〜max) と RMS (±rms) をそれぞれ1本の折れ線で描く
+        # (塗りつぶしの多角形は自己交差が多く、Qt のラスタライズが非常に遅い)
+        for lower, upper, color in ((mins, maxs, "#22AAEE"), (-rms, rms, "#1177BB")):
+            if len(upper) == 0:
+                continue
+            painter.setPen(QPen(QColor(color), 1))
+            painter.drawPolyline(_column_polyline(mid_y - upper * scale, mid_y - lower * scale))
+        painter.end()
 
-        # 再生カーソル
-        if self.cursor_time is not None:
-            cursor_x = self._time_to_xpos(self.cursor_time)
-            if 0 <= cursor_x <= w:
-                painter.setPen(QPen(QColor("#FF0000"), 2))
-                painter.drawLine(cursor_x, 0, cursor_x, h)
+        self._wave_cache = (key, pixmap)
+        return pixmap
 
     # ----------------------------------------------------------------
     #  4) Mouse Events: クリックで waveClicked, ドラッグで waveScrubbed
@@ -275,6 +376,25 @@ class WaveformWidget(QWidget):
         self.update()
 
 
+def _column_polyline(top: np.ndarray, bottom: np.ndarray) -> QPolygonF:
+    """
+    列 x = 0, 1, ... を上端 top → 下端 bottom → (次の列) 下端 → 上端 ... と往復する折れ線。
+    各列の縦線と、隣の列との間の輪郭が1本の線で描ける。
+    頂点は QPolygonF のバッファに NumPy で直接書き込む (1頂点ずつ QPointF を作らない)。
+    """
+    n = len(top)
+    polyline = QPolygonF(2 * n)
+    ptr = polyline.data()
+    ptr.setsize(2 * n * 2 * np.dtype(np.float64).itemsize)
+    points = np.frombuffer(ptr, dtype=np.float64).reshape(n, 2, 2)
+    points[:, :, 0] = np.arange(n, dtype=np.float64)[:, None]
+    points[:, 0, 1] = top
+    points[:, 1, 1] = bottom
+    # 奇数列は下 → 上の順にする
+    points[1::2, :, 1] = points[1::2, ::-1, 1].copy()
+    return polyline
+
+
 # -----------------------------------
 # デモ用ウィンドウ: WaveformWidget のテスト
 # -----------------------------------
@@ -363,10 +483,10 @@ if __name__ == "__main__":
             """
             波形の表示サンプル数が変わったり、リサイズ時にスクロールバーの最大値を更新。
             """
-            if self.waveform.audio_data is None:
+            if self.waveform.num_samples() == 0:
                 return
 
-            max_scroll = max(0, len(self.waveform.audio_data) - self.waveform.visible_samples_count())
+            max_scroll = max(0, self.waveform.num_samples() - self.waveform.visible_samples_count())
             self.scroll_bar.setRange(0, max_scroll)
             current_scroll = self.scroll_bar.value()
             if current_scroll > max_scroll:
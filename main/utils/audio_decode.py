@@ -0,0 +1,369 @@
+# main/utils/audio_decode.py
+# -*- coding: utf-8 -*-
+
+"""
+audio_decode.py
+
+音声ファイルを高速に読み込むためのモジュール (librosa.load の置き換え)。
+
+- WAV は RIFF ヘッダを自前で解析し、PCM / float のサンプルを np.memmap で直接参照する
+  (8/16/24/32bit 整数, 32/64bit float, WAVE_FORMAT_EXTENSIBLE に対応)。
+- リサンプリングは scipy.signal.resample_poly (ポリフェーズの有理数比リサンプラ) を使う。
+  44.1k/48k → 16k のような一般的な組み合わせでは librosa 既定の高品質リサンプラより数倍速い。
+- モノラル化はリサンプリングの前に行い、処理するサンプル数を減らす。
+- WAV 以外 (mp3 / flac など) や解析できない WAV は librosa.load にフォールバックする。
+
+依存:
+- numpy
+- scipy (任意。無ければ librosa → 線形補間の順にフォールバック)
+- librosa (任意。圧縮フォーマットの読み込みのみ)
+
+使い方:
+    from main.utils.audio_decode import load_audio
+
+    audio, sr = load_audio("input.wav", sr=16000, mono=True)   # librosa.load と同じ戻り値
+
+    # 長時間ファイルをブロック単位で読む (ネイティブのサンプリングレートのまま)
+    blocks, sr, duration = open_audio_blocks("long.wav", block_seconds=1.0)
+    for block in blocks:
+        ...
+"""
+
+import os
+import struct
+from math import gcd
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.signal import resample_poly
+except ImportError:
+    resample_poly = None
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+WAV_EXTS = (".wav", ".wave")
+
+
+class WavInfo:
+    """WAVヘッダの解析結果。"""
+
+    __slots__ = ("sample_rate", "channels", "bits_per_sample", "format_tag",
+                 "data_offset", "data_size", "block_align")
+
+    def __init__(self, sample_rate, channels, bits_per_sample, format_tag,
+                 data_offset, data_size, block_align):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bits_per_sample = bits_per_sample
+        self.format_tag = format_tag
+        self.data_offset = data_offset
+        self.data_size = data_size
+        self.block_align = block_align
+
+    @property
+    def n_frames(self) -> int:
+        return self.data_size // self.block_align if self.block_align else 0
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / float(self.sample_rate) if self.sample_rate else 0.0
+
+
+def read_wav_header(path: str) -> WavInfo:
+    """
+    RIFF/WAVE のヘッダを解析し、fmt / data チャンクの情報を返す。
+    対応外のファイルなら ValueError。
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError(f"RIFF/WAVE ではありません: {path}")
+
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                break
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    raise ValueError("fmt チャンクが短すぎます")
+                format_tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # SubFormat GUID の先頭2バイトが実際のフォーマット
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (format_tag, channels, sample_rate, block_align, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("data チャンクが fmt チャンクより前にあります")
+                data_offset = f.tell()
+                # 書き込み途中のファイル等でサイズが実ファイルを超える場合は切り詰める
+                data_size = min(chunk_size, file_size - data_offset)
+                format_tag, channels, sample_rate, block_align, bits = fmt
+                if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                    raise ValueError(f"未対応の WAV フォーマット: 0x{format_tag:04x}")
+                if channels <= 0 or block_align <= 0:
+                    raise ValueError("チャンネル数 / block_align が不正です")
+                return WavInfo(sample_rate, channels, bits, format_tag,
+                               data_offset, data_size - data_size % block_align, block_align)
+            else:
+                f.seek(chunk_size, os.SEEK_CUR)
+            # チャンクは2バイト境界に揃えられている
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+
+    raise ValueError(f"data チャンクが見つかりません: {path}")
+
+
+def decode_wav(path: str, info: WavInfo = None) -> Tuple[np.ndarray, int]:
+    """
+    WAV を float32 の (n_frames, channels) 配列として読み込む。
+    8/16/32bit 整数・float は memmap 経由で読み、変換時に1回だけコピーする。
+
+    Returns:
+        (np.ndarray float32 shape=(n_frames, channels), sample_rate)
+    """
+    if info is None:
+        info = read_wav_header(path)
+    n_frames, ch, bits = info.n_frames, info.channels, info.bits_per_sample
+
+    if n_frames == 0:
+        return np.zeros((0, ch), dtype=np.float32), info.sample_rate
+
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        if bits not in (32, 64):
+            raise ValueError(f"未対応の float ビット数: {bits}")
+        raw = np.memmap(path, dtype="<f4" if bits == 32 else "<f8", mode="r",
+                        offset=info.data_offset, shape=(n_frames, ch))
+        # memmap (読み取り専用) を返さないよう必ずコピーする
+        return np.array(raw, dtype=np.float32), info.sample_rate
+
+    if bits == 8:
+        raw = np.memmap(path, dtype=np.uint8, mode="r", offset=info.data_offset, shape=(n_frames, ch))
+        audio = (raw.astype(np.float32) - 128.0) * (1.0 / 128.0)
+    elif bits == 16:
+        raw = np.memmap(path, dtype="<i2", mode="r", offset=info.data_offset, shape=(n_frames, ch))
+        audio = raw.astype(np.float32) * (1.0 / 32768.0)
+    elif bits == 24:
+        # 3バイト整数は memmap できないので、上位に詰めて int32 として解釈する
+        raw = np.memmap(path, dtype=np.uint8, mode="r", offset=info.data_offset,
+                        shape=(n_frames * ch, 3))
+        packed = np.zeros((n_frames * ch, 4), dtype=np.uint8)
+        packed[:, 1:] = raw
+        audio = packed.view("<i4").reshape(n_frames, ch).astype(np.float32) * (1.0 / 2147483648.0)
+    elif bits == 32:
+        raw = np.memmap(path, dtype="<i4", mode="r", offset=info.data_offset, shape=(n_frames, ch))
+        audio = raw.astype(np.float32) * (1.0 / 2147483648.0)
+    else:
+        raise ValueError(f"未対応の PCM ビット数: {bits}")
+    return audio, info.sample_rate
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int, axis: int = -1) -> np.ndarray:
+    """
+    orig_sr → target_sr にリサンプリングする。
+    scipy があれば resample_poly (up/down は最大公約数で約分)、
+    無ければ librosa、それも無ければ線形補間。
+    """
+    if orig_sr == target_sr:
+        return audio
+    g = gcd(int(orig_sr), int(target_sr))
+    up, down = int(target_sr) // g, int(orig_sr) // g
+
+    if resample_poly is not None:
+        return resample_poly(audio, up, down, axis=axis).astype(np.float32, copy=False)
+
+    try:
+        import librosa
+        return librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr, axis=axis)
+    except ImportError:
+        pass
+
+    # 最終手段: 線形補間 (品質は落ちる)
+    audio = np.moveaxis(audio, axis, -1)
+    n_in = audio.shape[-1]
+    n_out = int(np.ceil(n_in * up / down))
+    x_new = np.arange(n_out) * (down / up)
+    x_old = np.arange(n_in)
+    out = np.apply_along_axis(lambda y: np.interp(x_new, x_old, y), -1, audio)
+    return np.moveaxis(out.astype(np.float32), -1, axis)
+
+
+def peak_normalize(audio: np.ndarray, axis: int = 0) -> np.ndarray:
+    """
+    librosa.util.normalize (norm=inf) 相当。axis 方向の最大絶対値で割る。
+    無音 (最大値がほぼ 0) の場合はそのまま返す。
+    """
+    peak = np.max(np.abs(audio), axis=axis, keepdims=True)
+    tiny = np.finfo(audio.dtype).tiny if np.issubdtype(audio.dtype, np.floating) else 1e-38
+    peak = np.where(peak < tiny, 1.0, peak)
+    return (audio / peak).astype(audio.dtype, copy=False)
+
+
+def load_audio(
+    path: str,
+    sr: Optional[int] = 16000,
+    mono: bool = True,
+    dtype=np.float32
+) -> Tuple[np.ndarray, int]:
+    """
+    librosa.load 互換の読み込み関数。
+
+    Args:
+        path (str): 音声ファイル
+        sr (int or None): 目標サンプリングレート。None ならファイルのまま。
+        mono (bool): True なら全チャンネル平均でモノラル化
+        dtype: 戻り値の dtype
+
+    Returns:
+        (audio, sr): mono=True なら shape=(n,), False なら shape=(channels, n)
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"[audio_decode] 音声ファイルが見つかりません: {path}")
+
+    info = None
+    if os.path.splitext(path)[1].lower() in WAV_EXTS:
+        try:
+            info = read_wav_header(path)
+        except ValueError as e:
+            print(f"[audio_decode] WAVを直接読めないため librosa にフォールバックします: {e}")
+
+    if info is None:
+        return _load_with_librosa(path, sr, mono, dtype)
+
+    frames, native_sr = decode_wav(path, info)
+    if mono:
+        audio = frames[:, 0] if frames.shape[1] == 1 else frames.mean(axis=1)
+    else:
+        audio = frames.T
+    if sr is not None and sr != native_sr:
+        audio = resample(audio, native_sr, sr, axis=-1)
+        native_sr = sr
+    return np.ascontiguousarray(audio, dtype=dtype), native_sr
+
+
+def _load_with_librosa(path: str, sr: Optional[int], mono: bool, dtype) -> Tuple[np.ndarray, int]:
+    try:
+        import librosa
+    except ImportError:
+        raise RuntimeError(
+            f"[audio_decode] WAV以外の形式の読み込みには librosa が必要です: {path}"
+        )
+    audio, out_sr = librosa.load(path, sr=sr, mono=mono)
+    return audio.astype(dtype, copy=False), out_sr
+
+
+# ----------------------------------------------------------------
+# ブロック単位の読み込み (ストリーミング解析用)
+# ----------------------------------------------------------------
+def open_audio_blocks(
+    path: str,
+    block_seconds: float = 1.0,
+    mono: bool = True
+) -> Tuple[Iterator[np.ndarray], int, Optional[float]]:
+    """
+    音声ファイルをブロック単位で読み出すイテレータを返す。
+    リサンプリングはしない (ブロック境界で不連続になるため)。
+    RMS 解析などはネイティブのサンプリングレートのまま行うこと。
+
+    Returns:
+        (blocks, sr, duration):
+            blocks: float32 のブロックを返すイテレータ (mono=True なら shape=(n,))
+            sr: ネイティブのサンプリングレート
+            duration: 全体の長さ(秒)。不明なら None
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"[audio_decode] 音声ファイルが見つかりません: {path}")
+
+    info = None
+    if os.path.splitext(path)[1].lower() in WAV_EXTS:
+        try:
+            info = read_wav_header(path)
+        except ValueError as e:
+            print(f"[audio_decode] WAVを直接読めないため librosa にフォールバックします: {e}")
+
+    if info is not None:
+        block_frames = max(1, int(info.sample_rate * block_seconds))
+        return _iter_wav_blocks(path, info, block_frames, mono), info.sample_rate, info.duration
+
+    try:
+        import librosa
+    except ImportError:
+        raise RuntimeError(
+            f"[audio_decode] WAV以外の形式の読み込みには librosa が必要です: {path}"
+        )
+    sr = librosa.get_samplerate(path)
+    duration = librosa.get_duration(path=path)
+    frame_length = 2048
+    block_length = max(1, int(sr * block_seconds) // frame_length)
+    blocks = librosa.stream(path, block_length=block_length, frame_length=frame_length,
+                            hop_length=frame_length, mono=mono, fill_value=None)
+    return blocks, sr, duration
+
+
+def _iter_wav_blocks(path: str, info: WavInfo, block_frames: int, mono: bool) -> Iterator[np.ndarray]:
+    # decode_wav は全体を memmap するので、ブロックごとに data チャンクの部分ビューを作る
+    for start in range(0, info.n_frames, block_frames):
+        n = min(block_frames, info.n_frames - start)
+        part = WavInfo(info.sample_rate, info.channels, info.bits_per_sample, info.format_tag,
+                       info.data_offset + start * info.block_align, n * info.block_align,
+                       info.block_align)
+        frames, _ = decode_wav(path, part)
+        if mono:
+            yield frames[:, 0] if frames.shape[1] == 1 else frames.mean(axis=1)
+        else:
+            yield frames.T
+
+
+def iter_pcm_blocks(
+    fp: BinaryIO,
+    channels: int = 1,
+    sample_width: int = 2,
+    block_frames: int = 16000,
+    mono: bool = True
+) -> Iterator[np.ndarray]:
+    """
+    パイプ / ソケット (socket.makefile("rb")) などから、ヘッダ無しの
+    リトルエンディアン整数PCM (s16le 等) をブロック単位で読み出す。
+
+    Args:
+        fp: バイナリストリーム (sys.stdin.buffer など)
+        channels (int): チャンネル数
+        sample_width (int): 1サンプルのバイト数 (1=u8, 2=s16, 4=s32)
+        block_frames (int): 1ブロックのフレーム数
+        mono (bool): True なら全チャンネル平均でモノラル化
+
+    Yields:
+        np.ndarray float32 (mono=True なら shape=(n,), False なら shape=(channels, n))
+    """
+    dtype = {1: np.uint8, 2: np.dtype("<i2"), 4: np.dtype("<i4")}.get(sample_width)
+    if dtype is None:
+        raise ValueError(f"[audio_decode] 未対応のサンプル幅: {sample_width}")
+    frame_bytes = channels * sample_width
+    scale = 1.0 / float(1 << (8 * sample_width - 1))
+    pending = b""
+
+    while True:
+        chunk = fp.read(block_frames * frame_bytes - len(pending))
+        if not chunk:
+            break
+        pending += chunk
+        usable = len(pending) - len(pending) % frame_bytes
+        if usable == 0:
+            continue
+        raw = np.frombuffer(pending[:usable], dtype=dtype).reshape(-1, channels)
+        pending = pending[usable:]
+        if sample_width == 1:
+            frames = (raw.astype(np.float32) - 128.0) * scale
+        else:
+            frames = raw.astype(np.float32) * scale
+        if mono:
+            yield frames[:, 0] if channels == 1 else frames.mean(axis=1)
+        else:
+            yield frames.T
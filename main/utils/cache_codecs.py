@@ -0,0 +1,212 @@
+# main/utils/cache_codecs.py
+# -*- coding: utf-8 -*-
+
+"""
+cache_codecs.py
+
+CacheManager のディスク層で値をファイルに書き出す方式 (コーデック)。
+
+- json  : 小さなメタデータ用。JSON にできる値なら何でも。
+- npy   : NumPy 配列1本を .npy でそのまま保存。読み込みは np.load(mmap_mode="r") なので
+          RMS エンベロープや波形ピークのような大きな配列もコピー無し・数十マイクロ秒で開ける。
+- arrays: {名前: 配列} の dict を1ファイルにまとめるバイナリコンテナ (.lsca)。
+          各配列を 64 バイト境界に並べ、読み込み時はそれぞれ np.memmap で開く。
+          形式: b"LSCA" + <HI (バージョン, ヘッダ長) + ヘッダ JSON + パディング + 配列データ
+          ヘッダ JSON: {"arrays": [{"name", "dtype", "shape", "offset"}, ...]}
+
+値の種類から自動で選ぶ (choose_codec)。独自のコーデックは register_codec で追加できる。
+ファイルではなくバイト列として保存するストア (SQLite バックエンド) 向けに encode / loads も持つ。
+loads で復元した配列はバイト列を参照する (コピー無し)。
+読み込んだ配列は読み取り専用 (書き換えたい場合は np.array(value) でコピーする)。
+
+依存:
+- numpy
+
+使い方:
+    from main.utils.cache_codecs import choose_codec, get_codec
+
+    codec = choose_codec(np.zeros(1000, dtype=np.float32))   # -> npy
+    with open("x" + codec.extension, "wb") as f:
+        codec.dump(value, f)
+    value = codec.load("x" + codec.extension)
+"""
+
+import io
+import json
+import struct
+from typing import Any, BinaryIO, Dict
+
+import numpy as np
+
+_ALIGN = 64
+
+
+class JsonCodec:
+    """JSON (UTF-8)。"""
+
+    name = "json"
+    extension = ".json"
+
+    def accepts(self, value: Any) -> bool:
+        return True
+
+    def dump(self, value: Any, f: BinaryIO):
+        f.write(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def load(self, path: str) -> Any:
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class NpyCodec:
+    """NumPy 配列1本 (.npy)。読み込みは mmap。"""
+
+    name = "npy"
+    extension = ".npy"
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, np.ndarray) and value.dtype != object
+
+    def dump(self, value: np.ndarray, f: BinaryIO):
+        np.save(f, value, allow_pickle=False)
+
+    def load(self, path: str) -> np.ndarray:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+
+    def loads(self, data: bytes) -> np.ndarray:
+        return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+class ArraysCodec:
+    """{名前: 配列} の dict (.lsca)。読み込みは配列ごとに mmap。"""
+
+    name = "arrays"
+    extension = ".lsca"
+    MAGIC = b"LSCA"
+    VERSION = 1
+    HEADER_FORMAT = "<HI"
+
+    def accepts(self, value: Any) -> bool:
+        return (
+            isinstance(value, dict) and bool(value)
+            and all(isinstance(k, str) for k in value)
+            and all(isinstance(v, np.ndarray) and v.dtype != object for v in value.values())
+        )
+
+    def dump(self, value: Dict[str, np.ndarray], f: BinaryIO):
+        arrays = {name: np.ascontiguousarray(arr) for name, arr in value.items()}
+        entries = []
+        rel = 0
+        for name, arr in arrays.items():
+            entries.append({"name": name, "dtype": arr.dtype.str, "shape": list(arr.shape), "rel": rel})
+            rel = _align(rel + arr.nbytes)
+
+        # オフセットの桁数でヘッダ長が変わるため、データ開始位置が収まるまで繰り返す
+        prefix_len = len(self.MAGIC) + struct.calcsize(self.HEADER_FORMAT)
+        data_start = _align(prefix_len)
+        while True:
+            for e in entries:
+                e["offset"] = data_start + e["rel"]
+            header = json.dumps(
+                {"arrays": [{k: e[k] for k in ("name", "dtype", "shape", "offset")} for e in entries]},
+                ensure_ascii=False
+            ).encode("utf-8")
+            if prefix_len + len(header) <= data_start:
+                break
+            data_start = _align(prefix_len + len(header))
+
+        f.write(self.MAGIC)
+        f.write(struct.pack(self.HEADER_FORMAT, self.VERSION, len(header)))
+        f.write(header)
+        pos = prefix_len + len(header)
+        for e, arr in zip(entries, arrays.values()):
+            f.write(b"\0" * (e["offset"] - pos))
+            if arr.nbytes:
+                f.write(arr.reshape(-1).view(np.uint8).data)
+            pos = e["offset"] + arr.nbytes
+
+    def _parse_header(self, head: bytes, where: str) -> dict:
+        prefix_len = len(self.MAGIC) + struct.calcsize(self.HEADER_FORMAT)
+        if head[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"[cache_codecs] LSCA 形式ではありません: {where}")
+        version, header_len = struct.unpack(self.HEADER_FORMAT, head[len(self.MAGIC):prefix_len])
+        if version != self.VERSION:
+            raise ValueError(f"[cache_codecs] 未対応の LSCA バージョン: {version}")
+        return json.loads(head[prefix_len:prefix_len + header_len])
+
+    def load(self, path: str) -> Dict[str, np.ndarray]:
+        prefix_len = len(self.MAGIC) + struct.calcsize(self.HEADER_FORMAT)
+        with open(path, "rb") as f:
+            head = f.read(prefix_len)
+            header_len = struct.unpack(self.HEADER_FORMAT, head[len(self.MAGIC):])[1] if len(head) == prefix_len else 0
+            header = self._parse_header(head + f.read(header_len), path)
+
+        out = {}
+        for e in header["arrays"]:
+            dtype = np.dtype(e["dtype"])
+            shape = tuple(e["shape"])
+            if int(np.prod(shape)) == 0:
+                out[e["name"]] = np.empty(shape, dtype=dtype)
+            else:
+                out[e["name"]] = np.memmap(path, dtype=dtype, mode="r", offset=e["offset"], shape=shape)
+        return out
+
+    def loads(self, data: bytes) -> Dict[str, np.ndarray]:
+        header = self._parse_header(data, "<bytes>")
+        out = {}
+        for e in header["arrays"]:
+            dtype = np.dtype(e["dtype"])
+            shape = tuple(e["shape"])
+            count = int(np.prod(shape))
+            out[e["name"]] = np.frombuffer(data, dtype=dtype, count=count, offset=e["offset"]).reshape(shape)
+        return out
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+_CODECS = {}
+# 自動選択の順 (先に accepts したものを使う。json は最後)
+_AUTO_ORDER = []
+
+
+def register_codec(codec, auto: bool = True):
+    """コーデックを登録する。auto=True なら choose_codec の候補にも加える (json より優先)。"""
+    _CODECS[codec.name] = codec
+    if auto and codec.name != "json" and codec.name not in _AUTO_ORDER:
+        _AUTO_ORDER.append(codec.name)
+
+
+def get_codec(name: str):
+    if name not in _CODECS:
+        raise ValueError(f"[cache_codecs] 未知のコーデック: {name}")
+    return _CODECS[name]
+
+
+def choose_codec(value: Any):
+    """値に合うコーデックを選ぶ (配列 → npy、配列の dict → arrays、それ以外 → json)。"""
+    for name in _AUTO_ORDER:
+        codec = _CODECS[name]
+        if codec.accepts(value):
+            return codec
+    return _CODECS["json"]
+
+
+def encode(codec, value: Any) -> bytes:
+    """codec.dump の出力をバイト列で返す。"""
+    buf = io.BytesIO()
+    codec.dump(value, buf)
+    return buf.getvalue()
+
+
+def codec_extensions():
+    return tuple(c.extension for c in _CODECS.values())
+
+
+register_codec(JsonCodec())
+register_codec(NpyCodec())
+register_codec(ArraysCodec())
@@ -1,42 +1,176 @@
+# main/utils/cache_manager.py
+# -*- coding: utf-8 -*-
+
+"""
+cache_manager.py
+
+RMS計算結果や音素解析結果などをキャッシュするための2段構成のキャッシュ。
+
+- メモリ層: プロセス内の LRU。件数 (max_memory_entries) とバイト数 (max_memory_bytes) の両方で上限を設ける。
+  JSON などの値はエンコード済みのバイト列で持ち、get のたびに復元する (呼び出し側が書き換えても
+  キャッシュに影響しない)。配列 (npy / arrays) は読み取り専用のまま共有する。
+  配列を set したときは呼び出し側の配列を抱え込まないよう、メモリ層には載せない (次の get でディスクから載る)。
+- ディスク層: 1キー1ファイル。ファイル名はキーのハッシュ (SqliteCacheStore と同じ blake2b)。
+  値の種類に応じたコーデック (cache_codecs.py) で書き出す。
+    - NumPy 配列 → .npy (get では mmap で開くのでコピー無し)
+    - {名前: 配列} の dict → .lsca (配列ごとに mmap)
+    - それ以外 (小さなメタデータ) → .json
+  合計サイズが max_disk_bytes を超えたら、LRU (最終アクセスが古い順) または
+  LFU (ヒット回数が少ない順) で 9割まで削除する。
+  ファイルの書き込みは一時ファイル → os.replace で行うため、並行するワーカーが書きかけのファイルを読むことはない。
+- 索引: 有効期限・コーデック・サイズは値ファイルではなく索引 (index.jsonl) に持つ。
+  追記専用のジャーナルで、1回の set / delete につき1行を追記する。別プロセスの追記は
+  索引に無いキーを引いたときに読み足す。行数が増えたら生きているエントリだけで書き直す
+  (書き直し中に別プロセスが追記した行は失われることがあるが、その場合はミスになるだけ)。
+- TTL: 値ごとに有効期限を持ち、期限切れは読み込み時に削除する。加えて sweep_interval 秒ごとに
+  バックグラウンドのスレッドが期限切れをまとめて削除する (sweep_expired)。
+- backend="sqlite": ディスク層を1ファイルの SQLite (cache_store.py) にする。キーはハッシュで引くので
+  ファイル名の衝突が無く、数十万件でもディレクトリの列挙が発生しない。値は同じコーデックで BLOB にする
+  (配列は mmap ではなくバイト列から復元する)。
+- get_many / set_many: 複数キーをまとめて読み書きする (sqlite では1回の問い合わせ / 1トランザクション)。
+- stats() でヒット・ミス・追い出しの回数と、各層の件数・サイズを取得できる。
+
+依存:
+- numpy (配列用コーデック)
+
+使い方:
+    from main.utils.cache_manager import CacheManager
+
+    cm = CacheManager(cache_dir="./cache_data", default_ttl=600.0, max_disk_bytes=256 * 1024 * 1024)
+    cm.set("test_key", {"foo": 123}, ttl=120.0)
+    cm.set("envelope", rms_array)            # .npy で保存
+    env = cm.get("envelope")                 # 読み取り専用の memmap
+    print(cm.stats())
+
+    cm = CacheManager(cache_dir="./cache_data", backend="sqlite")
+    cm.set_many({"a": 1, "b": rms_array})
+    values = cm.get_many(["a", "b", "c"])    # 見つかったキーだけの dict
+    cm.close()
+"""
+
 import os
 import time
 import json
-from typing import Any, Optional
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from main.utils.cache_codecs import choose_codec, codec_extensions, encode, get_codec
+from main.utils.cache_store import SqliteCacheStore, hash_key
+
+INDEX_FILE = "index.jsonl"
+SQLITE_FILE = "cache.sqlite3"
+EVICTION_POLICIES = ("lru", "lfu")
+BACKENDS = ("files", "sqlite")
+# メモリ層で値そのもの (読み取り専用の配列) を共有するコーデック。それ以外はバイト列で持つ
+SHARED_CODECS = ("npy", "arrays")
+
 
 class CacheManager:
     """
-    キャッシュ管理を行うクラス。
-    ここではファイルベースのシンプルなキャッシュを例示。
+    キャッシュ管理を行うクラス (メモリ LRU + ディスク)。
     例えばRMS計算結果や音素解析結果などをキャッシュする場合などに利用可能。
     """
 
-    def __init__(self, cache_dir: str = "./cache_data", default_ttl: float = 3600.0):
+    def __init__(
+        self,
+        cache_dir: str = "./cache_data",
+        default_ttl: float = 3600.0,
+        max_memory_entries: int = 256,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        eviction_policy: str = "lru",
+        backend: str = "files",
+        sweep_interval: float = 300.0
+    ):
         """
         Args:
             cache_dir (str): キャッシュファイルを保存するディレクトリパス
             default_ttl (float): キャッシュのデフォルト有効時間(秒)
+            max_memory_entries (int): メモリ層に置く最大件数 (0 でメモリ層を使わない)
+            max_memory_bytes (int): メモリ層の合計サイズ上限 (ディスク上のサイズで数える)
+            max_disk_bytes (int): ディスク層の合計サイズ上限 (0 以下で無制限)
+            eviction_policy (str): ディスク層の追い出し方 "lru" / "lfu"
+            backend (str): ディスク層の形式 "files" (1キー1ファイル) / "sqlite" (cache.sqlite3 1ファイル)
+            sweep_interval (float): 期限切れをまとめて削除する間隔(秒)。0 以下でバックグラウンドの掃除をしない。
         """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"[CacheManager] 未知の eviction_policy: {eviction_policy}")
+        if backend not in BACKENDS:
+            raise ValueError(f"[CacheManager] 未知の backend: {backend}")
+
         self.cache_dir = cache_dir
         self.default_ttl = default_ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.eviction_policy = eviction_policy
+        self.backend = backend
+
+        self._lock = threading.RLock()
+        # メモリ層: key -> (payload, codec名, expire, nbytes)  payload は _freeze() の結果
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        # ディスク層の索引: ファイル名 (拡張子なし) -> {"codec", "expire", "size", "atime", "hits"}
+        self._disk: Dict[str, dict] = {}
+        self._disk_bytes = 0
+        self._index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        self._index_offset = 0
+        self._index_records = 0
+        self._stats = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0,
+            "memory_evictions": 0, "disk_evictions": 0, "writes": 0
+        }
 
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir, exist_ok=True)
+        self._store: Optional[SqliteCacheStore] = None
+        if backend == "sqlite":
+            self._store = SqliteCacheStore(
+                os.path.join(self.cache_dir, SQLITE_FILE),
+                max_bytes=max_disk_bytes,
+                eviction_policy=eviction_policy
+            )
+        else:
+            self._refresh_index()
 
-    def _get_cache_file_path(self, key: str) -> str:
+        self._sweep_stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval and sweep_interval > 0:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,), name="CacheManagerSweep", daemon=True
+            )
+            self._sweeper.start()
+
+    def _get_cache_file_path(self, key: str, extension: str = ".json") -> str:
         """
         キャッシュ用ファイルのパスを返す。
         """
-        # key からファイル名を生成 (安全のため一部置換 or ハッシュ化しても良い)
-        safe_key = key.replace("/", "_").replace("\\", "_").replace(":", "_")
-        return os.path.join(self.cache_dir, f"{safe_key}.json")
+        return os.path.join(self.cache_dir, self._index_key(key) + extension)
+
+    @staticmethod
+    def _index_key(key: str) -> str:
+        # 置換ではなくハッシュにする ("a/b" と "a:b" が同じファイルにならないように)
+        return hash_key(key).hex()
+
+    def _entry_path(self, index_key: str, entry: dict) -> str:
+        return os.path.join(self.cache_dir, index_key + get_codec(entry["codec"]).extension)
 
-    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+    # ----------------------------------------------------------------
+    # 公開API
+    # ----------------------------------------------------------------
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, codec: Optional[str] = None) -> None:
         """
         キャッシュを保存する。
         Args:
             key (str): キャッシュキー
-            value (Any): キャッシュしたいデータ
+            value (Any): キャッシュしたいデータ (JSON にできる値 / NumPy 配列 / 配列の dict)
             ttl (float, optional): 有効期限(秒)。未指定の場合 default_ttl を使用。
+            codec (str, optional): "json" / "npy" / "arrays"。未指定なら値の種類から選ぶ。
         """
         if ttl is None:
             ttl = self.default_ttl
@@ -44,17 +178,33 @@ class CacheManager:
         # 有効期限のタイムスタンプ(エポック秒)
         expire_time = time.time() + ttl
 
-        data_to_store = {
-            "value": value,
-            "expire": expire_time
-        }
+        value_codec = get_codec(codec) if codec else choose_codec(value)
+        if self._store is not None:
+            self._set_to_store([(key, value, value_codec)], expire_time)
+            return
 
-        cache_file = self._get_cache_file_path(key)
+        index_key = self._index_key(key)
+        cache_file = os.path.join(self.cache_dir, index_key + value_codec.extension)
         try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data_to_store, f, ensure_ascii=False)
+            size = self._atomic_write(cache_file, value_codec, value)
         except Exception as e:
             print(f"[CacheManager] キャッシュの保存に失敗: key={key}, error={e}")
+            return
+
+        with self._lock:
+            old = self._disk.get(index_key)
+            if old is not None and old["codec"] != value_codec.name:
+                # 別のコーデックで保存されていた古いファイルを消す
+                self._remove_file(self._entry_path(index_key, old))
+            self._stats["writes"] += 1
+            self._put_disk_index(index_key, value_codec.name, expire_time, size)
+            self._append_index({"k": index_key, "c": value_codec.name, "e": expire_time, "s": size})
+            if value_codec.name in SHARED_CODECS:
+                # 呼び出し側の配列は抱え込まない (古い値だけ捨てる)
+                self._drop_memory(key)
+            else:
+                self._put_memory(key, _freeze(value_codec, value), value_codec.name, expire_time, size)
+            self._enforce_disk_quota()
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -63,25 +213,91 @@ class CacheManager:
             key (str): キャッシュキー
         Returns:
             Any or None: キャッシュ値。期限切れ、ファイル未存在等なら None。
+                npy / arrays で保存した配列は読み取り専用の memmap。
         """
-        cache_file = self._get_cache_file_path(key)
-        if not os.path.exists(cache_file):
-            return None
+        now = time.time()
+        done, value = self._get_memory(key, now)
+        if done:
+            return value
+        if self._store is not None:
+            return self._get_from_store([key], now).get(key)
 
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            print(f"[CacheManager] キャッシュファイルの読込に失敗: key={key}, error={e}")
-            return None
+        index_key = self._index_key(key)
+        with self._lock:
+            entry = self._disk.get(index_key)
+            if entry is None:
+                # 別プロセスが書いたかもしれないので索引を読み足す
+                self._refresh_index()
+                entry = self._disk.get(index_key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if now > entry["expire"]:
+                # 期限切れ => キャッシュファイル削除
+                self._stats["expired"] += 1
+                self.delete(key)
+                return None
 
-        expire_time = data.get("expire", 0)
-        if time.time() > expire_time:
-            # 期限切れ => キャッシュファイル削除
-            self.delete(key)
-            return None
+        value = self._load_entry(key, index_key, entry)
+        if value is None:
+            # 別プロセスがコーデックを変えて書き直した / 消した可能性があるので1回だけ読み直す
+            with self._lock:
+                self._refresh_index()
+                entry = self._disk.get(index_key)
+            if entry is not None and now <= entry["expire"]:
+                value = self._load_entry(key, index_key, entry)
+
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._touch_disk_index(index_key, now)
+            value_codec = get_codec(entry["codec"])
+            payload = _freeze(value_codec, value)
+            self._put_memory(key, payload, value_codec.name, entry["expire"], entry["size"])
+        return _thaw(value_codec, payload) if value_codec.name in SHARED_CODECS else value
 
-        return data.get("value")
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        複数のキーをまとめて取得する。
+        Returns:
+            Dict[str, Any]: 見つかった (期限内の) キーだけの dict
+        """
+        now = time.time()
+        out, missing = {}, []
+        for key in dict.fromkeys(keys):
+            done, value = self._get_memory(key, now)
+            if not done:
+                missing.append(key)
+            elif value is not None:
+                out[key] = value
+        if not missing:
+            return out
+        if self._store is not None:
+            out.update(self._get_from_store(missing, now))
+        else:
+            for key in missing:
+                value = self.get(key)
+                if value is not None:
+                    out[key] = value
+        return out
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None, codec: Optional[str] = None) -> None:
+        """
+        複数の値をまとめて保存する (sqlite では1トランザクション)。引数は set と同じ。
+        """
+        if self._store is None:
+            for key, value in items.items():
+                self.set(key, value, ttl=ttl, codec=codec)
+            return
+        if ttl is None:
+            ttl = self.default_ttl
+        expire_time = time.time() + ttl
+        self._set_to_store(
+            [(key, value, get_codec(codec) if codec else choose_codec(value)) for key, value in items.items()],
+            expire_time
+        )
 
     def delete(self, key: str) -> None:
         """
@@ -89,24 +305,394 @@ class CacheManager:
         Args:
             key (str): キャッシュキー
         """
-        cache_file = self._get_cache_file_path(key)
-        if os.path.exists(cache_file):
+        with self._lock:
+            self._drop_memory(key)
+        if self._store is not None:
             try:
-                os.remove(cache_file)
-            except OSError as e:
-                print(f"[CacheManager] キャッシュファイル削除失敗: key={key}, error={e}")
+                self._store.delete(key)
+            except sqlite3.Error as e:
+                print(f"[CacheManager] キャッシュの削除に失敗: key={key}, error={e}")
+            return
+
+        index_key = self._index_key(key)
+        with self._lock:
+            entry = self._drop_disk_index(index_key)
+            self._append_index({"k": index_key, "d": 1})
+
+        if entry is not None:
+            self._remove_file(self._entry_path(index_key, entry))
+        else:
+            for ext in codec_extensions():
+                self._remove_file(os.path.join(self.cache_dir, index_key + ext))
 
     def clear_all(self) -> None:
         """
-        キャッシュディレクトリ内の全キャッシュファイルを削除する。
+        キャッシュディレクトリ内の全キャッシュファイルと索引を削除する (メモリ層も空にする)。
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._store is not None:
+                try:
+                    self._store.clear()
+                except sqlite3.Error as e:
+                    print(f"[CacheManager] キャッシュの全削除に失敗: error={e}")
+                return
+            self._disk.clear()
+            self._disk_bytes = 0
+            self._index_offset = 0
+            self._index_records = 0
+            # .part は中断された書き込みの残骸
+            targets = codec_extensions() + (".part",)
+            try:
+                for filename in os.listdir(self.cache_dir):
+                    if filename == INDEX_FILE or filename.endswith(targets):
+                        os.remove(os.path.join(self.cache_dir, filename))
+            except Exception as e:
+                print(f"[CacheManager] キャッシュの全削除に失敗: error={e}")
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット・ミス・追い出しの回数と、各層の件数・バイト数。"""
+        with self._lock:
+            out = dict(self._stats)
+            out.update({
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes
+            })
+        if self._store is not None:
+            out["disk_evictions"] += self._store.evictions
+            out["disk_entries"] = self._store.count()
+            out["disk_bytes"] = self._store.total_bytes
+        return out
+
+    def sweep_expired(self) -> int:
+        """
+        期限切れのエントリをまとめて削除し、削除したディスク層の件数を返す
+        (sweep_interval を指定した場合はバックグラウンドのスレッドから定期的に呼ばれる)。
+        """
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, _, expire_time, _) in self._memory.items() if now > expire_time]:
+                self._drop_memory(key)
+
+        if self._store is not None:
+            try:
+                removed = self._store.sweep_expired(now)
+            except sqlite3.Error as e:
+                print(f"[CacheManager] 期限切れの削除に失敗: error={e}")
+                return 0
+        else:
+            with self._lock:
+                self._refresh_index()
+                victims = [(k, e) for k, e in self._disk.items() if now > e["expire"]]
+                for index_key, _ in victims:
+                    self._drop_disk_index(index_key)
+                    self._append_index({"k": index_key, "d": 1})
+            for index_key, entry in victims:
+                self._remove_file(self._entry_path(index_key, entry))
+            removed = len(victims)
+
+        with self._lock:
+            self._stats["expired"] += removed
+        return removed
+
+    def close(self) -> None:
+        """バックグラウンドの掃除を止め、SQLite の接続を閉じる。"""
+        self._sweep_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+        if self._store is not None:
+            self._store.close()
+
+    def _sweep_loop(self, interval: float):
+        while not self._sweep_stop.wait(interval):
+            try:
+                self.sweep_expired()
+            except Exception as e:
+                print(f"[CacheManager] 期限切れの削除に失敗: error={e}")
+
+    # ----------------------------------------------------------------
+    # 層をまたぐ読み書き
+    # ----------------------------------------------------------------
+    def _get_memory(self, key: str, now: float):
+        """
+        メモリ層を引く。
+        Returns:
+            (done, value): done が True なら結果が確定している (ヒット、または期限切れで削除済みなら None)
         """
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return False, None
+            payload, codec_name, expire_time, _ = item
+            if now <= expire_time:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                if self._store is not None:
+                    self._store.touch([key], now)
+                else:
+                    self._touch_disk_index(self._index_key(key), now)
+                return True, _thaw(get_codec(codec_name), payload)
+            # 期限切れ (ディスク側も同じ期限なので削除)
+            self._stats["expired"] += 1
+        self.delete(key)
+        return True, None
+
+    def _get_from_store(self, keys: List[str], now: float) -> Dict[str, Any]:
         try:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith(".json"):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    os.remove(file_path)
+            rows = self._store.get_many(keys)
+        except sqlite3.Error as e:
+            print(f"[CacheManager] キャッシュの読込に失敗: error={e}")
+            rows = {}
+
+        found, expired = {}, []
+        for key in keys:
+            row = rows.get(key)
+            if row is None:
+                continue
+            codec, data, expire_time, size = row
+            if now > expire_time:
+                expired.append(key)
+                continue
+            try:
+                value_codec = get_codec(codec)
+                payload = data if value_codec.name not in SHARED_CODECS else _freeze(value_codec, value_codec.loads(data))
+                found[key] = (value_codec, payload, expire_time, size)
+            except Exception as e:
+                print(f"[CacheManager] キャッシュの読込に失敗: key={key}, error={e}")
+        for key in expired:
+            self.delete(key)
+
+        with self._lock:
+            self._stats["disk_hits"] += len(found)
+            self._stats["expired"] += len(expired)
+            self._stats["misses"] += len(keys) - len(found) - len(expired)
+            for key, (value_codec, payload, expire_time, size) in found.items():
+                self._put_memory(key, payload, value_codec.name, expire_time, size)
+        self._store.touch(found, now)
+        return {key: _thaw(value_codec, payload) for key, (value_codec, payload, _, _) in found.items()}
+
+    def _set_to_store(self, items: List[tuple], expire_time: float):
+        """[(key, value, codec), ...] を SQLite ストアに書き込む。"""
+        encoded = []
+        for key, value, value_codec in items:
+            try:
+                encoded.append((key, value_codec, encode(value_codec, value)))
+            except Exception as e:
+                print(f"[CacheManager] キャッシュの保存に失敗: key={key}, error={e}")
+        try:
+            self._store.put_many([(key, value_codec.name, data, expire_time) for key, value_codec, data in encoded])
+        except sqlite3.Error as e:
+            print(f"[CacheManager] キャッシュの保存に失敗: error={e}")
+            return
+        with self._lock:
+            self._stats["writes"] += len(encoded)
+            for key, value_codec, data in encoded:
+                # 呼び出し側の値ではなく、エンコード済みのバイト列 (配列はそこから復元した読み取り専用の配列) を持つ
+                if value_codec.name in SHARED_CODECS:
+                    payload = _freeze(value_codec, value_codec.loads(data))
+                else:
+                    payload = data
+                self._put_memory(key, payload, value_codec.name, expire_time, len(data))
+
+    # ----------------------------------------------------------------
+    # メモリ層
+    # ----------------------------------------------------------------
+    def _put_memory(self, key: str, payload: Any, codec_name: str, expire_time: float, nbytes: int):
+        self._drop_memory(key)
+        if self.max_memory_entries <= 0 or nbytes > self.max_memory_bytes:
+            # 大きすぎる値はメモリ層に載せない
+            return
+        self._memory[key] = (payload, codec_name, expire_time, nbytes)
+        self._memory_bytes += nbytes
+        while (len(self._memory) > self.max_memory_entries
+               or self._memory_bytes > self.max_memory_bytes):
+            _, (_, _, _, size) = self._memory.popitem(last=False)
+            self._memory_bytes -= size
+            self._stats["memory_evictions"] += 1
+
+    def _drop_memory(self, key: str):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[3]
+
+    # ----------------------------------------------------------------
+    # ディスク層
+    # ----------------------------------------------------------------
+    def _atomic_write(self, path: str, value_codec, value: Any) -> int:
+        """value を一時ファイルに書いてから path に置き換える。書いたバイト数を返す。"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                value_codec.dump(value, f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove_file(tmp_path)
+            raise
+        return size
+
+    def _load_entry(self, key: str, index_key: str, entry: dict) -> Optional[Any]:
+        path = self._entry_path(index_key, entry)
+        try:
+            return get_codec(entry["codec"]).load(path)
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            print(f"[CacheManager] キャッシュの全削除に失敗: error={e}")
+            print(f"[CacheManager] キャッシュファイルの読込に失敗: key={key}, error={e}")
+            return None
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[CacheManager] キャッシュファイル削除失敗: {path}, error={e}")
+
+    def _put_disk_index(self, index_key: str, codec: str, expire_time: float, size: int):
+        old = self._disk.get(index_key)
+        if old is not None:
+            self._disk_bytes -= old["size"]
+        self._disk[index_key] = {
+            "codec": codec,
+            "expire": expire_time,
+            "size": size,
+            "atime": time.time(),
+            "hits": old["hits"] if old else 0
+        }
+        self._disk_bytes += size
+
+    def _touch_disk_index(self, index_key: str, now: float):
+        entry = self._disk.get(index_key)
+        if entry is not None:
+            entry["atime"] = now
+            entry["hits"] += 1
+
+    def _drop_disk_index(self, index_key: str) -> Optional[dict]:
+        entry = self._disk.pop(index_key, None)
+        if entry is not None:
+            self._disk_bytes -= entry["size"]
+        return entry
+
+    def _enforce_disk_quota(self):
+        """ディスク層が上限を超えていたら、上限の 9割まで追い出す。"""
+        if self.max_disk_bytes <= 0 or self._disk_bytes <= self.max_disk_bytes:
+            return
+        target = int(self.max_disk_bytes * 0.9)
+        if self.eviction_policy == "lfu":
+            order = sorted(self._disk.items(), key=lambda kv: (kv[1]["hits"], kv[1]["atime"]))
+        else:
+            order = sorted(self._disk.items(), key=lambda kv: kv[1]["atime"])
+        for index_key, entry in order:
+            if self._disk_bytes <= target:
+                break
+            self._remove_file(self._entry_path(index_key, entry))
+            self._drop_disk_index(index_key)
+            self._append_index({"k": index_key, "d": 1})
+            self._stats["disk_evictions"] += 1
+        # メモリ層に残っている値は期限まで有効 (ディスクから消えても整合性の問題は無い)
+
+    # ----------------------------------------------------------------
+    # 索引 (index.jsonl)
+    # ----------------------------------------------------------------
+    def _refresh_index(self):
+        """索引ファイルの未読部分 (自分や別プロセスが追記した行) を読み込む。"""
+        try:
+            with open(self._index_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self._index_offset:
+                    # 別プロセスが書き直した → 最初から読み直す
+                    self._disk.clear()
+                    self._disk_bytes = 0
+                    self._index_offset = 0
+                    self._index_records = 0
+                f.seek(self._index_offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+
+        # 書きかけの最終行は次回に回す
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            self._index_records += 1
+            if rec.get("d"):
+                self._drop_disk_index(rec["k"])
+            else:
+                self._put_disk_index(rec["k"], rec["c"], rec["e"], rec["s"])
+        self._index_offset += end
+
+    def _append_index(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            # 追記モード (O_APPEND) の1回の write なので、別プロセスの行と混ざらない
+            with open(self._index_path, "ab") as f:
+                f.write(line)
+                end = f.tell()
+        except OSError as e:
+            print(f"[CacheManager] 索引の書き込みに失敗: error={e}")
+            return
+        if end - len(line) == self._index_offset:
+            # 自分の行だけなら読み直さずに進める
+            self._index_offset = end
+            self._index_records += 1
+        else:
+            self._refresh_index()
+        if self._index_records > 2 * len(self._disk) + 1024:
+            self._compact_index()
+
+    def _compact_index(self):
+        """生きているエントリだけで索引を書き直す。"""
+        lines = [
+            json.dumps({"k": k, "c": e["codec"], "e": e["expire"], "s": e["size"]}, ensure_ascii=False) + "\n"
+            for k, e in self._disk.items()
+        ]
+        payload = "".join(lines).encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            self._remove_file(tmp_path)
+            print(f"[CacheManager] 索引の書き直しに失敗: error={e}")
+            return
+        self._index_offset = len(payload)
+        self._index_records = len(lines)
+
+
+def _read_only(arr: np.ndarray) -> np.ndarray:
+    if not arr.flags.writeable:
+        return arr
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+def _freeze(value_codec, value: Any) -> Any:
+    """メモリ層に置く形にする。配列は読み取り専用のビュー、それ以外はエンコード済みのバイト列。"""
+    if value_codec.name == "npy":
+        return _read_only(value)
+    if value_codec.name == "arrays":
+        return {name: _read_only(arr) for name, arr in value.items()}
+    return encode(value_codec, value)
+
+
+def _thaw(value_codec, payload: Any) -> Any:
+    """メモリ層の payload から get で返す値を作る (バイト列は毎回復元するので呼び出し側で書き換えてよい)。"""
+    if value_codec.name == "npy":
+        return payload
+    if value_codec.name == "arrays":
+        return dict(payload)
+    return value_codec.loads(payload)
 
 
 # 使用例:
@@ -118,5 +704,6 @@ class CacheManager:
 #     time.sleep(2)
 #     val2 = cm.get("test_key")
 #     print("Cached value after 2 seconds:", val2)
+#     print(cm.stats())
 #     cm.delete("test_key")
 #     cm.clear_all()
@@ -0,0 +1,272 @@
+# main/utils/cache_store.py
+# -*- coding: utf-8 -*-
+
+"""
+cache_store.py
+
+CacheManager のディスク層を1ファイルの SQLite データベースにまとめるストア (backend="sqlite")。
+
+1キー1ファイルのディレクトリ構成は、キャッシュが数十万件になると
+ディレクトリの列挙 (clear_all / 起動時の走査) やファイル作成そのものが遅くなり、
+キーの文字置換によるファイル名の衝突も起こりうる。このストアでは:
+
+- キー: BLAKE2b (16バイト) のハッシュを主キーにする (元のキーも列として残す)。検索は主キーの索引で1回。
+- 値: コーデック (cache_codecs.py) でバイト列にして BLOB 列に入れる。
+- 有効期限: expire 列に索引を張り、期限切れは sweep_expired() で1回の DELETE でまとめて消す
+  (CacheManager がバックグラウンドのスレッドから定期的に呼ぶ)。
+- 容量: 合計サイズが max_bytes を超えたら、LRU (atime) / LFU (hits, atime) の順で 9割まで削除する。
+  読み込みのたびに atime / hits を書き込むと読み込みが書き込みになるため、更新はメモリに溜めて
+  書き込み・掃除・追い出しの前にまとめて反映する。
+- 複数プロセス: WAL モードで開く (読み込みは書き込みを待たない)。書き込みの競合は busy timeout で待つ。
+- get_many / put_many は1回の問い合わせ / 1トランザクションで処理する。
+
+依存:
+- 標準ライブラリのみ (sqlite3)
+
+使い方:
+    from main.utils.cache_store import SqliteCacheStore
+
+    store = SqliteCacheStore("./cache_data/cache.sqlite3", max_bytes=512 * 1024 * 1024)
+    store.put("key", "json", b'{"foo": 1}', time.time() + 600)
+    row = store.get("key")          # (codec, data, expire, size) or None
+    store.sweep_expired()
+    store.close()
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# get_many の IN (...) に並べる最大件数 (SQLite の変数上限より十分小さく)
+_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key_hash BLOB PRIMARY KEY,
+    key      TEXT NOT NULL,
+    codec    TEXT NOT NULL,
+    expire   REAL NOT NULL,
+    size     INTEGER NOT NULL,
+    atime    REAL NOT NULL,
+    hits     INTEGER NOT NULL DEFAULT 0,
+    value    BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expire ON entries (expire);
+CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime);
+"""
+
+Row = Tuple[str, bytes, float, int]
+
+
+def hash_key(key: str) -> bytes:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+class SqliteCacheStore:
+    """
+    SQLite 1ファイルのキャッシュストア。スレッドセーフ (内部でロックする)。
+
+    Args:
+        path (str): データベースファイルのパス
+        max_bytes (int): 値の合計サイズの上限 (0 以下で無制限)
+        eviction_policy (str): "lru" / "lfu"
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, eviction_policy: str = "lru"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.eviction_policy = eviction_policy
+        self.evictions = 0
+        self._lock = threading.RLock()
+        # key_hash -> [atime, 追加ヒット数] (未反映のアクセス記録)
+        self._touched: Dict[bytes, list] = {}
+
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._bytes = self._total_bytes()
+
+    # ----------------------------------------------------------------
+    # 読み込み
+    # ----------------------------------------------------------------
+    def get(self, key: str) -> Optional[Row]:
+        """(codec, data, expire, size) を返す。無ければ None (期限の判定は呼び出し側)。"""
+        h = hash_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, value, expire, size FROM entries WHERE key_hash = ?", (h,)
+            ).fetchone()
+        return row
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Row]:
+        """見つかったキーだけを {key: (codec, data, expire, size)} で返す。"""
+        by_hash = {hash_key(k): k for k in keys}
+        hashes = list(by_hash)
+        out = {}
+        with self._lock:
+            for i in range(0, len(hashes), _BATCH):
+                chunk = hashes[i:i + _BATCH]
+                marks = ",".join("?" * len(chunk))
+                for h, codec, value, expire, size in self._conn.execute(
+                    f"SELECT key_hash, codec, value, expire, size FROM entries WHERE key_hash IN ({marks})", chunk
+                ):
+                    out[by_hash[h]] = (codec, value, expire, size)
+        return out
+
+    def touch(self, keys: Iterable[str], now: float):
+        """アクセスを記録する (DB には次の書き込み時にまとめて反映)。"""
+        with self._lock:
+            for key in keys:
+                rec = self._touched.setdefault(hash_key(key), [now, 0])
+                rec[0] = now
+                rec[1] += 1
+
+    # ----------------------------------------------------------------
+    # 書き込み
+    # ----------------------------------------------------------------
+    def put(self, key: str, codec: str, data: bytes, expire: float):
+        self.put_many([(key, codec, data, expire)])
+
+    def put_many(self, items: List[Tuple[str, str, bytes, float]]):
+        """[(key, codec, data, expire), ...] を1トランザクションで書き込む。"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(hash_key(k), k, c, e, len(d), now, sqlite3.Binary(d)) for (k, c, d, e) in items]
+        with self._lock:
+            self._flush_touches()
+            with self._transaction():
+                old = self._sizes([r[0] for r in rows])
+                self._conn.executemany(
+                    "INSERT INTO entries (key_hash, key, codec, expire, size, atime, hits, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0, ?) "
+                    "ON CONFLICT(key_hash) DO UPDATE SET codec = excluded.codec, expire = excluded.expire, "
+                    "size = excluded.size, atime = excluded.atime, value = excluded.value",
+                    rows
+                )
+            # 同じキーが複数回含まれていても最後の値だけが残る
+            latest = {r[0]: r[4] for r in rows}
+            self._bytes += sum(latest.values()) - sum(old.values())
+            self._enforce_quota()
+
+    def delete(self, key: str) -> bool:
+        h = hash_key(key)
+        with self._lock:
+            self._touched.pop(h, None)
+            with self._transaction():
+                size = self._sizes([h]).get(h)
+                self._conn.execute("DELETE FROM entries WHERE key_hash = ?", (h,))
+            if size is None:
+                return False
+            self._bytes -= size
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._bytes = 0
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    # ----------------------------------------------------------------
+    # 掃除・追い出し
+    # ----------------------------------------------------------------
+    def sweep_expired(self, now: Optional[float] = None) -> int:
+        """期限切れのエントリを削除し、その件数を返す。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._flush_touches()
+            with self._transaction():
+                cur = self._conn.execute("DELETE FROM entries WHERE expire < ?", (now,))
+            removed = max(cur.rowcount, 0)
+            # 別プロセスの書き込みも含めて合計を取り直す
+            self._bytes = self._total_bytes()
+            self._enforce_quota()
+        return removed
+
+    def _enforce_quota(self):
+        """合計サイズが上限を超えていたら、上限の 9割まで追い出す。"""
+        if self.max_bytes <= 0 or self._bytes <= self.max_bytes:
+            return
+        self._flush_touches()
+        excess = self._bytes - int(self.max_bytes * 0.9)
+        order = "hits, atime" if self.eviction_policy == "lfu" else "atime"
+        victims, freed = [], 0
+        cur = self._conn.execute(f"SELECT key_hash, size FROM entries ORDER BY {order}")
+        for h, size in cur:
+            if freed >= excess:
+                break
+            victims.append((h,))
+            freed += size
+        cur.close()
+        with self._transaction():
+            self._conn.executemany("DELETE FROM entries WHERE key_hash = ?", victims)
+        self._bytes -= freed
+        self.evictions += len(victims)
+
+    # ----------------------------------------------------------------
+    # 状態
+    # ----------------------------------------------------------------
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touches()
+            self._conn.close()
+            self._conn = None
+
+    # ----------------------------------------------------------------
+    # 内部
+    # ----------------------------------------------------------------
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _sizes(self, hashes: List[bytes]) -> Dict[bytes, int]:
+        out = {}
+        for i in range(0, len(hashes), _BATCH):
+            chunk = hashes[i:i + _BATCH]
+            marks = ",".join("?" * len(chunk))
+            out.update(self._conn.execute(
+                f"SELECT key_hash, size FROM entries WHERE key_hash IN ({marks})", chunk
+            ).fetchall())
+        return out
+
+    def _flush_touches(self):
+        if not self._touched:
+            return
+        rows = [(atime, hits, h) for h, (atime, hits) in self._touched.items()]
+        self._touched.clear()
+        with self._transaction():
+            self._conn.executemany(
+                "UPDATE entries SET atime = MAX(atime, ?), hits = hits + ? WHERE key_hash = ?", rows
+            )
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (例外時は ROLLBACK)。"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,212 @@
+# main/utils/config_registry.py
+# -*- coding: utf-8 -*-
+
+"""
+config_registry.py
+
+lip_sync_config.json や configs/*_map.json を、プロセス全体で1回だけ読み込んで共有するレジストリ。
+
+- 読み込んだ内容は (パス, 検証関数) ごとにキャッシュし、ファイルの mtime / サイズが
+  変わったときだけ読み直す。変わっていなければ open / json.load は行わない。
+- 返すのは読み取り専用ビュー (dict → MappingProxyType, list → tuple)。
+  全コンポーネントが同じスナップショットを参照し、誰かが書き換えて他へ波及することを防ぐ。
+  書き換えたい場合は thaw() で可変のコピーを取ること。
+- 相対パスは「カレントディレクトリ → プロジェクトルート → main/」の順で探す。
+  (従来は CWD 基準だけだったため、起動場所によって設定が見つからなかった)
+
+依存:
+- 標準ライブラリのみ
+
+使い方:
+    from main.utils.config_registry import load_config, load_mapping, thaw
+
+    config = load_config()                       # main/lip_sync_config.json
+    opts = config.get("processing_options", {})  # 読み取り専用ビュー
+    mapping = load_mapping("configs/phoneme_to_morph_map.json")
+
+    editable = thaw(load_config())               # 設定画面などで編集する場合
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROJECT_ROOT = os.path.abspath(os.path.join(MAIN_DIR, ".."))
+
+# 既定の設定ファイル
+LIP_SYNC_CONFIG = os.path.join(MAIN_DIR, "lip_sync_config.json")
+
+EMPTY_MAPPING = MappingProxyType({})
+
+
+# ----------------------------------------------------------------
+# 読み取り専用ビュー
+# ----------------------------------------------------------------
+def freeze(obj: Any) -> Any:
+    """dict / list を再帰的に読み取り専用 (MappingProxyType / tuple) に変換する。"""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """freeze() の逆。編集可能な dict / list のコピーを返す。"""
+    if isinstance(obj, Mapping):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+# ----------------------------------------------------------------
+# 検証
+# ----------------------------------------------------------------
+# lip_sync_config.json のうち、dict であるべきセクション
+CONFIG_SECTIONS = (
+    "timeline", "logging", "processing_options", "character_settings",
+    "export_options", "ui_settings", "output", "asr", "clustering",
+    "distributed", "video_settings", "realtime", "metrics"
+)
+
+
+def validate_lip_sync_config(data: Any, path: str = "") -> dict:
+    """
+    lip_sync_config.json の形を検証する。
+    トップレベルが dict でなければ空 dict、型の合わないセクションは警告して除外する。
+    """
+    if not isinstance(data, dict):
+        print(f"[ConfigRegistry] 設定ファイルのトップレベルが dict ではありません: {path}")
+        return {}
+    cleaned = dict(data)
+    for section in CONFIG_SECTIONS:
+        if section in cleaned and not isinstance(cleaned[section], dict):
+            print(f"[ConfigRegistry] '{section}' は dict である必要があります。無視します: {path}")
+            del cleaned[section]
+    return cleaned
+
+
+def validate_phoneme_mapping(data: Any, path: str = "") -> dict:
+    """
+    音素→モーフのマッピングJSONを検証する。
+    値は str / list / {morph: weight} のみ許可し、それ以外のエントリは警告して除外する。
+    """
+    if not isinstance(data, dict):
+        print(f"[ConfigRegistry] マッピングのトップレベルが dict ではありません: {path}")
+        return {}
+    cleaned = {}
+    for ph, value in data.items():
+        if isinstance(value, str):
+            ok = True
+        elif isinstance(value, list):
+            ok = all(isinstance(m, str) for m in value)
+        elif isinstance(value, dict):
+            ok = all(isinstance(m, str) and isinstance(w, (int, float)) for m, w in value.items())
+        else:
+            ok = False
+        if ok:
+            cleaned[ph] = value
+        else:
+            print(f"[ConfigRegistry] 不正なマッピング値を無視します: {ph!r} -> {value!r} ({path})")
+    return cleaned
+
+
+# ----------------------------------------------------------------
+# レジストリ本体
+# ----------------------------------------------------------------
+class ConfigRegistry:
+    """
+    JSON設定ファイルのキャッシュ。スレッドセーフ。
+
+    キャッシュエントリ: (絶対パス, 検証関数) → (mtime_ns, size, 読み取り専用ビュー)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, Optional[Callable]], Tuple[int, int, Any]] = {}
+        self._missing_reported = set()
+        self.load_count = 0
+
+    @staticmethod
+    def resolve_path(path: str) -> str:
+        """相対パスを CWD → プロジェクトルート → main/ の順で探し、絶対パスにする。"""
+        if os.path.isabs(path):
+            return path
+        for base in (os.getcwd(), PROJECT_ROOT, MAIN_DIR):
+            candidate = os.path.join(base, path)
+            if os.path.exists(candidate):
+                return os.path.abspath(candidate)
+        return os.path.abspath(path)
+
+    def get(self, path: str, validator: Optional[Callable[[Any, str], Any]] = None) -> Any:
+        """
+        path の JSON を読み取り専用ビューで返す。
+        ファイルが無い / 壊れている場合は空の MappingProxy を返す (エラーは1回だけ表示)。
+
+        Args:
+            path (str): JSONファイルパス (相対パス可)
+            validator (callable): validator(data, path) -> 検証済みデータ。読み込み時に1回だけ実行。
+        """
+        abs_path = self.resolve_path(path)
+        key = (abs_path, validator)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            with self._lock:
+                self._cache.pop(key, None)
+                if abs_path not in self._missing_reported:
+                    self._missing_reported.add(abs_path)
+                    print(f"[ConfigRegistry] 設定ファイルが見つかりません: {abs_path}")
+            return EMPTY_MAPPING
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                return cached[2]
+
+            self._missing_reported.discard(abs_path)
+            try:
+                with open(abs_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"[ConfigRegistry] 設定ファイル読み込みエラー: {abs_path}: {e}")
+                data = {}
+            if validator is not None:
+                data = validator(data, abs_path)
+
+            view = freeze(data)
+            self._cache[key] = (st.st_mtime_ns, st.st_size, view)
+            self.load_count += 1
+            return view
+
+    def invalidate(self, path: str = None):
+        """キャッシュを破棄する (path 省略時は全件)。"""
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+                return
+            abs_path = self.resolve_path(path)
+            for key in [k for k in self._cache if k[0] == abs_path]:
+                del self._cache[key]
+
+
+_registry = ConfigRegistry()
+
+
+def get_registry() -> ConfigRegistry:
+    """プロセス共通のレジストリを返す。"""
+    return _registry
+
+
+def load_config(path: str = LIP_SYNC_CONFIG) -> Mapping:
+    """lip_sync_config.json (またはその形式のファイル) を読み取り専用ビューで返す。"""
+    return _registry.get(path or LIP_SYNC_CONFIG, validate_lip_sync_config)
+
+
+def load_mapping(path: str) -> Mapping:
+    """音素→モーフのマッピングJSONを読み取り専用ビューで返す。"""
+    return _registry.get(path, validate_phoneme_mapping)
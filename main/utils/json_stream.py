@@ -0,0 +1,270 @@
+# main/utils/json_stream.py
+# -*- coding: utf-8 -*-
+
+"""
+json_stream.py
+
+大きな JSON (リップシンク結果・エクスポートデータ) をストリーミングで書き出すためのユーティリティ。
+
+- json.dump(obj, indent=2) は出力全体を一度メモリ上に組み立ててから書き込むため、
+  長時間セッションではメモリ・時間ともに膨らむ。
+- 本モジュールは dict を構造的に辿り、配列 (list / tuple / ジェネレータ / LipSyncColumns) は
+  要素 (レコード) 単位でエンコードして逐次書き込む。メモリ使用量はバッファ分のみ。
+- compact=True なら改行・インデント無しの最小表現 (separators=(",", ":"))。
+- orjson がインストールされていれば高速バックエンドとして使用する (backend="auto")。
+  backend="json" の場合、出力は json.dump(..., indent=indent, ensure_ascii=False) と同一になる。
+- 標準 json の indent 付きエンコードは純Python実装で遅いため、入れ子の無いレコードは
+  C 実装のエンコーダ (区切り文字に改行+インデントを含める) で1件ずつ変換する。
+
+使い方:
+    from main.utils.json_stream import dump_json_stream
+
+    with open("out.json", "w", encoding="utf-8") as f:
+        dump_json_stream(lip_sync_data, f, indent=2)
+
+    # レコードをジェネレータで渡せば、全件をリストに並べずに書き出せる
+    dump_json_stream({"Count": n, "Data": (make_record(x) for x in items)}, f, compact=True)
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _json_default(obj: Any):
+    """NumPy のスカラー/配列など、標準 json が扱えない値を変換する。"""
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_CONTAINER_TYPES = (dict, list, tuple)
+
+
+def _is_flat_record(value: Any) -> bool:
+    """入れ子コンテナを含まない、空でない dict / list / tuple かどうか。"""
+    if isinstance(value, dict):
+        values = value.values()
+    elif isinstance(value, (list, tuple)):
+        values = value
+    else:
+        return False
+    if not value:
+        return False
+    for v in values:
+        if isinstance(v, _CONTAINER_TYPES):
+            return False
+    return True
+
+
+def _is_array_like(obj: Any) -> bool:
+    """配列としてストリーミングすべき値かどうか。"""
+    if isinstance(obj, (list, tuple)):
+        return True
+    if isinstance(obj, (str, bytes, dict)):
+        return False
+    # LipSyncColumns などの列指向データ
+    if hasattr(obj, "iter_records"):
+        return True
+    # ジェネレータ / イテレータ
+    return hasattr(obj, "__next__")
+
+
+class JsonStreamWriter:
+    """
+    dict を辿りながら JSON を逐次書き出すライタ。
+
+    Args:
+        fp (TextIO): 書き込み先 (テキストモード)
+        indent (int or None): インデント幅。None なら1行 (標準 json の既定区切り)
+        compact (bool): True なら indent を無視し、区切りも最小 (",", ":") にする
+        backend (str): "auto" (orjson があれば使用) / "orjson" / "json"
+        ensure_ascii (bool): True なら非ASCII文字をエスケープ (orjson は非対応のため json を使用)
+        buffer_records (int): この件数ごとにまとめて fp.write() する
+    """
+
+    def __init__(
+        self,
+        fp: TextIO,
+        indent: Optional[int] = 2,
+        compact: bool = False,
+        backend: str = "auto",
+        ensure_ascii: bool = False,
+        buffer_records: int = 1024
+    ):
+        self.fp = fp
+        self.indent = None if compact else indent
+        self.compact = compact
+        self.buffer_records = max(1, buffer_records)
+        self._buf = []
+
+        if compact:
+            self._item_sep, self._key_sep = ",", ":"
+        elif self.indent is None:
+            self._item_sep, self._key_sep = ", ", ": "
+        else:
+            self._item_sep, self._key_sep = ",", ": "
+
+        self._use_orjson = self._select_orjson(backend, ensure_ascii)
+        self._orjson_opts = 0
+        if self._use_orjson:
+            self._orjson_opts = orjson.OPT_SERIALIZE_NUMPY
+            if self.indent is not None:
+                self._orjson_opts |= orjson.OPT_INDENT_2
+
+        self._ensure_ascii = ensure_ascii
+        self._encoder = json.JSONEncoder(
+            ensure_ascii=ensure_ascii,
+            indent=self.indent,
+            separators=(self._item_sep, self._key_sep),
+            default=_json_default
+        )
+        # 深さごとの「フラットなレコード用」C実装エンコーダ (indent 指定時のみ使用)
+        self._flat_encoders: Dict[int, json.JSONEncoder] = {}
+
+    def _select_orjson(self, backend: str, ensure_ascii: bool) -> bool:
+        backend = backend.lower()
+        if backend == "json":
+            return False
+        if backend not in ("auto", "orjson"):
+            raise ValueError(f"[JsonStreamWriter] 未知のbackend: {backend}")
+        if orjson is None:
+            if backend == "orjson":
+                raise ImportError("[JsonStreamWriter] orjson がインストールされていません。")
+            return False
+        # orjson はエスケープ出力と 2 以外のインデントに非対応
+        if ensure_ascii:
+            return False
+        return self.compact or self.indent == 2
+
+    # ----------------------------------------------------------------
+    # 公開API
+    # ----------------------------------------------------------------
+    def dump(self, obj: Any):
+        """obj 全体を書き出してバッファをフラッシュする。"""
+        self._write(obj, 0)
+        self.flush()
+
+    def flush(self):
+        if self._buf:
+            self.fp.write("".join(self._buf))
+            self._buf.clear()
+
+    # ----------------------------------------------------------------
+    # 内部処理
+    # ----------------------------------------------------------------
+    def _emit(self, text: str):
+        self._buf.append(text)
+        if len(self._buf) >= self.buffer_records:
+            self.flush()
+
+    def _newline(self, level: int) -> str:
+        if self.indent is None:
+            return ""
+        return "\n" + " " * (self.indent * level)
+
+    def _flat_encoder(self, level: int) -> json.JSONEncoder:
+        """
+        区切り文字に「改行 + 1段深いインデント」を含めた indent=None のエンコーダ。
+        indent=None なので C 実装が使われ、フラットなレコードなら indent 付きと同じ出力を得られる。
+        """
+        enc = self._flat_encoders.get(level)
+        if enc is None:
+            enc = json.JSONEncoder(
+                ensure_ascii=self._ensure_ascii,
+                separators=("," + self._newline(level + 1), self._key_sep),
+                default=_json_default
+            )
+            self._flat_encoders[level] = enc
+        return enc
+
+    def _encode_leaf(self, value: Any, level: int) -> str:
+        """レコード1件 (または末端の値) をエンコードし、現在の深さに合わせてインデントする。"""
+        if self._use_orjson:
+            text = orjson.dumps(value, default=_json_default, option=self._orjson_opts).decode("utf-8")
+        elif self.indent is not None and _is_flat_record(value):
+            text = self._flat_encoder(level).encode(value)
+            return text[0] + self._newline(level + 1) + text[1:-1] + self._newline(level) + text[-1]
+        else:
+            text = self._encoder.encode(value)
+        if self.indent is not None and level > 0 and "\n" in text:
+            text = text.replace("\n", self._newline(level))
+        return text
+
+    def _write(self, obj: Any, level: int):
+        if isinstance(obj, dict):
+            self._write_object(obj, level)
+        elif _is_array_like(obj):
+            self._write_array(obj, level)
+        else:
+            self._emit(self._encode_leaf(obj, level))
+
+    def _write_object(self, obj: dict, level: int):
+        if not obj:
+            self._emit("{}")
+            return
+        self._emit("{")
+        first = True
+        for key, value in obj.items():
+            if not isinstance(key, str):
+                # json.dump と同じく、数値/真偽値/None のキーは JSON 表記の文字列にする
+                key = json.dumps(key) if isinstance(key, (bool, int, float)) or key is None \
+                    else str(key)
+            prefix = "" if first else self._item_sep
+            self._emit(prefix + self._newline(level + 1) + self._encoder.encode(key) + self._key_sep)
+            self._write(value, level + 1)
+            first = False
+        self._emit(self._newline(level) + "}")
+
+    def _write_array(self, items: Iterable, level: int):
+        if hasattr(items, "iter_records"):
+            items = items.iter_records()
+
+        first = True
+        for item in items:
+            if first:
+                self._emit("[")
+            prefix = "" if first else self._item_sep
+            self._emit(prefix + self._newline(level + 1) + self._encode_leaf(item, level + 1))
+            first = False
+
+        if first:
+            self._emit("[]")
+        else:
+            self._emit(self._newline(level) + "]")
+
+
+def dump_json_stream(
+    obj: Any,
+    fp: TextIO,
+    indent: Optional[int] = 2,
+    compact: bool = False,
+    backend: str = "auto",
+    ensure_ascii: bool = False
+):
+    """
+    JsonStreamWriter の簡易ラッパ。json.dump と同じ感覚で使える。
+
+    Args:
+        obj: 書き出すデータ。配列部分はジェネレータや LipSyncColumns でも良い。
+        fp (TextIO): 書き込み先
+        indent (int or None): インデント幅 (compact=True なら無視)
+        compact (bool): 最小表現で書き出す
+        backend (str): "auto" / "orjson" / "json"
+        ensure_ascii (bool): 非ASCII文字をエスケープするか
+    """
+    JsonStreamWriter(
+        fp, indent=indent, compact=compact, backend=backend, ensure_ascii=ensure_ascii
+    ).dump(obj)
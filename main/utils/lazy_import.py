@@ -0,0 +1,107 @@
+# main/utils/lazy_import.py
+# -*- coding: utf-8 -*-
+
+"""
+lazy_import.py
+
+重い依存ライブラリ (whisper / torch, sklearn, moviepy, celery など) を
+「最初に実際に使われた時点」まで import しないためのヘルパー。
+
+- lazy_module("whisper") はモジュールの代わりになるプロキシを返す。
+  属性に初めてアクセスした時点で importlib.import_module を行い、以降は本物のモジュールに委譲する。
+- モジュールが存在しない場合も lazy_module 自体は失敗せず、使った時点で ImportError になる。
+  インストール済みかどうかだけ知りたい場合は is_available() を使う (import はしない)。
+- import にかかった時間は import_timings() で確認できる (起動時間の計測用)。
+
+依存:
+- 標準ライブラリのみ
+
+使い方:
+    from main.utils.lazy_import import lazy_module
+
+    whisper = lazy_module("whisper")   # ここではまだ import されない
+
+    def load():
+        return whisper.load_model("medium")   # ここで初めて import
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+from types import ModuleType
+from typing import Dict
+
+_timings: Dict[str, float] = {}
+_timings_lock = threading.Lock()
+
+
+class LazyModule(ModuleType):
+    """
+    属性アクセス時に本物のモジュールを import するプロキシ。
+
+    Args:
+        name (str): モジュール名 ("sklearn.cluster" など)
+        hint (str): import に失敗したときにエラーメッセージへ付ける補足 (pip install ... など)
+    """
+
+    def __init__(self, name: str, hint: str = ""):
+        super().__init__(name)
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_hint"] = hint
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+        with self.__dict__["_lazy_lock"]:
+            module = self.__dict__["_lazy_module"]
+            if module is None:
+                name = self.__dict__["_lazy_name"]
+                t0 = time.perf_counter()
+                try:
+                    module = importlib.import_module(name)
+                except ImportError as e:
+                    hint = self.__dict__["_lazy_hint"]
+                    raise ImportError(f"[lazy_import] {name} を import できません: {e}"
+                                      + (f" ({hint})" if hint else "")) from e
+                with _timings_lock:
+                    _timings[name] = time.perf_counter() - t0
+                self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({state})>"
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+
+def lazy_module(name: str, hint: str = "") -> LazyModule:
+    """name のモジュールを遅延 import するプロキシを返す。"""
+    return LazyModule(name, hint)
+
+
+def is_available(name: str) -> bool:
+    """モジュールがインストールされているかを import せずに調べる。"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # 親パッケージが無い場合など
+        return False
+
+
+def import_timings() -> Dict[str, float]:
+    """lazy_module 経由で import したモジュールと所要時間(秒)。"""
+    with _timings_lock:
+        return dict(_timings)
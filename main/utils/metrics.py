@@ -0,0 +1,278 @@
+# main/utils/metrics.py
+# -*- coding: utf-8 -*-
+
+"""
+metrics.py
+
+リップシンク生成パイプラインの計測 (インストルメンテーション) 用モジュール。
+
+- Metrics: 1回の解析ぶんの計測結果
+    - ステージごとの所要時間 (with metrics.stage("rms"): ...)
+    - カウンタ (segments / frames / cache_hits など)
+    - メモリ: ステージ終了時の RSS と、tracemalloc 有効時はステージ内の Python ヒープのピーク
+- シンク (任意): 計測結果を1件1行で追記する
+    - JsonLinesSink: JSON Lines
+    - LineProtocolSink: InfluxDB line protocol (measurement,tag=... field=... timestamp)
+  本番ログでステージ別の回帰を追えるよう、ステージ名をタグにして出力する。
+- lip_sync_config.json の "metrics" セクションで有効化する (既定は無効):
+    "metrics": {"enabled": true, "sink": "jsonl" | "line", "path": "./logs/metrics.jsonl"}
+  path に "-" を指定すると標準エラー出力へ書き出す。
+- listener (任意): ステージ開始時に listener(name) を呼ぶ。UI の進捗表示や中断に使う
+  (listener が例外を送出すると、そのステージに入る前に処理が打ち切られる)。
+
+依存:
+- 標準ライブラリのみ (RSS は Linux の /proc、無ければ resource.getrusage の最大値)
+
+使い方:
+    from main.utils.metrics import Metrics, sink_from_config
+
+    metrics = Metrics(tags={"audio": "a.wav"})
+    with metrics.stage("rms"):
+        ...
+    metrics.incr("frames", len(frames))
+    print(metrics.report())
+    sink = sink_from_config(config)
+    if sink:
+        sink.write(metrics)
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """現在の常駐メモリ (RSS)。取得できなければ最大 RSS、それも無理なら 0。"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS はバイト、Linux は KB
+        return peak if sys.platform == "darwin" else peak * 1024
+    return 0
+
+
+class Metrics:
+    """
+    1回の解析の計測結果。
+
+    Args:
+        tags (dict): 出力時に付けるタグ (音声ファイル名など)
+        sample_memory (bool): ステージ終了時に RSS を記録するか
+        listener (callable): ステージ開始時に listener(name) を呼ぶ (進捗通知・中断用)
+    """
+
+    def __init__(self, tags: Dict[str, str] = None, sample_memory: bool = True,
+                 listener: Optional[Callable[[str], None]] = None):
+        self.tags = dict(tags or {})
+        self.sample_memory = sample_memory
+        self.listener = listener
+        self.stages: Dict[str, dict] = {}   # name -> {"seconds", "calls", "rss_bytes", "py_peak_bytes"}
+        self.counters: Dict[str, int] = {}
+        self.peak_rss_bytes = 0
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------------
+    # 記録
+    # ----------------------------------------------------------------
+    @contextmanager
+    def stage(self, name: str):
+        """with 文の間の所要時間をステージ name に加算する。"""
+        if self.listener is not None:
+            self.listener(name)
+        # ステージ単位のピークには reset_peak (Python 3.9+) が要る。無い環境では py_peak を記録しない
+        tracing = tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak")
+        if tracing:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - t0
+            py_peak = tracemalloc.get_traced_memory()[1] if tracing else None
+            self.add_time(name, elapsed, py_peak_bytes=py_peak)
+
+    def add_time(self, name: str, seconds: float, py_peak_bytes: Optional[int] = None):
+        """外部で計測した時間をステージ name に加算する (StageGraph の計測結果など)。"""
+        rss = current_rss_bytes() if self.sample_memory else None
+        with self._lock:
+            entry = self.stages.setdefault(
+                name, {"seconds": 0.0, "calls": 0, "rss_bytes": None, "py_peak_bytes": None}
+            )
+            entry["seconds"] += seconds
+            entry["calls"] += 1
+            if rss is not None:
+                entry["rss_bytes"] = rss
+                self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+            if py_peak_bytes is not None:
+                entry["py_peak_bytes"] = max(entry["py_peak_bytes"] or 0, py_peak_bytes)
+
+    def incr(self, name: str, n: int = 1):
+        """カウンタ name を n 増やす。"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other: "Metrics"):
+        """other の計測結果を加算する (バッチ全体の集計など)。"""
+        with self._lock:
+            for name, st in other.stages.items():
+                entry = self.stages.setdefault(
+                    name, {"seconds": 0.0, "calls": 0, "rss_bytes": None, "py_peak_bytes": None}
+                )
+                entry["seconds"] += st["seconds"]
+                entry["calls"] += st["calls"]
+                for key in ("rss_bytes", "py_peak_bytes"):
+                    if st[key] is not None:
+                        entry[key] = max(entry[key] or 0, st[key])
+            for name, n in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            self.peak_rss_bytes = max(self.peak_rss_bytes, other.peak_rss_bytes)
+
+    # ----------------------------------------------------------------
+    # 出力
+    # ----------------------------------------------------------------
+    @property
+    def total_seconds(self) -> float:
+        return sum(st["seconds"] for st in self.stages.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": self.created_at,
+            "tags": dict(self.tags),
+            "stages": {name: dict(st) for name, st in self.stages.items()},
+            "counters": dict(self.counters),
+            "total_seconds": self.total_seconds,
+            "peak_rss_bytes": self.peak_rss_bytes
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Metrics":
+        """to_dict() の逆 (別プロセスから受け取った計測結果の復元用)。"""
+        m = cls(tags=data.get("tags"), sample_memory=False)
+        m.created_at = data.get("timestamp", m.created_at)
+        m.stages = {name: dict(st) for name, st in data.get("stages", {}).items()}
+        m.counters = dict(data.get("counters", {}))
+        m.peak_rss_bytes = data.get("peak_rss_bytes", 0)
+        return m
+
+    def to_line_protocol(self, measurement: str = "lipsync") -> str:
+        """
+        InfluxDB line protocol の複数行を返す。
+        ステージごとに1行 (measurement_stage,stage=...)、カウンタ等をまとめて1行。
+        """
+        ts = int(self.created_at * 1e9)
+        base_tags = "".join(f",{_lp_escape(k)}={_lp_escape(v)}" for k, v in sorted(self.tags.items()))
+        lines = []
+        for name, st in self.stages.items():
+            fields = [f"seconds={st['seconds']:.9f}", f"calls={st['calls']}i"]
+            if st["rss_bytes"] is not None:
+                fields.append(f"rss_bytes={st['rss_bytes']}i")
+            if st["py_peak_bytes"] is not None:
+                fields.append(f"py_peak_bytes={st['py_peak_bytes']}i")
+            lines.append(f"{measurement}_stage{base_tags},stage={_lp_escape(name)} {','.join(fields)} {ts}")
+        fields = [f"total_seconds={self.total_seconds:.9f}", f"peak_rss_bytes={self.peak_rss_bytes}i"]
+        fields += [f"{_lp_escape(k)}={v}i" for k, v in sorted(self.counters.items())]
+        lines.append(f"{measurement}{base_tags} {','.join(fields)} {ts}")
+        return "\n".join(lines)
+
+    def report(self) -> str:
+        """人が読むための表形式のレポート。"""
+        total = self.total_seconds or 1e-12
+        rows = ["  stage            seconds     %    calls   rss(MB)  py_peak(MB)"]
+        for name, st in self.stages.items():
+            rss = f"{st['rss_bytes'] / 1e6:8.1f}" if st["rss_bytes"] is not None else "       -"
+            py = f"{st['py_peak_bytes'] / 1e6:11.1f}" if st["py_peak_bytes"] is not None else "          -"
+            rows.append(f"  {name:<14} {st['seconds']:9.4f} {100 * st['seconds'] / total:5.1f} "
+                        f"{st['calls']:8d} {rss} {py}")
+        rows.append(f"  {'total':<14} {self.total_seconds:9.4f}")
+        if self.counters:
+            rows.append("  counters: " + ", ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+        rows.append(f"  peak rss: {self.peak_rss_bytes / 1e6:.1f} MB")
+        return "\n".join(rows)
+
+
+def _lp_escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace(" ", "\\ ").replace(",", "\\,").replace("=", "\\=")
+
+
+# ----------------------------------------------------------------
+# シンク
+# ----------------------------------------------------------------
+class _FileSink(ABC):
+    """1件ごとに追記する出力先。path="-" なら標準エラー出力。スレッドセーフ。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != "-":
+            out_dir = os.path.dirname(path)
+            if out_dir:
+                os.makedirs(out_dir, exist_ok=True)
+
+    def _append(self, text: str):
+        with self._lock:
+            if self.path == "-":
+                sys.stderr.write(text + "\n")
+                sys.stderr.flush()
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+    @abstractmethod
+    def write(self, metrics: Metrics):
+        """metrics を1件追記する。"""
+
+
+class JsonLinesSink(_FileSink):
+    """Metrics.to_dict() を JSON Lines で追記する。"""
+
+    def write(self, metrics: Metrics):
+        self._append(json.dumps(metrics.to_dict(), ensure_ascii=False))
+
+
+class LineProtocolSink(_FileSink):
+    """Metrics.to_line_protocol() を追記する。"""
+
+    def __init__(self, path: str, measurement: str = "lipsync"):
+        super().__init__(path)
+        self.measurement = measurement
+
+    def write(self, metrics: Metrics):
+        self._append(metrics.to_line_protocol(self.measurement))
+
+
+def make_sink(kind: str, path: str):
+    """kind ("jsonl" / "line") と path からシンクを作る。"""
+    if kind in ("jsonl", "json"):
+        return JsonLinesSink(path)
+    if kind in ("line", "line_protocol", "influx"):
+        return LineProtocolSink(path)
+    raise ValueError(f"[metrics] 未知のシンク種別: {kind}")
+
+
+def sink_from_config(config) -> Optional[_FileSink]:
+    """lip_sync_config.json の "metrics" セクションからシンクを作る。無効なら None。"""
+    conf = (config or {}).get("metrics", {}) or {}
+    if not conf.get("enabled", False):
+        return None
+    kind = conf.get("sink", "jsonl")
+    default_path = "./logs/metrics.jsonl" if kind in ("jsonl", "json") else "./logs/metrics.lp"
+    return make_sink(kind, conf.get("path", default_path))
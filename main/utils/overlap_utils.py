@@ -17,7 +17,7 @@ overlap_utils.py
   - メインの lip_sync_generator や hatsuon.py から呼び出される想定
 """
 
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List
 
 def apply_overlap_easing(lip_sync_frames: List[Dict], overlap_ratio: float = 0.2) -> List[Dict]:
     """
@@ -38,13 +38,34 @@ def apply_overlap_easing(lip_sync_frames: List[Dict], overlap_ratio: float = 0.2
     if not lip_sync_frames or overlap_ratio <= 0.0:
         return lip_sync_frames
 
-    # コピーして編集
-    adjusted = []
-    adjusted.append(dict(lip_sync_frames[0]))  # 最初の音素はそのまま
+    return list(iter_overlap_easing(lip_sync_frames, overlap_ratio))
 
-    for i in range(1, len(lip_sync_frames)):
-        prev_frame = adjusted[-1]
-        current_frame = dict(lip_sync_frames[i])
+
+def iter_overlap_easing(lip_sync_frames: Iterable[Dict], overlap_ratio: float = 0.2) -> Iterator[Dict]:
+    """
+    apply_overlap_easing の逐次版。フレームを1件ずつ受け取り、確定したフレームから順に返す。
+
+    音素 i の end は音素 i+1 を処理した時点で縮められるため、
+    i+1 を受け取った時点で i が確定する (保持するのは直前の1件だけ)。
+    ストリーミング解析で、全フレームをリストに溜めずにオーバーラップ処理をかけるために使う。
+
+    Args:
+        lip_sync_frames (Iterable[Dict]): apply_overlap_easing と同じ形式のフレーム列 (ジェネレータ可)
+        overlap_ratio (float): 0.0~1.0
+
+    Yields:
+        Dict: overlap 適用後のフレーム (入力 dict のコピー)
+    """
+    prev_frame = None
+
+    for frame in lip_sync_frames:
+        current_frame = dict(frame)
+        if prev_frame is None or overlap_ratio <= 0.0:
+            # 最初の音素はそのまま
+            if prev_frame is not None:
+                yield prev_frame
+            prev_frame = current_frame
+            continue
 
         base_duration = current_frame["end"] - current_frame["start"]
         overlap_time = base_duration * overlap_ratio
@@ -72,17 +93,16 @@ def apply_overlap_easing(lip_sync_frames: List[Dict], overlap_ratio: float = 0.2
 
             prev_frame["end"] -= shift_amt
             new_start += shift_amt
-        else:
-            # new_start >= prev_end なら、そもそも重ならないので何もしない
-            pass
 
         current_frame["start"] = new_start
         current_frame["end"] = new_start + base_duration
 
-        adjusted[-1] = prev_frame  # 更新
-        adjusted.append(current_frame)
+        # 前の音素はこれ以上変わらない
+        yield prev_frame
+        prev_frame = current_frame
 
-    return adjusted
+    if prev_frame is not None:
+        yield prev_frame
 
 # ------------------------------------------------------
 #  以下、テスト用の簡易デモ or サンプル
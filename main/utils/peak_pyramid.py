@@ -0,0 +1,323 @@
+# main/utils/peak_pyramid.py
+# -*- coding: utf-8 -*-
+
+"""
+peak_pyramid.py
+
+波形表示用のピークピラミッド (多段解像度の min / max / RMS)。
+
+- レベル 0: base_block サンプル (既定 64) ごとの min / max / RMS。
+  レベル k: base_block * 2^k サンプルごと (レベル k-1 の隣り合う2つをまとめたもの)。
+  要素数が1になるまでレベルを重ねるので、全体の大きさはレベル 0 の約2倍。
+- 値は -1.0〜1.0 を int16 に量子化して (count, 3) = [min, max, rms] で持つ
+  (2時間 / 16kHz の音声で約 22MB)。
+- 構築はブロック単位 (PeakPyramidBuilder.feed) で行えるので、長い音声も全体を読み込まずに作れる。
+- 表示側は columns(start, n, samples_per_pixel) で「1ピクセル = samples_per_pixel サンプル」の
+  min / max / RMS を得る。ズームに合ったレベル (ブロック長 <= samples_per_pixel の最大のもの) を選び、
+  そこから reduceat でピクセルごとにまとめるので、ズームによらずピクセル数に比例した計算量になる。
+  samples_per_pixel が base_block より小さい (十分に拡大している) 場合は元の波形から計算すること。
+- .peaks ファイル: 音声の隣 (foo.wav → foo.wav.peaks) に保存し、np.memmap で開く。
+  音声ファイルのサイズと更新日時を記録し、一致しなければ作り直す。
+  音声のフォルダに書けない場合は cache_dir/peaks/ に保存する。
+  形式: b"LSPK" + <HHIIQQd (バージョン, レベル数, base_block, サンプリングレート, サンプル数,
+        音声のサイズ, 音声の更新日時) + レベルごとの <QQ (要素数, オフセット) + 64バイト境界の int16 配列
+
+依存:
+- numpy
+
+使い方:
+    from main.utils.peak_pyramid import PeakPyramid, load_or_build_peaks
+
+    peaks = load_or_build_peaks("voice.wav", cache_dir="./cache")
+    mins, maxs, rms = peaks.columns(start_sample=0, n_columns=800, samples_per_pixel=512)
+
+    peaks = PeakPyramid.from_array(audio, sample_rate=16000)   # 配列から (保存しない)
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from main.utils.audio_decode import open_audio_blocks
+
+MAGIC = b"LSPK"
+VERSION = 1
+HEADER_FORMAT = "<HHIIQQd"
+LEVEL_FORMAT = "<QQ"
+DEFAULT_BASE_BLOCK = 64
+PEAKS_EXT = ".peaks"
+
+_SCALE = 32767.0
+_ALIGN = 64
+
+
+class PeakPyramid:
+    """
+    多段解像度の min / max / RMS。
+
+    Args:
+        levels (list): レベルごとの int16 配列 (count, 3) = [min, max, rms]
+        sample_rate (int): サンプリングレート
+        n_samples (int): 元の音声のサンプル数
+        base_block (int): レベル 0 の1要素あたりのサンプル数
+    """
+
+    def __init__(self, levels: List[np.ndarray], sample_rate: int, n_samples: int,
+                 base_block: int = DEFAULT_BASE_BLOCK):
+        self.levels = levels
+        self.sample_rate = int(sample_rate)
+        self.n_samples = int(n_samples)
+        self.base_block = int(base_block)
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / float(self.sample_rate) if self.sample_rate else 0.0
+
+    def block_size(self, level: int) -> int:
+        return self.base_block << level
+
+    def level_for(self, samples_per_pixel: float) -> int:
+        """samples_per_pixel に合うレベル (ブロック長 <= samples_per_pixel の最大)。拡大しすぎなら -1。"""
+        if samples_per_pixel < self.base_block or not self.levels:
+            return -1
+        level = int(np.floor(np.log2(samples_per_pixel / self.base_block)))
+        return min(level, len(self.levels) - 1)
+
+    def columns(self, start_sample: int, n_columns: int, samples_per_pixel: int
+                ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        start_sample から1列 samples_per_pixel サンプルずつ n_columns 列ぶんの min / max / RMS (float32)。
+        音声の末尾を超える列は含めない。samples_per_pixel < base_block なら None。
+        """
+        level = self.level_for(samples_per_pixel)
+        if level < 0:
+            return None
+        data = self.levels[level]
+        block = self.block_size(level)
+        start_sample = max(0, int(start_sample))
+        samples_per_pixel = int(samples_per_pixel)
+        # 先頭サンプルが音声の末尾以降になる列は作らない
+        n_columns = min(max(0, int(n_columns)), max(0, -(-(self.n_samples - start_sample) // samples_per_pixel)))
+        edges = (start_sample + np.arange(n_columns, dtype=np.int64) * samples_per_pixel) // block
+        edges = edges[edges < len(data)]
+        empty = np.empty(0, dtype=np.float32)
+        if len(edges) == 0:
+            return empty, empty, empty
+
+        stop = min(len(data), int((start_sample + len(edges) * samples_per_pixel + block - 1) // block))
+        window = np.asarray(data[edges[0]:stop], dtype=np.float32) / _SCALE
+        idx = edges - edges[0]
+        mins = np.minimum.reduceat(window[:, 0], idx)
+        maxs = np.maximum.reduceat(window[:, 1], idx)
+        sq = np.add.reduceat(window[:, 2] ** 2, idx)
+        counts = np.diff(np.append(idx, len(window)))
+        rms = np.sqrt(sq / counts).astype(np.float32)
+        return mins, maxs, rms
+
+    # ----------------------------------------------------------------
+    # 構築
+    # ----------------------------------------------------------------
+    @classmethod
+    def from_array(cls, audio: np.ndarray, sample_rate: int, base_block: int = DEFAULT_BASE_BLOCK) -> "PeakPyramid":
+        builder = PeakPyramidBuilder(sample_rate, base_block)
+        builder.feed(audio)
+        return builder.finish()
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[np.ndarray], sample_rate: int,
+                    base_block: int = DEFAULT_BASE_BLOCK) -> "PeakPyramid":
+        builder = PeakPyramidBuilder(sample_rate, base_block)
+        for block in blocks:
+            builder.feed(block)
+        return builder.finish()
+
+    # ----------------------------------------------------------------
+    # ファイル
+    # ----------------------------------------------------------------
+    def save(self, path: str, source_size: int = 0, source_mtime: float = 0.0):
+        """.peaks ファイルに書き出す (一時ファイル → os.replace)。"""
+        table_start = len(MAGIC) + struct.calcsize(HEADER_FORMAT)
+        offset = _align(table_start + struct.calcsize(LEVEL_FORMAT) * len(self.levels))
+        table = []
+        for arr in self.levels:
+            table.append((len(arr), offset))
+            offset = _align(offset + arr.nbytes)
+
+        out_dir = os.path.dirname(path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".tmp_", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack(HEADER_FORMAT, VERSION, len(self.levels), self.base_block,
+                                    self.sample_rate, self.n_samples, int(source_size), float(source_mtime)))
+                for count, off in table:
+                    f.write(struct.pack(LEVEL_FORMAT, count, off))
+                for (_, off), arr in zip(table, self.levels):
+                    f.write(b"\0" * (off - f.tell()))
+                    f.write(np.ascontiguousarray(arr, dtype="<i2").tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["PeakPyramid", int, float]:
+        """
+        .peaks ファイルを開く (各レベルは読み取り専用の memmap)。
+
+        Returns:
+            (pyramid, source_size, source_mtime)
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"[peak_pyramid] .peaks 形式ではありません: {path}")
+            version, n_levels, base_block, sample_rate, n_samples, source_size, source_mtime = struct.unpack(
+                HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT))
+            )
+            if version != VERSION:
+                raise ValueError(f"[peak_pyramid] 未対応の .peaks バージョン: {version}")
+            table = [struct.unpack(LEVEL_FORMAT, f.read(struct.calcsize(LEVEL_FORMAT))) for _ in range(n_levels)]
+
+        levels = [
+            np.memmap(path, dtype="<i2", mode="r", offset=off, shape=(count, 3)) if count
+            else np.empty((0, 3), dtype="<i2")
+            for count, off in table
+        ]
+        return cls(levels, sample_rate, n_samples, base_block), source_size, source_mtime
+
+
+class PeakPyramidBuilder:
+    """
+    ブロック単位で音声を受け取り、PeakPyramid を作る。
+
+    Args:
+        sample_rate (int): サンプリングレート
+        base_block (int): レベル 0 の1要素あたりのサンプル数
+    """
+
+    def __init__(self, sample_rate: int, base_block: int = DEFAULT_BASE_BLOCK):
+        self.sample_rate = int(sample_rate)
+        self.base_block = int(base_block)
+        self.n_samples = 0
+        self._pending = np.empty(0, dtype=np.float32)
+        self._mins: List[np.ndarray] = []
+        self._maxs: List[np.ndarray] = []
+        self._ms: List[np.ndarray] = []
+
+    def feed(self, block: np.ndarray):
+        """モノラルの波形ブロックを追加する (長さは任意)。"""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        self.n_samples += len(block)
+        data = np.concatenate([self._pending, block]) if len(self._pending) else block
+        full = len(data) // self.base_block * self.base_block
+        if full:
+            self._add(data[:full].reshape(-1, self.base_block))
+        self._pending = data[full:].copy()
+
+    def _add(self, frames: np.ndarray):
+        self._mins.append(frames.min(axis=1))
+        self._maxs.append(frames.max(axis=1))
+        f64 = frames.astype(np.float64)
+        self._ms.append(np.einsum("ij,ij->i", f64, f64) / frames.shape[1])
+
+    def finish(self) -> PeakPyramid:
+        if len(self._pending):
+            self._add(self._pending.reshape(1, -1))
+            self._pending = np.empty(0, dtype=np.float32)
+
+        if not self._mins:
+            return PeakPyramid([], self.sample_rate, 0, self.base_block)
+
+        mins = np.concatenate(self._mins)
+        maxs = np.concatenate(self._maxs)
+        ms = np.concatenate(self._ms)
+        self._mins, self._maxs, self._ms = [], [], []
+
+        # 各要素のサンプル数 (最後の要素だけ端数になりうる)
+        block = self.base_block
+        counts = np.minimum(block, self.n_samples - np.arange(len(mins), dtype=np.int64) * block).astype(np.float64)
+
+        levels = [_quantize(mins, maxs, ms)]
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+                ms = np.append(ms, 0.0)
+                counts = np.append(counts, 0.0)
+            c0, c1 = counts[0::2], counts[1::2]
+            merged = c0 + c1
+            ms = (ms[0::2] * c0 + ms[1::2] * c1) / merged
+            mins = np.minimum(mins[0::2], mins[1::2])
+            maxs = np.maximum(maxs[0::2], maxs[1::2])
+            counts = merged
+            levels.append(_quantize(mins, maxs, ms))
+        return PeakPyramid(levels, self.sample_rate, self.n_samples, self.base_block)
+
+
+def _quantize(mins: np.ndarray, maxs: np.ndarray, ms: np.ndarray) -> np.ndarray:
+    out = np.empty((len(mins), 3), dtype="<i2")
+    for col, values in enumerate((mins, maxs, np.sqrt(ms))):
+        out[:, col] = np.round(np.clip(values, -1.0, 1.0) * _SCALE)
+    return out
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+# ----------------------------------------------------------------
+# .peaks ファイルの場所と読み込み
+# ----------------------------------------------------------------
+def peaks_path_for(audio_path: str, cache_dir: Optional[str] = None) -> str:
+    """音声の隣の .peaks パス (cache_dir 指定時はキャッシュ内のパス)。"""
+    if cache_dir is None:
+        return audio_path + PEAKS_EXT
+    digest = hashlib.blake2b(os.path.abspath(audio_path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, "peaks", digest + PEAKS_EXT)
+
+
+def _load_if_fresh(path: str, size: int, mtime: float) -> Optional[PeakPyramid]:
+    if not os.path.exists(path):
+        return None
+    try:
+        pyramid, source_size, source_mtime = PeakPyramid.load(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"[peak_pyramid] .peaks の読込に失敗しました。作り直します: {path} ({e})")
+        return None
+    if source_size != size or source_mtime != mtime:
+        return None
+    return pyramid
+
+
+def load_or_build_peaks(audio_path: str, cache_dir: Optional[str] = None,
+                        base_block: int = DEFAULT_BASE_BLOCK) -> PeakPyramid:
+    """
+    音声ファイルのピークピラミッドを返す。保存済みの .peaks が新しければそれを開き、
+    無ければ音声をブロック単位で読んで作り、音声の隣 (書けなければ cache_dir) に保存する。
+    ピークは音声のネイティブのサンプリングレート・モノラルで作る。
+    """
+    st = os.stat(audio_path)
+    candidates = [peaks_path_for(audio_path)]
+    if cache_dir is not None:
+        candidates.append(peaks_path_for(audio_path, cache_dir))
+    for path in candidates:
+        pyramid = _load_if_fresh(path, st.st_size, st.st_mtime)
+        if pyramid is not None:
+            return pyramid
+
+    blocks, sr, _ = open_audio_blocks(audio_path, block_seconds=10.0, mono=True)
+    pyramid = PeakPyramid.from_blocks(blocks, sr, base_block)
+
+    for path in candidates:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            pyramid.save(path, st.st_size, st.st_mtime)
+            return pyramid
+        except OSError as e:
+            print(f"[peak_pyramid] .peaks を保存できませんでした: {path} ({e})")
+    return pyramid
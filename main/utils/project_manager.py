@@ -116,21 +116,10 @@ class ProjectManager:
             if self.timeline_model:
                 events_data = data.get("events", [])
 
-                self.timeline_model.beginResetModel()
-                self.timeline_model._events.clear()
-
-                for evt_dict in events_data:
-                    # PhonemeEvent に event_id を含めて復元する想定:
-                    #   evt_dict = {
-                    #     "event_id": <str>,
-                    #     "phoneme": <str>,
-                    #     "start_time": <float>,
-                    #     "duration": <float>
-                    #   }
-                    evt = self.timeline_model.PhonemeEvent.from_dict(evt_dict)
-                    self.timeline_model._events.append(evt)
-
-                self.timeline_model.endResetModel()
+                # PhonemeEvent.to_dict() 形式:
+                #   {"event_id": <str>, "phoneme": <str>, "start_time": <float>, "duration": <float>}
+                # 1件ずつ PhonemeEvent を作らずにストアの配列へまとめて読み込む
+                self.timeline_model.load_event_dicts(events_data)
 
             # meta 部分 (プロジェクトメタ情報)
             self.project_meta = data.get("meta", {})
@@ -163,13 +152,8 @@ class ProjectManager:
             print("[ProjectManager] Save failed: no timeline_model set.")
             return False
 
-        # events リストを構築
-        events_list = []
-        for evt in self.timeline_model._events:
-            dict_evt = evt.to_dict()  # { "phoneme", "start_time", "duration" ...}
-            # もし event_id があるならここで dict_evt["event_id"] = evt.event_id
-            # (TimelineDataModel.PhonemeEvent で持っている想定)
-            events_list.append(dict_evt)
+        # events リストを構築 (ストアの配列からまとめて { "event_id", "phoneme", "start_time", "duration" } に)
+        events_list = self.timeline_model._events.to_dicts()
 
         data_to_save = {
             "events": events_list,
@@ -0,0 +1,183 @@
+# main/utils/result_cache.py
+# -*- coding: utf-8 -*-
+
+"""
+result_cache.py
+
+generate_lip_sync の結果全体を、入力の内容から作ったキーで保存するキャッシュ (content-addressed)。
+
+- キー: 音声サンプルのダイジェスト (BLAKE2b) + サンプリングレート + 正規化済みテキスト
+        + 結果に影響する設定 (rms_threshold / gap_threshold / overlap_ratio / phoneme_timing_mode /
+        asr_model_size など) + キャッシュ形式のバージョン
+  同じ音声・テキスト・設定なら、ファイル名や更新日時が違ってもヒットする。
+- 保存形式: 列指向の NumPy 配列を .npz (非圧縮) で保存する
+    frames_*   : lip_sync_frames (LipSyncColumns と同じ start / end / avg_rms / 音素コード)
+    segments_* : phoneme_segments
+    rms_*      : rms_timeline (time / value)
+    vocab      : 音素の語彙 (frames / segments 共通)
+  JSON より読み書きが速く、float64 のまま保存するので復元結果は元の結果と完全に一致する。
+- 書き込みは一時ファイル → os.replace で行う (並列実行・中断で壊れたファイルを残さない)。
+- 有効/無効と保存先は lip_sync_config.json の processing_options.enable_cache / cache_directory。
+
+依存:
+- numpy
+
+使い方:
+    from main.utils.result_cache import ResultCache
+
+    cache = ResultCache("./cache")
+    key = cache.make_key(audio, 16000, text, {"rms_threshold": 0.02})
+    data = cache.load(key)
+    if data is None:
+        data = generator.generate_lip_sync(audio, text, 16000)
+        cache.store(key, data)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 保存形式や解析ロジックが変わって既存のキャッシュと互換が無くなったら上げる
+CACHE_FORMAT_VERSION = 1
+
+
+class ResultCache:
+    """
+    リップシンク解析結果のキャッシュ。
+
+    Args:
+        cache_dir (str): 保存先ディレクトリ (lipsync/ 以下にキーの先頭2文字ごとのサブフォルダを作る)
+    """
+
+    def __init__(self, cache_dir: str = "./cache"):
+        self.cache_dir = cache_dir
+        self.root = os.path.join(cache_dir, "lipsync")
+
+    # ----------------------------------------------------------------
+    # キー
+    # ----------------------------------------------------------------
+    @staticmethod
+    def audio_digest(audio_data: np.ndarray) -> str:
+        """音声サンプルの内容のダイジェスト (dtype / 形状も含める)。"""
+        arr = np.ascontiguousarray(audio_data)
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode("ascii"))
+        h.update(memoryview(arr).cast("B"))
+        return h.hexdigest()
+
+    @classmethod
+    def make_key(cls, audio_data: np.ndarray, sample_rate: int, text: str, params: Dict) -> str:
+        """
+        キャッシュキーを作る。
+
+        Args:
+            audio_data: 解析する音声サンプル
+            sample_rate: サンプリングレート
+            text: 正規化済みテキスト
+            params: 結果に影響する設定 (JSON にできる値)
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(json.dumps({
+            "version": CACHE_FORMAT_VERSION,
+            "audio": cls.audio_digest(audio_data),
+            "sample_rate": int(sample_rate),
+            "text": text,
+            "params": params
+        }, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return h.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".npz")
+
+    # ----------------------------------------------------------------
+    # 読み書き
+    # ----------------------------------------------------------------
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        キャッシュを読み込み、lip_sync_data と同じ形の dict を返す。無い・壊れている場合は None。
+        """
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["version"]) != CACHE_FORMAT_VERSION:
+                    return None
+                vocab = z["vocab"].tolist()
+                frames = [
+                    {"start": st, "end": ed, "phoneme": vocab[c], "avg_rms": rms}
+                    for st, ed, c, rms in zip(
+                        z["frames_start"].tolist(), z["frames_end"].tolist(),
+                        z["frames_code"].tolist(), z["frames_rms"].tolist()
+                    )
+                ]
+                segments = [
+                    (vocab[c], st, ed)
+                    for c, st, ed in zip(
+                        z["segments_code"].tolist(), z["segments_start"].tolist(),
+                        z["segments_end"].tolist()
+                    )
+                ]
+                rms_timeline = list(zip(z["rms_time"].tolist(), z["rms_value"].tolist()))
+        except Exception as e:
+            print(f"[ResultCache] キャッシュの読込に失敗しました。無視します: {path} ({e})")
+            return None
+
+        return {
+            "phoneme_segments": segments,
+            "rms_timeline": rms_timeline,
+            "lip_sync_frames": frames
+        }
+
+    def store(self, key: str, lip_sync_data: Dict):
+        """lip_sync_data (phoneme_segments / rms_timeline / lip_sync_frames) を保存する。"""
+        frames = lip_sync_data.get("lip_sync_frames", [])
+        segments = lip_sync_data.get("phoneme_segments", [])
+        rms_timeline = lip_sync_data.get("rms_timeline", [])
+
+        vocab: Dict[str, int] = {}
+        frame_codes = [vocab.setdefault(f["phoneme"], len(vocab)) for f in frames]
+        segment_codes = [vocab.setdefault(s[0], len(vocab)) for s in segments]
+        vocab_list: List[str] = list(vocab.keys())
+
+        arrays = {
+            "version": np.int32(CACHE_FORMAT_VERSION),
+            "vocab": np.array(vocab_list if vocab_list else [""], dtype=str),
+            "frames_start": np.array([f["start"] for f in frames], dtype=np.float64),
+            "frames_end": np.array([f["end"] for f in frames], dtype=np.float64),
+            "frames_rms": np.array([f["avg_rms"] for f in frames], dtype=np.float64),
+            "frames_code": np.array(frame_codes, dtype=np.int32),
+            "segments_start": np.array([s[1] for s in segments], dtype=np.float64),
+            "segments_end": np.array([s[2] for s in segments], dtype=np.float64),
+            "segments_code": np.array(segment_codes, dtype=np.int32),
+            "rms_time": np.array([t for (t, _) in rms_timeline], dtype=np.float64),
+            "rms_value": np.array([v for (_, v) in rms_timeline], dtype=np.float64),
+        }
+
+        path = self.path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            print(f"[ResultCache] キャッシュの保存に失敗: {path} ({e})")
+
+    def clear(self):
+        """保存済みのキャッシュをすべて削除する。"""
+        if not os.path.isdir(self.root):
+            return
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(dirpath, name))
@@ -40,16 +40,13 @@ import os
 import subprocess
 import logging
 
-# moviepy.editor のインポート部分でバージョン差によるエラーが出る場合は、
-# pip install --upgrade moviepy などを試すか、
-# pip install "moviepy==1.0.3" などバージョン固定で回避を試してください。
-from moviepy.editor import VideoFileClip
+from main.utils.config_registry import get_registry, load_config
+from main.utils.lazy_import import lazy_module
 
-try:
-    # 設定ファイルを読み込みたい場合 (任意)
-    import json
-except ImportError:
-    pass
+# moviepy.editor は import 時に ffmpeg の検出まで行って重いため、実際に動画を開く時点まで遅延させる。
+# バージョン差によるエラーが出る場合は pip install --upgrade moviepy などを試すか、
+# pip install "moviepy==1.0.3" などバージョン固定で回避を試してください。
+moviepy_editor = lazy_module("moviepy.editor", hint='pip install "moviepy==1.0.3"')
 
 
 class VideoProcessor:
@@ -98,10 +95,9 @@ class VideoProcessor:
 
         # (オプション) 設定ファイルの読み込みを行う例
         # config_path があれば、audio_codec, audio_sample_rate等を上書きしても良い
-        if config_path and os.path.exists(config_path):
+        if config_path and os.path.exists(get_registry().resolve_path(config_path)):
             try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
+                config_data = load_config(config_path)
                 video_settings = config_data.get("video_settings", {})
                 # 例: config内に "video_settings": { "audio_codec": "pcm_s16le", "sample_rate": 22050 } があれば反映
                 if "audio_codec" in video_settings:
@@ -165,7 +161,7 @@ class VideoProcessor:
             RuntimeError: 抽出処理に失敗した場合
         """
         try:
-            with VideoFileClip(video_file) as clip:
+            with moviepy_editor.VideoFileClip(video_file) as clip:
                 # 音声が存在しない場合
                 if clip.audio is None:
                     raise ValueError("[VideoProcessor] 動画に音声トラックが存在しません。")
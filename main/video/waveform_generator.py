@@ -1,13 +1,9 @@
 import os
 import numpy as np
-import librosa
 import matplotlib.pyplot as plt
 
-# librosa.display は librosa>=0.7 以降で別モジュール化されているため、
-# バージョンによっては import librosa.display でなく以下形式の場合も:
-#   from librosa import display as librosa_display
-# ここでは便宜上 'import librosa.display' とする。
-import librosa.display
+from main.utils.audio_decode import load_audio, peak_normalize
+from main.utils.peak_pyramid import PeakPyramid, load_or_build_peaks
 
 """
 waveform_generator.py
@@ -15,12 +11,13 @@ waveform_generator.py
 音声ファイルを読み込み、波形データの生成や可視化を行うユーティリティクラス。
 
 [主な機能]
-  - 音声データを読み込み (librosa使用)
+  - 音声データを読み込み (main.utils.audio_decode。WAV以外は librosa)
   - 波形データ(配列)生成
-  - 波形を画像としてプロット & 保存
+  - 表示用のピークピラミッド (min / max / RMS の多段解像度) を生成・.peaks ファイルにキャッシュ
+  - 波形を画像としてプロット & 保存 (画像の幅に合ったピラミッドのレベルを使う)
 
 [前提]
-  - pip install librosa matplotlib
+  - pip install scipy matplotlib
   - 16kHz, 44.1kHz 等々、音声ファイルのサンプリングレートを適宜想定
   - もしGPUがあるなら librosa の一部機能をGPU対応ライブラリで置き換えることも検討可
 
@@ -33,6 +30,9 @@ waveform_generator.py
   # 波形データを確認
   print(wave_data)
 
+  # 表示用のピーク (audio.wav.peaks に保存され、次回は mmap で開く)
+  peaks = generator.generate_peaks("path/to/audio.wav")
+
   # 波形画像を保存
   generator.save_waveform_plot("path/to/audio.wav", "output_waveform.png")
 """
@@ -49,9 +49,9 @@ class WaveformGenerator:
         WaveformGenerator クラスの初期化
 
         Args:
-            normalize (bool): 音声データを正規化するかどうか (librosa.util.normalize)
+            normalize (bool): 音声データを正規化するかどうか (最大振幅を 1.0 に揃える)
             sample_rate (int): 音声読み込み時にリサンプリングするサンプリングレート
-            mono (bool): Trueの場合、モノラルに変換して読み込む (librosa.load のモード)
+            mono (bool): Trueの場合、モノラルに変換して読み込む (load_audio のモード)
         """
         self.normalize = normalize
         self.sample_rate = sample_rate
@@ -67,6 +67,7 @@ class WaveformGenerator:
         Returns:
             dict: 時間 (float) -> 振幅 (float) のマッピングを辞書で返す
                   { 0.0: 0.123, 0.001: 0.456, ... } のように時間をキー、振幅を値とする
+                  (1サンプル1要素なので、表示用途には generate_peaks を使うこと)
 
         Raises:
             FileNotFoundError: 音声ファイルが存在しない場合
@@ -76,16 +77,15 @@ class WaveformGenerator:
             raise FileNotFoundError(f"[WaveformGenerator] 音声ファイルが見つかりません: {audio_file}")
 
         try:
-            # librosa で読み込み
-            audio_data, sr = librosa.load(
-                path=audio_file,
+            audio_data, sr = load_audio(
+                audio_file,
                 sr=self.sample_rate,
                 mono=self.mono
             )
 
             # 正規化が指定されている場合
             if self.normalize:
-                audio_data = librosa.util.normalize(audio_data)
+                audio_data = peak_normalize(audio_data)
 
             # 時間軸を計算 (len(audio_data) 個の等間隔)
             # 注意: np.linspace は端点を含むため、サンプル数+1 相当の形になる。
@@ -97,17 +97,34 @@ class WaveformGenerator:
                 endpoint=False
             )
 
-            # 時刻をキー、小数点第3位程度に丸め、振幅を値にした辞書を生成
-            waveform_data = {
-                round(float(t), 3): round(float(a), 3)
-                for t, a in zip(times, audio_data)
-            }
+            # 時刻をキー、小数点第3位程度に丸め、振幅を値にした辞書を生成 (丸めは配列のまま行う)
+            waveform_data = dict(zip(
+                np.round(times, 3).tolist(),
+                np.round(audio_data.astype(np.float64), 3).tolist()
+            ))
 
             return waveform_data
 
         except Exception as e:
             raise ValueError(f"[WaveformGenerator] 波形データ生成中にエラー: {e}")
 
+    def generate_peaks(self, audio_file: str, cache_dir: str = None) -> PeakPyramid:
+        """
+        表示用のピークピラミッドを返す。
+        音声の隣 (書けなければ cache_dir) の .peaks ファイルが新しければ開くだけで、
+        無ければ音声をブロック単位で読んで作る (ネイティブのサンプリングレート・モノラル)。
+
+        Args:
+            audio_file (str): 音声ファイルのパス
+            cache_dir (str, optional): 音声のフォルダに書けない場合の保存先
+
+        Raises:
+            FileNotFoundError: 音声ファイルが存在しない場合
+        """
+        if not os.path.exists(audio_file):
+            raise FileNotFoundError(f"[WaveformGenerator] 音声ファイルが見つかりません: {audio_file}")
+        return load_or_build_peaks(audio_file, cache_dir=cache_dir)
+
     def save_waveform_plot(self, audio_file: str, output_image: str) -> None:
         """
         波形データをプロットして画像ファイルに保存する。
@@ -124,30 +141,36 @@ class WaveformGenerator:
             raise FileNotFoundError(f"[WaveformGenerator] 音声ファイルが見つかりません: {audio_file}")
 
         try:
-            # 音声ファイルを読み込み
-            audio_data, sr = librosa.load(
-                path=audio_file,
-                sr=self.sample_rate,
-                mono=self.mono
-            )
-
-            # 正規化
-            if self.normalize:
-                audio_data = librosa.util.normalize(audio_data)
-
-            # プロット用の Figure
-            plt.figure(figsize=(10, 4))
-
-            # librosa.display で波形を可視化
-            # y=audio_data, sr=sr
-            librosa.display.waveshow(audio_data, sr=sr, x_axis='time', color='steelblue')
+            peaks = self.generate_peaks(audio_file)
+
+            # プロット用の Figure (横幅のピクセル数ぶんの列を描く)
+            width_in, dpi = 10, 150
+            plt.figure(figsize=(width_in, 4))
+            n_columns = width_in * dpi
+            samples_per_pixel = max(1, -(-peaks.n_samples // n_columns))
+            cols = peaks.columns(0, n_columns, samples_per_pixel)
+            if cols is None:
+                # 画像の幅より短い音声はレベル 0 をそのまま使う
+                samples_per_pixel = peaks.base_block
+                cols = peaks.columns(0, -(-peaks.n_samples // samples_per_pixel), samples_per_pixel)
+            mins, maxs, _ = cols
+
+            # 正規化 (表示のみ。ピークの最大絶対値で割る)
+            if self.normalize and len(mins):
+                peak = max(float(np.max(np.abs(mins))), float(np.max(np.abs(maxs))))
+                if peak > 0:
+                    mins, maxs = mins / peak, maxs / peak
+
+            times = np.arange(len(mins)) * (samples_per_pixel / float(peaks.sample_rate))
+            plt.fill_between(times, mins, maxs, color='steelblue', linewidth=0)
+            plt.xlim(0, peaks.duration)
             plt.title("Waveform")
             plt.xlabel("Time [s]")
             plt.ylabel("Amplitude")
             plt.tight_layout()
 
             # 画像を保存
-            plt.savefig(output_image, dpi=150)
+            plt.savefig(output_image, dpi=dpi)
             plt.close()
             print(f"[WaveformGenerator] 波形プロットを保存しました -> {output_image}")
 